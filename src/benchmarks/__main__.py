@@ -0,0 +1,51 @@
+"""
+Runs the benchmark suite, and saves or compares its results.
+Run it with:
+    python -m src.benchmarks --size medium --output results.json
+    python -m src.benchmarks --size medium --compare results.json
+When comparing, the benchmarks whose median grew by more than the threshold are reported as regressions, and the
+command exits with status 1.
+"""
+from typing import List, Optional
+import argparse
+import sys
+from . import bench_api, bench_domain, bench_serialization
+from .data import SIZES
+from .harness import compare, format_comparisons, format_results, load_results, save_results
+
+
+SUITES = {"domain": bench_domain.run, "api": bench_api.run, "serialization": bench_serialization.run}
+REGRESSION_THRESHOLD = 1.25
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m src.benchmarks", description=__doc__.splitlines()[1])
+    parser.add_argument("--suite", choices=sorted(SUITES), action="append",
+                        help="Suite to run, can be repeated (defaults to every suite).")
+    parser.add_argument("--size", choices=list(SIZES), default="small", help="Size of the synthetic dataset.")
+    parser.add_argument("--output", help="JSON file where the results are saved.")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON file of results to compare with.")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Ratio of the medians above which a benchmark is reported as a regression.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    results = []
+    for suite in args.suite or list(SUITES):
+        results += SUITES[suite](**SIZES[args.size])
+    print(format_results(results))
+    if args.output:
+        save_results(args.output, results, args.size)
+    if args.compare:
+        comparisons = compare(load_results(args.compare), results)
+        print()
+        print(format_comparisons(comparisons, args.threshold))
+        if any(comparison.ratio > args.threshold for comparison in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+End-to-end benchmarks of the application against SQLite.
+The dataset is stored in a temporary SQLite database through the repositories the application uses, then the
+planning endpoints are called through `src.main.web.main.app`, with its lifespan, its session per request and its
+caches. The database engine of the application is swapped for the one of the benchmark, and restored afterwards.
+Repository round trips are measured on their own, so that a regression can be told apart from the cost of the
+response assembly: reading the references of the slots, and serialising the plannings.
+"""
+from itertools import count
+from typing import List
+import shutil
+import tempfile
+from fastapi.testclient import TestClient
+from sqlmodel import create_engine
+from src.main.domain.planning import PlanningSlot, PlanningSlotId
+from src.main.domain.room import RoomId
+from src.main.domain.teacher import TeacherId
+import src.main.persistence.database as database
+from src.main.web import state
+from src.main.web.main import app
+from .data import FIRST_DAY, FIRST_HOUR, MAX_SLOTS_PER_DAY, generate_dataset
+from .harness import BenchmarkResult, measure
+
+
+PAGE_SIZE = 100
+# Slots added by the benchmarks take the last hour of the day, left free by the dataset.
+EXTRA_HOURS_START = FIRST_HOUR + MAX_SLOTS_PER_DAY - 1
+
+
+def check(response, expected_status: int = 200):
+    if response.status_code != expected_status:
+        raise RuntimeError(f"{response.request.method} {response.request.url}: {response.status_code} {response.text}")
+    return response
+
+
+def store_dataset(dataset) -> BenchmarkResult:
+    """Stores the reference entities, then measures the bulk insert of the plannings."""
+    with database.session_scope():
+        for repository, entities in [(state.repository_promotions, dataset.promotions),
+                                     (state.repository_teachers, dataset.teachers),
+                                     (state.repository_courses, dataset.courses),
+                                     (state.repository_rooms, dataset.rooms)]:
+            for entity in entities:
+                repository.add(entity)
+        return measure("persistence.add_all", lambda: state.repository_plannings.add_all(dataset.plannings),
+                       repeat=1, plannings=len(dataset.plannings))
+
+
+def extra_slot(planning, slot_id: str) -> PlanningSlot:
+    """Slot of the promotion of the planning at the last hour of the day, with the teacher and room of its number."""
+    promotion = planning.promotion_id.id
+    return planning.slots[0].model_copy(update={
+        "id": PlanningSlotId(id=slot_id), "hours_start": EXTRA_HOURS_START, "hours_end": EXTRA_HOURS_START + 1,
+        "teacher_id": TeacherId(id=promotion), "room_id": RoomId(id=promotion)})
+
+
+def run_repository(dataset) -> List[BenchmarkResult]:
+    repository = state.repository_plannings
+    plannings = dataset.plannings
+    planning = plannings[len(plannings) // 2]
+    sizes = {"plannings": len(plannings)}
+    slot = extra_slot(planning, "persistence-slot")
+
+    def read_and_update():
+        stored = repository.find_by_id(planning.id)
+        stored.slots = list(reversed(stored.slots))
+        repository.update(stored)
+
+    def add_and_delete_slot():
+        repository.add_slot(planning.id, slot)
+        repository.delete_slot(planning.id, slot.id)
+
+    with database.session_scope():
+        return [
+            measure("persistence.find_by_id", lambda: repository.find_by_id(planning.id), number=50, **sizes),
+            measure("persistence.find_page", lambda: repository.find_page(PAGE_SIZE), number=10, **sizes),
+            measure("persistence.read_and_update", read_and_update, number=20, **sizes),
+            measure("persistence.add_and_delete_slot", add_and_delete_slot, number=20, **sizes)
+        ]
+
+
+def run_api(client: TestClient, dataset) -> List[BenchmarkResult]:
+    plannings = dataset.plannings
+    planning = plannings[len(plannings) // 2]
+    sizes = {"plannings": len(plannings)}
+    url = f"/api/v1/plannings/{planning.id.id}"
+    etag = check(client.get(url)).headers["ETag"]
+    week = f"{FIRST_DAY.isocalendar().year}-W{FIRST_DAY.isocalendar().week:02d}"
+    # Each slot is added to another planning, so that the promotions never book the same teacher or room.
+    targets, numbers = iter(plannings), count()
+    repeat, number = 5, max(1, min(10, len(plannings) // 5))
+
+    def add_planning_slot():
+        target = next(targets)
+        slot = extra_slot(target, f"api-slot-{next(numbers)}")
+        data = {"id": slot.id.id, "hours_start": slot.hours_start, "minutes_start": slot.minutes_start,
+                "hours_end": slot.hours_end, "minutes_end": slot.minutes_end, "promotion_id": slot.promotion_id.id,
+                "teacher_id": slot.teacher_id.id, "course_id": slot.course_id.id, "room_id": slot.room_id.id}
+        check(client.post(f"/api/v1/plannings/{target.id.id}/slots", json=data))
+
+    return [
+        measure("api.get_plannings_page", lambda: check(client.get(f"/api/v1/plannings?limit={PAGE_SIZE}")),
+                number=5, **sizes),
+        measure("api.get_plannings_stream", lambda: check(client.get("/api/v1/plannings?stream=1")),
+                repeat=3, **sizes),
+        measure("api.get_planning", lambda: check(client.get(url)), number=50, **sizes),
+        measure("api.get_planning_not_modified", lambda: check(client.get(url, headers={"If-None-Match": etag}), 304),
+                number=50, **sizes),
+        measure("api.get_promotion_week", lambda: check(client.get(f"/api/v1/promotions/0/weeks/{week}")),
+                number=20, **sizes),
+        measure("api.add_planning_slot", add_planning_slot, repeat=repeat, number=number, **sizes)
+    ]
+
+
+def run(promotions: int, teachers: int, rooms: int, days: int, slots_per_day: int) -> List[BenchmarkResult]:
+    if slots_per_day >= MAX_SLOTS_PER_DAY:
+        raise ValueError("The last hour of the day must be left free to add slots")
+    dataset = generate_dataset(promotions, teachers, rooms, days, slots_per_day)
+    directory = tempfile.mkdtemp(prefix="benchmarks-")
+    url = f"sqlite:///{directory}/benchmarks.db"
+    engine, async_url = database.engine, database.DATABASE_ASYNC_URL
+    database.engine = create_engine(url, **database.get_engine_options(url))
+    database.DATABASE_ASYNC_URL = None
+    try:
+        with TestClient(app) as client:
+            results = [store_dataset(dataset)]
+            results += run_repository(dataset)
+            results += run_api(client, dataset)
+        return results
+    finally:
+        database.engine.dispose()
+        database.engine, database.DATABASE_ASYNC_URL = engine, async_url
+        shutil.rmtree(directory, ignore_errors=True)
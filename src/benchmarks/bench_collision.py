@@ -0,0 +1,77 @@
+"""
+Benchmark of the Planning collision engine.
+It compares the sort and sweep validation of a whole planning with the former pairwise comparison and with the
+minute bitsets of the occupancy model, then measures the incremental checks of Planning.add_slot, for plannings
+of growing size.
+Run it with:
+    python -m src.benchmarks.bench_collision
+"""
+from datetime import date
+from time import perf_counter
+from src.main.domain.collision import find_first_collision
+from src.main.domain.occupancy import find_first_overlap
+from src.main.domain.planning import Planning, PlanningId, PlanningSlot, PlanningSlotId
+from src.main.domain.promotion import PromotionId
+from src.main.domain.teacher import TeacherId
+from src.main.domain.course import CourseId
+from src.main.domain.room import RoomId
+
+
+SIZES = [100, 500, 1000, 2000, 5000, 10000]
+PAIRWISE_MAX_SIZE = 1000
+SLOTS_PER_DAY = 9
+
+
+def generate_slots(count: int):
+    """Generates collision-free one hour slots: every resource holds the 9 slots between 08:15 and 17:15."""
+    slots = []
+    for i in range(count):
+        resource, hour = str(i // SLOTS_PER_DAY), 8 + i % SLOTS_PER_DAY
+        slots.append(PlanningSlot(
+            id=PlanningSlotId(id=str(i)), hours_start=hour, minutes_start=15, hours_end=hour + 1, minutes_end=15,
+            promotion_id=PromotionId(id=resource), teacher_id=TeacherId(id=resource),
+            course_id=CourseId(id="1"), room_id=RoomId(id=resource)))
+    return slots
+
+
+def pairwise_first_collision(slots):
+    """Former validation: every pair of slots is compared, in both directions."""
+    for i, slot1 in enumerate(slots):
+        for j, slot2 in enumerate(slots):
+            if i != j and (slot1.promotion_id == slot2.promotion_id or slot1.teacher_id == slot2.teacher_id
+                           or slot1.room_id == slot2.room_id):
+                if slot1.start_minute < slot2.end_minute and slot2.start_minute < slot1.end_minute:
+                    return i, j
+    return None
+
+
+def measure(function, *args) -> float:
+    start = perf_counter()
+    function(*args)
+    return (perf_counter() - start) * 1000
+
+
+def create_planning(slots) -> Planning:
+    return Planning(id=PlanningId(id="1"), date=date(2025, 1, 6), promotion_id=PromotionId(id="0"), slots=slots)
+
+
+def add_slots(slots) -> None:
+    planning = create_planning([])
+    for slot in slots:
+        planning.add_slot(slot)
+
+
+def main():
+    print(f"{'slots':>8} {'sweep (ms)':>12} {'pairwise (ms)':>14} {'sort (ms)':>10} {'bitset (ms)':>12} "
+          f"{'add_slot x n (ms)':>18}")
+    for size in SIZES:
+        slots = generate_slots(size)
+        sweep = measure(create_planning, slots)
+        pairwise = f"{measure(pairwise_first_collision, slots):.1f}" if size <= PAIRWISE_MAX_SIZE else "-"
+        sort, bitset = measure(find_first_collision, slots), measure(find_first_overlap, slots)
+        incremental = measure(add_slots, slots)
+        print(f"{size:>8} {sweep:>12.1f} {pairwise:>14} {sort:>10.1f} {bitset:>12.1f} {incremental:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
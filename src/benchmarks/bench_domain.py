@@ -0,0 +1,35 @@
+"""
+Micro-benchmarks of the domain validators.
+They measure the validation of a slot, of the planning of a promotion for a day, and of a single planning holding
+the slots of every promotion of a day, which is the worst case of the collision check. Plannings are validated from
+dictionaries, as they are when read from a request body, and built slot by slot with Planning.add_slot.
+"""
+from typing import List
+from src.main.domain.collision import find_first_collision
+from src.main.domain.planning import Planning, PlanningId, PlanningSlot
+from .data import generate_plannings
+from .harness import BenchmarkResult, measure
+
+
+def run(promotions: int, teachers: int, rooms: int, days: int, slots_per_day: int) -> List[BenchmarkResult]:
+    plannings = generate_plannings(promotions, teachers, rooms, 1, slots_per_day)
+    planning = plannings[0]
+    day = Planning(id=PlanningId(id="day"), date=planning.date, promotion_id=planning.promotion_id,
+                   slots=[slot for other in plannings for slot in other.slots])
+    slot_data, planning_data, day_data = (
+        planning.slots[0].model_dump(), planning.model_dump(), day.model_dump())
+    sizes = {"slots": len(day.slots)}
+
+    def add_slots():
+        built = Planning(id=day.id, date=day.date, promotion_id=day.promotion_id, slots=[])
+        for slot in day.slots:
+            built.add_slot(slot)
+
+    return [
+        measure("domain.slot_validation", lambda: PlanningSlot.model_validate(slot_data), number=5000),
+        measure("domain.planning_validation", lambda: Planning.model_validate(planning_data), number=1000,
+                slots=slots_per_day),
+        measure("domain.day_validation", lambda: Planning.model_validate(day_data), number=100, **sizes),
+        measure("domain.day_collision_check", lambda: find_first_collision(day.slots), number=100, **sizes),
+        measure("domain.day_add_slot", add_slots, number=50, **sizes)
+    ]
@@ -0,0 +1,49 @@
+"""
+Benchmark of the timetable generator.
+It builds the week of synthetic establishments of growing size: each promotion follows 8 courses of 4 hours,
+in 2 hour sessions, each course being taught by one of the teachers in turn. The smallest establishment fits
+comfortably, the largest ones have barely enough rooms, so that the search has to backtrack or give up sessions.
+Run it with:
+    python -m src.benchmarks.bench_scheduler
+"""
+from datetime import date
+from time import perf_counter
+from src.main.domain.course import CourseId
+from src.main.domain.promotion import PromotionId
+from src.main.domain.room import RoomId
+from src.main.domain.scheduler import CourseRequirement, TimetableRequest, generate_timetable
+from src.main.domain.teacher import TeacherId
+
+
+# (promotions, teachers, rooms)
+DATASETS = [(5, 10, 5), (20, 40, 20), (30, 45, 27), (50, 100, 50), (100, 200, 100)]
+COURSES_PER_PROMOTION = 8
+COURSE_MINUTES = 240
+TIME_BUDGET = 10.0
+
+
+def generate_request(promotions: int, teachers: int, rooms: int) -> TimetableRequest:
+    requirements = [
+        CourseRequirement(
+            promotion_id=PromotionId(id=str(promotion)), course_id=CourseId(id=str(course)),
+            teacher_id=TeacherId(id=str((promotion * COURSES_PER_PROMOTION + course) % teachers)),
+            minutes=COURSE_MINUTES)
+        for promotion in range(promotions) for course in range(COURSES_PER_PROMOTION)
+    ]
+    return TimetableRequest(monday=date(2025, 1, 6), requirements=requirements,
+                            rooms=[RoomId(id=str(room)) for room in range(rooms)], time_budget=TIME_BUDGET)
+
+
+def main():
+    print(f"{'promotions':>10} {'teachers':>9} {'rooms':>6} {'sessions':>9} {'unscheduled':>12} {'time (ms)':>10}")
+    for promotions, teachers, rooms in DATASETS:
+        request = generate_request(promotions, teachers, rooms)
+        start = perf_counter()
+        timetable = generate_timetable(request)
+        elapsed = (perf_counter() - start) * 1000
+        sessions = sum(len(requirement.sessions()) for requirement in request.requirements)
+        print(f"{promotions:>10} {teachers:>9} {rooms:>6} {sessions:>9} {len(timetable.unscheduled):>12} {elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmarks of the serialisation of the plannings returned by the API, on the first thousand slots of the dataset.
+Both paths start from domain plannings and their references, already read, and end with the bytes of the body:
+- `serialization.response_model` builds Planning models, then dumps and validates them against the response model
+  and serialises them with the standard json module, as FastAPI does for a route returning models;
+- `serialization.trusted_json` builds plain dicts and serialises them with `src.main.web.responses.dumps`, as the
+  planning routes do;
+- `serialization.normalized` does the same with `?format=normalized`, each referenced entity being sent once;
+- `serialization.sparse` does the same with the times and the room of the slots only, the other relations as ids.
+Both bodies are checked to hold the same plannings before being measured.
+"""
+from typing import List
+import asyncio
+import json
+from pydantic import TypeAdapter
+from src.main.web.planning import (
+    EMBEDDED_FORMAT, NORMALIZED_FORMAT, Planning, Projection, References, get_course_from_entity,
+    get_planning_document, get_planning_from_entity, get_plannings_body, get_promotion_from_entity, get_room_from_entity,
+    get_teacher_from_entity)
+from src.main.web.responses import dumps
+from .data import generate_dataset
+from .harness import BenchmarkResult, measure
+
+
+SLOTS = 1000
+SPARSE_PROJECTION = Projection(("hours_start", "minutes_start", "hours_end", "minutes_end", "room"), ("room",))
+
+
+async def build_references(dataset) -> References:
+    return References(
+        promotions={str(entity.id): await get_promotion_from_entity(entity) for entity in dataset.promotions},
+        teachers={str(entity.id): await get_teacher_from_entity(entity) for entity in dataset.teachers},
+        courses={str(entity.id): await get_course_from_entity(entity) for entity in dataset.courses},
+        rooms={str(entity.id): await get_room_from_entity(entity) for entity in dataset.rooms})
+
+
+def take_slots(plannings, slots: int) -> list:
+    """First plannings holding at least `slots` slots together."""
+    taken, total = [], 0
+    for planning in plannings:
+        if total >= slots:
+            break
+        taken.append(planning)
+        total += len(planning.slots)
+    return taken
+
+
+def run(promotions: int, teachers: int, rooms: int, days: int, slots_per_day: int) -> List[BenchmarkResult]:
+    dataset = generate_dataset(promotions, teachers, rooms, days, slots_per_day)
+    plannings = take_slots(dataset.plannings, SLOTS)
+    loop = asyncio.new_event_loop()
+    references = loop.run_until_complete(build_references(dataset))
+    adapter = TypeAdapter(List[Planning])
+    sizes = {"slots": sum(len(planning.slots) for planning in plannings)}
+
+    async def build_models():
+        return [await get_planning_from_entity(planning, references) for planning in plannings]
+
+    def response_model() -> bytes:
+        content = [model.model_dump() for model in loop.run_until_complete(build_models())]
+        body = adapter.dump_python(adapter.validate_python(content), mode="json")
+        return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def trusted_json() -> bytes:
+        documents = references.model_dump()
+        return dumps([get_planning_document(planning, documents) for planning in plannings])
+
+    def normalized() -> bytes:
+        return dumps(get_plannings_body(plannings, references.model_dump(), NORMALIZED_FORMAT))
+
+    def sparse() -> bytes:
+        documents = references.model_dump(include={"rooms"})
+        return dumps(get_plannings_body(plannings, documents, EMBEDDED_FORMAT, SPARSE_PROJECTION))
+
+    try:
+        if json.loads(response_model()) != json.loads(trusted_json()):
+            raise RuntimeError("The serialisation paths produce different bodies")
+        return [
+            measure("serialization.response_model", response_model, number=5, **sizes),
+            measure("serialization.trusted_json", trusted_json, number=5, **sizes),
+            measure("serialization.normalized", normalized, number=5, **sizes),
+            measure("serialization.sparse", sparse, number=5, **sizes)
+        ]
+    finally:
+        loop.close()
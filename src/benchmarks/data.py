@@ -0,0 +1,77 @@
+"""
+Synthetic data of the benchmarks.
+A dataset holds N promotions, teachers, courses and rooms, and the plannings of the promotions over consecutive
+days, each made of one hour slots. Slots are spread so that no teacher and no room is booked twice at the same
+time, across all the plannings of a day: the dataset can be stored and written through the API without conflicts.
+Datasets only depend on their sizes, so that measures taken on different commits are comparable.
+"""
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import List
+from src.main.domain.course import Course, CourseId
+from src.main.domain.planning import Planning, PlanningId, PlanningSlot, PlanningSlotId
+from src.main.domain.promotion import Promotion, PromotionId
+from src.main.domain.room import Room, RoomId
+from src.main.domain.teacher import Teacher, TeacherId
+
+
+FIRST_DAY = date(2025, 1, 6)
+FIRST_HOUR = 8
+FIRST_MINUTE = 15
+# Slots of a day fit between 08:15 and 17:15.
+MAX_SLOTS_PER_DAY = 9
+COURSES = 8
+# Sizes of the datasets the suite runs on, from a quick check to an establishment of a few thousand students.
+SIZES = {
+    "small": {"promotions": 5, "teachers": 10, "rooms": 10, "days": 5, "slots_per_day": 6},
+    "medium": {"promotions": 20, "teachers": 40, "rooms": 30, "days": 20, "slots_per_day": 8},
+    "large": {"promotions": 50, "teachers": 100, "rooms": 60, "days": 60, "slots_per_day": 8}
+}
+
+
+Dataset = namedtuple("Dataset", ["promotions", "teachers", "courses", "rooms", "plannings"])
+
+
+def generate_slots(promotion: int, day: int, slots_per_day: int, teachers: int, rooms: int,
+                   prefix: str = "") -> List[PlanningSlot]:
+    """
+    Generates the slots of a promotion for a day, from 08:15. At a given hour, promotion p is taught by teacher
+    (p + hour) and in room (p + hour), modulo their counts: promotions never share them as long as there are
+    at least as many teachers and rooms as promotions.
+    """
+    slots = []
+    for hour in range(slots_per_day):
+        slots.append(PlanningSlot(
+            id=PlanningSlotId(id=f"{prefix}{promotion}-{day}-{hour}"),
+            hours_start=FIRST_HOUR + hour, minutes_start=FIRST_MINUTE, hours_end=FIRST_HOUR + hour + 1,
+            minutes_end=FIRST_MINUTE,
+            promotion_id=PromotionId(id=str(promotion)), teacher_id=TeacherId(id=str((promotion + hour) % teachers)),
+            course_id=CourseId(id=str((promotion + hour) % COURSES)), room_id=RoomId(id=str((promotion + hour) % rooms))))
+    return slots
+
+
+def generate_plannings(promotions: int, teachers: int, rooms: int, days: int, slots_per_day: int) -> List[Planning]:
+    """Generates one planning per promotion and per day, ordered by date then promotion."""
+    if teachers < promotions or rooms < promotions:
+        raise ValueError("A dataset needs at least as many teachers and rooms as promotions")
+    if slots_per_day > MAX_SLOTS_PER_DAY:
+        raise ValueError(f"A day holds at most {MAX_SLOTS_PER_DAY} slots")
+    return [
+        Planning(
+            id=PlanningId(id=f"{promotion}-{day}"), date=FIRST_DAY + timedelta(days=day),
+            promotion_id=PromotionId(id=str(promotion)),
+            slots=generate_slots(promotion, day, slots_per_day, teachers, rooms))
+        for day in range(days) for promotion in range(promotions)
+    ]
+
+
+def generate_dataset(promotions: int, teachers: int, rooms: int, days: int, slots_per_day: int) -> Dataset:
+    return Dataset(
+        promotions=[Promotion(id=PromotionId(id=str(i)), study_year=1 + i % 5, diploma="Master", name=f"Promotion {i}")
+                    for i in range(promotions)],
+        teachers=[Teacher(id=TeacherId(id=str(i)), name=f"Name {i}", firstname=f"Firstname {i}")
+                  for i in range(teachers)],
+        courses=[Course(id=CourseId(id=str(i)), name=f"Course {i}") for i in range(COURSES)],
+        rooms=[Room(id=RoomId(id=str(i)), name=f"Room {i}", description=f"Room {i} of the benchmarks")
+               for i in range(rooms)],
+        plannings=generate_plannings(promotions, teachers, rooms, days, slots_per_day))
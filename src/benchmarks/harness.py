@@ -0,0 +1,116 @@
+"""
+Measures of the benchmark suite, and their machine-readable results.
+Each benchmark runs its function `number` times per round, for `repeat` rounds, and keeps the time of a call
+in each round: the median is the figure compared between commits, the minimum and the deviation tell how noisy
+the measure was. Results are saved as JSON along with the commit and the interpreter they were measured on.
+"""
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+import json
+import platform
+import statistics
+import subprocess
+from pydantic import BaseModel
+
+
+class BenchmarkResult(BaseModel):
+    """
+    Times of a benchmark, in milliseconds per call.
+    Attributes:
+        name (str): Name of the benchmark, as `suite.benchmark`.
+        params (dict): Sizes of the data it ran on.
+        repeat (int): Number of rounds.
+        number (int): Number of calls per round.
+    """
+    name: str
+    params: Dict[str, int] = {}
+    repeat: int
+    number: int
+    min_ms: float
+    median_ms: float
+    mean_ms: float
+    stdev_ms: float
+
+    @property
+    def key(self) -> str:
+        return self.name + "".join(f" {name}={value}" for name, value in sorted(self.params.items()))
+
+
+class Comparison(BaseModel):
+    key: str
+    baseline_ms: float
+    current_ms: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_ms / self.baseline_ms if self.baseline_ms else float("inf")
+
+
+def measure(name: str, function: Callable[[], object], repeat: int = 5, number: int = 1,
+            setup: Optional[Callable[[], object]] = None, **params: int) -> BenchmarkResult:
+    """Times `function`. `setup` runs before each round, outside of the measure."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = perf_counter()
+        for _ in range(number):
+            function()
+        times.append((perf_counter() - start) * 1000 / number)
+    return BenchmarkResult(
+        name=name, params=params, repeat=repeat, number=number, min_ms=min(times),
+        median_ms=statistics.median(times), mean_ms=statistics.mean(times),
+        stdev_ms=statistics.stdev(times) if len(times) > 1 else 0.0)
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(path: str, results: List[BenchmarkResult], size: str) -> None:
+    document = {
+        "metadata": {
+            "commit": get_commit(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "size": size
+        },
+        "results": [result.model_dump() for result in results]
+    }
+    with open(path, "w") as file:
+        json.dump(document, file, indent=2)
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    with open(path) as file:
+        return [BenchmarkResult(**result) for result in json.load(file)["results"]]
+
+
+def compare(baseline: List[BenchmarkResult], current: List[BenchmarkResult]) -> List[Comparison]:
+    """Pairs the medians of the benchmarks measured in both runs, with the same sizes."""
+    medians = {result.key: result.median_ms for result in baseline}
+    return [Comparison(key=result.key, baseline_ms=medians[result.key], current_ms=result.median_ms)
+            for result in current if result.key in medians]
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    width = max((len(result.key) for result in results), default=0)
+    lines = [f"{'benchmark':<{width}} {'median (ms)':>12} {'min (ms)':>10} {'stdev (ms)':>11}"]
+    for result in results:
+        lines.append(f"{result.key:<{width}} {result.median_ms:>12.3f} {result.min_ms:>10.3f} {result.stdev_ms:>11.3f}")
+    return "\n".join(lines)
+
+
+def format_comparisons(comparisons: List[Comparison], threshold: float) -> str:
+    width = max((len(comparison.key) for comparison in comparisons), default=0)
+    lines = [f"{'benchmark':<{width}} {'baseline (ms)':>14} {'current (ms)':>13} {'ratio':>7}"]
+    for comparison in comparisons:
+        flag = "  regression" if comparison.ratio > threshold else ""
+        lines.append(f"{comparison.key:<{width}} {comparison.baseline_ms:>14.3f} {comparison.current_ms:>13.3f} "
+                     f"{comparison.ratio:>7.2f}{flag}")
+    return "\n".join(lines)
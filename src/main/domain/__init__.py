@@ -1,6 +1,12 @@
-from .base import *
-from .promotion import *
-from .teacher import *
-from .course import *
-from .room import *
-from .planning import *
+from .base import *
+from .collision import *
+from .conflict import *
+from .availability import *
+from .occupancy import *
+from .promotion import *
+from .teacher import *
+from .course import *
+from .room import *
+from .planning import *
+from .events import *
+from .scheduler import *
@@ -0,0 +1,53 @@
+"""
+This module computes the free intervals of a set of resources (promotions, teachers and rooms) on a day.
+Times are expressed in minutes since midnight. The occupancy of each resource is a list of (start, end) intervals
+sorted by start, as kept by the SlotIndex: the lists are merged in one pass, their union is subtracted from the
+opening window of the day, and the free intervals long enough for the requested duration are returned.
+The whole computation is linear in the number of booked intervals of the requested resources.
+"""
+from heapq import merge
+from typing import Iterable, List, Tuple
+
+
+Interval = Tuple[int, int]
+# Opening window enforced by PlanningSlot.check_times: from 08:15 to 17:15.
+DAY_START_MINUTE = 8 * 60 + 15
+DAY_END_MINUTE = 17 * 60 + 15
+MIN_SLOT_DURATION = 30
+MAX_SLOT_DURATION = 4 * 60
+
+
+def merge_intervals(occupancies: Iterable[List[Interval]]) -> List[Interval]:
+    """Returns the union of several lists of intervals sorted by start, as sorted and disjoint intervals."""
+    merged: List[Interval] = []
+    for start, end in merge(*occupancies):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(window: Interval, busy: List[Interval]) -> List[Interval]:
+    """Returns the parts of window not covered by busy, which must be sorted and disjoint."""
+    free: List[Interval] = []
+    cursor, window_end = window
+    for start, end in busy:
+        if end <= cursor:
+            continue
+        if start >= window_end:
+            break
+        if start > cursor:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < window_end:
+        free.append((cursor, window_end))
+    return free
+
+
+def find_free_intervals(occupancies: Iterable[List[Interval]], duration: int = MIN_SLOT_DURATION,
+                        window: Interval = (DAY_START_MINUTE, DAY_END_MINUTE)) -> List[Interval]:
+    """Returns the intervals of window, at least duration minutes long, during which every resource is free."""
+    return [(start, end) for start, end in subtract_intervals(window, merge_intervals(occupancies))
+            if end - start >= duration]
@@ -0,0 +1,111 @@
+"""
+This module contains the collision engine used by the Planning aggregate.
+Two slots collide when they share a promotion, a teacher or a room and their time ranges overlap.
+Slots are grouped by resource key (promotion, teacher and room) and sorted by start minute, so a whole
+planning is validated with one sort and one sweep per key, in O(n log n), instead of comparing every pair.
+The SlotIndex keeps those sorted groups alive between calls, so a single slot can be checked against a
+valid planning with one binary search per key, in O(log n).
+An index can also be restricted to some resources with its keys function: shared_resource_keys only keeps the
+teacher and the room, which are the resources shared between the plannings of different promotions.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+ResourceKey = Tuple[str, str]
+
+
+def resource_keys(slot) -> Tuple[ResourceKey, ResourceKey, ResourceKey]:
+    """Returns the keys of the resources a slot occupies: its promotion, its teacher and its room."""
+    return ("promotion", str(slot.promotion_id)), ("teacher", str(slot.teacher_id)), ("room", str(slot.room_id))
+
+
+def shared_resource_keys(slot) -> Tuple[ResourceKey, ResourceKey]:
+    """Returns the keys of the resources a slot shares with other promotions: its teacher and its room."""
+    return ("teacher", str(slot.teacher_id)), ("room", str(slot.room_id))
+
+
+def find_first_collision(slots: List) -> Optional[Tuple[int, int]]:
+    """
+    Returns the positions (i, j), with i < j, of two colliding slots, or None if the slots do not collide.
+    Each resource key is swept once in start order, keeping track of the slot that ends the latest so far:
+    a slot collides as soon as it starts before that end.
+    """
+    groups: Dict[ResourceKey, List[Tuple[int, int, int]]] = {}
+    for position, slot in enumerate(slots):
+        entry = (slot.start_minute, slot.end_minute, position)
+        for key in resource_keys(slot):
+            groups.setdefault(key, []).append(entry)
+    for entries in groups.values():
+        if len(entries) < 2:
+            continue
+        entries.sort()
+        latest_end, latest_position = entries[0][1], entries[0][2]
+        for start, end, position in entries[1:]:
+            if start < latest_end:
+                return min(latest_position, position), max(latest_position, position)
+            if end > latest_end:
+                latest_end, latest_position = end, position
+    return None
+
+
+class SlotIndex:
+    """
+    Collision-free slots indexed by resource key and sorted by start minute.
+    As slots sharing a key never overlap, their end minutes are sorted too, so the only candidate for a
+    collision with a new slot is the last indexed slot starting before the new one ends.
+    """
+    def __init__(self, slots: Iterable = (), keys: Callable[..., Tuple[ResourceKey, ...]] = resource_keys):
+        self._keys = keys
+        self._starts: Dict[ResourceKey, List[int]] = {}
+        self._entries: Dict[ResourceKey, List[Tuple[int, int, str]]] = {}
+        self._size = 0
+        for slot in slots:
+            self.insert(slot)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def find_collision(self, slot, ignore_id=None) -> Optional[str]:
+        """
+        Returns the id of an indexed slot colliding with the given one, or None.
+        The slot identified by ignore_id is skipped, which allows checking the new version of an indexed slot.
+        """
+        start, end = slot.start_minute, slot.end_minute
+        ignored = str(ignore_id) if ignore_id is not None else None
+        for key in self._keys(slot):
+            starts = self._starts.get(key)
+            if not starts:
+                continue
+            entries = self._entries[key]
+            candidate = bisect_left(starts, end) - 1
+            if candidate >= 0 and entries[candidate][2] == ignored:
+                candidate -= 1
+            if candidate >= 0 and entries[candidate][1] > start:
+                return entries[candidate][2]
+        return None
+
+    def insert(self, slot) -> None:
+        entry = (slot.start_minute, slot.end_minute, str(slot.id))
+        for key in self._keys(slot):
+            starts = self._starts.setdefault(key, [])
+            position = bisect_right(starts, entry[0])
+            starts.insert(position, entry[0])
+            self._entries.setdefault(key, []).insert(position, entry)
+        self._size += 1
+
+    def remove(self, slot) -> None:
+        start, slot_id = slot.start_minute, str(slot.id)
+        for key in self._keys(slot):
+            starts = self._starts.get(key, [])
+            entries = self._entries.get(key, [])
+            position = bisect_left(starts, start)
+            while position < len(starts) and starts[position] == start:
+                if entries[position][2] == slot_id:
+                    del starts[position]
+                    del entries[position]
+                    break
+                position += 1
+            else:
+                raise ValueError("Slot not found")
+        self._size -= 1
@@ -0,0 +1,35 @@
+"""
+This module contains the index used to detect double-booked teachers and rooms across plannings.
+A Planning only checks its own slots, and each Planning belongs to a single promotion: a teacher or a room
+can still be booked at the same time by the plannings of two promotions. The ResourceConflictIndex keeps,
+for each date, a SlotIndex of every slot of every planning keyed by teacher and room, so that many new slots,
+such as the items of a bulk import, are checked against each other in O(log n) without querying again.
+It is meant for a single unit of work: the caller loads the plannings of a date from its repository with `load`,
+and the repository remains the authority, checking the bookings again in its write transaction.
+"""
+from datetime import date
+from typing import Dict, Iterable, Optional
+from .collision import SlotIndex, shared_resource_keys
+
+
+class ResourceConflictIndex:
+    """Teacher and room occupancy of the loaded dates, across the plannings of every promotion."""
+    def __init__(self):
+        self._dates: Dict[date, SlotIndex] = {}
+
+    def load(self, day: date, plannings: Iterable) -> None:
+        """Indexes the slots of all the plannings of a date, replacing what was indexed for that date."""
+        slots = (slot for planning in plannings for slot in planning.slots)
+        self._dates[day] = SlotIndex(slots, keys=shared_resource_keys)
+
+    def find_conflict(self, day: date, slot, ignore_id=None) -> Optional[str]:
+        """Returns the id of an indexed slot booking the same teacher or room at the same time, or None."""
+        index = self._dates.get(day)
+        return index.find_collision(slot, ignore_id=ignore_id) if index is not None else None
+
+    def add(self, day: date, slots: Iterable) -> None:
+        """Indexes new slots of a date. Nothing is done for a date that is not loaded."""
+        index = self._dates.get(day)
+        if index is not None:
+            for slot in slots:
+                index.insert(slot)
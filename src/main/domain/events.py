@@ -0,0 +1,121 @@
+"""
+This module contains the events published when a planning is written, and the in-process broker fanning them out
+to the clients watching plannings.
+Each subscriber has its own bounded queue, filtered by promotion and date when it subscribes, so publishing an event
+costs one put per interested subscriber and never waits for any of them. A subscriber whose queue is full is too
+slow to keep up: its pending events are discarded and it is dropped, and its next read tells it so. It can then
+subscribe again and reload the plannings it watches, instead of holding memory and missing events silently.
+Subscriptions belong to the event loop they were created on. Events published from another thread are handed over
+to that loop.
+"""
+from collections import namedtuple
+from datetime import date
+from itertools import count
+from typing import Literal, Optional, Set
+import asyncio
+from pydantic import BaseModel
+from .planning import PlanningId
+from .promotion import PromotionId
+
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class PlanningEvent(BaseModel):
+    """
+    Change of a planning.
+    Attributes:
+        type (str): "added", "updated" when the planning or one of its slots was written, or "deleted".
+        planning_id (PlanningId): ID of the planning.
+        promotion_id (PromotionId): ID of the promotion of the planning.
+        date (date): Date of the planning.
+        version (int): Version of the planning once written.
+    """
+    type: Literal["added", "updated", "deleted"]
+    planning_id: PlanningId
+    promotion_id: PromotionId
+    date: date
+    version: int = 0
+
+
+PublishedEvent = namedtuple("PublishedEvent", ["sequence", "event"])
+
+
+class PlanningSubscription:
+    """Queue of the events of a subscriber, restricted to a promotion and a date when they are given."""
+    def __init__(self, broker: "PlanningEventBroker", loop: asyncio.AbstractEventLoop, max_size: int,
+                 promotion_id: Optional[PromotionId] = None, date: Optional[date] = None):
+        self.promotion_id = promotion_id
+        self.date = date
+        self.dropped = False
+        self._broker = broker
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue(max_size)
+
+    def matches(self, event: PlanningEvent) -> bool:
+        return ((self.promotion_id is None or event.promotion_id == self.promotion_id)
+                and (self.date is None or event.date == self.date))
+
+    async def get(self) -> Optional[PublishedEvent]:
+        """Waits for the next event. Returns None once the subscription was dropped for being too slow."""
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._broker.unsubscribe(self)
+
+    def _deliver(self, published: PublishedEvent) -> None:
+        if self.dropped:
+            return
+        try:
+            self._queue.put_nowait(published)
+        except asyncio.QueueFull:
+            self._drop()
+
+    def _drop(self) -> None:
+        self.dropped = True
+        self._broker.unsubscribe(self)
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    def _push(self, published: PublishedEvent) -> None:
+        try:
+            same_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            self._deliver(published)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, published)
+
+
+class PlanningEventBroker:
+    """Fans the planning events out to the current subscribers, numbered in the order they are published."""
+    def __init__(self, max_queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.max_queue_size = max_queue_size
+        self.dropped = 0
+        self._subscriptions: Set[PlanningSubscription] = set()
+        self._sequence = count(1)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, promotion_id: Optional[PromotionId] = None,
+                  date: Optional[date] = None) -> PlanningSubscription:
+        """Subscribes to the events of a promotion and of a date, or of every planning. Must run on an event loop."""
+        subscription = PlanningSubscription(
+            self, asyncio.get_running_loop(), self.max_queue_size, promotion_id=promotion_id, date=date)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: PlanningSubscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.discard(subscription)
+            if subscription.dropped:
+                self.dropped += 1
+
+    def publish(self, event: PlanningEvent) -> None:
+        published = PublishedEvent(next(self._sequence), event)
+        for subscription in list(self._subscriptions):
+            if subscription.matches(event):
+                subscription._push(published)
@@ -0,0 +1,97 @@
+"""
+This module contains a compact occupancy model of a day, in which each resource is a bitset of the day's minutes.
+Bit i of a mask is set when the resource is booked during the i-th quantum after 08:15, so the 540 minutes of
+the opening window fit in a single Python integer. Overlap tests, unions and free-time queries then become
+integer AND, OR and shift operations, whatever the number of slots already booked.
+The quantum defaults to one minute. A coarser quantum, such as 5 minutes, gives smaller masks: a slot then books
+every quantum it touches, which never hides an overlap but may report one between slots closer than a quantum.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+from .availability import DAY_END_MINUTE, DAY_START_MINUTE, MIN_SLOT_DURATION, Interval
+from .collision import ResourceKey, resource_keys
+
+
+def interval_mask(start_minute: int, end_minute: int, quantum: int = 1) -> int:
+    """Returns the mask of the quanta touched by [start_minute, end_minute), clipped to the opening window."""
+    first = (max(start_minute, DAY_START_MINUTE) - DAY_START_MINUTE) // quantum
+    last = -(-(min(end_minute, DAY_END_MINUTE) - DAY_START_MINUTE) // quantum)
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+
+def slot_mask(slot, quantum: int = 1) -> int:
+    return interval_mask(slot.start_minute, slot.end_minute, quantum)
+
+
+def day_mask(quantum: int = 1) -> int:
+    """Returns the mask of the whole opening window."""
+    return interval_mask(DAY_START_MINUTE, DAY_END_MINUTE, quantum)
+
+
+def mask_intervals(mask: int, quantum: int = 1) -> List[Interval]:
+    """Returns the runs of set bits of a mask as (start, end) minutes since midnight, sorted by start."""
+    intervals = []
+    while mask:
+        first = (mask & -mask).bit_length() - 1
+        length = ((mask >> first) ^ ((mask >> first) + 1)).bit_length() - 1
+        intervals.append((DAY_START_MINUTE + first * quantum,
+                          min(DAY_START_MINUTE + (first + length) * quantum, DAY_END_MINUTE)))
+        mask &= ~(((1 << length) - 1) << first)
+    return intervals
+
+
+def find_first_overlap(slots: List, quantum: int = 1) -> Optional[Tuple[int, int]]:
+    """
+    Returns the positions (i, j), with i < j, of two slots booking the same promotion, teacher or room at the
+    same time, or None. Each slot is checked against the union of the slots before it with one AND per resource.
+    """
+    booked: Dict[ResourceKey, int] = {}
+    masks = [slot_mask(slot, quantum) for slot in slots]
+    for position, slot in enumerate(slots):
+        mask = masks[position]
+        for key in resource_keys(slot):
+            if booked.get(key, 0) & mask:
+                earlier = next(i for i in range(position) if masks[i] & mask and key in resource_keys(slots[i]))
+                return earlier, position
+            booked[key] = booked.get(key, 0) | mask
+    return None
+
+
+class DayOccupancy:
+    """Occupancy of the promotions, teachers and rooms of a day, as one bitset per resource key."""
+    def __init__(self, slots: Iterable = (), quantum: int = 1):
+        self.quantum = quantum
+        self.masks: Dict[ResourceKey, int] = {}
+        for slot in slots:
+            self.book(slot)
+
+    def is_free(self, slot) -> bool:
+        mask = slot_mask(slot, self.quantum)
+        return not any(self.masks.get(key, 0) & mask for key in resource_keys(slot))
+
+    def book(self, slot) -> None:
+        if not self.is_free(slot):
+            raise ValueError("Collision detected with an existing slot")
+        mask = slot_mask(slot, self.quantum)
+        for key in resource_keys(slot):
+            self.masks[key] = self.masks.get(key, 0) | mask
+
+    def block(self, key: ResourceKey, start_minute: int, end_minute: int) -> None:
+        """Marks a resource as unavailable from start_minute to end_minute, whatever it is already booked for."""
+        self.masks[key] = self.masks.get(key, 0) | interval_mask(start_minute, end_minute, self.quantum)
+
+    def release(self, slot) -> None:
+        mask = slot_mask(slot, self.quantum)
+        for key in resource_keys(slot):
+            self.masks[key] = self.masks.get(key, 0) & ~mask
+
+    def busy(self, keys: Iterable[ResourceKey]) -> int:
+        """Returns the union of the masks of the given resources."""
+        mask = 0
+        for key in keys:
+            mask |= self.masks.get(key, 0)
+        return mask
+
+    def free_intervals(self, keys: Iterable[ResourceKey], duration: int = MIN_SLOT_DURATION) -> List[Interval]:
+        """Returns the intervals, at least duration minutes long, during which every given resource is free."""
+        free = day_mask(self.quantum) & ~self.busy(keys)
+        return [(start, end) for start, end in mask_intervals(free, self.quantum) if end - start >= duration]
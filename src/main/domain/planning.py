@@ -1,175 +1,326 @@
-"""
-This module contains the definition of the Planning domain entity, which represents a planning for a promotion.
-The Planning entity is an aggregate root that contains a list of PlanningSlot entities.
-A PlanningSlot represents a course that takes place at a given hour in a given room.
-"""
-from typing import List
-from abc import ABC, abstractmethod
-from datetime import time, timedelta, date
-from pydantic import BaseModel, Field, model_validator
-from .base import BaseIdentifier
-from .promotion import PromotionId
-from .teacher import TeacherId
-from .course import CourseId
-from .room import RoomId
-
-
-class PlanningSlotId(BaseIdentifier):
-    """Value object holding PlanningSlot identity."""
-    pass
-
-
-class PlanningSlot(BaseModel):
-    """
-    PlanningSlot is an entity that holds the details of a planning slot.
-    Note: This entity is part of the Planning aggregate and should only be managed via a Planning.
-    Attributes:
-        id (PlanningSlotId): Unique identifier for the planning slot.
-        hours_start (int): Starting hour of the planning slot (must be between 8 and 17 inclusive).
-        minutes_start (int): Starting minute of the planning slot (must be between 0 and 59 inclusive).
-        hours_end (int): Ending hour of the planning slot (must be between 8 and 17 inclusive).
-        minutes_end (int): Ending minute of the planning slot (must be between 0 and 59 inclusive).
-        promotion_id (PromotionId): ID of the promotion associated with the planning slot.
-        teacher_id (TeacherId): ID of the teacher assigned to the planning slot.
-        course_id (CourseId): ID of the course associated with the planning slot.
-        room_id (RoomId): ID of the room where the planning slot will take place.
-    Validators:
-        check_times: Ensures that the end time is after the start time, the duration is between 30 minutes and 4 hours,
-                      the first slot starts at 08:15 or later, and the last slot ends at 17:15 or earlier.
-    """
-    id: PlanningSlotId
-    hours_start: int = Field(..., ge=8, le=17)
-    minutes_start: int = Field(..., ge=0, le=59)
-    hours_end: int = Field(..., ge=8, le=17)
-    minutes_end: int = Field(..., ge=0, le=59)
-    promotion_id: PromotionId
-    teacher_id: TeacherId
-    course_id: CourseId
-    room_id: RoomId
-
-    @model_validator(mode="after")
-    def check_times(self):
-        start_time = time(self.hours_start, self.minutes_start)
-        end_time = time(self.hours_end, self.minutes_end)
-        if end_time <= start_time:
-            raise ValueError("End time must be after start time")
-        duration = timedelta(
-            hours=end_time.hour, minutes=end_time.minute) - timedelta(hours=start_time.hour, minutes=start_time.minute)
-        if duration < timedelta(minutes=30):
-            raise ValueError("Slot duration must be at least 30 minutes")
-        if duration > timedelta(hours=4):
-            raise ValueError("Slot duration must be at most 4 hours")
-        if self.hours_start == 8 and self.minutes_start < 15:
-            raise ValueError("First slot can only start at 08:15 or later")
-        if self.hours_end == 17 and self.minutes_end > 15:
-            raise ValueError("Last slot can only end at 17:15 or earlier")
-        return self
-
-
-class PlanningId(BaseIdentifier):
-    """Value object holding Planning identity."""
-    pass
-
-
-class Planning(BaseModel):
-    """
-    Aggregate root, entity holding planning.
-    A Planning encapsulates a list of PlanningSlot. To respect the DDD, a PlanningSlot can only be
-    manipulated through this aggregate.
-    Attributes:
-        id (PlanningId): Unique identifier for the planning.
-        date (date): Date of the planning.
-        promotion_id (PromotionId): ID of the promotion associated with the planning.
-        slots (List[PlanningSlot]): List of planning slots.
-    Validators:
-        check_no_collisions: Ensures that there are no collisions between slots.
-    """
-    id: PlanningId
-    date: date
-    promotion_id: PromotionId
-    slots: List[PlanningSlot]
-
-    @model_validator(mode="after")
-    def check_no_collisions(self):
-        for i, slot1 in enumerate(self.slots):
-            for j, slot2 in enumerate(self.slots):
-                if i != j and self._slots_collide(slot1, slot2):
-                    raise ValueError(f"Collision detected between slot {i+1} and slot {j+1}")
-        return self
-
-    def _slots_collide(self, slot1: PlanningSlot, slot2: PlanningSlot) -> bool:
-        # Collisions occur if two slots of the same promotion, teacher, or room overlap.
-        if slot1.promotion_id == slot2.promotion_id or slot1.teacher_id == slot2.teacher_id or slot1.room_id == slot2.room_id:
-            start1 = time(slot1.hours_start, slot1.minutes_start)
-            end1 = time(slot1.hours_end, slot1.minutes_end)
-            start2 = time(slot2.hours_start, slot2.minutes_start)
-            end2 = time(slot2.hours_end, slot2.minutes_end)
-            return start1 < end2 and start2 < end1
-        return False
-
-    def add_slot(self, slot: PlanningSlot) -> None:
-        """
-        Adds a new slot to the planning after checking that it does not collide with any existing slots.
-        """
-        for existing in self.slots:
-            if self._slots_collide(existing, slot):
-                raise ValueError("Collision detected with an existing slot")
-        self.slots.append(slot)
-        self.check_no_collisions()
-
-    def remove_slot(self, slot_id: PlanningSlotId) -> None:
-        """
-        Removes a slot from the planning given its identifier.
-        """
-        self.slots = [slot for slot in self.slots if slot.id != slot_id]
-        self.check_no_collisions()
-
-    def update_slot(self, updated_slot: PlanningSlot) -> None:
-        """
-        Updates an existing slot in the planning.
-        """
-        found = False
-        new_slots = []
-        for slot in self.slots:
-            if slot.id == updated_slot.id:
-                new_slots.append(updated_slot)
-                found = True
-            else:
-                new_slots.append(slot)
-        if not found:
-            raise ValueError("Slot not found")
-        # Ensure that the update does not cause any collision
-        temp = self.model_copy(update={"slots": new_slots})
-        temp.check_no_collisions()
-        self.slots = new_slots
-
-
-class IPlanningRepository(ABC):
-    """Interface for handling plannings persistence."""
-    @abstractmethod
-    def next_identity(self) -> PlanningId:
-        raise NotImplementedError
-
-    @abstractmethod
-    def find_all(self) -> List[Planning]:
-        raise NotImplementedError
-
-    @abstractmethod
-    def find_by_id(self, id: PlanningId) -> Planning:
-        raise NotImplementedError
-
-    @abstractmethod
-    def find_by_date_and_promotion(self, date: date, promotion_id: PromotionId) -> List[Planning]:
-        raise NotImplementedError
-
-    @abstractmethod
-    def add(self, planning: Planning) -> None:
-        raise NotImplementedError
-
-    @abstractmethod
-    def update(self, planning: Planning) -> None:
-        raise NotImplementedError
-
-    @abstractmethod
-    def delete(self, planning: Planning) -> None:
-        raise NotImplementedError
+"""
+This module contains the definition of the Planning domain entity, which represents a planning for a promotion.
+The Planning entity is an aggregate root that contains a list of PlanningSlot entities.
+A PlanningSlot represents a course that takes place at a given hour in a given room.
+Plannings are versioned by their repository: writing a planning on the basis of an outdated version raises
+a ConcurrentUpdateError.
+A Planning only checks its own slots, and each Planning belongs to a single promotion: the repository checks, in
+the transaction writing the slots, that their teachers and rooms are not booked at the same time by the plannings
+of other promotions, and raises a ResourceConflictError otherwise.
+"""
+from typing import List, Optional, Tuple
+from abc import ABC, abstractmethod
+from datetime import time, timedelta, date
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator, model_validator
+from .base import BaseIdentifier
+from .collision import SlotIndex, find_first_collision
+from .promotion import PromotionId
+from .teacher import TeacherId
+from .course import CourseId
+from .room import RoomId
+
+
+class PlanningSlotId(BaseIdentifier):
+    """Value object holding PlanningSlot identity."""
+    pass
+
+
+class PlanningSlot(BaseModel):
+    """
+    PlanningSlot is an entity that holds the details of a planning slot.
+    Note: This entity is part of the Planning aggregate and should only be managed via a Planning.
+    A PlanningSlot is immutable: a changed slot is a new PlanningSlot, built with `model_copy(update=...)`.
+    Attributes:
+        id (PlanningSlotId): Unique identifier for the planning slot.
+        hours_start (int): Starting hour of the planning slot (must be between 8 and 17 inclusive).
+        minutes_start (int): Starting minute of the planning slot (must be between 0 and 59 inclusive).
+        hours_end (int): Ending hour of the planning slot (must be between 8 and 17 inclusive).
+        minutes_end (int): Ending minute of the planning slot (must be between 0 and 59 inclusive).
+        promotion_id (PromotionId): ID of the promotion associated with the planning slot.
+        teacher_id (TeacherId): ID of the teacher assigned to the planning slot.
+        course_id (CourseId): ID of the course associated with the planning slot.
+        room_id (RoomId): ID of the room where the planning slot will take place.
+    Validators:
+        check_times: Ensures that the end time is after the start time, the duration is between 30 minutes and 4 hours,
+                      the first slot starts at 08:15 or later, and the last slot ends at 17:15 or earlier.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    id: PlanningSlotId
+    hours_start: int = Field(..., ge=8, le=17)
+    minutes_start: int = Field(..., ge=0, le=59)
+    hours_end: int = Field(..., ge=8, le=17)
+    minutes_end: int = Field(..., ge=0, le=59)
+    promotion_id: PromotionId
+    teacher_id: TeacherId
+    course_id: CourseId
+    room_id: RoomId
+
+    @model_validator(mode="after")
+    def check_times(self):
+        start_time = time(self.hours_start, self.minutes_start)
+        end_time = time(self.hours_end, self.minutes_end)
+        if end_time <= start_time:
+            raise ValueError("End time must be after start time")
+        duration = timedelta(
+            hours=end_time.hour, minutes=end_time.minute) - timedelta(hours=start_time.hour, minutes=start_time.minute)
+        if duration < timedelta(minutes=30):
+            raise ValueError("Slot duration must be at least 30 minutes")
+        if duration > timedelta(hours=4):
+            raise ValueError("Slot duration must be at most 4 hours")
+        if self.hours_start == 8 and self.minutes_start < 15:
+            raise ValueError("First slot can only start at 08:15 or later")
+        if self.hours_end == 17 and self.minutes_end > 15:
+            raise ValueError("Last slot can only end at 17:15 or earlier")
+        return self
+
+    @property
+    def start_minute(self) -> int:
+        """Start of the slot, in minutes since midnight."""
+        return self.hours_start * 60 + self.minutes_start
+
+    @property
+    def end_minute(self) -> int:
+        """End of the slot, in minutes since midnight."""
+        return self.hours_end * 60 + self.minutes_end
+
+
+class SlotList(list):
+    """List of the slots of a Planning, counting the changes made to it in place."""
+    changes = 0
+
+
+def _counting(method):
+    def counted(self, *args, **kwargs):
+        self.changes += 1
+        return method(self, *args, **kwargs)
+    return counted
+
+
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert", "pop", "remove",
+              "clear", "sort", "reverse"):
+    setattr(SlotList, _name, _counting(getattr(list, _name)))
+
+
+class ConcurrentUpdateError(ValueError):
+    """Raised when a planning is written on the basis of a version that is no longer the stored one."""
+    pass
+
+
+class ResourceConflictError(ValueError):
+    """Raised when a slot is written while its teacher or its room is booked at the same time by another planning."""
+    pass
+
+
+class PlanningId(BaseIdentifier):
+    """Value object holding Planning identity."""
+    pass
+
+
+class Planning(BaseModel):
+    """
+    Aggregate root, entity holding planning.
+    A Planning encapsulates a list of PlanningSlot. To respect the DDD, a PlanningSlot can only be
+    manipulated through this aggregate.
+    Attributes:
+        id (PlanningId): Unique identifier for the planning.
+        date (date): Date of the planning.
+        promotion_id (PromotionId): ID of the promotion associated with the planning.
+        slots (List[PlanningSlot]): List of planning slots.
+        version (int): Number of times the planning was written, maintained by its repository (0 until it is stored).
+    Validators:
+        check_no_collisions: Ensures that there are no collisions between slots, with a single sort and sweep.
+        check_unique_slot_ids: Ensures that no two slots share the same id.
+    Slots added, removed or updated through the aggregate methods are checked incrementally against a SlotIndex.
+    The slots are held in a SlotList, which counts its changes: the index is rebuilt if the list was replaced or
+    changed in place from outside, which is told without going through the slots.
+    """
+    id: PlanningId
+    date: date
+    promotion_id: PromotionId
+    slots: List[PlanningSlot]
+    version: int = Field(0, ge=0)
+    # Index of the slots, with the SlotList it was built from and the number of changes of that list it covers.
+    _indexed: Optional[Tuple[SlotIndex, SlotList, int]] = PrivateAttr(default=None)
+
+    @field_validator("slots")
+    @classmethod
+    def track_slots(cls, slots: List[PlanningSlot]) -> SlotList:
+        return SlotList(slots)
+
+    @model_validator(mode="after")
+    def check_no_collisions(self):
+        collision = find_first_collision(self.slots)
+        if collision:
+            i, j = collision
+            raise ValueError(f"Collision detected between slot {i+1} and slot {j+1}")
+        return self
+
+    @model_validator(mode="after")
+    def check_unique_slot_ids(self):
+        slot_ids = set()
+        for slot in self.slots:
+            if slot.id in slot_ids:
+                raise ValueError(f"Duplicate slot id {slot.id}")
+            slot_ids.add(slot.id)
+        return self
+
+    def _slot_index(self) -> SlotIndex:
+        # The index is rebuilt whenever the slots were replaced or changed in place outside of the aggregate methods.
+        indexed, slots = self._indexed, self.slots
+        if indexed is not None and indexed[1] is slots and indexed[2] == slots.changes:
+            return indexed[0]
+        if not isinstance(slots, SlotList):
+            slots = self.slots = SlotList(slots)
+        index = SlotIndex(slots)
+        self._indexed = (index, slots, slots.changes)
+        return index
+
+    def _set_slots(self, index: SlotIndex, slots: SlotList) -> None:
+        self.slots = slots
+        self._indexed = (index, slots, slots.changes)
+
+    def add_slot(self, slot: PlanningSlot) -> None:
+        """
+        Adds a new slot to the planning after checking that it does not collide with any existing slots.
+        """
+        index = self._slot_index()
+        if index.find_collision(slot) is not None:
+            raise ValueError("Collision detected with an existing slot")
+        self.slots.append(slot)
+        index.insert(slot)
+        self._indexed = (index, self.slots, self.slots.changes)
+
+    def remove_slot(self, slot_id: PlanningSlotId) -> None:
+        """
+        Removes a slot from the planning given its identifier.
+        """
+        index = self._slot_index()
+        for slot in self.slots:
+            if slot.id == slot_id:
+                index.remove(slot)
+        self._set_slots(index, SlotList(slot for slot in self.slots if slot.id != slot_id))
+
+    def update_slot(self, updated_slot: PlanningSlot) -> None:
+        """
+        Updates an existing slot in the planning.
+        """
+        position = next((i for i, slot in enumerate(self.slots) if slot.id == updated_slot.id), None)
+        if position is None:
+            raise ValueError("Slot not found")
+        # Ensure that the update does not cause any collision
+        index = self._slot_index()
+        if index.find_collision(updated_slot, ignore_id=updated_slot.id) is not None:
+            raise ValueError("Collision detected with an existing slot")
+        index.remove(self.slots[position])
+        new_slots = SlotList(self.slots)
+        new_slots[position] = updated_slot
+        index.insert(updated_slot)
+        self._set_slots(index, new_slots)
+
+
+class IPlanningRepository(ABC):
+    """
+    Interface for handling plannings persistence.
+    Methods writing slots raise ResourceConflictError, and write nothing, when one of the slots books a teacher or
+    a room already booked at the same time by another planning of the same date.
+    """
+    @abstractmethod
+    def next_identity(self) -> PlanningId:
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_all(self) -> List[Planning]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_by_id(self, id: PlanningId) -> Planning:
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_version(self, id: PlanningId) -> int:
+        """Returns the version of a planning without loading its slots."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_header(self, id: PlanningId) -> Planning:
+        """Returns a planning with its date, promotion and version, but without loading its slots: `slots` is empty."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_by_date_and_promotion(self, date: date, promotion_id: PromotionId) -> List[Planning]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_by_date_range(self, date_from: date, date_to: date,
+                           promotion_id: Optional[PromotionId] = None) -> List[Planning]:
+        """Returns the plannings dated between date_from and date_to inclusive, ordered by date."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_page(self, limit: int, after: Optional[Tuple[date, PlanningId]] = None, date_from: Optional[date] = None,
+                  date_to: Optional[date] = None, promotion_id: Optional[PromotionId] = None) -> List[Planning]:
+        """
+        Returns at most `limit` plannings ordered by (date, id), starting right after the `after` key.
+        Plannings can be restricted to the inclusive [date_from, date_to] range and to a promotion.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_existing_ids(self, ids: List[PlanningId]) -> List[PlanningId]:
+        """Returns the ids, among the given ones, of the plannings already stored."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_existing_slot_ids(self, ids: List[PlanningSlotId]) -> List[PlanningSlotId]:
+        """Returns the ids, among the given ones, of the slots already stored, whatever their planning."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_overlapping_slots(self, date: date, start_minute: int, end_minute: int,
+                               teacher_id: Optional[TeacherId] = None, room_id: Optional[RoomId] = None,
+                               promotion_id: Optional[PromotionId] = None) -> List[PlanningSlot]:
+        """
+        Returns the slots of the plannings of a date overlapping [start_minute, end_minute), in minutes since midnight,
+        ordered by start. When a teacher, a room or a promotion is given, only their slots are returned.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_bookings(self, date_from: date, date_to: date, teacher_id: Optional[TeacherId] = None,
+                      room_id: Optional[RoomId] = None,
+                      promotion_id: Optional[PromotionId] = None) -> List[Tuple[date, int, int]]:
+        """
+        Returns the (date, start minute, end minute) of the slots dated between date_from and date_to inclusive,
+        ordered by date and start. When a teacher, a room or a promotion is given, only their slots are returned.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, planning: Planning) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_all(self, plannings: List[Planning]) -> None:
+        """Stores all the given plannings and their slots in a single transaction: either all are added or none."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, planning: Planning) -> None:
+        """
+        Stores the changes of a planning, writing only the slots that were added, removed or changed.
+        Raises ConcurrentUpdateError if the stored planning was written since this version of it was read.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_slot(self, planning_id: PlanningId, slot: PlanningSlot, expected_version: Optional[int] = None) -> None:
+        """
+        Stores a single new slot of a planning, without reading nor writing its other slots.
+        When expected_version is given, raises ConcurrentUpdateError if the planning is no longer at that version.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, planning: Planning) -> None:
+        raise NotImplementedError
@@ -1,47 +1,56 @@
-"""
-This module contains the definition of the Promotion domain entity and its associated repository interface.
-"""
-from typing import List
-from abc import ABC, abstractmethod
-from pydantic import BaseModel
-from .base import BaseIdentifier
-
-
-class PromotionId(BaseIdentifier):
-    """Value object holding Promotion identity."""
-    pass
-
-
-class Promotion(BaseModel):
-    """Aggregate root, entity holding promotion."""
-    id: PromotionId
-    study_year: int
-    diploma: str
-    name: str
-
-
-class IPromotionRepository(ABC):
-    """Interface for handling promotions persistence."""
-    @abstractmethod
-    def next_identity(self) -> PromotionId:
-        raise NotImplementedError
-
-    @abstractmethod
-    def find_all(self) -> List[Promotion]:
-        raise NotImplementedError
-
-    @abstractmethod
-    def find_by_id(self, id: PromotionId) -> Promotion:
-        raise NotImplementedError
-
-    @abstractmethod
-    def add(self, promotion: Promotion) -> None:
-        raise NotImplementedError
-
-    @abstractmethod
-    def update(self, promotion: Promotion) -> None:
-        raise NotImplementedError
-
-    @abstractmethod
-    def delete(self, id: PromotionId) -> None:
-        raise NotImplementedError
+"""
+This module contains the definition of the Promotion domain entity and its associated repository interface.
+"""
+from typing import Iterator, List
+from abc import ABC, abstractmethod
+from pydantic import BaseModel
+from .base import BaseIdentifier
+
+
+class PromotionId(BaseIdentifier):
+    """Value object holding Promotion identity."""
+    pass
+
+
+class Promotion(BaseModel):
+    """Aggregate root, entity holding promotion."""
+    id: PromotionId
+    study_year: int
+    diploma: str
+    name: str
+
+
+class IPromotionRepository(ABC):
+    """Interface for handling promotions persistence."""
+    @abstractmethod
+    def next_identity(self) -> PromotionId:
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_all(self) -> List[Promotion]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_all(self) -> Iterator[Promotion]:
+        """Yields every promotion, read from the database in batches instead of all at once."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_by_id(self, id: PromotionId) -> Promotion:
+        raise NotImplementedError
+
+    @abstractmethod
+    def find_by_ids(self, ids: List[PromotionId]) -> List[Promotion]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, promotion: Promotion) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, promotion: Promotion) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, id: PromotionId) -> None:
+        raise NotImplementedError
@@ -0,0 +1,259 @@
+"""
+This module contains the timetable generator, which builds the plannings of a week from the course hours each
+promotion requires. Every requirement is split into sessions, which are placed one by one with a depth-first
+search: the most constrained sessions first, then for each session the least loaded days first, the earliest
+start times first and the allowed rooms in order. A session that cannot be placed undoes the previous one,
+at most MAX_DEAD_ENDS times: after that, the session is reported as unscheduled so that an over-constrained
+week does not spend the whole search on the same sessions.
+The teachers, rooms and promotions of each day are tracked with a DayOccupancy, so checking a placement costs
+a few integer operations. Generated slots follow the rules of PlanningSlot: they last from 30 minutes to 4 hours,
+between 08:15 and 17:15, and never collide with each other nor with the plannings already booked that week.
+The search stops once its time budget is spent: the sessions not placed yet are then reported as unscheduled.
+"""
+from datetime import date, timedelta
+from time import monotonic
+from typing import Dict, Iterator, List, Optional
+import uuid
+from pydantic import BaseModel, Field, model_validator
+from .availability import DAY_END_MINUTE, DAY_START_MINUTE, MAX_SLOT_DURATION, MIN_SLOT_DURATION
+from .collision import resource_keys
+from .course import CourseId
+from .occupancy import DayOccupancy, interval_mask
+from .planning import Planning, PlanningId, PlanningSlot, PlanningSlotId
+from .promotion import PromotionId
+from .room import RoomId
+from .teacher import TeacherId
+
+
+WEEK_DAYS = 5
+START_STEP_MINUTES = 15
+MAX_DEAD_ENDS = 3
+MAX_WEEK_MINUTES = WEEK_DAYS * (DAY_END_MINUTE - DAY_START_MINUTE)
+
+
+class CourseRequirement(BaseModel):
+    """
+    Weekly hours of a course for a promotion, taught by a teacher.
+    Attributes:
+        minutes (int): Minutes to schedule in the week (at most MAX_WEEK_MINUTES), the last session being rounded
+            up to 30 minutes.
+        session_minutes (int): Duration of each session (between 30 minutes and 4 hours).
+        room_ids (List[RoomId]): Rooms suitable for the course, any room of the request if empty.
+    """
+    promotion_id: PromotionId
+    course_id: CourseId
+    teacher_id: TeacherId
+    minutes: int = Field(..., gt=0, le=MAX_WEEK_MINUTES)
+    session_minutes: int = Field(120, ge=MIN_SLOT_DURATION, le=MAX_SLOT_DURATION)
+    room_ids: List[RoomId] = []
+
+    def sessions(self) -> List[int]:
+        """Returns the duration of each session of the week."""
+        full, remainder = divmod(self.minutes, self.session_minutes)
+        return [self.session_minutes] * full + ([max(remainder, MIN_SLOT_DURATION)] if remainder else [])
+
+
+class Unavailability(BaseModel):
+    """A teacher or a room that cannot be booked on a day of the week (0 for Monday) between two minutes."""
+    teacher_id: Optional[TeacherId] = None
+    room_id: Optional[RoomId] = None
+    weekday: int = Field(..., ge=0, lt=WEEK_DAYS)
+    start_minute: int = Field(..., ge=0)
+    end_minute: int = Field(..., le=24 * 60)
+
+    @model_validator(mode="after")
+    def check_resource(self):
+        if (self.teacher_id is None) == (self.room_id is None):
+            raise ValueError("An unavailability concerns either a teacher or a room")
+        if self.end_minute <= self.start_minute:
+            raise ValueError("End time must be after start time")
+        return self
+
+
+class TimetableRequest(BaseModel):
+    """
+    Everything the generator needs to build a week.
+    Attributes:
+        monday (date): Monday of the week to build.
+        requirements (List[CourseRequirement]): Course hours to schedule.
+        rooms (List[RoomId]): Rooms available to courses without a room constraint.
+        unavailabilities (List[Unavailability]): Periods during which teachers or rooms cannot be booked.
+        booked (List[Planning]): Plannings already stored for the week, whose slots must be left untouched.
+        time_budget (float): Seconds after which the search stops, the sessions left being unscheduled.
+    """
+    monday: date
+    requirements: List[CourseRequirement]
+    rooms: List[RoomId] = []
+    unavailabilities: List[Unavailability] = []
+    booked: List[Planning] = []
+    time_budget: float = Field(5.0, gt=0, le=60)
+
+    @model_validator(mode="after")
+    def check_monday(self):
+        if self.monday.weekday() != 0:
+            raise ValueError("The week must start on a Monday")
+        return self
+
+
+class UnscheduledSession(BaseModel):
+    promotion_id: PromotionId
+    course_id: CourseId
+    minutes: int
+
+
+class Timetable(BaseModel):
+    """Plannings generated for a week, one per promotion and day, and the sessions that could not be placed."""
+    plannings: List[Planning]
+    unscheduled: List[UnscheduledSession]
+
+    @property
+    def complete(self) -> bool:
+        return not self.unscheduled
+
+
+class _Placement:
+    """A session placed on a day, shaped like a PlanningSlot for the occupancy checks."""
+    __slots__ = ("weekday", "start_minute", "end_minute", "promotion_id", "teacher_id", "room_id")
+
+    def __init__(self, weekday: int, start_minute: int, duration: int, requirement: CourseRequirement, room_id: RoomId):
+        self.weekday = weekday
+        self.start_minute = start_minute
+        self.end_minute = start_minute + duration
+        self.promotion_id = requirement.promotion_id
+        self.teacher_id = requirement.teacher_id
+        self.room_id = room_id
+
+
+class _Search:
+    def __init__(self, request: TimetableRequest):
+        self.request = request
+        self.days = [DayOccupancy() for _ in range(WEEK_DAYS)]
+        # Minutes already booked per (promotion, weekday) and sessions of each (promotion, course, weekday),
+        # used to spread the sessions of a promotion and of a course over the week.
+        self.load: Dict[tuple, int] = {}
+        self.deadline = monotonic() + request.time_budget
+        self._block_booked()
+        teacher_minutes: Dict[str, int] = {}
+        for requirement in request.requirements:
+            teacher = str(requirement.teacher_id)
+            teacher_minutes[teacher] = teacher_minutes.get(teacher, 0) + requirement.minutes
+        self.sessions = sorted(
+            ((requirement, duration) for requirement in request.requirements for duration in requirement.sessions()),
+            key=lambda session: (len(self._rooms(session[0])), -teacher_minutes[str(session[0].teacher_id)], -session[1]))
+
+    def _block_booked(self) -> None:
+        for planning in self.request.booked:
+            weekday = (planning.date - self.request.monday).days
+            if 0 <= weekday < WEEK_DAYS:
+                for slot in planning.slots:
+                    for key in resource_keys(slot):
+                        self.days[weekday].block(key, slot.start_minute, slot.end_minute)
+        for unavailability in self.request.unavailabilities:
+            key = ("teacher", str(unavailability.teacher_id)) if unavailability.teacher_id else (
+                "room", str(unavailability.room_id))
+            self.days[unavailability.weekday].block(key, unavailability.start_minute, unavailability.end_minute)
+
+    def _rooms(self, requirement: CourseRequirement) -> List[RoomId]:
+        return requirement.room_ids or self.request.rooms
+
+    def candidates(self, requirement: CourseRequirement, duration: int) -> Iterator[_Placement]:
+        promotion, course = str(requirement.promotion_id), str(requirement.course_id)
+        attendees = [("promotion", promotion), ("teacher", str(requirement.teacher_id))]
+        weekdays = sorted(range(WEEK_DAYS), key=lambda weekday: (
+            self.load.get((promotion, course, weekday), 0), self.load.get((promotion, weekday), 0), weekday))
+        for weekday in weekdays:
+            day = self.days[weekday]
+            for start in range(DAY_START_MINUTE, DAY_END_MINUTE - duration + 1, START_STEP_MINUTES):
+                mask = interval_mask(start, start + duration, day.quantum)
+                # The promotion and the teacher are checked once for every room.
+                if day.busy(attendees) & mask:
+                    continue
+                for room_id in self._rooms(requirement):
+                    if not day.masks.get(("room", str(room_id)), 0) & mask:
+                        yield _Placement(weekday, start, duration, requirement, room_id)
+
+    def book(self, requirement: CourseRequirement, placement: _Placement) -> None:
+        self.days[placement.weekday].book(placement)
+        self._count(requirement, placement, 1)
+
+    def release(self, requirement: CourseRequirement, placement: _Placement) -> None:
+        self.days[placement.weekday].release(placement)
+        self._count(requirement, placement, -1)
+
+    def _count(self, requirement: CourseRequirement, placement: _Placement, sign: int) -> None:
+        promotion = str(requirement.promotion_id)
+        course_key = (promotion, str(requirement.course_id), placement.weekday)
+        promotion_key = (promotion, placement.weekday)
+        self.load[course_key] = self.load.get(course_key, 0) + sign
+        self.load[promotion_key] = self.load.get(promotion_key, 0) + sign * (placement.end_minute - placement.start_minute)
+
+    def run(self) -> List[Optional[_Placement]]:
+        """Returns the placement of each session, None for the sessions that could not be placed."""
+        placements: List[Optional[_Placement]] = [None] * len(self.sessions)
+        iterators: List[Optional[Iterator[_Placement]]] = [None] * len(self.sessions)
+        skipped = set()
+        dead_ends = [0] * len(self.sessions)
+        position = 0
+        while position < len(self.sessions):
+            if monotonic() >= self.deadline:
+                break
+            requirement, duration = self.sessions[position]
+            if iterators[position] is None:
+                iterators[position] = self.candidates(requirement, duration)
+            placement = next(iterators[position], None)
+            if placement is not None:
+                self.book(requirement, placement)
+                placements[position] = placement
+                skipped.discard(position)
+                position += 1
+                continue
+            iterators[position] = None
+            previous = position - 1
+            while previous >= 0 and previous in skipped:
+                previous -= 1
+            dead_ends[position] += 1
+            if previous < 0 or dead_ends[position] > MAX_DEAD_ENDS:
+                skipped.add(position)
+                position += 1
+                continue
+            # Dead end: the previous session moves to its next candidate.
+            self.release(self.sessions[previous][0], placements[previous])
+            placements[previous] = None
+            position = previous
+        return placements
+
+
+def generate_timetable(request: TimetableRequest) -> Timetable:
+    """
+    Builds collision-free plannings for the Monday to Friday of the requested week.
+    This is a CPU-bound function, meant to be run in a worker process.
+    """
+    search = _Search(request)
+    placements = search.run()
+    slots: Dict[tuple, List[PlanningSlot]] = {}
+    unscheduled: List[UnscheduledSession] = []
+    for (requirement, duration), placement in zip(search.sessions, placements):
+        if placement is None:
+            unscheduled.append(UnscheduledSession(
+                promotion_id=requirement.promotion_id, course_id=requirement.course_id, minutes=duration))
+            continue
+        slots.setdefault((str(requirement.promotion_id), placement.weekday), []).append(PlanningSlot(
+            id=PlanningSlotId(id=str(uuid.uuid4())),
+            hours_start=placement.start_minute // 60,
+            minutes_start=placement.start_minute % 60,
+            hours_end=placement.end_minute // 60,
+            minutes_end=placement.end_minute % 60,
+            promotion_id=requirement.promotion_id,
+            teacher_id=requirement.teacher_id,
+            course_id=requirement.course_id,
+            room_id=placement.room_id
+        ))
+    plannings = [
+        Planning(
+            id=PlanningId(id=str(uuid.uuid4())),
+            date=request.monday + timedelta(days=weekday),
+            promotion_id=PromotionId(id=promotion_id),
+            slots=sorted(day_slots, key=lambda slot: slot.start_minute))
+        for (promotion_id, weekday), day_slots in sorted(slots.items())
+    ]
+    return Timetable(plannings=plannings, unscheduled=unscheduled)
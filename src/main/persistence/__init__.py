@@ -1,6 +1,9 @@
-from .database import *
-from .promotion import *
-from .teacher import *
-from .course import *
-from .room import *
-from .planning import *
+from .database import *
+from .promotion import *
+from .teacher import *
+from .course import *
+from .room import *
+from .planning import *
+from .cache import *
+from .events import *
+from .instrumentation import *
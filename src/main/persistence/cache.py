@@ -0,0 +1,160 @@
+"""
+This module provides a read-through cache for the repositories of reference entities (promotions, teachers,
+courses and rooms), which change rarely but are read for every slot of every planning response.
+LRUCache is a bounded least recently used cache whose entries expire after a time to live. CachedRepository
+wraps any repository, synchronous or asynchronous: lookups by id are served from the cache, and entries are
+invalidated when the entity is added, updated or deleted through the wrapper.
+The cache lives in the process: with several workers, an entry updated by another worker stays stale at most
+for the time to live. The `generation` of a CachedRepository changes on every write through it, and at least once
+per time to live: responses embedding cached entities can be tagged with it instead of with the entities themselves.
+Both bounds can be tuned with the following environment variables:
+- CACHE_MAX_SIZE: Number of entities kept per repository (defaults to 1024).
+- CACHE_TTL: Time to live of an entry, in seconds (defaults to 300).
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, Hashable, List, Tuple
+import inspect
+import os
+import time
+
+
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+MISSING = object()
+
+
+class LRUCache:
+    """Bounded least recently used cache, with a time to live per entry and hit/miss counters."""
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        """Returns the value cached for key, or MISSING if it is absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def _then(result, callback: Callable):
+    """Applies callback to the result of a repository call, awaiting it first if the repository is asynchronous."""
+    if inspect.isawaitable(result):
+        async def wait():
+            return callback(await result)
+        return wait()
+    return callback(result)
+
+
+def _copy(entity):
+    # Callers may modify the entities they get back: the cached instance must stay untouched.
+    return entity.model_copy()
+
+
+class CachedRepository:
+    """
+    Read-through cache wrapping a repository of reference entities.
+    find_by_id and find_by_ids are served from the cache, add, update and delete invalidate the written entity.
+    Any other attribute is delegated to the wrapped repository.
+    """
+    def __init__(self, repository, cache: LRUCache = None, clock: Callable[[], float] = time.time):
+        self.repository = repository
+        self.cache = cache if cache is not None else LRUCache()
+        self._clock = clock
+        self._epoch = None
+        self._writes = 0
+
+    def __getattr__(self, name):
+        return getattr(self.repository, name)
+
+    def find_all(self):
+        return _then(self.repository.find_all(), self._store_all)
+
+    def find_by_id(self, id):
+        cached = self.cache.get(str(id))
+        if cached is not MISSING:
+            return _copy(cached)
+        return _then(self.repository.find_by_id(id), self._store)
+
+    def find_by_ids(self, ids: List):
+        found, missing = [], []
+        for id in ids:
+            cached = self.cache.get(str(id))
+            if cached is MISSING:
+                missing.append(id)
+            else:
+                found.append(_copy(cached))
+        if not missing:
+            return found
+        return _then(self.repository.find_by_ids(missing), lambda entities: found + self._store_all(entities))
+
+    def add(self, entity):
+        return _then(self.repository.add(entity), lambda result: self._invalidate(entity.id, result))
+
+    def update(self, entity):
+        return _then(self.repository.update(entity), lambda result: self._invalidate(entity.id, result))
+
+    def delete(self, id):
+        return _then(self.repository.delete(id), lambda result: self._invalidate(id, result))
+
+    def _store(self, entity):
+        if entity:
+            self.cache.set(str(entity.id), _copy(entity))
+        return entity
+
+    def _store_all(self, entities: List) -> List:
+        for entity in entities:
+            self._store(entity)
+        return entities
+
+    def generation(self) -> Tuple[int, int]:
+        """
+        Returns the (epoch, writes) generation of the entities: the period of the time to live, on the wall clock
+        so that it is the same in every worker, and the number of writes through this wrapper since it started.
+        A write through another worker only changes the generation with the next periods: a response tagged with
+        it stays stale at most twice the time to live.
+        """
+        epoch = int(self._clock() // self.cache.ttl)
+        if epoch != self._epoch:
+            self._epoch, self._writes = epoch, 0
+        return epoch, self._writes
+
+    def _invalidate(self, id, result):
+        self.cache.invalidate(str(id))
+        self.generation()
+        self._writes += 1
+        return result
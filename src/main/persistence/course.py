@@ -1,59 +1,118 @@
-"""
-This module contains the definition of the Course model in terms of a SQLModel model, and the CourseRepository
-class that provides methods for interacting with the database.
-"""
-from sqlmodel import Session, select, SQLModel, Field
-from typing import List
-from src.main.domain.course import ICourseRepository, Course as DomainCourse, CourseId
-from src.main.domain.base import BaseRepository
-
-
-class Course(SQLModel, table=True):
-    __tablename__ = "courses"
-    __table_args__ = {"extend_existing": True}
-    id: str = Field(primary_key=True)
-    name: str
-
-
-class CourseRepository(BaseRepository, ICourseRepository):
-    def __init__(self, session: Session):
-        self.session = session
-
-    def find_all(self) -> List[DomainCourse]:
-        statement = select(Course)
-        results = self.session.exec(statement)
-        return [self._to_domain(course) for course in results.all()]
-
-    def find_by_id(self, id: CourseId) -> DomainCourse:
-        statement = select(Course).where(Course.id == str(id))
-        result = self.session.exec(statement).first()
-        if not result:
-            raise ValueError("Course not found")
-        return self._to_domain(result)
-
-    def add(self, course: DomainCourse) -> None:
-        db_course = Course(
-            id=str(course.id),
-            name=course.name
-        )
-        self.session.add(db_course)
-        self.session.commit()
-
-    def update(self, course: DomainCourse) -> None:
-        db_course = Course(
-            id=str(course.id),
-            name=course.name
-        )
-        self.session.merge(db_course)
-        self.session.commit()
-
-    def delete(self, id: CourseId) -> None:
-        db_course = self.session.get(Course, str(id))
-        self.session.delete(db_course)
-        self.session.commit()
-
-    def _to_domain(self, course: Course) -> DomainCourse:
-        return DomainCourse(
-            id=CourseId(id=course.id),
-            name=course.name
-        )
+"""
+This module contains the definition of the Course model in terms of a SQLModel model, and the CourseRepository
+class that provides methods for interacting with the database. AsyncCourseRepository offers the same methods
+as coroutines, on top of an AsyncSession.
+"""
+from sqlmodel import Session, select, SQLModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncIterator, Iterator, List
+from src.main.domain.course import ICourseRepository, Course as DomainCourse, CourseId
+from src.main.domain.base import BaseRepository
+from src.main.persistence.database import DATABASE_STREAM_BATCH_SIZE
+
+
+class Course(SQLModel, table=True):
+    __tablename__ = "courses"
+    __table_args__ = {"extend_existing": True}
+    id: str = Field(primary_key=True)
+    name: str
+
+
+class CourseMapper:
+    """Conversions between domain and database representations of a course, shared by both repositories."""
+    def _to_domain(self, course: Course) -> DomainCourse:
+        return DomainCourse(
+            id=CourseId(id=course.id),
+            name=course.name
+        )
+
+    def _to_db(self, course: DomainCourse) -> Course:
+        return Course(
+            id=str(course.id),
+            name=course.name
+        )
+
+
+class CourseRepository(CourseMapper, BaseRepository, ICourseRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def find_all(self) -> List[DomainCourse]:
+        statement = select(Course)
+        results = self.session.exec(statement)
+        return [self._to_domain(course) for course in results.all()]
+
+    def iter_all(self) -> Iterator[DomainCourse]:
+        results = self.session.exec(select(Course).execution_options(yield_per=DATABASE_STREAM_BATCH_SIZE))
+        for course in results:
+            yield self._to_domain(course)
+
+    def find_by_id(self, id: CourseId) -> DomainCourse:
+        statement = select(Course).where(Course.id == str(id))
+        result = self.session.exec(statement).first()
+        if not result:
+            raise ValueError("Course not found")
+        return self._to_domain(result)
+
+    def find_by_ids(self, ids: List[CourseId]) -> List[DomainCourse]:
+        if not ids:
+            return []
+        statement = select(Course).where(Course.id.in_({str(id) for id in ids}))
+        results = self.session.exec(statement)
+        return [self._to_domain(course) for course in results.all()]
+
+    def add(self, course: DomainCourse) -> None:
+        db_course = self._to_db(course)
+        self.session.add(db_course)
+        self.session.commit()
+
+    def update(self, course: DomainCourse) -> None:
+        db_course = self._to_db(course)
+        self.session.merge(db_course)
+        self.session.commit()
+
+    def delete(self, id: CourseId) -> None:
+        db_course = self.session.get(Course, str(id))
+        self.session.delete(db_course)
+        self.session.commit()
+
+
+class AsyncCourseRepository(CourseMapper, BaseRepository, ICourseRepository):
+    """CourseRepository counterpart working on an AsyncSession: every method is a coroutine."""
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_all(self) -> List[DomainCourse]:
+        results = await self.session.exec(select(Course))
+        return [self._to_domain(course) for course in results.all()]
+
+    async def iter_all(self) -> AsyncIterator[DomainCourse]:
+        # Rows are fetched DATABASE_STREAM_BATCH_SIZE at a time, from a server-side cursor when the driver has one.
+        results = await self.session.stream_scalars(select(Course).execution_options(yield_per=DATABASE_STREAM_BATCH_SIZE))
+        async for course in results:
+            yield self._to_domain(course)
+
+    async def find_by_id(self, id: CourseId) -> DomainCourse:
+        result = (await self.session.exec(select(Course).where(Course.id == str(id)))).first()
+        if not result:
+            raise ValueError("Course not found")
+        return self._to_domain(result)
+
+    async def find_by_ids(self, ids: List[CourseId]) -> List[DomainCourse]:
+        if not ids:
+            return []
+        results = await self.session.exec(select(Course).where(Course.id.in_({str(id) for id in ids})))
+        return [self._to_domain(course) for course in results.all()]
+
+    async def add(self, course: DomainCourse) -> None:
+        self.session.add(self._to_db(course))
+        await self.session.commit()
+
+    async def update(self, course: DomainCourse) -> None:
+        await self.session.merge(self._to_db(course))
+        await self.session.commit()
+
+    async def delete(self, id: CourseId) -> None:
+        db_course = await self.session.get(Course, str(id))
+        await self.session.delete(db_course)
+        await self.session.commit()
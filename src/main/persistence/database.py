@@ -1,24 +1,141 @@
-"""
-This module is a placeholder for the database connection management code.
-It uses the sqlmodel library as the ORM, which is not ready for production yet.
-"""
-from sqlmodel import SQLModel, create_engine, Session
-
-
-DATABASE_USER = "fastapi"
-DATABASE_PASSWORD = "fastapi_password"
-DATABASE_NAME = "fastapi_dev"
-DATABASE_HOST = "localhost"
-DATABASE_PORT = "5432"
-DATABASE_URL = f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
-
-
-engine = create_engine(DATABASE_URL)
-
-
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
-
-
-def get_session():
-    return Session(engine)
+"""
+This module is a placeholder for the database connection management code.
+It uses the sqlmodel library as the ORM, which is not ready for production yet.
+The engine holds a pool of connections. Each unit of work (an API request for instance) opens its own session
+with `session_scope`, which binds it to the current context: repositories built on `context_session` always
+work on the session of the caller, so concurrent requests never share a session or a connection.
+The connection and its pool can be tuned with the following environment variables:
+- DATABASE_URL: SQLAlchemy URL of the database (defaults to the development PostgreSQL server).
+- DATABASE_POOL_SIZE: Number of connections kept open in the pool (defaults to 5).
+- DATABASE_MAX_OVERFLOW: Number of extra connections opened when the pool is exhausted (defaults to 10).
+- DATABASE_POOL_PRE_PING: Checks connections before use to discard stale ones (defaults to true).
+- DATABASE_POOL_RECYCLE: Age in seconds after which connections are replaced (defaults to 1800).
+- DATABASE_ASYNC_URL: SQLAlchemy URL using an async driver (postgresql+asyncpg://..., sqlite+aiosqlite://...).
+  When set, the application works with the asynchronous repositories on top of `async_engine()`.
+- DATABASE_STREAM_BATCH_SIZE: Number of rows fetched at a time when a repository streams a table (defaults to 500).
+The schema is created and upgraded by the migrations of the `migrations` module.
+"""
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional, Union
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from . import migrations
+import os
+
+
+DATABASE_USER = "fastapi"
+DATABASE_PASSWORD = "fastapi_password"
+DATABASE_NAME = "fastapi_dev"
+DATABASE_HOST = "localhost"
+DATABASE_PORT = "5432"
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{DATABASE_USER}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+DATABASE_ASYNC_URL = os.getenv("DATABASE_ASYNC_URL")
+DATABASE_STREAM_BATCH_SIZE = int(os.getenv("DATABASE_STREAM_BATCH_SIZE", "500"))
+
+
+def get_engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        # SQLite connections are not pooled the same way, and are shared between threads of the server.
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+        "pool_recycle": DATABASE_POOL_RECYCLE
+    }
+
+
+engine = create_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
+_async_engine: Optional[AsyncEngine] = None
+_current_session: ContextVar[Optional[Union[Session, AsyncSession]]] = ContextVar("current_session", default=None)
+
+
+def create_db_and_tables():
+    """Creates or upgrades the schema of the database, by applying its pending migrations."""
+    migrations.upgrade(engine)
+
+
+async def create_db_and_tables_async():
+    await migrations.upgrade_async(async_engine())
+
+
+def get_session():
+    return Session(engine)
+
+
+def async_engine() -> AsyncEngine:
+    """Creates the async engine on first use, so that its driver is only required when it is configured."""
+    global _async_engine
+    if _async_engine is None:
+        if not DATABASE_ASYNC_URL:
+            raise RuntimeError("DATABASE_ASYNC_URL is not configured")
+        _async_engine = create_async_engine(DATABASE_ASYNC_URL, **get_engine_options(DATABASE_ASYNC_URL))
+    return _async_engine
+
+
+def get_async_session():
+    # Objects are not expired on commit: reloading them would need an implicit query, not allowed in async code.
+    return AsyncSession(async_engine(), expire_on_commit=False)
+
+
+@contextmanager
+def session_scope():
+    """
+    Opens a session bound to the current context. The session is closed on exit, which gives its connection
+    back to the pool.
+    """
+    with get_session() as session:
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
+
+
+@asynccontextmanager
+async def async_session_scope():
+    """Same as `session_scope`, with an AsyncSession."""
+    async with get_async_session() as session:
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
+
+
+@asynccontextmanager
+async def open_session_scope():
+    """Opens an `async_session_scope` when DATABASE_ASYNC_URL is configured, a `session_scope` otherwise."""
+    if DATABASE_ASYNC_URL:
+        async with async_session_scope() as session:
+            yield session
+    else:
+        with session_scope() as session:
+            yield session
+
+
+def current_session() -> Union[Session, AsyncSession]:
+    session = _current_session.get()
+    if session is None:
+        raise RuntimeError("No database session bound to the current context")
+    return session
+
+
+class ContextSession:
+    """
+    Session proxy forwarding every call to the session bound to the current context by `session_scope`
+    or `async_session_scope`.
+    """
+    def __getattr__(self, name):
+        return getattr(current_session(), name)
+
+
+context_session = ContextSession()
@@ -0,0 +1,76 @@
+"""
+This module provides the repository wrapper publishing a PlanningEvent for every successful write of a planning.
+EventPublishingRepository wraps a planning repository, synchronous or asynchronous, like CachedRepository wraps
+the repositories of reference entities: events are published once the wrapped write returned, so a failed or
+rolled back write never reaches the subscribers.
+Writing a slot only gives the id of its planning: while clients are subscribed, the date and promotion of the
+planning are read back with `find_header`, without its slots. Its version is the expected version plus one when it
+was given.
+"""
+from typing import List, Optional
+import inspect
+from src.main.domain.events import PlanningEvent, PlanningEventBroker
+from src.main.domain.planning import Planning, PlanningId, PlanningSlot, PlanningSlotId
+from .cache import _then
+
+
+class EventPublishingRepository:
+    """
+    Planning repository wrapper publishing the added, updated and deleted plannings to a PlanningEventBroker.
+    Any other attribute is delegated to the wrapped repository.
+    """
+    def __init__(self, repository, broker: PlanningEventBroker):
+        self.repository = repository
+        self.broker = broker
+
+    def __getattr__(self, name):
+        return getattr(self.repository, name)
+
+    def add(self, planning: Planning):
+        return _then(self.repository.add(planning), lambda result: self._publish("added", [planning], result))
+
+    def add_all(self, plannings: List[Planning]):
+        return _then(self.repository.add_all(plannings), lambda result: self._publish("added", plannings, result))
+
+    def update(self, planning: Planning):
+        return _then(self.repository.update(planning), lambda result: self._publish("updated", [planning], result))
+
+    def delete(self, planning: Planning):
+        return _then(self.repository.delete(planning), lambda result: self._publish("deleted", [planning], result))
+
+    def add_slot(self, planning_id: PlanningId, slot: PlanningSlot, expected_version: Optional[int] = None):
+        result = self.repository.add_slot(planning_id, slot, expected_version=expected_version)
+        return self._publish_slot_write(result, planning_id, expected_version)
+
+    def update_slot(self, planning_id: PlanningId, slot: PlanningSlot, expected_version: Optional[int] = None):
+        result = self.repository.update_slot(planning_id, slot, expected_version=expected_version)
+        return self._publish_slot_write(result, planning_id, expected_version)
+
+    def delete_slot(self, planning_id: PlanningId, slot_id: PlanningSlotId, expected_version: Optional[int] = None):
+        result = self.repository.delete_slot(planning_id, slot_id, expected_version=expected_version)
+        return self._publish_slot_write(result, planning_id, expected_version)
+
+    def _publish_slot_write(self, result, planning_id: PlanningId, expected_version: Optional[int]):
+        def publish_header(header: Planning):
+            if expected_version is not None:
+                header.version = expected_version + 1
+            self._publish("updated", [header])
+
+        if inspect.isawaitable(result):
+            async def wait():
+                value = await result
+                if len(self.broker):
+                    publish_header(await self.repository.find_header(planning_id))
+                return value
+            return wait()
+        if len(self.broker):
+            publish_header(self.repository.find_header(planning_id))
+        return result
+
+    def _publish(self, type: str, plannings: List[Planning], result=None):
+        for planning in plannings:
+            if planning is not None:
+                self.broker.publish(PlanningEvent(
+                    type=type, planning_id=planning.id, promotion_id=planning.promotion_id, date=planning.date,
+                    version=planning.version))
+        return result
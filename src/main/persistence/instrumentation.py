@@ -0,0 +1,59 @@
+"""
+This module counts the SQL statements run on behalf of a unit of work, and the time the database took to run them.
+`instrument_engine` listens to the cursor events of an engine, synchronous or asynchronous. Statements are recorded
+in the QueryStats bound to the current context by `record_queries`, so that concurrent requests each count their
+own statements; statements run outside of any recording are not counted.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Iterator, Optional
+from sqlalchemy import event
+
+
+class QueryStats:
+    """Number of SQL statements run, and their total duration in seconds."""
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryStats]:
+    """Records the statements run in the current context, until the block exits."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_times", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_times"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += perf_counter() - started
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute.
+    if context.connection is not None and context.connection.info.get("query_start_times"):
+        context.connection.info["query_start_times"].pop()
+
+
+def instrument_engine(engine) -> None:
+    """Listens to the statements of an engine, once. An AsyncEngine is instrumented through its sync_engine."""
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,130 @@
+"""
+This module contains the migrations of the database schema, which replace `SQLModel.metadata.create_all`.
+Each migration has a version number, and the versions applied to a database are recorded in the
+`schema_migrations` table: `migrate` applies the missing ones in order, in the transaction of the connection it is
+given, so that a failed migration leaves the schema unchanged. On PostgreSQL, a transaction-level advisory lock
+keeps several instances of the application starting at once from migrating the same database twice.
+Databases created with `create_all` before migrations existed hold no `schema_migrations` table: the first
+migration only creates the tables missing, and the next ones check the schema they change, so that they apply to
+these databases as well as to new ones.
+A change of the SQLModel tables needs a new migration, appended to MIGRATIONS: the schema they lead to is tested
+against the metadata of the tables.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import List
+from sqlalchemy import (
+    Column, Connection, Date, DateTime, ForeignKey, Integer, MetaData, String, Table, inspect, select, text)
+
+
+MIGRATION_LOCK_KEY = 727171
+Migration = namedtuple("Migration", ["version", "name", "upgrade"])
+
+migrations_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", migrations_metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False))
+
+
+def create_initial_tables(connection: Connection) -> None:
+    """Creates the tables as they were first declared, without the columns and indexes added by later migrations."""
+    metadata = MetaData()
+    Table("promotions", metadata, Column("id", String, primary_key=True), Column("study_year", Integer, nullable=False),
+          Column("diploma", String, nullable=False), Column("name", String, nullable=False))
+    Table("teachers", metadata, Column("id", String, primary_key=True), Column("name", String, nullable=False),
+          Column("firstname", String, nullable=False))
+    Table("courses", metadata, Column("id", String, primary_key=True), Column("name", String, nullable=False))
+    Table("rooms", metadata, Column("id", String, primary_key=True), Column("name", String, nullable=False),
+          Column("description", String, nullable=False))
+    Table("plannings", metadata, Column("id", String, primary_key=True), Column("date", Date, nullable=False),
+          Column("promotion_id", String, ForeignKey("promotions.id"), nullable=False))
+    Table("planning_slots", metadata, Column("id", String, primary_key=True),
+          Column("hours_start", Integer, nullable=False), Column("minutes_start", Integer, nullable=False),
+          Column("hours_end", Integer, nullable=False), Column("minutes_end", Integer, nullable=False),
+          Column("promotion_id", String, ForeignKey("promotions.id"), nullable=False),
+          Column("teacher_id", String, ForeignKey("teachers.id"), nullable=False),
+          Column("course_id", String, ForeignKey("courses.id"), nullable=False),
+          Column("room_id", String, ForeignKey("rooms.id"), nullable=False),
+          Column("planning_id", String, ForeignKey("plannings.id"), nullable=False))
+    metadata.create_all(connection, checkfirst=True)
+
+
+def add_planning_version(connection: Connection) -> None:
+    columns = {column["name"] for column in inspect(connection).get_columns("plannings")}
+    if "version" not in columns:
+        connection.execute(text("ALTER TABLE plannings ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+def add_planning_indexes(connection: Connection) -> None:
+    """
+    Indexes the plannings by date and promotion, and the slots by planning, and by teacher or room then planning.
+    The single column indexes on date, teacher and room some databases hold are prefixes of these ones, and dropped.
+    """
+    for statement in [
+        "CREATE INDEX IF NOT EXISTS ix_plannings_date_promotion_id ON plannings (date, promotion_id)",
+        "CREATE INDEX IF NOT EXISTS ix_planning_slots_planning_id ON planning_slots (planning_id)",
+        "CREATE INDEX IF NOT EXISTS ix_planning_slots_teacher_id_planning_id ON planning_slots (teacher_id, planning_id)",
+        "CREATE INDEX IF NOT EXISTS ix_planning_slots_room_id_planning_id ON planning_slots (room_id, planning_id)",
+        "DROP INDEX IF EXISTS ix_plannings_date",
+        "DROP INDEX IF EXISTS ix_planning_slots_teacher_id",
+        "DROP INDEX IF EXISTS ix_planning_slots_room_id"
+    ]:
+        connection.execute(text(statement))
+
+
+def add_slot_minutes(connection: Connection) -> None:
+    """
+    Adds the start and end of the slots as minutes since midnight, generated from their hours and minutes, and
+    indexes the slots of a planning by start and end instead of the planning alone.
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("planning_slots")}
+    # SQLite can only add virtual generated columns, PostgreSQL only stored ones.
+    persisted = " STORED" if connection.dialect.name == "postgresql" else ""
+    for column, hours, minutes in [("start_minute", "hours_start", "minutes_start"),
+                                   ("end_minute", "hours_end", "minutes_end")]:
+        if column not in columns:
+            connection.execute(text(f"ALTER TABLE planning_slots ADD COLUMN {column} INTEGER "
+                                    f"GENERATED ALWAYS AS ({hours} * 60 + {minutes}){persisted}"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_planning_slots_planning_id_start_minute "
+                            "ON planning_slots (planning_id, start_minute, end_minute)"))
+    connection.execute(text("DROP INDEX IF EXISTS ix_planning_slots_planning_id"))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "create initial tables", create_initial_tables),
+    Migration(2, "add planning version", add_planning_version),
+    Migration(3, "add planning indexes", add_planning_indexes),
+    Migration(4, "add slot minutes", add_slot_minutes)
+]
+
+
+def applied_versions(connection: Connection) -> List[int]:
+    if not inspect(connection).has_table(schema_migrations.name):
+        return []
+    return list(connection.execute(select(schema_migrations.c.version).order_by(schema_migrations.c.version)).scalars())
+
+
+def migrate(connection: Connection) -> List[int]:
+    """Applies the pending migrations on the connection, and returns their versions. The caller commits."""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    migrations_metadata.create_all(connection, checkfirst=True)
+    applied = set(applied_versions(connection))
+    pending = [migration for migration in MIGRATIONS if migration.version not in applied]
+    for migration in pending:
+        migration.upgrade(connection)
+        connection.execute(schema_migrations.insert().values(
+            version=migration.version, name=migration.name, applied_at=datetime.now(timezone.utc)))
+    return [migration.version for migration in pending]
+
+
+def upgrade(engine) -> List[int]:
+    with engine.begin() as connection:
+        return migrate(connection)
+
+
+async def upgrade_async(engine) -> List[int]:
+    async with engine.begin() as connection:
+        return await connection.run_sync(migrate)
@@ -1,191 +1,643 @@
-"""
-This module defines the persistence layer for Planning and PlanningSlot entities.
-It provides the SQLModel-based implementation for storing and retrieving planning-related
-data from the database. The module includes the definition of Planning and PlanningSlot
-tables, and a PlanningRepository class that offers CRUD operations and utility methods
-for converting between domain and database representations of planning entities.
-"""
-from sqlmodel import Session, select, SQLModel, Field, Relationship
-from typing import List
-from datetime import date
-from src.main.domain.planning import (
-    IPlanningRepository, Planning as DomainPlanning, PlanningId, PlanningSlot as DomainPlanningSlot, PlanningSlotId)
-from src.main.domain.base import BaseRepository
-from src.main.domain.promotion import PromotionId
-from src.main.domain.teacher import TeacherId
-from src.main.domain.course import CourseId
-from src.main.domain.room import RoomId
-import uuid
-
-
-class PlanningSlot(SQLModel, table=True):
-    __tablename__ = "planning_slots"
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    hours_start: int
-    minutes_start: int
-    hours_end: int
-    minutes_end: int
-    promotion_id: str = Field(foreign_key="promotions.id")
-    teacher_id: str = Field(foreign_key="teachers.id")
-    course_id: str = Field(foreign_key="courses.id")
-    room_id: str = Field(foreign_key="rooms.id")
-    planning_id: str = Field(foreign_key="plannings.id")
-    planning: "Planning" = Relationship(back_populates="slots")
-
-
-class Planning(SQLModel, table=True):
-    __tablename__ = "plannings"
-    id: str = Field(primary_key=True)
-    date: date
-    promotion_id: str = Field(foreign_key="promotions.id")
-    slots: List[PlanningSlot] = Relationship(back_populates="planning", cascade_delete=True)
-
-
-class PlanningRepository(BaseRepository, IPlanningRepository):
-    def __init__(self, session: Session):
-        self.session = session
-
-    def find_all(self) -> List[DomainPlanning]:
-        statement = select(Planning)
-        results = self.session.exec(statement)
-        return [self._to_domain(planning) for planning in results.all()]
-
-    def find_by_id(self, id: PlanningId) -> DomainPlanning:
-        statement = select(Planning).where(Planning.id == str(id))
-        result = self.session.exec(statement).first()
-        if not result:
-            raise ValueError("Planning not found")
-        return self._to_domain(result)
-
-    def find_by_date_and_promotion(self, date: date, promotion_id: PromotionId) -> List[DomainPlanning]:
-        statement = select(Planning).where(Planning.date == date, Planning.promotion_id == str(promotion_id))
-        results = self.session.exec(statement)
-        return [self._to_domain(planning) for planning in results.all()]
-
-    def add(self, planning: DomainPlanning) -> None:
-        planning_id = str(planning.id)
-        db_planning = Planning(
-            id=planning_id,
-            date=planning.date,
-            promotion_id=str(planning.promotion_id),
-            slots=[self._to_db_slot(slot, planning_id) for slot in planning.slots]
-        )
-        self.session.add(db_planning)
-        self.session.commit()
-
-    def update(self, planning: DomainPlanning) -> None:
-        planning_id = str(planning.id)
-        db_planning = self.session.get(Planning, planning_id)
-        if not db_planning:
-            raise ValueError("Planning not found")
-        self._update_planning(db_planning, planning)
-
-    def _update_planning(self, db_planning: Planning, planning: DomainPlanning) -> None:
-        db_planning.date = planning.date
-        db_planning.promotion_id = str(planning.promotion_id)
-
-        # Update existing slots and add new ones if necessary
-        existing_slot_ids = {slot.id for slot in db_planning.slots}
-        new_slot_ids = {str(slot.id) for slot in planning.slots}
-
-        # Delete slots that are no longer present
-        for slot in list(db_planning.slots):
-            if slot.id not in new_slot_ids:
-                self.session.delete(slot)
-
-        # Update or add slots
-        for slot in planning.slots:
-            slot_id = str(slot.id)
-            if slot_id in existing_slot_ids:
-                db_slot = self.session.get(PlanningSlot, slot_id)
-                if db_slot:
-                    self._update_slot(db_slot, slot)
-            else:
-                db_slot = self._to_db_slot(slot, str(planning.id))
-                self.session.add(db_slot)
-        self.session.commit()
-
-    def _update_slot(self, db_slot: PlanningSlot, slot: DomainPlanningSlot) -> None:
-        db_slot.hours_start = slot.hours_start
-        db_slot.minutes_start = slot.minutes_start
-        db_slot.hours_end = slot.hours_end
-        db_slot.minutes_end = slot.minutes_end
-        db_slot.teacher_id = str(slot.teacher_id)
-        db_slot.course_id = str(slot.course_id)
-        db_slot.room_id = str(slot.room_id)
-
-    def delete(self, planning: DomainPlanning) -> None:
-        planning_id = str(planning.id)
-        db_planning = self.session.get(Planning, planning_id)
-        if not db_planning:
-            raise ValueError("Planning not found")
-        self.session.delete(db_planning)
-        self.session.commit()
-
-    def _to_domain(self, planning: Planning) -> DomainPlanning:
-        return DomainPlanning(
-            id=PlanningId(id=planning.id),
-            date=planning.date,
-            promotion_id=PromotionId(id=planning.promotion_id),
-            slots=[self._to_domain_slot(slot) for slot in planning.slots]
-        )
-
-    def _to_domain_slot(self, slot: PlanningSlot) -> DomainPlanningSlot:
-        return DomainPlanningSlot(
-            id=PlanningSlotId(id=slot.id),
-            hours_start=slot.hours_start,
-            minutes_start=slot.minutes_start,
-            hours_end=slot.hours_end,
-            minutes_end=slot.minutes_end,
-            promotion_id=PromotionId(id=slot.promotion_id),
-            teacher_id=TeacherId(id=slot.teacher_id),
-            course_id=CourseId(id=slot.course_id),
-            room_id=RoomId(id=slot.room_id)
-        )
-
-    def _to_db_slot(self, slot: DomainPlanningSlot, planning_id: str) -> PlanningSlot:
-        return PlanningSlot(
-            id=str(slot.id),
-            hours_start=slot.hours_start,
-            minutes_start=slot.minutes_start,
-            hours_end=slot.hours_end,
-            minutes_end=slot.minutes_end,
-            promotion_id=str(slot.promotion_id),
-            teacher_id=str(slot.teacher_id),
-            course_id=str(slot.course_id),
-            room_id=str(slot.room_id),
-            planning_id=planning_id
-        )
-
-    def find_slot_by_id(self, planning_id: PlanningId, slot_id: PlanningSlotId) -> DomainPlanningSlot:
-        statement = select(PlanningSlot).where(PlanningSlot.id == slot_id.id, PlanningSlot.planning_id == planning_id.id)
-        result = self.session.exec(statement).first()
-        if not result:
-            raise ValueError("Planning slot not found")
-        return self._to_domain_slot(result)
-
-    def add_slot(self, planning_id: PlanningId, slot: DomainPlanningSlot) -> None:
-        db_slot = self._to_db_slot(slot, planning_id=str(planning_id))
-        self.session.add(db_slot)
-        self.session.commit()
-
-    def update_slot(self, planning_id: PlanningId, slot: DomainPlanningSlot) -> None:
-        db_slot = self.session.get(PlanningSlot, str(slot.id))
-        if not db_slot or db_slot.planning_id != str(planning_id):
-            raise ValueError("Planning slot not found")
-        db_slot.hours_start = slot.hours_start
-        db_slot.minutes_start = slot.minutes_start
-        db_slot.hours_end = slot.hours_end
-        db_slot.minutes_end = slot.minutes_end
-        db_slot.teacher_id = str(slot.teacher_id)
-        db_slot.course_id = str(slot.course_id)
-        db_slot.room_id = str(slot.room_id)
-        self.session.add(db_slot)
-        self.session.commit()
-
-    def delete_slot(self, planning_id: PlanningId, slot_id: PlanningSlotId) -> None:
-        db_slot = self.session.get(PlanningSlot, str(slot_id))
-        if not db_slot or db_slot.planning_id != str(planning_id):
-            raise ValueError("Planning slot not found")
-        self.session.delete(db_slot)
-        self.session.commit()
+"""
+This module defines the persistence layer for Planning and PlanningSlot entities.
+It provides the SQLModel-based implementation for storing and retrieving planning-related
+data from the database. The module includes the definition of Planning and PlanningSlot
+tables, and a PlanningRepository class that offers CRUD operations and utility methods
+for converting between domain and database representations of planning entities.
+AsyncPlanningRepository offers the same methods as coroutines, on top of an AsyncSession.
+"""
+from sqlmodel import Session, select, SQLModel, Field, Relationship, tuple_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import Column, Computed, Index, Integer, delete, insert, or_, text, update
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Iterable, Iterator, List, Optional, Tuple
+from datetime import date
+from src.main.domain.collision import shared_resource_keys
+from src.main.domain.planning import (
+    ConcurrentUpdateError, IPlanningRepository, Planning as DomainPlanning, PlanningId, PlanningSlot as DomainPlanningSlot,
+    PlanningSlotId, ResourceConflictError)
+from src.main.domain.base import BaseRepository
+from src.main.domain.promotion import PromotionId
+from src.main.domain.teacher import TeacherId
+from src.main.domain.course import CourseId
+from src.main.domain.room import RoomId
+import uuid
+import zlib
+
+
+BULK_INSERT_BATCH_SIZE = 500
+# Generated by the database, never written.
+SLOT_MINUTE_COLUMNS = {"start_minute", "end_minute"}
+
+
+def _batches(rows: list, size: int) -> Iterator[list]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class PlanningSlot(SQLModel, table=True):
+    """
+    Slots are indexed by planning then start, to search the slots of a planning overlapping an interval instead of
+    scanning them, and by teacher or room then planning, to find their bookings. The indexes are created by the
+    migrations, and declared here to match them.
+    start_minute and end_minute are generated by the database from the hours and minutes: overlap, range and
+    availability queries compare them directly.
+    """
+    __tablename__ = "planning_slots"
+    __table_args__ = (Index("ix_planning_slots_planning_id_start_minute", "planning_id", "start_minute", "end_minute"),
+                      Index("ix_planning_slots_teacher_id_planning_id", "teacher_id", "planning_id"),
+                      Index("ix_planning_slots_room_id_planning_id", "room_id", "planning_id"))
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    hours_start: int
+    minutes_start: int
+    hours_end: int
+    minutes_end: int
+    start_minute: Optional[int] = Field(
+        default=None, sa_column=Column("start_minute", Integer, Computed("hours_start * 60 + minutes_start")))
+    end_minute: Optional[int] = Field(
+        default=None, sa_column=Column("end_minute", Integer, Computed("hours_end * 60 + minutes_end")))
+    promotion_id: str = Field(foreign_key="promotions.id")
+    teacher_id: str = Field(foreign_key="teachers.id")
+    course_id: str = Field(foreign_key="courses.id")
+    room_id: str = Field(foreign_key="rooms.id")
+    planning_id: str = Field(foreign_key="plannings.id")
+    planning: "Planning" = Relationship(back_populates="slots")
+
+
+class Planning(SQLModel, table=True):
+    """
+    Plannings are indexed by date and promotion. The version is incremented by every write of the planning or of
+    one of its slots, so that it identifies the state of a planning without loading its slots.
+    """
+    __tablename__ = "plannings"
+    # Declared on the table: a `date` field default would clash with its `date` type annotation.
+    __table_args__ = (Index("ix_plannings_date_promotion_id", "date", "promotion_id"),)
+    id: str = Field(primary_key=True)
+    date: date
+    promotion_id: str = Field(foreign_key="promotions.id")
+    version: int = Field(default=1)
+    slots: List[PlanningSlot] = Relationship(back_populates="planning", cascade_delete=True)
+
+
+class PlanningMapper:
+    """
+    Statements and conversions between domain and database representations of a planning,
+    shared by both repositories.
+    """
+    def _select_plannings(self):
+        # Slots of every selected planning are fetched by a single extra query, instead of one lazy load per planning.
+        return select(Planning).options(selectinload(Planning.slots))
+
+    def _select_range(self, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      promotion_id: Optional[PromotionId] = None):
+        statement = self._select_plannings()
+        if date_from is not None:
+            statement = statement.where(Planning.date >= date_from)
+        if date_to is not None:
+            statement = statement.where(Planning.date <= date_to)
+        if promotion_id is not None:
+            statement = statement.where(Planning.promotion_id == str(promotion_id))
+        return statement.order_by(Planning.date, Planning.id)
+
+    def _select_page(self, limit: int, after: Optional[Tuple[date, PlanningId]] = None, date_from: Optional[date] = None,
+                     date_to: Optional[date] = None, promotion_id: Optional[PromotionId] = None):
+        statement = self._select_range(date_from, date_to, promotion_id)
+        if after is not None:
+            after_date, after_id = after
+            statement = statement.where(tuple_(Planning.date, Planning.id) > (after_date, str(after_id)))
+        return statement.limit(limit)
+
+    def _select_version(self, id: PlanningId):
+        return select(Planning.version).where(Planning.id == str(id))
+
+    def _select_header(self, id: PlanningId):
+        return select(Planning.date, Planning.promotion_id, Planning.version).where(Planning.id == str(id))
+
+    def _to_header(self, id: PlanningId, row) -> DomainPlanning:
+        if row is None:
+            raise ValueError("Planning not found")
+        return DomainPlanning(
+            id=id, date=row.date, promotion_id=PromotionId(id=row.promotion_id), slots=[], version=row.version)
+
+    def _increment_version(self, planning_id: PlanningId, expected_version: Optional[int] = None, **values):
+        """
+        UPDATE incrementing the version of a planning, only if it is still at expected_version when it is given.
+        Writes are optimistic: a planning written in between matches no row, which _check_version reports as a
+        ConcurrentUpdateError instead of overwriting the other write. No row is locked while the planning is edited.
+        """
+        statement = update(Planning).where(Planning.id == str(planning_id))
+        if expected_version is not None:
+            statement = statement.where(Planning.version == expected_version)
+        return statement.values(version=Planning.version + 1, **values)
+
+    def _check_version(self, result, planning_id: PlanningId, expected_version: Optional[int]) -> None:
+        if expected_version is not None and result.rowcount != 1:
+            raise ConcurrentUpdateError(f"Planning {planning_id} was modified since version {expected_version}")
+
+    def _filter_resources(self, statement, teacher_id: Optional[TeacherId], room_id: Optional[RoomId],
+                          promotion_id: Optional[PromotionId]):
+        resources = [column == str(value) for column, value in [
+            (PlanningSlot.teacher_id, teacher_id), (PlanningSlot.room_id, room_id),
+            (PlanningSlot.promotion_id, promotion_id)] if value is not None]
+        return statement.where(or_(*resources)) if resources else statement
+
+    def _select_overlapping_slots(self, date: date, start_minute: int, end_minute: int,
+                                  teacher_id: Optional[TeacherId] = None, room_id: Optional[RoomId] = None,
+                                  promotion_id: Optional[PromotionId] = None):
+        statement = (select(PlanningSlot).join(Planning, PlanningSlot.planning_id == Planning.id)
+                     .where(Planning.date == date, PlanningSlot.start_minute < end_minute,
+                            PlanningSlot.end_minute > start_minute))
+        statement = self._filter_resources(statement, teacher_id, room_id, promotion_id)
+        return statement.order_by(PlanningSlot.start_minute, PlanningSlot.id)
+
+    def _select_bookings(self, date_from: date, date_to: date, teacher_id: Optional[TeacherId] = None,
+                         room_id: Optional[RoomId] = None, promotion_id: Optional[PromotionId] = None):
+        statement = (select(Planning.date, PlanningSlot.start_minute, PlanningSlot.end_minute)
+                     .join(Planning, PlanningSlot.planning_id == Planning.id)
+                     .where(Planning.date >= date_from, Planning.date <= date_to))
+        statement = self._filter_resources(statement, teacher_id, room_id, promotion_id)
+        return statement.order_by(Planning.date, PlanningSlot.start_minute)
+
+    def _lock_bookings(self, dialect: str, slots: Iterable[DomainPlanningSlot]) -> list:
+        """
+        On PostgreSQL, statements taking a transaction-level advisory lock on each teacher and room of the slots,
+        in a fixed order so that two transactions never wait for each other: concurrent transactions booking the
+        same teacher or room are serialised, and each one sees the slots committed by the other. Nothing is locked
+        on other databases, SQLite only letting one transaction write at a time.
+        """
+        if dialect != "postgresql":
+            return []
+        keys = sorted({zlib.crc32(f"{kind}:{value}".encode()) for slot in slots for kind, value in shared_resource_keys(slot)})
+        return [text("SELECT pg_advisory_xact_lock(:key)").bindparams(key=key) for key in keys]
+
+    def _select_booking_conflicts(self, planning_ids: List[str], slot_ids: Optional[List[str]] = None) -> list:
+        """
+        Statements selecting the first (slot id, booking slot id) pair where a slot of the given plannings, or one of
+        the given slots only, overlaps a slot of another planning of the same date with the same teacher, then room.
+        Teachers and rooms are queried separately, so that each statement searches the slots through the index of
+        its resource, and never scans them.
+        """
+        statements = []
+        for batch in _batches(slot_ids if slot_ids is not None else planning_ids, BULK_INSERT_BATCH_SIZE):
+            for column in ["teacher_id", "room_id"]:
+                written, booked = aliased(PlanningSlot), aliased(PlanningSlot)
+                written_planning, booked_planning = aliased(Planning), aliased(Planning)
+                statement = (select(written.id, booked.id)
+                             .join(written_planning, written.planning_id == written_planning.id)
+                             .join(booked_planning, booked_planning.date == written_planning.date)
+                             .join(booked, booked.planning_id == booked_planning.id)
+                             .where(booked_planning.id != written_planning.id,
+                                    getattr(booked, column) == getattr(written, column),
+                                    booked.start_minute < written.end_minute, booked.end_minute > written.start_minute))
+                written_ids = written.id if slot_ids is not None else written.planning_id
+                statements.append(statement.where(written_ids.in_(batch)).limit(1))
+        return statements
+
+    def _raise_conflict(self, conflict) -> None:
+        if conflict is not None:
+            slot_id, booked_id = conflict
+            raise ResourceConflictError(f"Teacher or room of slot {slot_id} is already booked by slot {booked_id}")
+
+    def _select_existing_ids(self, ids: List[PlanningId]):
+        return [select(Planning.id).where(Planning.id.in_(batch))
+                for batch in _batches(sorted({str(id) for id in ids}), BULK_INSERT_BATCH_SIZE)]
+
+    def _select_existing_slot_ids(self, ids: List[PlanningSlotId]):
+        return [select(PlanningSlot.id).where(PlanningSlot.id.in_(batch))
+                for batch in _batches(sorted({str(id) for id in ids}), BULK_INSERT_BATCH_SIZE)]
+
+    def _insert_plannings(self, plannings: List[DomainPlanning]):
+        """Multi-row INSERT statements for the given plannings, then for their slots, BULK_INSERT_BATCH_SIZE rows each."""
+        planning_rows = [
+            {"id": str(planning.id), "date": planning.date, "promotion_id": str(planning.promotion_id), "version": 1}
+            for planning in plannings
+        ]
+        slot_rows = [self._to_slot_row(slot, str(planning.id)) for planning in plannings for slot in planning.slots]
+        return ([insert(Planning).values(batch) for batch in _batches(planning_rows, BULK_INSERT_BATCH_SIZE)]
+                + [insert(PlanningSlot).values(batch) for batch in _batches(slot_rows, BULK_INSERT_BATCH_SIZE)])
+
+    def _to_db(self, planning: DomainPlanning) -> Planning:
+        planning_id = str(planning.id)
+        return Planning(
+            id=planning_id,
+            date=planning.date,
+            promotion_id=str(planning.promotion_id),
+            slots=[self._to_db_slot(slot, planning_id) for slot in planning.slots]
+        )
+
+    def _write_slot_changes(self, db_slots: List[PlanningSlot], planning: DomainPlanning) -> list:
+        """
+        Compares the stored slots of a planning with its domain slots, and returns the (statement, parameters)
+        pairs writing only the differences: multi-row INSERT statements for the added slots, DELETE statements
+        for the removed ones and a single executemany UPDATE, by primary key, for the changed ones.
+        """
+        planning_id = str(planning.id)
+        stored = {db_slot.id: db_slot for db_slot in db_slots}
+        rows = {str(slot.id): self._to_slot_row(slot, planning_id) for slot in planning.slots}
+        added = [row for slot_id, row in rows.items() if slot_id not in stored]
+        removed = [slot_id for slot_id in stored if slot_id not in rows]
+        changed = [
+            row for slot_id, row in rows.items()
+            if slot_id in stored and any(getattr(stored[slot_id], column) != value for column, value in row.items())
+        ]
+        statements = [(insert(PlanningSlot).values(batch), None) for batch in _batches(added, BULK_INSERT_BATCH_SIZE)]
+        statements += [(delete(PlanningSlot).where(PlanningSlot.id.in_(batch)), None)
+                       for batch in _batches(removed, BULK_INSERT_BATCH_SIZE)]
+        if changed:
+            statements.append((update(PlanningSlot), changed))
+        return statements
+
+    def _update_slot(self, db_slot: PlanningSlot, slot: DomainPlanningSlot) -> None:
+        db_slot.hours_start = slot.hours_start
+        db_slot.minutes_start = slot.minutes_start
+        db_slot.hours_end = slot.hours_end
+        db_slot.minutes_end = slot.minutes_end
+        db_slot.teacher_id = str(slot.teacher_id)
+        db_slot.course_id = str(slot.course_id)
+        db_slot.room_id = str(slot.room_id)
+
+    def _to_domain(self, planning: Planning) -> DomainPlanning:
+        return DomainPlanning(
+            id=PlanningId(id=planning.id),
+            date=planning.date,
+            promotion_id=PromotionId(id=planning.promotion_id),
+            slots=[self._to_domain_slot(slot) for slot in planning.slots],
+            version=planning.version
+        )
+
+    def _to_domain_slot(self, slot: PlanningSlot) -> DomainPlanningSlot:
+        return DomainPlanningSlot(
+            id=PlanningSlotId(id=slot.id),
+            hours_start=slot.hours_start,
+            minutes_start=slot.minutes_start,
+            hours_end=slot.hours_end,
+            minutes_end=slot.minutes_end,
+            promotion_id=PromotionId(id=slot.promotion_id),
+            teacher_id=TeacherId(id=slot.teacher_id),
+            course_id=CourseId(id=slot.course_id),
+            room_id=RoomId(id=slot.room_id)
+        )
+
+    def _to_db_slot(self, slot: DomainPlanningSlot, planning_id: str) -> PlanningSlot:
+        return PlanningSlot(
+            id=str(slot.id),
+            hours_start=slot.hours_start,
+            minutes_start=slot.minutes_start,
+            hours_end=slot.hours_end,
+            minutes_end=slot.minutes_end,
+            promotion_id=str(slot.promotion_id),
+            teacher_id=str(slot.teacher_id),
+            course_id=str(slot.course_id),
+            room_id=str(slot.room_id),
+            planning_id=planning_id
+        )
+
+    def _to_slot_row(self, slot: DomainPlanningSlot, planning_id: str) -> dict:
+        return self._to_db_slot(slot, planning_id).model_dump(exclude=SLOT_MINUTE_COLUMNS)
+
+    def _select_slot(self, planning_id: PlanningId, slot_id: PlanningSlotId):
+        return select(PlanningSlot).where(PlanningSlot.id == str(slot_id), PlanningSlot.planning_id == str(planning_id))
+
+
+class PlanningRepository(PlanningMapper, BaseRepository, IPlanningRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def find_all(self) -> List[DomainPlanning]:
+        statement = self._select_plannings()
+        results = self.session.exec(statement)
+        return [self._to_domain(planning) for planning in results.all()]
+
+    def find_by_id(self, id: PlanningId) -> DomainPlanning:
+        statement = self._select_plannings().where(Planning.id == str(id))
+        result = self.session.exec(statement).first()
+        if not result:
+            raise ValueError("Planning not found")
+        return self._to_domain(result)
+
+    def find_version(self, id: PlanningId) -> int:
+        version = self.session.exec(self._select_version(id)).first()
+        if version is None:
+            raise ValueError("Planning not found")
+        return version
+
+    def find_header(self, id: PlanningId) -> DomainPlanning:
+        return self._to_header(id, self.session.exec(self._select_header(id)).first())
+
+    def find_by_date_and_promotion(self, date: date, promotion_id: PromotionId) -> List[DomainPlanning]:
+        statement = self._select_plannings().where(
+            Planning.date == date, Planning.promotion_id == str(promotion_id))
+        results = self.session.exec(statement)
+        return [self._to_domain(planning) for planning in results.all()]
+
+    def find_by_date_range(self, date_from: date, date_to: date,
+                           promotion_id: Optional[PromotionId] = None) -> List[DomainPlanning]:
+        results = self.session.exec(self._select_range(date_from, date_to, promotion_id))
+        return [self._to_domain(planning) for planning in results.all()]
+
+    def find_page(self, limit: int, after: Optional[Tuple[date, PlanningId]] = None, date_from: Optional[date] = None,
+                  date_to: Optional[date] = None, promotion_id: Optional[PromotionId] = None) -> List[DomainPlanning]:
+        statement = self._select_page(limit, after, date_from, date_to, promotion_id)
+        results = self.session.exec(statement)
+        return [self._to_domain(planning) for planning in results.all()]
+
+    def find_existing_ids(self, ids: List[PlanningId]) -> List[PlanningId]:
+        return [PlanningId(id=planning_id)
+                for statement in self._select_existing_ids(ids) for planning_id in self.session.exec(statement)]
+
+    def find_existing_slot_ids(self, ids: List[PlanningSlotId]) -> List[PlanningSlotId]:
+        return [PlanningSlotId(id=slot_id)
+                for statement in self._select_existing_slot_ids(ids) for slot_id in self.session.exec(statement)]
+
+    def find_overlapping_slots(self, date: date, start_minute: int, end_minute: int,
+                               teacher_id: Optional[TeacherId] = None, room_id: Optional[RoomId] = None,
+                               promotion_id: Optional[PromotionId] = None) -> List[DomainPlanningSlot]:
+        statement = self._select_overlapping_slots(date, start_minute, end_minute, teacher_id, room_id, promotion_id)
+        return [self._to_domain_slot(slot) for slot in self.session.exec(statement).all()]
+
+    def find_bookings(self, date_from: date, date_to: date, teacher_id: Optional[TeacherId] = None,
+                      room_id: Optional[RoomId] = None,
+                      promotion_id: Optional[PromotionId] = None) -> List[Tuple[date, int, int]]:
+        statement = self._select_bookings(date_from, date_to, teacher_id, room_id, promotion_id)
+        return [tuple(booking) for booking in self.session.exec(statement).all()]
+
+    def add(self, planning: DomainPlanning) -> None:
+        try:
+            self.session.add(self._to_db(planning))
+            self._check_bookings(planning.slots, [str(planning.id)])
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        planning.version = 1
+
+    def add_all(self, plannings: List[DomainPlanning]) -> None:
+        try:
+            for statement in self._insert_plannings(plannings):
+                self.session.exec(statement)
+            self._check_bookings([slot for planning in plannings for slot in planning.slots],
+                                 [str(planning.id) for planning in plannings])
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        for planning in plannings:
+            planning.version = 1
+
+    def _check_bookings(self, slots: List[DomainPlanningSlot], planning_ids: List[str],
+                        slot_ids: Optional[List[str]] = None) -> None:
+        """
+        Checks the written slots against the slots of the other plannings, before the transaction is committed: a
+        teacher or a room already booked raises a ResourceConflictError, which rolls the write back.
+        """
+        for statement in self._lock_bookings(self.session.get_bind().dialect.name, slots):
+            self.session.exec(statement)
+        for statement in self._select_booking_conflicts(planning_ids, slot_ids):
+            self._raise_conflict(self.session.exec(statement).first())
+
+    def update(self, planning: DomainPlanning) -> None:
+        """
+        Writes only the slots that were added, removed or changed, with batched statements, and increments the
+        version of the planning if it is still the one it was read at. A planning that was not read from the
+        repository (version 0) is written whatever its stored version.
+        """
+        planning_id = str(planning.id)
+        db_planning = self.session.get(Planning, planning_id)
+        if not db_planning:
+            raise ValueError("Planning not found")
+        self._update_planning(db_planning, planning)
+
+    def _update_planning(self, db_planning: Planning, planning: DomainPlanning) -> None:
+        try:
+            slot_changes = self._write_slot_changes(db_planning.slots, planning)
+            self._write_version(planning.id, planning.version or None, date=planning.date,
+                                promotion_id=str(planning.promotion_id))
+            # Already written by the statement above: the loaded planning is kept in sync without being flushed again.
+            set_committed_value(db_planning, "date", planning.date)
+            set_committed_value(db_planning, "promotion_id", str(planning.promotion_id))
+            for statement, params in slot_changes:
+                self.session.exec(statement, params=params)
+            self._check_bookings(planning.slots, [str(planning.id)])
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        if planning.version:
+            planning.version += 1
+
+    def _write_version(self, planning_id: PlanningId, expected_version: Optional[int] = None, **values) -> None:
+        result = self.session.exec(self._increment_version(planning_id, expected_version, **values))
+        self._check_version(result, planning_id, expected_version)
+
+    def delete(self, planning: DomainPlanning) -> None:
+        planning_id = str(planning.id)
+        db_planning = self.session.get(Planning, planning_id)
+        if not db_planning:
+            raise ValueError("Planning not found")
+        self.session.delete(db_planning)
+        self.session.commit()
+
+    def find_slot_by_id(self, planning_id: PlanningId, slot_id: PlanningSlotId) -> DomainPlanningSlot:
+        result = self.session.exec(self._select_slot(planning_id, slot_id)).first()
+        if not result:
+            raise ValueError("Planning slot not found")
+        return self._to_domain_slot(result)
+
+    def add_slot(self, planning_id: PlanningId, slot: DomainPlanningSlot, expected_version: Optional[int] = None) -> None:
+        self.session.add(self._to_db_slot(slot, planning_id=str(planning_id)))
+        self._commit_slot_write(planning_id, expected_version, slot)
+
+    def update_slot(self, planning_id: PlanningId, slot: DomainPlanningSlot,
+                    expected_version: Optional[int] = None) -> None:
+        db_slot = self.session.get(PlanningSlot, str(slot.id))
+        if not db_slot or db_slot.planning_id != str(planning_id):
+            raise ValueError("Planning slot not found")
+        self._update_slot(db_slot, slot)
+        self.session.add(db_slot)
+        self._commit_slot_write(planning_id, expected_version, slot)
+
+    def delete_slot(self, planning_id: PlanningId, slot_id: PlanningSlotId, expected_version: Optional[int] = None) -> None:
+        db_slot = self.session.get(PlanningSlot, str(slot_id))
+        if not db_slot or db_slot.planning_id != str(planning_id):
+            raise ValueError("Planning slot not found")
+        self.session.delete(db_slot)
+        self._commit_slot_write(planning_id, expected_version)
+
+    def _commit_slot_write(self, planning_id: PlanningId, expected_version: Optional[int],
+                           slot: Optional[DomainPlanningSlot] = None) -> None:
+        try:
+            self._write_version(planning_id, expected_version)
+            if slot is not None:
+                self._check_bookings([slot], [str(planning_id)], [str(slot.id)])
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+
+class AsyncPlanningRepository(PlanningMapper, BaseRepository, IPlanningRepository):
+    """PlanningRepository counterpart working on an AsyncSession: every method is a coroutine."""
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_all(self) -> List[DomainPlanning]:
+        results = await self.session.exec(self._select_plannings())
+        return [self._to_domain(planning) for planning in results.all()]
+
+    async def find_by_id(self, id: PlanningId) -> DomainPlanning:
+        result = (await self.session.exec(self._select_plannings().where(Planning.id == str(id)))).first()
+        if not result:
+            raise ValueError("Planning not found")
+        return self._to_domain(result)
+
+    async def find_version(self, id: PlanningId) -> int:
+        version = (await self.session.exec(self._select_version(id))).first()
+        if version is None:
+            raise ValueError("Planning not found")
+        return version
+
+    async def find_header(self, id: PlanningId) -> DomainPlanning:
+        return self._to_header(id, (await self.session.exec(self._select_header(id))).first())
+
+    async def find_by_date_and_promotion(self, date: date, promotion_id: PromotionId) -> List[DomainPlanning]:
+        statement = self._select_plannings().where(
+            Planning.date == date, Planning.promotion_id == str(promotion_id))
+        results = await self.session.exec(statement)
+        return [self._to_domain(planning) for planning in results.all()]
+
+    async def find_by_date_range(self, date_from: date, date_to: date,
+                                 promotion_id: Optional[PromotionId] = None) -> List[DomainPlanning]:
+        results = await self.session.exec(self._select_range(date_from, date_to, promotion_id))
+        return [self._to_domain(planning) for planning in results.all()]
+
+    async def find_page(self, limit: int, after: Optional[Tuple[date, PlanningId]] = None,
+                        date_from: Optional[date] = None, date_to: Optional[date] = None,
+                        promotion_id: Optional[PromotionId] = None) -> List[DomainPlanning]:
+        results = await self.session.exec(self._select_page(limit, after, date_from, date_to, promotion_id))
+        return [self._to_domain(planning) for planning in results.all()]
+
+    async def find_existing_ids(self, ids: List[PlanningId]) -> List[PlanningId]:
+        existing_ids = []
+        for statement in self._select_existing_ids(ids):
+            existing_ids.extend(PlanningId(id=planning_id) for planning_id in await self.session.exec(statement))
+        return existing_ids
+
+    async def find_existing_slot_ids(self, ids: List[PlanningSlotId]) -> List[PlanningSlotId]:
+        existing_ids = []
+        for statement in self._select_existing_slot_ids(ids):
+            existing_ids.extend(PlanningSlotId(id=slot_id) for slot_id in await self.session.exec(statement))
+        return existing_ids
+
+    async def find_overlapping_slots(self, date: date, start_minute: int, end_minute: int,
+                                     teacher_id: Optional[TeacherId] = None, room_id: Optional[RoomId] = None,
+                                     promotion_id: Optional[PromotionId] = None) -> List[DomainPlanningSlot]:
+        statement = self._select_overlapping_slots(date, start_minute, end_minute, teacher_id, room_id, promotion_id)
+        return [self._to_domain_slot(slot) for slot in (await self.session.exec(statement)).all()]
+
+    async def find_bookings(self, date_from: date, date_to: date, teacher_id: Optional[TeacherId] = None,
+                            room_id: Optional[RoomId] = None,
+                            promotion_id: Optional[PromotionId] = None) -> List[Tuple[date, int, int]]:
+        statement = self._select_bookings(date_from, date_to, teacher_id, room_id, promotion_id)
+        return [tuple(booking) for booking in (await self.session.exec(statement)).all()]
+
+    async def add(self, planning: DomainPlanning) -> None:
+        try:
+            self.session.add(self._to_db(planning))
+            await self._check_bookings(planning.slots, [str(planning.id)])
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        planning.version = 1
+
+    async def add_all(self, plannings: List[DomainPlanning]) -> None:
+        try:
+            for statement in self._insert_plannings(plannings):
+                await self.session.exec(statement)
+            await self._check_bookings([slot for planning in plannings for slot in planning.slots],
+                                       [str(planning.id) for planning in plannings])
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        for planning in plannings:
+            planning.version = 1
+
+    async def _check_bookings(self, slots: List[DomainPlanningSlot], planning_ids: List[str],
+                              slot_ids: Optional[List[str]] = None) -> None:
+        for statement in self._lock_bookings(self.session.get_bind().dialect.name, slots):
+            await self.session.exec(statement)
+        for statement in self._select_booking_conflicts(planning_ids, slot_ids):
+            self._raise_conflict((await self.session.exec(statement)).first())
+
+    async def update(self, planning: DomainPlanning) -> None:
+        # Slots must be loaded up front: lazy loading is not available on an AsyncSession.
+        db_planning = await self.session.get(Planning, str(planning.id), options=[selectinload(Planning.slots)])
+        if not db_planning:
+            raise ValueError("Planning not found")
+        try:
+            slot_changes = self._write_slot_changes(db_planning.slots, planning)
+            await self._write_version(
+                planning.id, planning.version or None, date=planning.date, promotion_id=str(planning.promotion_id))
+            for statement, params in slot_changes:
+                await self.session.exec(statement, params=params)
+            await self._check_bookings(planning.slots, [str(planning.id)])
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        if planning.version:
+            planning.version += 1
+        # Slots were written without the unit of work: the objects loaded by this session are refreshed by the
+        # next query instead of being served stale, as they are not expired on commit.
+        self.session.expire_all()
+
+    async def delete(self, planning: DomainPlanning) -> None:
+        db_planning = await self.session.get(Planning, str(planning.id))
+        if not db_planning:
+            raise ValueError("Planning not found")
+        await self.session.delete(db_planning)
+        await self.session.commit()
+
+    async def find_slot_by_id(self, planning_id: PlanningId, slot_id: PlanningSlotId) -> DomainPlanningSlot:
+        result = (await self.session.exec(self._select_slot(planning_id, slot_id))).first()
+        if not result:
+            raise ValueError("Planning slot not found")
+        return self._to_domain_slot(result)
+
+    async def add_slot(self, planning_id: PlanningId, slot: DomainPlanningSlot,
+                       expected_version: Optional[int] = None) -> None:
+        self.session.add(self._to_db_slot(slot, planning_id=str(planning_id)))
+        await self._commit_slot_write(planning_id, expected_version, slot)
+
+    async def update_slot(self, planning_id: PlanningId, slot: DomainPlanningSlot,
+                          expected_version: Optional[int] = None) -> None:
+        db_slot = await self.session.get(PlanningSlot, str(slot.id))
+        if not db_slot or db_slot.planning_id != str(planning_id):
+            raise ValueError("Planning slot not found")
+        self._update_slot(db_slot, slot)
+        await self._commit_slot_write(planning_id, expected_version, slot)
+
+    async def delete_slot(self, planning_id: PlanningId, slot_id: PlanningSlotId,
+                          expected_version: Optional[int] = None) -> None:
+        db_slot = await self.session.get(PlanningSlot, str(slot_id))
+        if not db_slot or db_slot.planning_id != str(planning_id):
+            raise ValueError("Planning slot not found")
+        await self.session.delete(db_slot)
+        await self._commit_slot_write(planning_id, expected_version)
+
+    async def _write_version(self, planning_id: PlanningId, expected_version: Optional[int] = None, **values) -> None:
+        result = await self.session.exec(self._increment_version(planning_id, expected_version, **values))
+        self._check_version(result, planning_id, expected_version)
+
+    async def _commit_slot_write(self, planning_id: PlanningId, expected_version: Optional[int],
+                                 slot: Optional[DomainPlanningSlot] = None) -> None:
+        try:
+            await self._write_version(planning_id, expected_version)
+            if slot is not None:
+                await self._check_bookings([slot], [str(planning_id)], [str(slot.id)])
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
@@ -1,70 +1,126 @@
-"""
-This module defines the persistence layer for the Promotion entity. It provides an implementation
-using SQLModel for storing and retrieving promotion-related data from the database. The module
-includes the definition of the Promotion table and a PromotionRepository class that offers
-CRUD operations and utility methods for converting between domain and database representations
-of promotion entities.
-"""
-from sqlmodel import Session, select, SQLModel, Field
-from typing import List
-from src.main.domain.promotion import IPromotionRepository, Promotion as DomainPromotion, PromotionId
-from src.main.domain.base import BaseRepository
-
-
-class Promotion(SQLModel, table=True):
-    __tablename__ = "promotions"
-    __table_args__ = {"extend_existing": True}
-    id: str = Field(primary_key=True)
-    study_year: int
-    diploma: str
-    name: str
-
-
-class PromotionRepository(BaseRepository, IPromotionRepository):
-    def __init__(self, session: Session):
-        self.session = session
-
-    def find_all(self) -> List[DomainPromotion]:
-        statement = select(Promotion)
-        results = self.session.exec(statement)
-        return [self._to_domain(promotion) for promotion in results.all()]
-
-    def find_by_id(self, id: PromotionId) -> DomainPromotion:
-        statement = select(Promotion).where(Promotion.id == str(id))
-        result = self.session.exec(statement).first()
-        if not result:
-            raise ValueError("Promotion not found")
-        return self._to_domain(result)
-
-    def add(self, promotion: DomainPromotion) -> None:
-        db_promotion = Promotion(
-            id=str(promotion.id),
-            study_year=promotion.study_year,
-            diploma=promotion.diploma,
-            name=promotion.name
-        )
-        self.session.add(db_promotion)
-        self.session.commit()
-
-    def update(self, promotion: DomainPromotion) -> None:
-        db_promotion = Promotion(
-            id=str(promotion.id),
-            study_year=promotion.study_year,
-            diploma=promotion.diploma,
-            name=promotion.name
-        )
-        self.session.merge(db_promotion)
-        self.session.commit()
-
-    def delete(self, id: PromotionId) -> None:
-        db_promotion = self.session.get(Promotion, str(id))
-        self.session.delete(db_promotion)
-        self.session.commit()
-
-    def _to_domain(self, promotion: Promotion) -> DomainPromotion:
-        return DomainPromotion(
-            id=PromotionId(id=promotion.id),
-            study_year=promotion.study_year,
-            diploma=promotion.diploma,
-            name=promotion.name
-        )
+"""
+This module defines the persistence layer for the Promotion entity. It provides an implementation
+using SQLModel for storing and retrieving promotion-related data from the database. The module
+includes the definition of the Promotion table and a PromotionRepository class that offers
+CRUD operations and utility methods for converting between domain and database representations
+of promotion entities. AsyncPromotionRepository offers the same methods as coroutines, on top of an AsyncSession.
+"""
+from sqlmodel import Session, select, SQLModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncIterator, Iterator, List
+from src.main.domain.promotion import IPromotionRepository, Promotion as DomainPromotion, PromotionId
+from src.main.domain.base import BaseRepository
+from src.main.persistence.database import DATABASE_STREAM_BATCH_SIZE
+
+
+class Promotion(SQLModel, table=True):
+    __tablename__ = "promotions"
+    __table_args__ = {"extend_existing": True}
+    id: str = Field(primary_key=True)
+    study_year: int
+    diploma: str
+    name: str
+
+
+class PromotionMapper:
+    """Conversions between domain and database representations of a promotion, shared by both repositories."""
+    def _to_domain(self, promotion: Promotion) -> DomainPromotion:
+        return DomainPromotion(
+            id=PromotionId(id=promotion.id),
+            study_year=promotion.study_year,
+            diploma=promotion.diploma,
+            name=promotion.name
+        )
+
+    def _to_db(self, promotion: DomainPromotion) -> Promotion:
+        return Promotion(
+            id=str(promotion.id),
+            study_year=promotion.study_year,
+            diploma=promotion.diploma,
+            name=promotion.name
+        )
+
+
+class PromotionRepository(PromotionMapper, BaseRepository, IPromotionRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def find_all(self) -> List[DomainPromotion]:
+        statement = select(Promotion)
+        results = self.session.exec(statement)
+        return [self._to_domain(promotion) for promotion in results.all()]
+
+    def iter_all(self) -> Iterator[DomainPromotion]:
+        results = self.session.exec(select(Promotion).execution_options(yield_per=DATABASE_STREAM_BATCH_SIZE))
+        for promotion in results:
+            yield self._to_domain(promotion)
+
+    def find_by_id(self, id: PromotionId) -> DomainPromotion:
+        statement = select(Promotion).where(Promotion.id == str(id))
+        result = self.session.exec(statement).first()
+        if not result:
+            raise ValueError("Promotion not found")
+        return self._to_domain(result)
+
+    def find_by_ids(self, ids: List[PromotionId]) -> List[DomainPromotion]:
+        if not ids:
+            return []
+        statement = select(Promotion).where(Promotion.id.in_({str(id) for id in ids}))
+        results = self.session.exec(statement)
+        return [self._to_domain(promotion) for promotion in results.all()]
+
+    def add(self, promotion: DomainPromotion) -> None:
+        db_promotion = self._to_db(promotion)
+        self.session.add(db_promotion)
+        self.session.commit()
+
+    def update(self, promotion: DomainPromotion) -> None:
+        db_promotion = self._to_db(promotion)
+        self.session.merge(db_promotion)
+        self.session.commit()
+
+    def delete(self, id: PromotionId) -> None:
+        db_promotion = self.session.get(Promotion, str(id))
+        self.session.delete(db_promotion)
+        self.session.commit()
+
+
+class AsyncPromotionRepository(PromotionMapper, BaseRepository, IPromotionRepository):
+    """PromotionRepository counterpart working on an AsyncSession: every method is a coroutine."""
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_all(self) -> List[DomainPromotion]:
+        results = await self.session.exec(select(Promotion))
+        return [self._to_domain(promotion) for promotion in results.all()]
+
+    async def iter_all(self) -> AsyncIterator[DomainPromotion]:
+        # Rows are fetched DATABASE_STREAM_BATCH_SIZE at a time, from a server-side cursor when the driver has one.
+        results = await self.session.stream_scalars(select(Promotion).execution_options(yield_per=DATABASE_STREAM_BATCH_SIZE))
+        async for promotion in results:
+            yield self._to_domain(promotion)
+
+    async def find_by_id(self, id: PromotionId) -> DomainPromotion:
+        result = (await self.session.exec(select(Promotion).where(Promotion.id == str(id)))).first()
+        if not result:
+            raise ValueError("Promotion not found")
+        return self._to_domain(result)
+
+    async def find_by_ids(self, ids: List[PromotionId]) -> List[DomainPromotion]:
+        if not ids:
+            return []
+        results = await self.session.exec(select(Promotion).where(Promotion.id.in_({str(id) for id in ids})))
+        return [self._to_domain(promotion) for promotion in results.all()]
+
+    async def add(self, promotion: DomainPromotion) -> None:
+        self.session.add(self._to_db(promotion))
+        await self.session.commit()
+
+    async def update(self, promotion: DomainPromotion) -> None:
+        await self.session.merge(self._to_db(promotion))
+        await self.session.commit()
+
+    async def delete(self, id: PromotionId) -> None:
+        db_promotion = await self.session.get(Promotion, str(id))
+        await self.session.delete(db_promotion)
+        await self.session.commit()
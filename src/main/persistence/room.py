@@ -1,63 +1,121 @@
-"""
-This module contains the definition of the Room model in terms of a SQLModel model, and the RoomRepository
-class that provides methods for interacting with the database.
-"""
-from sqlmodel import Session, select, SQLModel, Field
-from typing import List
-from src.main.domain.room import IRoomRepository, Room as DomainRoom, RoomId
-from src.main.domain.base import BaseRepository
-
-
-class Room(SQLModel, table=True):
-    __tablename__ = "rooms"
-    __table_args__ = {"extend_existing": True}
-    id: str = Field(primary_key=True)
-    name: str
-    description: str
-
-
-class RoomRepository(BaseRepository, IRoomRepository):
-    def __init__(self, session: Session):
-        self.session = session
-
-    def find_all(self) -> List[DomainRoom]:
-        statement = select(Room)
-        results = self.session.exec(statement)
-        return [self._to_domain(room) for room in results.all()]
-
-    def find_by_id(self, id: RoomId) -> DomainRoom:
-        statement = select(Room).where(Room.id == str(id))
-        result = self.session.exec(statement).first()
-        if not result:
-            raise ValueError("Room not found")
-        return self._to_domain(result)
-
-    def add(self, room: DomainRoom) -> None:
-        db_room = Room(
-            id=str(room.id),
-            name=room.name,
-            description=room.description
-        )
-        self.session.add(db_room)
-        self.session.commit()
-
-    def update(self, room: DomainRoom) -> None:
-        db_room = Room(
-            id=str(room.id),
-            name=room.name,
-            description=room.description
-        )
-        self.session.merge(db_room)
-        self.session.commit()
-
-    def delete(self, id: RoomId) -> None:
-        db_room = self.session.get(Room, str(id))
-        self.session.delete(db_room)
-        self.session.commit()
-
-    def _to_domain(self, room: Room) -> DomainRoom:
-        return DomainRoom(
-            id=RoomId(id=room.id),
-            name=room.name,
-            description=room.description
-        )
+"""
+This module contains the definition of the Room model in terms of a SQLModel model, and the RoomRepository
+class that provides methods for interacting with the database. AsyncRoomRepository offers the same methods
+as coroutines, on top of an AsyncSession.
+"""
+from sqlmodel import Session, select, SQLModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncIterator, Iterator, List
+from src.main.domain.room import IRoomRepository, Room as DomainRoom, RoomId
+from src.main.domain.base import BaseRepository
+from src.main.persistence.database import DATABASE_STREAM_BATCH_SIZE
+
+
+class Room(SQLModel, table=True):
+    __tablename__ = "rooms"
+    __table_args__ = {"extend_existing": True}
+    id: str = Field(primary_key=True)
+    name: str
+    description: str
+
+
+class RoomMapper:
+    """Conversions between domain and database representations of a room, shared by both repositories."""
+    def _to_domain(self, room: Room) -> DomainRoom:
+        return DomainRoom(
+            id=RoomId(id=room.id),
+            name=room.name,
+            description=room.description
+        )
+
+    def _to_db(self, room: DomainRoom) -> Room:
+        return Room(
+            id=str(room.id),
+            name=room.name,
+            description=room.description
+        )
+
+
+class RoomRepository(RoomMapper, BaseRepository, IRoomRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def find_all(self) -> List[DomainRoom]:
+        statement = select(Room)
+        results = self.session.exec(statement)
+        return [self._to_domain(room) for room in results.all()]
+
+    def iter_all(self) -> Iterator[DomainRoom]:
+        results = self.session.exec(select(Room).execution_options(yield_per=DATABASE_STREAM_BATCH_SIZE))
+        for room in results:
+            yield self._to_domain(room)
+
+    def find_by_id(self, id: RoomId) -> DomainRoom:
+        statement = select(Room).where(Room.id == str(id))
+        result = self.session.exec(statement).first()
+        if not result:
+            raise ValueError("Room not found")
+        return self._to_domain(result)
+
+    def find_by_ids(self, ids: List[RoomId]) -> List[DomainRoom]:
+        if not ids:
+            return []
+        statement = select(Room).where(Room.id.in_({str(id) for id in ids}))
+        results = self.session.exec(statement)
+        return [self._to_domain(room) for room in results.all()]
+
+    def add(self, room: DomainRoom) -> None:
+        db_room = self._to_db(room)
+        self.session.add(db_room)
+        self.session.commit()
+
+    def update(self, room: DomainRoom) -> None:
+        db_room = self._to_db(room)
+        self.session.merge(db_room)
+        self.session.commit()
+
+    def delete(self, id: RoomId) -> None:
+        db_room = self.session.get(Room, str(id))
+        self.session.delete(db_room)
+        self.session.commit()
+
+
+class AsyncRoomRepository(RoomMapper, BaseRepository, IRoomRepository):
+    """RoomRepository counterpart working on an AsyncSession: every method is a coroutine."""
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_all(self) -> List[DomainRoom]:
+        results = await self.session.exec(select(Room))
+        return [self._to_domain(room) for room in results.all()]
+
+    async def iter_all(self) -> AsyncIterator[DomainRoom]:
+        # Rows are fetched DATABASE_STREAM_BATCH_SIZE at a time, from a server-side cursor when the driver has one.
+        results = await self.session.stream_scalars(select(Room).execution_options(yield_per=DATABASE_STREAM_BATCH_SIZE))
+        async for room in results:
+            yield self._to_domain(room)
+
+    async def find_by_id(self, id: RoomId) -> DomainRoom:
+        result = (await self.session.exec(select(Room).where(Room.id == str(id)))).first()
+        if not result:
+            raise ValueError("Room not found")
+        return self._to_domain(result)
+
+    async def find_by_ids(self, ids: List[RoomId]) -> List[DomainRoom]:
+        if not ids:
+            return []
+        results = await self.session.exec(select(Room).where(Room.id.in_({str(id) for id in ids})))
+        return [self._to_domain(room) for room in results.all()]
+
+    async def add(self, room: DomainRoom) -> None:
+        self.session.add(self._to_db(room))
+        await self.session.commit()
+
+    async def update(self, room: DomainRoom) -> None:
+        await self.session.merge(self._to_db(room))
+        await self.session.commit()
+
+    async def delete(self, id: RoomId) -> None:
+        db_room = await self.session.get(Room, str(id))
+        await self.session.delete(db_room)
+        await self.session.commit()
@@ -1,63 +1,121 @@
-"""
-This module contains the definition of the Teacher model in terms of a SQLModel model, and the TeacherRepository
-class that provides methods for interacting with the database.
-"""
-from sqlmodel import Session, select, SQLModel, Field
-from typing import List
-from src.main.domain.teacher import ITeacherRepository, Teacher as DomainTeacher, TeacherId
-from src.main.domain.base import BaseRepository
-
-
-class Teacher(SQLModel, table=True):
-    __tablename__ = "teachers"
-    __table_args__ = {"extend_existing": True}
-    id: str = Field(primary_key=True)
-    name: str
-    firstname: str
-
-
-class TeacherRepository(BaseRepository, ITeacherRepository):
-    def __init__(self, session: Session):
-        self.session = session
-
-    def find_all(self) -> List[DomainTeacher]:
-        statement = select(Teacher)
-        results = self.session.exec(statement)
-        return [self._to_domain(teacher) for teacher in results.all()]
-
-    def find_by_id(self, id: TeacherId) -> DomainTeacher:
-        statement = select(Teacher).where(Teacher.id == str(id))
-        result = self.session.exec(statement).first()
-        if not result:
-            raise ValueError("Teacher not found")
-        return self._to_domain(result)
-
-    def add(self, teacher: DomainTeacher) -> None:
-        db_teacher = Teacher(
-            id=str(teacher.id),
-            name=teacher.name,
-            firstname=teacher.firstname
-        )
-        self.session.add(db_teacher)
-        self.session.commit()
-
-    def update(self, teacher: DomainTeacher) -> None:
-        db_teacher = Teacher(
-            id=str(teacher.id),
-            name=teacher.name,
-            firstname=teacher.firstname
-        )
-        self.session.merge(db_teacher)
-        self.session.commit()
-
-    def delete(self, id: TeacherId) -> None:
-        db_teacher = self.session.get(Teacher, str(id))
-        self.session.delete(db_teacher)
-        self.session.commit()
-
-    def _to_domain(self, teacher: Teacher) -> DomainTeacher:
-        return DomainTeacher(
-            id=TeacherId(id=teacher.id),
-            name=teacher.name,
-            firstname=teacher.firstname
-        )
+"""
+This module contains the definition of the Teacher model in terms of a SQLModel model, and the TeacherRepository
+class that provides methods for interacting with the database. AsyncTeacherRepository offers the same methods
+as coroutines, on top of an AsyncSession.
+"""
+from sqlmodel import Session, select, SQLModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import AsyncIterator, Iterator, List
+from src.main.domain.teacher import ITeacherRepository, Teacher as DomainTeacher, TeacherId
+from src.main.domain.base import BaseRepository
+from src.main.persistence.database import DATABASE_STREAM_BATCH_SIZE
+
+
+class Teacher(SQLModel, table=True):
+    __tablename__ = "teachers"
+    __table_args__ = {"extend_existing": True}
+    id: str = Field(primary_key=True)
+    name: str
+    firstname: str
+
+
+class TeacherMapper:
+    """Conversions between domain and database representations of a teacher, shared by both repositories."""
+    def _to_domain(self, teacher: Teacher) -> DomainTeacher:
+        return DomainTeacher(
+            id=TeacherId(id=teacher.id),
+            name=teacher.name,
+            firstname=teacher.firstname
+        )
+
+    def _to_db(self, teacher: DomainTeacher) -> Teacher:
+        return Teacher(
+            id=str(teacher.id),
+            name=teacher.name,
+            firstname=teacher.firstname
+        )
+
+
+class TeacherRepository(TeacherMapper, BaseRepository, ITeacherRepository):
+    def __init__(self, session: Session):
+        self.session = session
+
+    def find_all(self) -> List[DomainTeacher]:
+        statement = select(Teacher)
+        results = self.session.exec(statement)
+        return [self._to_domain(teacher) for teacher in results.all()]
+
+    def iter_all(self) -> Iterator[DomainTeacher]:
+        results = self.session.exec(select(Teacher).execution_options(yield_per=DATABASE_STREAM_BATCH_SIZE))
+        for teacher in results:
+            yield self._to_domain(teacher)
+
+    def find_by_id(self, id: TeacherId) -> DomainTeacher:
+        statement = select(Teacher).where(Teacher.id == str(id))
+        result = self.session.exec(statement).first()
+        if not result:
+            raise ValueError("Teacher not found")
+        return self._to_domain(result)
+
+    def find_by_ids(self, ids: List[TeacherId]) -> List[DomainTeacher]:
+        if not ids:
+            return []
+        statement = select(Teacher).where(Teacher.id.in_({str(id) for id in ids}))
+        results = self.session.exec(statement)
+        return [self._to_domain(teacher) for teacher in results.all()]
+
+    def add(self, teacher: DomainTeacher) -> None:
+        db_teacher = self._to_db(teacher)
+        self.session.add(db_teacher)
+        self.session.commit()
+
+    def update(self, teacher: DomainTeacher) -> None:
+        db_teacher = self._to_db(teacher)
+        self.session.merge(db_teacher)
+        self.session.commit()
+
+    def delete(self, id: TeacherId) -> None:
+        db_teacher = self.session.get(Teacher, str(id))
+        self.session.delete(db_teacher)
+        self.session.commit()
+
+
+class AsyncTeacherRepository(TeacherMapper, BaseRepository, ITeacherRepository):
+    """TeacherRepository counterpart working on an AsyncSession: every method is a coroutine."""
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def find_all(self) -> List[DomainTeacher]:
+        results = await self.session.exec(select(Teacher))
+        return [self._to_domain(teacher) for teacher in results.all()]
+
+    async def iter_all(self) -> AsyncIterator[DomainTeacher]:
+        # Rows are fetched DATABASE_STREAM_BATCH_SIZE at a time, from a server-side cursor when the driver has one.
+        results = await self.session.stream_scalars(select(Teacher).execution_options(yield_per=DATABASE_STREAM_BATCH_SIZE))
+        async for teacher in results:
+            yield self._to_domain(teacher)
+
+    async def find_by_id(self, id: TeacherId) -> DomainTeacher:
+        result = (await self.session.exec(select(Teacher).where(Teacher.id == str(id)))).first()
+        if not result:
+            raise ValueError("Teacher not found")
+        return self._to_domain(result)
+
+    async def find_by_ids(self, ids: List[TeacherId]) -> List[DomainTeacher]:
+        if not ids:
+            return []
+        results = await self.session.exec(select(Teacher).where(Teacher.id.in_({str(id) for id in ids})))
+        return [self._to_domain(teacher) for teacher in results.all()]
+
+    async def add(self, teacher: DomainTeacher) -> None:
+        self.session.add(self._to_db(teacher))
+        await self.session.commit()
+
+    async def update(self, teacher: DomainTeacher) -> None:
+        await self.session.merge(self._to_db(teacher))
+        await self.session.commit()
+
+    async def delete(self, id: TeacherId) -> None:
+        db_teacher = await self.session.get(Teacher, str(id))
+        await self.session.delete(db_teacher)
+        await self.session.commit()
@@ -0,0 +1,62 @@
+"""
+This module contains the implementation of the REST API for the availability
+endpoint using FastAPI. It lists the intervals during which a teacher, a room
+and a promotion are all free, so that a slot can be planned without trial and error.
+The bookings of the teacher, the room and the promotion are read with a single query,
+as the start and end minutes of their slots: no planning is loaded. Their union is then
+subtracted from the opening hours of each day.
+"""
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import List, Optional
+from datetime import date as dt, timedelta
+from src.main import domain
+from src.main.web import state
+from pydantic import BaseModel
+
+
+router = APIRouter(prefix="/api/v1/availability", tags=["Availability"])
+MAX_AVAILABILITY_DAYS = 31
+
+
+class FreeInterval(BaseModel):
+    date: dt
+    hours_start: int
+    minutes_start: int
+    hours_end: int
+    minutes_end: int
+
+
+@router.get("", response_model=List[FreeInterval])
+async def get_availability(
+        date: dt, date_to: Optional[dt] = None, teacher_id: Optional[str] = None, room_id: Optional[str] = None,
+        promotion_id: Optional[str] = None,
+        duration: int = Query(domain.MIN_SLOT_DURATION, ge=domain.MIN_SLOT_DURATION, le=domain.MAX_SLOT_DURATION)
+) -> List[FreeInterval]:
+    """
+    Fetches the free intervals, at least `duration` minutes long, of the given teacher, room and promotion,
+    between 08:15 and 17:15 of `date`, or of every day from `date` to `date_to` inclusive.
+    Every given resource must be free during a returned interval.
+    """
+    date_to = date_to or date
+    if date_to < date or (date_to - date).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"date_to must be within {MAX_AVAILABILITY_DAYS} days after date")
+    days = [date + timedelta(days=offset) for offset in range((date_to - date).days + 1)]
+    bookings = {day: [] for day in days}
+    if teacher_id or room_id or promotion_id:
+        try:
+            for day, start, end in await state.maybe_await(state.repository_plannings.find_bookings(
+                    date, date_to, teacher_id=domain.TeacherId(id=teacher_id) if teacher_id else None,
+                    room_id=domain.RoomId(id=room_id) if room_id else None,
+                    promotion_id=domain.PromotionId(id=promotion_id) if promotion_id else None)):
+                bookings[day].append((start, end))
+        except Exception as ex:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+    intervals = []
+    for day in days:
+        intervals += [
+            FreeInterval(date=day, hours_start=start // 60, minutes_start=start % 60, hours_end=end // 60,
+                         minutes_end=end % 60)
+            for start, end in domain.find_free_intervals([bookings[day]], duration)
+        ]
+    return intervals
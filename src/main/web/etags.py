@@ -0,0 +1,69 @@
+"""
+This module contains the helpers used by the read endpoints to support conditional GET requests.
+A response carries a strong ETag computed from what identifies its content: the id and version of each planning
+along with the generations of the reference repositories, or the stored fields of each reference entity.
+A client sending that ETag back in `If-None-Match` gets an empty 304 Not Modified response, which is decided
+before the slots and their references are resolved and serialised.
+The version of a planning is incremented on every write of the planning or of its slots. Renaming a promotion,
+teacher, course or room does not change it, but changes the generation of the cached repository of that entity.
+Repositories that are not cached have no generation: writes through them do not change the ETag of plannings.
+Writes accept the ETag in `If-Match`, to only proceed if the resource did not change since the client read it.
+"""
+from typing import Iterable, List, Tuple
+from fastapi import Request, Response, status
+import hashlib
+
+
+NOT_MODIFIED_RESPONSES = {304: {"description": "The representation matching `If-None-Match` did not change."}}
+CONCURRENCY_RESPONSES = {
+    409: {"description": "The resource was written concurrently."},
+    412: {"description": "The resource no longer matches `If-Match`."}
+}
+
+
+def make_etag(parts: Iterable) -> str:
+    """Returns a strong ETag, as a quoted digest of the given parts."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()}"'
+
+
+def planning_etag(versions: Iterable[Tuple[object, int]], generations: Iterable = ()) -> str:
+    """
+    Returns the ETag of a list of plannings, given the (id, version) of each of them and the generations of the
+    repositories of the entities they reference.
+    """
+    return make_etag([*(f"{planning_id}:{version}" for planning_id, version in versions), *generations])
+
+
+def reference_generations(repositories: Iterable) -> List:
+    """Returns the generations of the given repositories that have one, as CachedRepository does."""
+    return [repository.generation() for repository in repositories if hasattr(repository, "generation")]
+
+
+def entities_etag(entities: Iterable) -> str:
+    return make_etag(entity.model_dump_json() for entity in entities)
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Tells whether `If-None-Match` holds the given ETag, or `*`. Weak validators match their strong counterpart."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def is_match(request: Request, etag: str) -> bool:
+    """Tells whether a write can proceed: `If-Match` is absent, is `*` or holds the given ETag (strong comparison)."""
+    header = request.headers.get("if-match")
+    if not header:
+        return True
+    candidates = {candidate.strip() for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
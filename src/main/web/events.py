@@ -0,0 +1,63 @@
+"""
+This module contains the implementation of the change feed of plannings, as Server-Sent Events.
+Instead of polling the plannings to detect changes, a client keeps a single connection open and receives an event
+each time a planning of the promotion and of the date it watches is added, updated or deleted. Events are fanned
+out in process by the planning events broker, to which every planning write is published.
+Each event carries the id, promotion, date and version of the planning: clients fetch the planning itself only
+when it changed. A comment is sent every KEEPALIVE_SECONDS so that idle connections are not closed by proxies.
+A client too slow to read its events is dropped: it receives an `overflow` event, then the stream ends.
+"""
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+from datetime import date as dt
+import asyncio
+import json
+from src.main import domain
+from src.main.web import state
+
+
+router = APIRouter(tags=["Planning"])
+SSE_MEDIA_TYPE = "text/event-stream"
+KEEPALIVE_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+
+
+def format_event(published: domain.PublishedEvent) -> str:
+    event = published.event
+    data = json.dumps({"planning_id": str(event.planning_id), "promotion_id": str(event.promotion_id),
+                       "date": event.date.isoformat(), "version": event.version})
+    return f"id: {published.sequence}\nevent: {event.type}\ndata: {data}\n\n"
+
+
+async def event_stream(promotion_id: Optional[domain.PromotionId] = None, date: Optional[dt] = None,
+                       keepalive: float = KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+    """Subscribes to the planning events and yields them as Server-Sent Events, until the client disconnects."""
+    subscription = state.planning_events.subscribe(promotion_id=promotion_id, date=date)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        while True:
+            try:
+                published = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if published is None:
+                yield "event: overflow\ndata: {}\n\n"
+                return
+            yield format_event(published)
+    finally:
+        subscription.close()
+
+
+@router.get("/api/v1/plannings/events", response_class=StreamingResponse,
+            responses={200: {"content": {SSE_MEDIA_TYPE: {}}, "description": "Server-Sent Events stream."}})
+async def get_planning_events(promotion_id: Optional[str] = None, date: Optional[dt] = None) -> StreamingResponse:
+    """
+    Streams the `added`, `updated` and `deleted` events of the plannings, optionally restricted to a promotion
+    and to a date. Each event holds the planning id, promotion id, date and version as JSON.
+    """
+    promotion = domain.PromotionId(id=promotion_id) if promotion_id else None
+    return StreamingResponse(
+        event_stream(promotion, date), media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,46 +1,96 @@
-"""
-This module serves as the main entry point for the FastAPI application.
-It initializes the FastAPI app with a custom lifespan context manager to set up
-and tear down application state. The application includes routers for various
-functionalities such as authentication, promotions, teachers, courses, rooms,
-and planning.
-Modules included:
-- auth: Handles authentication-related endpoints.
-- promotions: Manages promotion-related endpoints.
-- teachers: Manages teacher-related endpoints.
-- courses: Manages course-related endpoints.
-- rooms: Manages room-related endpoints.
-- planning: Manages planning-related endpoints.
-The `lifespan` context manager initializes repository states to `None` at the
-start of the application and ensures proper cleanup when the application shuts
-down.
-"""
-from fastapi import FastAPI
-from contextlib import asynccontextmanager
-from src.main.web import auth, promotions, teachers, courses, rooms, planning
-from src.main.web import state
-import src.main.persistence.database as database
-from src.main.persistence import PromotionRepository, PlanningRepository, TeacherRepository, CourseRepository, RoomRepository
-
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    database.create_db_and_tables()
-    session = database.get_session()
-    state.repository_promotions = PromotionRepository(session)
-    state.repository_plannings = PlanningRepository(session)
-    state.repository_teachers = TeacherRepository(session)
-    state.repository_courses = CourseRepository(session)
-    state.repository_rooms = RoomRepository(session)
-    yield
-
-
-app = FastAPI(lifespan=lifespan)
-
-
-app.include_router(auth.router)
-app.include_router(promotions.router)
-app.include_router(teachers.router)
-app.include_router(courses.router)
-app.include_router(rooms.router)
-app.include_router(planning.router)
+"""
+This module serves as the main entry point for the FastAPI application.
+It initializes the FastAPI app with a custom lifespan context manager to set up
+and tear down application state. The application includes routers for various
+functionalities such as authentication, promotions, teachers, courses, rooms,
+planning, availability and timetables.
+Modules included:
+- auth: Handles authentication-related endpoints.
+- promotions: Manages promotion-related endpoints.
+- teachers: Manages teacher-related endpoints.
+- courses: Manages course-related endpoints.
+- rooms: Manages room-related endpoints.
+- planning: Manages planning-related endpoints.
+- availability: Lists the free intervals of teachers, rooms and promotions.
+- timetables: Generates the plannings of a week in worker processes.
+- events: Streams the changes of plannings to their clients as Server-Sent Events.
+- metrics: Exposes the request histograms in the Prometheus text format.
+The `lifespan` context manager creates the database tables and the repositories
+at the start of the application. Repositories are shared, but work on the
+session of the current request: the `get_db_session` dependency gives every
+request its own session, taken from the connection pool of `database.engine`.
+List responses streamed as NDJSON outlive their request and open their own.
+When `DATABASE_ASYNC_URL` is configured, the asynchronous repositories are used
+instead, on sessions of `database.async_engine()`, so that database round trips
+no longer block the event loop. Repositories of reference entities are wrapped
+in a read-through cache. Every planning write is
+published to the subscribers of the change feed. The worker processes of the
+timetable generator are stopped at shutdown.
+Every request is timed by RequestMetricsMiddleware, which counts the SQL statements
+it runs on the instrumented engines and reports them in a Server-Timing header.
+"""
+from fastapi import Depends, FastAPI
+from contextlib import asynccontextmanager
+from src.main.web import auth, promotions, teachers, courses, rooms, planning, availability, timetables, events, metrics
+from src.main.web import state
+import src.main.persistence.database as database
+from src.main.persistence import PromotionRepository, PlanningRepository, TeacherRepository, CourseRepository, RoomRepository
+from src.main.persistence import (
+    AsyncPromotionRepository, AsyncPlanningRepository, AsyncTeacherRepository, AsyncCourseRepository, AsyncRoomRepository)
+from src.main.persistence import CachedRepository, EventPublishingRepository, instrument_engine
+from src.main.domain import PlanningEventBroker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    session = database.context_session
+    if database.DATABASE_ASYNC_URL:
+        await database.create_db_and_tables_async()
+        instrument_engine(database.async_engine())
+        state.repository_promotions = AsyncPromotionRepository(session)
+        state.repository_plannings = AsyncPlanningRepository(session)
+        state.repository_teachers = AsyncTeacherRepository(session)
+        state.repository_courses = AsyncCourseRepository(session)
+        state.repository_rooms = AsyncRoomRepository(session)
+    else:
+        database.create_db_and_tables()
+        instrument_engine(database.engine)
+        state.repository_promotions = PromotionRepository(session)
+        state.repository_plannings = PlanningRepository(session)
+        state.repository_teachers = TeacherRepository(session)
+        state.repository_courses = CourseRepository(session)
+        state.repository_rooms = RoomRepository(session)
+    # Reference entities change rarely: they are served from memory when resolving planning responses.
+    state.repository_promotions = CachedRepository(state.repository_promotions)
+    state.repository_teachers = CachedRepository(state.repository_teachers)
+    state.repository_courses = CachedRepository(state.repository_courses)
+    state.repository_rooms = CachedRepository(state.repository_rooms)
+    state.planning_events = PlanningEventBroker()
+    state.repository_plannings = EventPublishingRepository(state.repository_plannings, state.planning_events)
+    yield
+    if state.scheduler_pool is not None:
+        state.scheduler_pool.shutdown()
+        state.scheduler_pool = None
+
+
+async def get_db_session():
+    """Gives each request its own session, closed once the request is handled."""
+    async with database.open_session_scope() as session:
+        yield session
+
+
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(get_db_session)])
+app.add_middleware(metrics.RequestMetricsMiddleware)
+
+
+app.include_router(auth.router)
+app.include_router(promotions.router)
+app.include_router(teachers.router)
+app.include_router(courses.router)
+app.include_router(rooms.router)
+# Registered before the planning routes, so that /api/v1/plannings/events is not read as a planning id.
+app.include_router(events.router)
+app.include_router(planning.router)
+app.include_router(availability.router)
+app.include_router(timetables.router)
+app.include_router(metrics.router)
@@ -0,0 +1,166 @@
+"""
+This module contains the instrumentation of the requests handled by the application.
+RequestMetricsMiddleware times every HTTP request, and counts the SQL statements it runs and the time the database
+took to run them, with `record_queries`. These figures are sent back to the client in a `Server-Timing` header,
+readable in the network panel of browsers:
+    Server-Timing: app;dur=12.5, db;dur=3.1;desc="4 statements"
+They are also aggregated per route into histograms, exposed in the Prometheus text format by `GET /metrics`.
+Routes are labelled with their path template (`/api/v1/plannings/{planning_id}`), so that the number of series
+does not grow with the ids requested. Requests matching no route are labelled `unmatched`.
+The header is sent with the first bytes of the response: for a streamed response, it only covers the work done
+before streaming started, while the histograms cover the whole response.
+`GET /metrics` also exposes the hit and miss counters, and the size, of the cache of each reference repository
+wrapped in a CachedRepository, labelled with the repository (`promotions`, `teachers`, `courses` or `rooms`).
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from time import perf_counter
+from typing import Dict, List, Sequence, Tuple
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from src.main.persistence.cache import CachedRepository
+from src.main.persistence.instrumentation import record_queries
+from src.main.web import state
+
+
+router = APIRouter(tags=["Monitoring"])
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    """
+    Prometheus histogram, with a series per set of label values. Updated from the event loop only.
+    Attributes:
+        name (str): Name of the metric.
+        description (str): Help text of the metric.
+        label_names (Sequence[str]): Names of the labels of each series.
+        buckets (Sequence[float]): Upper bounds of the buckets, in increasing order.
+    """
+    def __init__(self, name: str, description: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._counts: Dict[Tuple[str, ...], List[int]] = defaultdict(lambda: [0] * len(self.buckets))
+        self._sums: Dict[Tuple[str, ...], float] = defaultdict(float)
+        self._totals: Dict[Tuple[str, ...], int] = defaultdict(int)
+
+    def observe(self, value: float, *label_values: str) -> None:
+        position = bisect_left(self.buckets, value)
+        if position < len(self.buckets):
+            self._counts[label_values][position] += 1
+        self._sums[label_values] += value
+        self._totals[label_values] += 1
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._sums.clear()
+        self._totals.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for label_values in sorted(self._totals):
+            labels = ",".join(f'{name}="{escape(value)}"' for name, value in zip(self.label_names, label_values))
+            cumulated = 0
+            for bound, count in zip(self.buckets, self._counts[label_values]):
+                cumulated += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{format_bound(bound)}"}} {cumulated}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {self._totals[label_values]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {self._sums[label_values]}")
+            lines.append(f"{self.name}_count{{{labels}}} {self._totals[label_values]}")
+        return lines
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_bound(bound: float) -> str:
+    return str(float(bound))
+
+
+REQUEST_LABELS = ("method", "route", "status")
+request_duration = Histogram(
+    "http_request_duration_seconds", "Duration of the HTTP requests, in seconds.", REQUEST_LABELS, DURATION_BUCKETS)
+request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "Time spent running SQL statements per HTTP request, in seconds.",
+    REQUEST_LABELS, DURATION_BUCKETS)
+request_db_statements = Histogram(
+    "http_request_db_statements", "Number of SQL statements run per HTTP request.", REQUEST_LABELS, STATEMENT_BUCKETS)
+HISTOGRAMS = [request_duration, request_db_duration, request_db_statements]
+
+
+def format_server_timing(app_seconds: float, db_seconds: float, statements: int) -> str:
+    return f'app;dur={app_seconds * 1000:.1f}, db;dur={db_seconds * 1000:.1f};desc="{statements} statements"'
+
+
+def get_route(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing the HTTP requests and counting their SQL statements."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = perf_counter()
+        status_code = 500
+
+        with record_queries() as stats:
+            async def send_with_timing(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    timing = format_server_timing(perf_counter() - start, stats.seconds, stats.statements)
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (b"server-timing", timing.encode("latin-1"))]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                labels = (scope["method"], get_route(scope), str(status_code))
+                request_duration.observe(perf_counter() - start, *labels)
+                request_db_duration.observe(stats.seconds, *labels)
+                request_db_statements.observe(stats.statements, *labels)
+
+
+CACHED_REPOSITORIES = ("promotions", "teachers", "courses", "rooms")
+CACHE_METRICS = [
+    ("repository_cache_hits_total", "counter", "Lookups of reference entities served from the cache.", "hits"),
+    ("repository_cache_misses_total", "counter", "Lookups of reference entities missing from the cache.", "misses"),
+    ("repository_cache_entries", "gauge", "Number of reference entities held in the cache.", "size"),
+]
+
+
+def render_cache_metrics() -> List[str]:
+    """Renders the counters of the caches of the reference repositories in use, none if they are not cached."""
+    repositories = [(name, getattr(state, f"repository_{name}", None)) for name in CACHED_REPOSITORIES]
+    stats = [(name, repository.cache.stats()) for name, repository in repositories
+             if isinstance(repository, CachedRepository)]
+    if not stats:
+        return []
+    lines = []
+    for metric, metric_type, description, key in CACHE_METRICS:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {metric_type}"]
+        lines += [f'{metric}{{repository="{name}"}} {values[key]}' for name, values in stats]
+    return lines
+
+
+def render_metrics() -> str:
+    lines = [line for histogram in HISTOGRAMS for line in histogram.render()] + render_cache_metrics()
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    """Exposes the request histograms and the cache counters in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -1,224 +1,817 @@
-"""
-This module defines the API endpoints for managing planning entities in the application.
-It uses FastAPI to create a set of routes that allow clients to perform CRUD operations on planning data.
-The planning endpoints are crucial as they will be the most frequently accessed and used by clients.
-Classes:
-    PlanningSlot: Represents a planning slot with details such as start and end times, promotion, teacher, course, and room.
-    PlanningSlotWrite:
-    Represents a planning slot with details for writing operations, including IDs for promotion, teacher, course, and room.
-    Planning: Represents a planning entity with a date, promotion, and a list of planning slots.
-    PlanningWrite: Represents a planning entity for writing operations, including IDs for promotion and planning slots.
-Functions:
-    get_entity_by_id: Fetches an entity by its ID from the specified repository.
-    get_planning_slot_from_entity: Converts a domain.PlanningSlot entity to a PlanningSlot model.
-    get_planning_from_entity: Converts a domain.Planning entity to a Planning model.
-    get_promotion_from_entity: Converts a domain.Promotion entity to a Promotion model.
-    get_teacher_from_entity: Converts a domain.Teacher entity to a Teacher model.
-    get_course_from_entity: Converts a domain.Course entity to a Course model.
-    get_room_from_entity: Converts a domain.Room entity to a Room model.
-    validate_slot_details: Validates the details of a PlanningSlot.
-    validate_slot_write_details: Validates the details of a PlanningSlotWrite.
-Routes:
-    GET /api/v1/plannings: Fetches a list of planning entities.
-    POST /api/v1/plannings: Adds a new planning entity to the repository.
-    GET /api/v1/plannings/{planning_id}: Fetches a planning entity by its ID.
-    POST /api/v1/plannings/{planning_id}/slots: Adds a new planning slot to an existing planning entity.
-"""
-from fastapi import APIRouter, HTTPException, status
-from typing import List, Optional
-from datetime import date as dt
-from src.main import domain
-from src.main.web import state
-from src.main.web.promotions import Promotion
-from src.main.web.teachers import Teacher
-from src.main.web.courses import Course
-from src.main.web.rooms import Room
-from pydantic import BaseModel
-
-
-router = APIRouter(tags=["Planning"])
-
-
-class PlanningSlot(BaseModel):
-    id: str
-    hours_start: int
-    minutes_start: int
-    hours_end: int
-    minutes_end: int
-    promotion: Promotion
-    teacher: Teacher
-    course: Course
-    room: Room
-
-
-class PlanningSlotWrite(BaseModel):
-    id: str
-    hours_start: int
-    minutes_start: int
-    hours_end: int
-    minutes_end: int
-    promotion_id: str
-    teacher_id: str
-    course_id: str
-    room_id: str
-
-
-class Planning(BaseModel):
-    id: str
-    date: dt
-    promotion: Promotion
-    slots: List[Optional[PlanningSlot]]
-
-
-class PlanningWrite(BaseModel):
-    id: str
-    date: dt
-    promotion_id: str
-    slots: List[Optional[PlanningSlotWrite]]
-
-
-async def get_entity_by_id(repository, entity_id, entity_name):
-    entity = repository.find_by_id(entity_id)
-    if not entity:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{entity_name} not found")
-    return entity
-
-
-async def get_planning_slot_from_entity(entity: domain.PlanningSlot) -> PlanningSlot:
-    promotion = await get_promotion_from_entity(
-        await get_entity_by_id(state.repository_promotions, entity.promotion_id, "Promotion"))
-    teacher = await get_teacher_from_entity(
-        await get_entity_by_id(state.repository_teachers, entity.teacher_id, "Teacher"))
-    course = await get_course_from_entity(
-        await get_entity_by_id(state.repository_courses, entity.course_id, "Course"))
-    room = await get_room_from_entity(
-        await get_entity_by_id(state.repository_rooms, entity.room_id, "Room"))
-    return PlanningSlot(
-        id=str(entity.id),
-        hours_start=entity.hours_start,
-        minutes_start=entity.minutes_start,
-        hours_end=entity.hours_end,
-        minutes_end=entity.minutes_end,
-        promotion=promotion,
-        teacher=teacher,
-        course=course,
-        room=room
-    )
-
-
-async def get_planning_from_entity(entity: domain.Planning) -> Planning:
-    promotion = await get_promotion_from_entity(
-        await get_entity_by_id(state.repository_promotions, str(entity.promotion_id), "Promotion"))
-    slots = [await get_planning_slot_from_entity(slot) for slot in entity.slots]
-    return Planning(id=str(entity.id), date=str(entity.date), promotion=promotion, slots=slots)
-
-
-async def get_promotion_from_entity(entity: domain.Promotion) -> Promotion:
-    return Promotion(id=str(entity.id), study_year=entity.study_year, diploma=entity.diploma, name=entity.name)
-
-
-async def get_teacher_from_entity(entity: domain.Teacher) -> Teacher:
-    return Teacher(id=str(entity.id), name=entity.name, firstname=entity.firstname)
-
-
-async def get_course_from_entity(entity: domain.Course) -> Course:
-    return Course(id=str(entity.id), name=entity.name)
-
-
-async def get_room_from_entity(entity: domain.Room) -> Room:
-    return Room(id=str(entity.id), name=entity.name, description=entity.description)
-
-
-async def validate_slot_details(slot: PlanningSlot):
-    teacher = await get_entity_by_id(state.repository_teachers, slot.teacher.id, "Teacher")
-    course = await get_entity_by_id(state.repository_courses, slot.course.id, "Course")
-    room = await get_entity_by_id(state.repository_rooms, slot.room.id, "Room")
-    return teacher, course, room
-
-
-async def validate_slot_write_details(slot: PlanningSlotWrite):
-    teacher = await get_entity_by_id(state.repository_teachers, slot.teacher_id, "Teacher")
-    course = await get_entity_by_id(state.repository_courses, slot.course_id, "Course")
-    room = await get_entity_by_id(state.repository_rooms, slot.room_id, "Room")
-    return teacher, course, room
-
-
-@router.get("/api/v1/plannings", response_model=List[Planning])
-async def get_plannings(date: Optional[str] = None, promotion_id: Optional[str] = None) -> List[Planning]:
-    """
-    Fetches a list of planning entities
-    """
-
-    planning_entities = state.repository_plannings.find_all()
-    return [await get_planning_from_entity(entity) for entity in planning_entities]
-
-
-@router.post("/api/v1/plannings", response_model=Planning)
-async def add_planning(planning: PlanningWrite) -> Planning:
-    """
-    Add a planning entity to the repository.
-    """
-    try:
-        planning_slots = [
-            domain.PlanningSlot(
-                id=slot.id,
-                hours_start=slot.hours_start,
-                minutes_start=slot.minutes_start,
-                hours_end=slot.hours_end,
-                minutes_end=slot.minutes_end,
-                promotion_id=planning.promotion_id,
-                teacher_id=slot.teacher_id,
-                course_id=slot.course_id,
-                room_id=slot.room_id
-            )
-            for slot in planning.slots
-        ]
-
-        planning_entity = domain.Planning(
-            id=domain.PlanningId(id=planning.id),
-            date=planning.date,
-            promotion_id=domain.PromotionId(id=planning.promotion_id),
-            slots=planning_slots
-        )
-        state.repository_plannings.add(planning_entity)
-        return await get_planning_from_entity(planning_entity)
-    except Exception as ex:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
-
-
-@router.get("/api/v1/plannings/{planning_id}", response_model=Planning)
-async def get_planning_by_id(planning_id: str) -> Planning:
-    """
-    Get a planning entity by its id.
-    """
-    try:
-        planning = await get_entity_by_id(state.repository_plannings, planning_id, "Planning")
-        return await get_planning_from_entity(planning)
-    except Exception as ex:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
-
-
-@router.post("/api/v1/plannings/{planning_id}/slots", response_model=Planning)
-async def add_planning_slot(planning_id: str, slot: PlanningSlotWrite) -> Planning:
-    """Add a planning slot to a planning entity."""
-    try:
-        planning = await get_entity_by_id(state.repository_plannings, domain.PlanningId(id=planning_id), "Planning")
-        teacher, course, room = await validate_slot_write_details(slot)
-
-        planning_slot = domain.PlanningSlot(
-            id=domain.PlanningSlotId(id=slot.id),
-            hours_start=slot.hours_start,
-            minutes_start=slot.minutes_start,
-            hours_end=slot.hours_end,
-            minutes_end=slot.minutes_end,
-            promotion_id=domain.PromotionId(id=slot.promotion_id),
-            teacher_id=domain.TeacherId(id=slot.teacher_id),
-            course_id=domain.CourseId(id=slot.course_id),
-            room_id=domain.RoomId(id=slot.room_id)
-        )
-
-        planning.slots.append(planning_slot)
-        state.repository_plannings.update(planning)
-        return await get_planning_from_entity(planning)
-    except Exception as ex:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+"""
+This module defines the API endpoints for managing planning entities in the application.
+It uses FastAPI to create a set of routes that allow clients to perform CRUD operations on planning data, to import
+plannings in bulk and to read the timetable of a promotion for a week.
+The planning endpoints are crucial as they will be the most frequently accessed and used by clients.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Literal, NamedTuple, Optional, Tuple, Union
+from datetime import date as dt, timedelta
+import base64
+import json
+from src.main import domain
+from src.main.web import state
+from src.main.web.auth import get_current_user
+from src.main.web.etags import (
+    CONCURRENCY_RESPONSES, NOT_MODIFIED_RESPONSES, is_match, is_not_modified, not_modified, planning_etag,
+    reference_generations)
+from src.main.web.streaming import NDJSON_MEDIA_TYPE, STREAM_RESPONSES, stream_documents, wants_stream
+from src.main.web.responses import trusted_response
+from src.main.web.promotions import Promotion
+from src.main.web.teachers import Teacher
+from src.main.web.courses import Course
+from src.main.web.rooms import Room
+from pydantic import BaseModel, ValidationError
+
+
+router = APIRouter(tags=["Planning"])
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+ISO_WEEK_PATTERN = r"^\d{4}-W\d{2}$"
+MAX_BULK_SIZE = 10000
+STREAM_PAGE_SIZE = MAX_PAGE_SIZE
+EMBEDDED_FORMAT = "embedded"
+NORMALIZED_FORMAT = "normalized"
+PlanningFormat = Literal["embedded", "normalized"]
+RELATIONS = ("promotion", "teacher", "course", "room")
+SLOT_FIELDS = ("hours_start", "minutes_start", "hours_end", "minutes_end") + RELATIONS
+# Key of the relation in References, and name of its entity in errors.
+RELATION_REFERENCES = {"promotion": ("promotions", "Promotion"), "teacher": ("teachers", "Teacher"),
+                       "course": ("courses", "Course"), "room": ("rooms", "Room")}
+
+
+class PlanningSlot(BaseModel):
+    """Represents a planning slot with details such as start and end times, promotion, teacher, course, and room."""
+    id: str
+    hours_start: int
+    minutes_start: int
+    hours_end: int
+    minutes_end: int
+    promotion: Promotion
+    teacher: Teacher
+    course: Course
+    room: Room
+
+
+class PlanningSlotWrite(BaseModel):
+    """Represents a planning slot for writing operations, with the IDs of its promotion, teacher, course and room."""
+    id: str
+    hours_start: int
+    minutes_start: int
+    hours_end: int
+    minutes_end: int
+    promotion_id: str
+    teacher_id: str
+    course_id: str
+    room_id: str
+
+
+class Planning(BaseModel):
+    """Represents a planning entity with a date, promotion, and a list of planning slots."""
+    id: str
+    date: dt
+    promotion: Promotion
+    slots: List[Optional[PlanningSlot]]
+
+
+class PlanningWrite(BaseModel):
+    """Represents a planning entity for writing operations, including IDs for promotion and planning slots."""
+    id: str
+    date: dt
+    promotion_id: str
+    slots: List[Optional[PlanningSlotWrite]]
+
+
+class PlanningDay(BaseModel):
+    """Represents the slots of a promotion on a given day, ordered by start time."""
+    date: dt
+    slots: List[PlanningSlot]
+
+
+class PlanningWeek(BaseModel):
+    """Represents the timetable of a promotion from Monday to Friday of an ISO week."""
+    week: str
+    promotion: Promotion
+    days: List[PlanningDay]
+
+
+class BulkItemError(BaseModel):
+    """Describes why an item of a bulk import was rejected."""
+    index: int
+    id: Optional[str] = None
+    detail: str
+
+
+class BulkImportResult(BaseModel):
+    """Reports the number of plannings imported in bulk and the rejected items."""
+    created: int
+    errors: List[BulkItemError]
+
+
+class References(BaseModel):
+    """Holds the promotions, teachers, courses and rooms referenced by a set of plannings, indexed by id."""
+    promotions: Dict[str, Promotion] = {}
+    teachers: Dict[str, Teacher] = {}
+    courses: Dict[str, Course] = {}
+    rooms: Dict[str, Room] = {}
+
+
+class NormalizedPlanningDay(BaseModel):
+    """Represents the slots of a promotion on a given day, with the ids of their references."""
+    date: dt
+    slots: List[PlanningSlotWrite]
+
+
+class NormalizedPlanningWeek(BaseModel):
+    """Represents the timetable of a promotion for an ISO week, with the ids of its references."""
+    week: str
+    promotion_id: str
+    days: List[NormalizedPlanningDay]
+
+
+class IncludedPlannings(BaseModel):
+    """
+    Plannings read with `?format=normalized`: slots hold the ids of their references, and each referenced entity
+    is sent once in `included`:
+        {"data": [{"id": ..., "slots": [{"teacher_id": "1", ...}]}], "included": {"teachers": {"1": {...}}, ...}}
+    """
+    data: List[PlanningWrite]
+    included: References
+
+
+class IncludedPlanning(BaseModel):
+    """Normalized planning, holding the ids of its references, and the referenced entities once each."""
+    data: PlanningWrite
+    included: References
+
+
+class IncludedPlanningWeek(BaseModel):
+    """Normalized timetable of a week, holding the ids of its references, and the referenced entities once each."""
+    data: NormalizedPlanningWeek
+    included: References
+
+
+class Projection(NamedTuple):
+    """
+    Fields of the slots to return, and relations to embed in the plannings and their slots.
+    A relation left out of `expand` is returned as the id of its entity, whose repository is not queried.
+    Attributes:
+        fields (Tuple[str, ...]): Fields of the slots, among SLOT_FIELDS, besides their id.
+        expand (Tuple[str, ...]): Relations to embed, among RELATIONS.
+    """
+    fields: Tuple[str, ...] = SLOT_FIELDS
+    expand: Tuple[str, ...] = RELATIONS
+
+    def relations(self) -> Tuple[str, ...]:
+        """Relations whose entities are needed: the promotion of a planning is returned whatever the slot fields."""
+        return tuple(relation for relation in self.expand if relation in self.fields or relation == "promotion")
+
+    def without_expansion(self) -> "Projection":
+        return Projection(self.fields, ())
+
+
+FULL_PROJECTION = Projection()
+
+
+async def get_entity_by_id(repository, entity_id, entity_name):
+    """Fetches an entity by its ID from the specified repository."""
+    entity = await state.maybe_await(repository.find_by_id(entity_id))
+    if not entity:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{entity_name} not found")
+    return entity
+
+
+async def get_entities_by_ids(repository, entity_ids, converter) -> dict:
+    """Fetches all entities matching the given IDs from the specified repository in one query."""
+    entities = await state.maybe_await(repository.find_by_ids(list(entity_ids))) if entity_ids else []
+    return {str(entity.id): await converter(entity) for entity in entities}
+
+
+def get_reference(references: dict, entity_id, entity_name):
+    """Looks up an already resolved entity by its ID."""
+    reference = references.get(str(entity_id))
+    if reference is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{entity_name} not found")
+    return reference
+
+
+def get_reference_generations() -> List:
+    """Returns the generations of the repositories of the entities referenced by plannings, to tag their ETags."""
+    return reference_generations([
+        state.repository_promotions, state.repository_teachers, state.repository_courses, state.repository_rooms])
+
+
+async def resolve_references(entities: List[domain.Planning], promotion_ids: Iterable = (),
+                             relations: Iterable[str] = RELATIONS) -> References:
+    """
+    Collects the ids of every promotion, teacher, course and room referenced by the given plannings,
+    then fetches each entity type with a single query, whatever the number of plannings and slots.
+    Additional promotions to fetch along can be given through promotion_ids.
+    Only the entity types of the given relations are fetched, the others are left empty.
+    """
+    relations = set(relations)
+    promotion_ids = {str(promotion_id): promotion_id for promotion_id in promotion_ids}
+    teacher_ids, course_ids, room_ids = {}, {}, {}
+    for entity in entities:
+        promotion_ids[str(entity.promotion_id)] = entity.promotion_id
+        for slot in entity.slots:
+            promotion_ids[str(slot.promotion_id)] = slot.promotion_id
+            teacher_ids[str(slot.teacher_id)] = slot.teacher_id
+            course_ids[str(slot.course_id)] = slot.course_id
+            room_ids[str(slot.room_id)] = slot.room_id
+    ids = {"promotion": promotion_ids, "teacher": teacher_ids, "course": course_ids, "room": room_ids}
+    ids = {relation: list(ids[relation].values()) if relation in relations else [] for relation in RELATIONS}
+    return References(
+        promotions=await get_entities_by_ids(state.repository_promotions, ids["promotion"], get_promotion_from_entity),
+        teachers=await get_entities_by_ids(state.repository_teachers, ids["teacher"], get_teacher_from_entity),
+        courses=await get_entities_by_ids(state.repository_courses, ids["course"], get_course_from_entity),
+        rooms=await get_entities_by_ids(state.repository_rooms, ids["room"], get_room_from_entity)
+    )
+
+
+async def get_planning_slot_from_entity(entity: domain.PlanningSlot, references: References) -> PlanningSlot:
+    """Converts a domain.PlanningSlot entity to a PlanningSlot model."""
+    return PlanningSlot(
+        id=str(entity.id),
+        hours_start=entity.hours_start,
+        minutes_start=entity.minutes_start,
+        hours_end=entity.hours_end,
+        minutes_end=entity.minutes_end,
+        promotion=get_reference(references.promotions, entity.promotion_id, "Promotion"),
+        teacher=get_reference(references.teachers, entity.teacher_id, "Teacher"),
+        course=get_reference(references.courses, entity.course_id, "Course"),
+        room=get_reference(references.rooms, entity.room_id, "Room")
+    )
+
+
+async def get_planning_from_entity(entity: domain.Planning, references: Optional[References] = None) -> Planning:
+    """Converts a domain.Planning entity to a Planning model."""
+    if references is None:
+        references = await resolve_references([entity])
+    promotion = get_reference(references.promotions, entity.promotion_id, "Promotion")
+    slots = [await get_planning_slot_from_entity(slot, references) for slot in entity.slots]
+    return Planning(id=str(entity.id), date=str(entity.date), promotion=promotion, slots=slots)
+
+
+def get_planning_slot_document(entity: domain.PlanningSlot, documents: dict) -> dict:
+    """Same as get_planning_slot_from_entity, with `documents` holding the references dumped as dicts."""
+    return {
+        "id": str(entity.id),
+        "hours_start": entity.hours_start,
+        "minutes_start": entity.minutes_start,
+        "hours_end": entity.hours_end,
+        "minutes_end": entity.minutes_end,
+        "promotion": get_reference(documents["promotions"], entity.promotion_id, "Promotion"),
+        "teacher": get_reference(documents["teachers"], entity.teacher_id, "Teacher"),
+        "course": get_reference(documents["courses"], entity.course_id, "Course"),
+        "room": get_reference(documents["rooms"], entity.room_id, "Room")
+    }
+
+
+def get_planning_document(entity: domain.Planning, documents: dict, projection: Projection = FULL_PROJECTION) -> dict:
+    """
+    Same as get_planning_from_entity with the full projection, `documents` holding the references dumped as dicts.
+    """
+    convert = get_slot_converter(projection)
+    document = {"id": str(entity.id), "date": str(entity.date)}
+    document.update(get_promotion_field(entity.promotion_id, documents, projection))
+    document["slots"] = [convert(slot, documents) for slot in entity.slots]
+    return document
+
+
+def get_normalized_slot_document(entity: domain.PlanningSlot) -> dict:
+    """Converts a domain.PlanningSlot entity to a dict shaped like a PlanningSlotWrite model."""
+    return {
+        "id": str(entity.id),
+        "hours_start": entity.hours_start,
+        "minutes_start": entity.minutes_start,
+        "hours_end": entity.hours_end,
+        "minutes_end": entity.minutes_end,
+        "promotion_id": str(entity.promotion_id),
+        "teacher_id": str(entity.teacher_id),
+        "course_id": str(entity.course_id),
+        "room_id": str(entity.room_id)
+    }
+
+
+def get_slot_converter(projection: Projection) -> Callable[[domain.PlanningSlot, dict], dict]:
+    """
+    Returns the converter of the slots for a projection, `documents` holding the references dumped as dicts.
+    Complete slots, embedded or normalized, are built by the functions above. For the other projections, the fields
+    are sorted once, rather than for every slot.
+    """
+    if projection == FULL_PROJECTION:
+        return get_planning_slot_document
+    if projection == FULL_PROJECTION.without_expansion():
+        return lambda entity, documents: get_normalized_slot_document(entity)
+    values = [field for field in projection.fields if field not in RELATION_REFERENCES]
+    ids = [f"{field}_id" for field in projection.fields if field in RELATION_REFERENCES and field not in projection.expand]
+    expanded = [(field, f"{field}_id", *RELATION_REFERENCES[field]) for field in projection.fields
+                if field in projection.expand]
+
+    def convert(entity: domain.PlanningSlot, documents: dict) -> dict:
+        document = {"id": str(entity.id)}
+        for field in values:
+            document[field] = getattr(entity, field)
+        for field in ids:
+            document[field] = str(getattr(entity, field))
+        for field, id_field, key, name in expanded:
+            document[field] = get_reference(documents[key], getattr(entity, id_field), name)
+        return document
+    return convert
+
+
+def get_promotion_field(promotion_id: domain.PromotionId, documents: dict, projection: Projection) -> dict:
+    """Returns the promotion of a planning, embedded or as its id depending on a Projection."""
+    if "promotion" in projection.expand:
+        return {"promotion": get_reference(documents["promotions"], promotion_id, "Promotion")}
+    return {"promotion_id": str(promotion_id)}
+
+
+def get_plannings_body(entities: List[domain.Planning], documents: dict, response_format: str,
+                       projection: Projection = FULL_PROJECTION):
+    """
+    Body of a list of plannings in the requested format, `documents` holding their references dumped as dicts.
+    The body is made of dicts, sent through the fast response path of src.main.web.responses without being
+    validated again.
+    """
+    if response_format == NORMALIZED_FORMAT:
+        normalized = projection.without_expansion()
+        return {"data": [get_planning_document(entity, documents, normalized) for entity in entities],
+                "included": documents}
+    return [get_planning_document(entity, documents, projection) for entity in entities]
+
+
+def get_planning_body(entity: domain.Planning, documents: dict, response_format: str,
+                      projection: Projection = FULL_PROJECTION):
+    """Body of a planning in the requested format, `documents` holding its references dumped as dicts."""
+    if response_format == NORMALIZED_FORMAT:
+        return {"data": get_planning_document(entity, documents, projection.without_expansion()), "included": documents}
+    return get_planning_document(entity, documents, projection)
+
+
+def parse_names(value: Optional[str], allowed: Tuple[str, ...], parameter: str) -> Tuple[str, ...]:
+    """Reads a comma-separated list of names, kept in the order of `allowed`. An absent list selects every name."""
+    if value is None:
+        return allowed
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(names.difference(allowed))
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Unknown {parameter}: {', '.join(unknown)}, expected among {', '.join(allowed)}")
+    return tuple(name for name in allowed if name in names)
+
+
+def get_projection(
+        fields: Optional[str] = Query(None, description="Comma-separated fields of the slots, all by default.",
+                                      examples=["hours_start,minutes_start,hours_end,minutes_end,room"]),
+        expand: Optional[str] = Query(None, description="Comma-separated relations to embed, all by default.",
+                                      examples=["teacher,room"])) -> Projection:
+    """Dependency reading the `fields` and `expand` query parameters of the planning reads."""
+    return Projection(parse_names(fields, SLOT_FIELDS, "fields"), parse_names(expand, RELATIONS, "relations"))
+
+
+def encode_cursor(entity: domain.Planning) -> str:
+    """Builds the opaque pagination cursor pointing right after a domain.Planning."""
+    return base64.urlsafe_b64encode(f"{entity.date.isoformat()}|{entity.id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[dt, domain.PlanningId]:
+    """Reads the (date, id) keyset back from a pagination cursor."""
+    try:
+        planning_date, planning_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return dt.fromisoformat(planning_date), domain.PlanningId(id=planning_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+async def stream_plannings(after: Optional[Tuple[dt, domain.PlanningId]], date: Optional[dt],
+                           promotion: Optional[domain.PromotionId],
+                           projection: Projection = FULL_PROJECTION) -> AsyncIterator[dict]:
+    """
+    Yields the plannings matching the optional date and promotion filters, with a keyset query per page, so that only
+    one page of plannings and of their references is held in memory at a time.
+    """
+    while True:
+        planning_entities = await state.maybe_await(state.repository_plannings.find_page(
+            STREAM_PAGE_SIZE, after=after, date_from=date, date_to=date, promotion_id=promotion))
+        documents = (await resolve_references(planning_entities, relations=projection.relations())).model_dump()
+        for entity in planning_entities:
+            yield get_planning_document(entity, documents, projection)
+        if len(planning_entities) < STREAM_PAGE_SIZE:
+            return
+        after = (planning_entities[-1].date, planning_entities[-1].id)
+
+
+def parse_iso_week(iso_week: str) -> Tuple[dt, dt]:
+    """Returns the Monday and Friday of an ISO week such as 2025-W03."""
+    year, week = iso_week.split("-W")
+    try:
+        monday = dt.fromisocalendar(int(year), int(week), 1)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid ISO week")
+    return monday, monday + timedelta(days=4)
+
+
+def read_bulk_items(body: bytes, media_type: str) -> list:
+    """
+    Splits the body of a bulk import into raw items: one JSON line per item for an NDJSON stream,
+    one decoded object per item for a JSON array. NDJSON lines are decoded one by one by parse_bulk_item,
+    so that a malformed line only rejects its own item.
+    """
+    if media_type == NDJSON_MEDIA_TYPE:
+        items = [line for line in body.splitlines() if line.strip()]
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of plannings")
+    if len(items) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                            detail=f"At most {MAX_BULK_SIZE} plannings can be imported at once")
+    return items
+
+
+def describe_validation_error(ex: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" if error["loc"] else error["msg"]
+        for error in ex.errors())
+
+
+def parse_bulk_item(item) -> domain.Planning:
+    """
+    Validates a raw item with the PlanningWrite model, then with the domain.Planning validators.
+    Raises a ValidationError for an invalid item, and a ValueError for an item holding a null slot.
+    """
+    if isinstance(item, bytes):
+        planning = PlanningWrite.model_validate_json(item)
+    else:
+        planning = PlanningWrite.model_validate(item)
+    null_slots = [str(position) for position, slot in enumerate(planning.slots) if slot is None]
+    if null_slots:
+        raise ValueError(f"slots.{', slots.'.join(null_slots)}: Slot must not be null")
+    return get_planning_entity_from_write(planning)
+
+
+def get_missing_references(entity: domain.Planning, references: References) -> List[str]:
+    """Lists the entities referenced by a domain.Planning that do not exist."""
+    missing = []
+    if str(entity.promotion_id) not in references.promotions:
+        missing.append(f"Promotion {entity.promotion_id} not found")
+    for slot in entity.slots:
+        for found, entity_id, entity_name in [(references.teachers, slot.teacher_id, "Teacher"),
+                                              (references.courses, slot.course_id, "Course"),
+                                              (references.rooms, slot.room_id, "Room")]:
+            if str(entity_id) not in found:
+                missing.append(f"{entity_name} {entity_id} not found")
+    return list(dict.fromkeys(missing))
+
+
+def get_planning_entity_from_write(planning: PlanningWrite) -> domain.Planning:
+    """Converts a PlanningWrite model to a domain.Planning entity."""
+    planning_slots = [
+        domain.PlanningSlot(
+            id=domain.PlanningSlotId(id=slot.id),
+            hours_start=slot.hours_start,
+            minutes_start=slot.minutes_start,
+            hours_end=slot.hours_end,
+            minutes_end=slot.minutes_end,
+            promotion_id=domain.PromotionId(id=planning.promotion_id),
+            teacher_id=domain.TeacherId(id=slot.teacher_id),
+            course_id=domain.CourseId(id=slot.course_id),
+            room_id=domain.RoomId(id=slot.room_id)
+        )
+        for slot in planning.slots
+    ]
+    return domain.Planning(
+        id=domain.PlanningId(id=planning.id),
+        date=planning.date,
+        promotion_id=domain.PromotionId(id=planning.promotion_id),
+        slots=planning_slots
+    )
+
+
+async def load_conflict_index(days: Iterable[dt]) -> domain.ResourceConflictIndex:
+    """
+    Indexes the bookings of the given dates, with a single range query on the indexed date column whatever the
+    number of dates. Used to check the items of a bulk import against each other and against stored plannings
+    before they are written; the repository checks them again in its write transaction.
+    """
+    index = domain.ResourceConflictIndex()
+    days = set(days)
+    if not days:
+        return index
+    planning_entities = await state.maybe_await(state.repository_plannings.find_by_date_range(min(days), max(days)))
+    plannings_by_date = {day: [] for day in days}
+    for entity in planning_entities:
+        if entity.date in plannings_by_date:
+            plannings_by_date[entity.date].append(entity)
+    for day, plannings in plannings_by_date.items():
+        index.load(day, plannings)
+    return index
+
+
+def find_resource_conflict(
+        index: domain.ResourceConflictIndex, day: dt, slots: List[domain.PlanningSlot]) -> Optional[str]:
+    """Describes the first slot booking a teacher or a room already booked on the same date."""
+    for slot in slots:
+        conflict = index.find_conflict(day, slot)
+        if conflict is not None:
+            return f"Teacher or room of slot {slot.id} is already booked by slot {conflict}"
+    return None
+
+
+async def get_promotion_from_entity(entity: domain.Promotion) -> Promotion:
+    """Converts a domain.Promotion entity to a Promotion model."""
+    return Promotion(id=str(entity.id), study_year=entity.study_year, diploma=entity.diploma, name=entity.name)
+
+
+async def get_teacher_from_entity(entity: domain.Teacher) -> Teacher:
+    """Converts a domain.Teacher entity to a Teacher model."""
+    return Teacher(id=str(entity.id), name=entity.name, firstname=entity.firstname)
+
+
+async def get_course_from_entity(entity: domain.Course) -> Course:
+    """Converts a domain.Course entity to a Course model."""
+    return Course(id=str(entity.id), name=entity.name)
+
+
+async def get_room_from_entity(entity: domain.Room) -> Room:
+    """Converts a domain.Room entity to a Room model."""
+    return Room(id=str(entity.id), name=entity.name, description=entity.description)
+
+
+async def validate_slot_details(slot: PlanningSlot):
+    """Validates the details of a PlanningSlot."""
+    teacher = await get_entity_by_id(state.repository_teachers, slot.teacher.id, "Teacher")
+    course = await get_entity_by_id(state.repository_courses, slot.course.id, "Course")
+    room = await get_entity_by_id(state.repository_rooms, slot.room.id, "Room")
+    return teacher, course, room
+
+
+async def validate_slot_write_details(slot: PlanningSlotWrite):
+    """Validates the details of a PlanningSlotWrite."""
+    teacher = await get_entity_by_id(state.repository_teachers, slot.teacher_id, "Teacher")
+    course = await get_entity_by_id(state.repository_courses, slot.course_id, "Course")
+    room = await get_entity_by_id(state.repository_rooms, slot.room_id, "Room")
+    return teacher, course, room
+
+
+@router.get("/api/v1/plannings", response_model=Union[List[Planning], IncludedPlannings],
+            responses={**STREAM_RESPONSES, **NOT_MODIFIED_RESPONSES})
+async def get_plannings(
+        request: Request, response: Response, date: Optional[dt] = None, promotion_id: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+        stream: bool = False, response_format: PlanningFormat = Query(EMBEDDED_FORMAT, alias="format"),
+        projection: Projection = Depends(get_projection)) -> Response:
+    """
+    Fetches a page of planning entities ordered by date, optionally filtered by date and promotion.
+    Filters are applied by the database. When more plannings are available, the `X-Next-Cursor` response header
+    holds the cursor to pass back to fetch the next page.
+    With `Accept: application/x-ndjson` or `?stream=1`, every planning matching the filters, after the cursor if any,
+    is streamed one per line instead, whatever the limit: they are read STREAM_PAGE_SIZE at a time.
+    A page is returned with an ETag built from the versions of its plannings and the generations of the reference
+    repositories, checked against `If-None-Match` before their references are resolved.
+    With `?format=normalized`, the page is returned in `data` with the ids of the references of the plannings, and
+    the referenced entities are returned once each in `included`. A stream cannot be normalized.
+    `?fields=` restricts the fields of the slots, and `?expand=` the relations embedded, the others being returned
+    as ids: the entities of the relations left out are not read.
+    """
+    promotion = domain.PromotionId(id=promotion_id) if promotion_id else None
+    if wants_stream(request, stream):
+        if response_format == NORMALIZED_FORMAT:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A stream cannot be normalized")
+        after = decode_cursor(cursor) if cursor else None
+        return stream_documents(lambda: stream_plannings(after, date, promotion, projection))
+    after = decode_cursor(cursor) if cursor else None
+    planning_entities = await state.maybe_await(state.repository_plannings.find_page(
+        limit + 1, after=after, date_from=date, date_to=date, promotion_id=promotion))
+    if len(planning_entities) > limit:
+        planning_entities = planning_entities[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(planning_entities[-1])
+    etag = planning_etag(((entity.id, entity.version) for entity in planning_entities), get_reference_generations())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    documents = (await resolve_references(planning_entities, relations=projection.relations())).model_dump()
+    return trusted_response(get_plannings_body(planning_entities, documents, response_format, projection), response)
+
+
+@router.post("/api/v1/plannings", response_model=Planning)
+async def add_planning(planning: PlanningWrite) -> Planning:
+    """
+    Add a planning entity to the repository.
+    """
+    try:
+        planning_entity = get_planning_entity_from_write(planning)
+        await state.maybe_await(state.repository_plannings.add(planning_entity))
+        return await get_planning_from_entity(planning_entity)
+    except HTTPException:
+        raise
+    except domain.ResourceConflictError as ex:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(ex))
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+
+
+BULK_REQUEST_BODY = {
+    "content": {
+        "application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/PlanningWrite"}}},
+        NDJSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/PlanningWrite"}},
+    },
+    "required": True,
+}
+
+
+@router.post("/api/v1/plannings:bulk", response_model=BulkImportResult, openapi_extra={"requestBody": BULK_REQUEST_BODY})
+async def add_plannings_bulk(request: Request, user: dict = Depends(get_current_user)) -> BulkImportResult:
+    """
+    Add planning entities in bulk, from a JSON array or from an NDJSON stream (`Content-Type: application/x-ndjson`).
+    Each item is validated like a single planning, and its promotion, teachers, courses and rooms must exist.
+    Its id and the ids of its slots must not be used by another item nor by a stored planning or slot.
+    Its teachers and rooms must not be booked at the same time by another planning, stored or imported.
+    Valid items are written with batched multi-row inserts in a single transaction, rejected items are reported
+    with their index in the body.
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    items = read_bulk_items(await request.body(), media_type)
+    errors: List[BulkItemError] = []
+    candidates: List[Tuple[int, domain.Planning]] = []
+    planning_ids, slot_ids = set(), set()
+    for index, item in enumerate(items):
+        try:
+            entity = parse_bulk_item(item)
+        except ValidationError as ex:
+            errors.append(BulkItemError(index=index, detail=describe_validation_error(ex)))
+            continue
+        except ValueError as ex:
+            errors.append(BulkItemError(index=index, detail=str(ex)))
+            continue
+        entity_slot_ids = {str(slot.id) for slot in entity.slots}
+        if str(entity.id) in planning_ids or entity_slot_ids & slot_ids:
+            errors.append(BulkItemError(index=index, id=str(entity.id), detail="Duplicate planning or slot id"))
+            continue
+        planning_ids.add(str(entity.id))
+        slot_ids |= entity_slot_ids
+        candidates.append((index, entity))
+
+    try:
+        existing_ids = {str(id) for id in await state.maybe_await(
+            state.repository_plannings.find_existing_ids([entity.id for _, entity in candidates]))} if candidates else set()
+        existing_slot_ids = {str(id) for id in await state.maybe_await(
+            state.repository_plannings.find_existing_slot_ids([slot.id for _, entity in candidates for slot in entity.slots])
+        )} if slot_ids else set()
+        references = await resolve_references([entity for _, entity in candidates])
+        conflict_index = await load_conflict_index(entity.date for _, entity in candidates)
+        plannings = []
+        for index, entity in candidates:
+            missing = get_missing_references(entity, references)
+            conflict = find_resource_conflict(conflict_index, entity.date, entity.slots)
+            existing_slots = sorted(str(slot.id) for slot in entity.slots if str(slot.id) in existing_slot_ids)
+            if str(entity.id) in existing_ids:
+                errors.append(BulkItemError(index=index, id=str(entity.id), detail="Planning already exists"))
+            elif existing_slots:
+                errors.append(BulkItemError(
+                    index=index, id=str(entity.id), detail=f"Slot {', '.join(existing_slots)} already exists"))
+            elif missing:
+                errors.append(BulkItemError(index=index, id=str(entity.id), detail="; ".join(missing)))
+            elif conflict:
+                errors.append(BulkItemError(index=index, id=str(entity.id), detail=conflict))
+            else:
+                conflict_index.add(entity.date, entity.slots)
+                plannings.append(entity)
+        if plannings:
+            await state.maybe_await(state.repository_plannings.add_all(plannings))
+    except domain.ResourceConflictError as ex:
+        # A planning written by another request since the bookings were loaded: nothing was imported.
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(ex))
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+    return BulkImportResult(created=len(plannings), errors=sorted(errors, key=lambda error: error.index))
+
+
+@router.get("/api/v1/plannings/{planning_id}", response_model=Union[Planning, IncludedPlanning],
+            responses=NOT_MODIFIED_RESPONSES)
+async def get_planning_by_id(
+        planning_id: str, request: Request, response: Response,
+        response_format: PlanningFormat = Query(EMBEDDED_FORMAT, alias="format"),
+        projection: Projection = Depends(get_projection)) -> Planning:
+    """
+    Get a planning entity by its id.
+    The ETag of the planning is checked against `If-None-Match` with its version and the generations of the
+    reference repositories only, before loading its slots.
+    With `?format=normalized`, the planning is returned in `data` and the entities it references in `included`.
+    `?fields=` and `?expand=` select the fields of the slots and the relations embedded, as for the list.
+    """
+    try:
+        try:
+            version = await state.maybe_await(state.repository_plannings.find_version(domain.PlanningId(id=planning_id)))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Planning not found")
+        generations = get_reference_generations()
+        etag = planning_etag([(planning_id, version)], generations)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        planning = await get_entity_by_id(state.repository_plannings, planning_id, "Planning")
+        response.headers["ETag"] = planning_etag([(planning.id, planning.version)], generations)
+        documents = (await resolve_references([planning], relations=projection.relations())).model_dump()
+        return trusted_response(get_planning_body(planning, documents, response_format, projection), response)
+    except HTTPException:
+        raise
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+
+
+@router.post("/api/v1/plannings/{planning_id}/slots", response_model=Planning, responses=CONCURRENCY_RESPONSES)
+async def add_planning_slot(planning_id: str, slot: PlanningSlotWrite, request: Request, response: Response) -> Planning:
+    """
+    Add a planning slot to a planning entity.
+    With `If-Match`, the slot is only added if the planning still has that ETag, and 412 is returned otherwise.
+    The slot is written only if the planning was not written since it was read and checked for collisions:
+    a concurrent write is reported with a 409, instead of being overwritten.
+    """
+    try:
+        planning = await get_entity_by_id(state.repository_plannings, domain.PlanningId(id=planning_id), "Planning")
+        version = planning.version
+        generations = get_reference_generations()
+        if not is_match(request, planning_etag([(planning.id, version)], generations)):
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Planning was modified")
+        teacher, course, room = await validate_slot_write_details(slot)
+
+        planning_slot = domain.PlanningSlot(
+            id=domain.PlanningSlotId(id=slot.id),
+            hours_start=slot.hours_start,
+            minutes_start=slot.minutes_start,
+            hours_end=slot.hours_end,
+            minutes_end=slot.minutes_end,
+            promotion_id=domain.PromotionId(id=slot.promotion_id),
+            teacher_id=domain.TeacherId(id=slot.teacher_id),
+            course_id=domain.CourseId(id=slot.course_id),
+            room_id=domain.RoomId(id=slot.room_id)
+        )
+
+        try:
+            planning.add_slot(planning_slot)
+        except ValueError as ex:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(ex))
+        # Only the new slot is written, the other slots of the planning are left untouched.
+        await state.maybe_await(
+            state.repository_plannings.add_slot(planning.id, planning_slot, expected_version=version))
+        response.headers["ETag"] = planning_etag([(planning.id, version + 1)], generations)
+        documents = (await resolve_references([planning])).model_dump()
+        return trusted_response(get_planning_document(planning, documents), response)
+    except HTTPException:
+        raise
+    except (domain.ConcurrentUpdateError, domain.ResourceConflictError) as ex:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(ex))
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+
+
+@router.get("/api/v1/promotions/{promotion_id}/weeks/{iso_week}", response_model=Union[PlanningWeek, IncludedPlanningWeek],
+            responses=NOT_MODIFIED_RESPONSES)
+async def get_promotion_week(
+        request: Request, response: Response, promotion_id: str,
+        iso_week: str = Path(..., pattern=ISO_WEEK_PATTERN, examples=["2025-W03"]),
+        response_format: PlanningFormat = Query(EMBEDDED_FORMAT, alias="format"),
+        projection: Projection = Depends(get_projection)) -> PlanningWeek:
+    """
+    Fetches the timetable of a promotion from Monday to Friday of an ISO week (e.g. 2025-W03).
+    Plannings and their slots are read with a single range query, then each referenced entity type with one query.
+    Every day of the week is returned, with its slots ordered by start time. The week has an ETag built from the
+    versions of its plannings and the generations of the reference repositories, so that clients polling it get a
+    304 as long as none of them is written.
+    With `?format=normalized`, the week is returned in `data` with the ids of the references of its slots, and the
+    referenced entities are returned once each in `included`.
+    `?fields=` and `?expand=` select the fields of the slots and the relations embedded, as for the list.
+    """
+    monday, friday = parse_iso_week(iso_week)
+    promotion = domain.PromotionId(id=promotion_id)
+    planning_entities = await state.maybe_await(
+        state.repository_plannings.find_by_date_range(monday, friday, promotion))
+    etag = planning_etag(((entity.id, entity.version) for entity in planning_entities), get_reference_generations())
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    documents = (await resolve_references(
+        planning_entities, promotion_ids=[promotion], relations=projection.relations())).model_dump()
+    if "promotion" in projection.expand:
+        # An unknown promotion is reported in every format.
+        get_reference(documents["promotions"], promotion, "Promotion")
+    slots_by_date = {monday + timedelta(days=offset): [] for offset in range(5)}
+    for entity in planning_entities:
+        slots_by_date[entity.date].extend(entity.slots)
+    normalized = response_format == NORMALIZED_FORMAT
+    if normalized:
+        projection = projection.without_expansion()
+    convert = get_slot_converter(projection)
+    days = [
+        {"date": str(day), "slots": [
+            convert(slot, documents) for slot in sorted(slots, key=lambda slot: (slot.start_minute, slot.end_minute))]}
+        for day, slots in slots_by_date.items()
+    ]
+    week = {"week": iso_week, **get_promotion_field(promotion, documents, projection), "days": days}
+    return trusted_response({"data": week, "included": documents} if normalized else week, response)
@@ -0,0 +1,67 @@
+"""
+This module contains the fast response path of the routes returning many entities, such as the plannings.
+FastAPI validates the value a route returns against its `response_model`, then serialises it: for a page of
+plannings, that means building and validating a model per slot and per referenced entity, which costs more than
+the queries themselves. The routes of this path build plain dicts, shaped like their response model, from entities
+already validated by the domain, and return them as a JSONResponse: FastAPI sends a returned Response as is.
+`response_model` is kept on these routes, so that the OpenAPI schema still documents the body; tests check that
+both paths produce the same body.
+Bodies are serialised with orjson when it is installed, and with the standard json module otherwise.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Type
+import json
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialises content to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class TrustedJSONResponse(Response):
+    """JSON response whose content is serialised as is, without being validated against a model."""
+    media_type = JSON_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def trusted_response(content: Any, response: Response) -> TrustedJSONResponse:
+    """
+    Returns content as a TrustedJSONResponse, with the headers set on the `response` injected in the route,
+    which FastAPI only applies to the values it serialises itself.
+    """
+    trusted = TrustedJSONResponse(content)
+    for name, value in response.headers.items():
+        if name != "content-length":
+            trusted.headers.append(name, value)
+    return trusted
+
+
+def get_document(entity: BaseModel, model: Type[BaseModel]) -> Dict[str, Any]:
+    """Converts a domain entity to a dict holding the fields of `model`, with its id as a string."""
+    document = entity.model_dump(include=set(model.model_fields))
+    document["id"] = str(entity.id)
+    return document
+
+
+def get_documents(entities: Iterable[BaseModel], model: Type[BaseModel]) -> list:
+    return [get_document(entity, model) for entity in entities]
@@ -1,85 +1,96 @@
-"""
-This module contains the implementation of the REST API for the rooms
-endpoint using FastAPI.
-"""
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from src.main import domain
-from src.main.web.auth import get_current_user
-from src.main.web import state
-from pydantic import BaseModel
-
-
-router = APIRouter(prefix="/api/v1/rooms", tags=["Rooms"])
-
-
-class Room(BaseModel):
-    id: str
-    name: str
-    description: str
-
-
-@router.get("", response_model=List[Room])
-async def get_rooms() -> List[Room]:
-    """
-    Fetches a list of rooms.
-    This asynchronous function retrieves all room entities from the repository,
-    converts them to Room objects, and returns them as a list.
-    """
-    try:
-        room_entities = state.repository_rooms.find_all()
-        rooms = [await get_room_from_entity(entity) for entity in room_entities]
-    except Exception as ex:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
-    return rooms
-
-
-@router.post("", response_model=Room)
-async def add_room(room: Room, user: dict = Depends(get_current_user)) -> Room:
-    """
-    Add a new room to the repository.
-    """
-    try:
-        room_entity = domain.Room(id=domain.RoomId(
-            id=state.repository_rooms.next_identity()),
-            name=room.name, description=room.description)
-        state.repository_rooms.add(room_entity)
-    except Exception as ex:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
-    return room
-
-
-@router.put("/{room_id}", response_model=Room)
-async def update_room(room_id: str, room: Room, user: dict = Depends(get_current_user)) -> Room:
-    """
-    Update an existing room.
-    """
-    try:
-        room_entity = state.repository_rooms.find_by_id(domain.RoomId(id=room_id))
-        if not room_entity:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Room not found")
-        room_entity.name = room.name
-        room_entity.description = room.description
-        state.repository_rooms.update(room_entity)
-    except Exception as ex:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
-    return room
-
-
-@router.delete("/{room_id}", response_model=dict)
-async def delete_room(room_id: str, user: dict = Depends(get_current_user)) -> dict:
-    """
-    Delete a room by its ID.
-    """
-    try:
-        room_entity = state.repository_rooms.find_by_id(domain.RoomId(id=room_id))
-        if not room_entity:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Room not found")
-        state.repository_rooms.delete(domain.RoomId(id=room_id))
-    except Exception as ex:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
-    return {"message": "Room deleted"}
-
-
-async def get_room_from_entity(entity: domain.Room) -> Room:
-    return Room(id=str(entity.id), name=entity.name, description=entity.description)
+"""
+This module contains the implementation of the REST API for the rooms
+endpoint using FastAPI.
+"""
+from fastapi import APIRouter, HTTPException, Request, Response, status, Depends
+from typing import List
+from src.main import domain
+from src.main.web.auth import get_current_user
+from src.main.web import state
+from src.main.web.etags import NOT_MODIFIED_RESPONSES, entities_etag, is_not_modified, not_modified
+from src.main.web.streaming import STREAM_RESPONSES, convert_entities, stream_models, wants_stream
+from src.main.web.responses import get_documents, trusted_response
+from pydantic import BaseModel
+
+
+router = APIRouter(prefix="/api/v1/rooms", tags=["Rooms"])
+
+
+class Room(BaseModel):
+    id: str
+    name: str
+    description: str
+
+
+@router.get("", response_model=List[Room], responses={**STREAM_RESPONSES, **NOT_MODIFIED_RESPONSES})
+async def get_rooms(request: Request, response: Response, stream: bool = False) -> List[Room]:
+    """
+    Fetches a list of rooms.
+    This asynchronous function retrieves all room entities from the repository,
+    converts them to Room objects, and returns them as a list.
+    With `Accept: application/x-ndjson` or `?stream=1`, rooms are streamed one per line as they are read.
+    The list has an ETag built from the stored rooms, checked against `If-None-Match` before converting them.
+    """
+    if wants_stream(request, stream):
+        return stream_models(lambda: convert_entities(state.repository_rooms.iter_all(), get_room_from_entity))
+    try:
+        room_entities = await state.maybe_await(state.repository_rooms.find_all())
+        etag = entities_etag(room_entities)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        rooms = get_documents(room_entities, Room)
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+    return trusted_response(rooms, response)
+
+
+@router.post("", response_model=Room)
+async def add_room(room: Room, user: dict = Depends(get_current_user)) -> Room:
+    """
+    Add a new room to the repository.
+    """
+    try:
+        room_entity = domain.Room(id=domain.RoomId(
+            id=state.repository_rooms.next_identity()),
+            name=room.name, description=room.description)
+        await state.maybe_await(state.repository_rooms.add(room_entity))
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+    return room
+
+
+@router.put("/{room_id}", response_model=Room)
+async def update_room(room_id: str, room: Room, user: dict = Depends(get_current_user)) -> Room:
+    """
+    Update an existing room.
+    """
+    try:
+        room_entity = await state.maybe_await(state.repository_rooms.find_by_id(domain.RoomId(id=room_id)))
+        if not room_entity:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Room not found")
+        room_entity.name = room.name
+        room_entity.description = room.description
+        await state.maybe_await(state.repository_rooms.update(room_entity))
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+    return room
+
+
+@router.delete("/{room_id}", response_model=dict)
+async def delete_room(room_id: str, user: dict = Depends(get_current_user)) -> dict:
+    """
+    Delete a room by its ID.
+    """
+    try:
+        room_entity = await state.maybe_await(state.repository_rooms.find_by_id(domain.RoomId(id=room_id)))
+        if not room_entity:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Room not found")
+        await state.maybe_await(state.repository_rooms.delete(domain.RoomId(id=room_id)))
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+    return {"message": "Room deleted"}
+
+
+async def get_room_from_entity(entity: domain.Room) -> Room:
+    return Room(id=str(entity.id), name=entity.name, description=entity.description)
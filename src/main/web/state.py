@@ -1,19 +1,35 @@
-"""
-This module defines repository variables for different entities in the backend course application.
-
-The repository variables are placeholders for the actual repository instances that will be used to
-interact with the database or data source for the respective entities. These entities include:
-- Promotions
-- Plannings
-- Teachers
-- Courses
-- Rooms
-
-Initially, these repository variables are set to None and are expected to be assigned with the
-appropriate repository instances during the application setup or initialization process.
-"""
-repository_promotions = None
-repository_plannings = None
-repository_teachers = None
-repository_courses = None
-repository_rooms = None
+"""
+This module defines repository variables for different entities in the backend course application.
+
+The repository variables are placeholders for the actual repository instances that will be used to
+interact with the database or data source for the respective entities. These entities include:
+- Promotions
+- Plannings
+- Teachers
+- Courses
+- Rooms
+
+Initially, these repository variables are set to None and are expected to be assigned with the
+appropriate repository instances during the application setup or initialization process.
+Repositories can be synchronous or asynchronous: callers pass their results through `maybe_await`.
+The scheduler pool holds the worker processes of the timetable generator, started on first use.
+The planning events broker fans the writes of plannings out to the clients of the change feed.
+"""
+import inspect
+from src.main.domain import PlanningEventBroker
+
+
+repository_promotions = None
+repository_plannings = None
+repository_teachers = None
+repository_courses = None
+repository_rooms = None
+scheduler_pool = None
+planning_events = PlanningEventBroker()
+
+
+async def maybe_await(result):
+    """Awaits the result of an asynchronous repository, returns the result of a synchronous one unchanged."""
+    if inspect.isawaitable(result):
+        return await result
+    return result
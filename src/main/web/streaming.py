@@ -0,0 +1,58 @@
+"""
+This module contains the helpers shared by the list endpoints to stream their results as NDJSON.
+A list endpoint streams when the client asks for it, with `Accept: application/x-ndjson` or `?stream=1`:
+each entity is then serialised on its own line as soon as it is read, instead of building the whole list first,
+so the memory used and the time to the first byte do not grow with the table.
+A streamed response is sent once its route has returned, after the session of the request is closed: the stream
+opens its own session with `database.open_session_scope`, which the repositories use through `context_session`.
+Once the first line is sent the status can no longer change, so an error raised while streaming aborts the response.
+"""
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Union
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+import src.main.persistence.database as database
+from src.main.web.responses import dumps
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_RESPONSES = {
+    200: {"content": {NDJSON_MEDIA_TYPE: {}}, "description": "One JSON object per line when streaming is requested."}
+}
+
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    """Tells whether the client asked for an NDJSON stream, with the `stream` query parameter or its Accept header."""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def convert_entities(entities: Union[Iterable, AsyncIterable],
+                           convert: Callable[[object], Awaitable[BaseModel]]) -> AsyncIterator[BaseModel]:
+    """Converts the entities yielded by a synchronous or an asynchronous repository, one at a time."""
+    if hasattr(entities, "__aiter__"):
+        async for entity in entities:
+            yield await convert(entity)
+    else:
+        for entity in entities:
+            yield await convert(entity)
+
+
+def stream_models(read: Callable[[], AsyncIterator[BaseModel]]) -> StreamingResponse:
+    """
+    Streams the models yielded by `read` as NDJSON. `read` is only called once the session of the stream is open,
+    so that every query it makes runs on that session.
+    """
+    async def lines():
+        async with database.open_session_scope():
+            async for model in read():
+                yield model.model_dump_json() + "\n"
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def stream_documents(read: Callable[[], AsyncIterator[dict]]) -> StreamingResponse:
+    """Same as stream_models, for dicts already shaped like the models, serialised without validating them again."""
+    async def lines():
+        async with database.open_session_scope():
+            async for document in read():
+                yield dumps(document) + b"\n"
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,151 @@
+"""
+This module contains the implementation of the REST API for the timetable
+generator using FastAPI. The generator builds collision-free plannings for a
+week from the course hours each promotion requires. It is CPU-bound, so it runs
+in a pool of worker processes and does not block the event loop while it searches.
+The generated plannings are returned in the format accepted by the bulk import
+endpoint, which stores them once reviewed. The number of worker processes can be
+set with the SCHEDULER_WORKERS environment variable (defaults to 2).
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+import asyncio
+import os
+from src.main import domain
+from src.main.web import state
+from src.main.web.auth import get_current_user
+from src.main.web.planning import (
+    ISO_WEEK_PATTERN, PlanningSlotWrite, PlanningWrite, describe_validation_error, parse_iso_week)
+
+
+router = APIRouter(prefix="/api/v1/timetables", tags=["Timetables"])
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))
+
+
+class CourseRequirement(BaseModel):
+    promotion_id: str
+    course_id: str
+    teacher_id: str
+    minutes: int = Field(..., gt=0, le=domain.MAX_WEEK_MINUTES)
+    session_minutes: int = 120
+    room_ids: List[str] = []
+
+
+class Unavailability(BaseModel):
+    teacher_id: Optional[str] = None
+    room_id: Optional[str] = None
+    weekday: int
+    hours_start: int
+    minutes_start: int
+    hours_end: int
+    minutes_end: int
+
+
+class TimetableWrite(BaseModel):
+    week: str = Field(..., pattern=ISO_WEEK_PATTERN, examples=["2025-W03"])
+    requirements: List[CourseRequirement]
+    room_ids: List[str] = []
+    unavailabilities: List[Unavailability] = []
+    time_budget: float = 5.0
+
+
+class UnscheduledSession(BaseModel):
+    promotion_id: str
+    course_id: str
+    minutes: int
+
+
+class Timetable(BaseModel):
+    week: str
+    complete: bool
+    plannings: List[PlanningWrite]
+    unscheduled: List[UnscheduledSession]
+
+
+def get_scheduler_pool() -> ProcessPoolExecutor:
+    if state.scheduler_pool is None:
+        state.scheduler_pool = ProcessPoolExecutor(max_workers=SCHEDULER_WORKERS)
+    return state.scheduler_pool
+
+
+def get_timetable_request(timetable: TimetableWrite, rooms: List[domain.RoomId],
+                          booked: List[domain.Planning]) -> domain.TimetableRequest:
+    monday, _ = parse_iso_week(timetable.week)
+    return domain.TimetableRequest(
+        monday=monday,
+        requirements=[
+            domain.CourseRequirement(
+                promotion_id=domain.PromotionId(id=requirement.promotion_id),
+                course_id=domain.CourseId(id=requirement.course_id),
+                teacher_id=domain.TeacherId(id=requirement.teacher_id),
+                minutes=requirement.minutes,
+                session_minutes=requirement.session_minutes,
+                room_ids=[domain.RoomId(id=room_id) for room_id in requirement.room_ids]
+            )
+            for requirement in timetable.requirements
+        ],
+        rooms=rooms,
+        unavailabilities=[
+            domain.Unavailability(
+                teacher_id=domain.TeacherId(id=unavailability.teacher_id) if unavailability.teacher_id else None,
+                room_id=domain.RoomId(id=unavailability.room_id) if unavailability.room_id else None,
+                weekday=unavailability.weekday,
+                start_minute=unavailability.hours_start * 60 + unavailability.minutes_start,
+                end_minute=unavailability.hours_end * 60 + unavailability.minutes_end
+            )
+            for unavailability in timetable.unavailabilities
+        ],
+        booked=booked,
+        time_budget=timetable.time_budget
+    )
+
+
+def get_planning_write_from_entity(entity: domain.Planning) -> PlanningWrite:
+    return PlanningWrite(
+        id=str(entity.id),
+        date=entity.date,
+        promotion_id=str(entity.promotion_id),
+        slots=[
+            PlanningSlotWrite(
+                id=str(slot.id), hours_start=slot.hours_start, minutes_start=slot.minutes_start,
+                hours_end=slot.hours_end, minutes_end=slot.minutes_end, promotion_id=str(slot.promotion_id),
+                teacher_id=str(slot.teacher_id), course_id=str(slot.course_id), room_id=str(slot.room_id))
+            for slot in entity.slots
+        ]
+    )
+
+
+@router.post("", response_model=Timetable)
+async def generate_timetable(timetable: TimetableWrite, user: dict = Depends(get_current_user)) -> Timetable:
+    """
+    Generates the plannings of an ISO week (e.g. 2025-W03) from the course hours each promotion requires.
+    Courses are placed in the rooms listed in the request, or in any room if none is listed, around the slots
+    already planned that week. The search stops after `time_budget` seconds: sessions that could not be placed
+    are then listed as unscheduled. Nothing is stored: post the plannings to `/api/v1/plannings:bulk` to keep them.
+    """
+    monday, friday = parse_iso_week(timetable.week)
+    try:
+        if timetable.room_ids:
+            rooms = [domain.RoomId(id=room_id) for room_id in timetable.room_ids]
+        else:
+            rooms = [room.id for room in await state.maybe_await(state.repository_rooms.find_all())]
+        booked = await state.maybe_await(state.repository_plannings.find_by_date_range(monday, friday))
+    except Exception as ex:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=repr(ex))
+    try:
+        request = get_timetable_request(timetable, rooms, booked)
+    except ValidationError as ex:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=describe_validation_error(ex))
+    result = await asyncio.get_running_loop().run_in_executor(get_scheduler_pool(), domain.generate_timetable, request)
+    return Timetable(
+        week=timetable.week,
+        complete=result.complete,
+        plannings=[get_planning_write_from_entity(entity) for entity in result.plannings],
+        unscheduled=[
+            UnscheduledSession(promotion_id=str(session.promotion_id), course_id=str(session.course_id),
+                               minutes=session.minutes)
+            for session in result.unscheduled
+        ]
+    )
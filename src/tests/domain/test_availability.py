@@ -0,0 +1,37 @@
+from src.main.domain.availability import (
+    DAY_END_MINUTE, DAY_START_MINUTE, find_free_intervals, merge_intervals, subtract_intervals)
+
+
+class TestMergeIntervals:
+    """Test cases for the union of sorted occupancy lists."""
+    def test_given_overlapping_and_contiguous_intervals_when_merge_then_return_disjoint_union(self):
+        # Given
+        teacher = [(540, 600), (660, 720)]
+        room = [(570, 630), (720, 780)]
+        # When/Then
+        assert merge_intervals([teacher, room, []]) == [(540, 630), (660, 780)]
+
+
+class TestSubtractIntervals:
+    """Test cases for the subtraction of busy intervals from a window."""
+    def test_given_busy_intervals_overflowing_window_when_subtract_then_return_gaps_inside_window(self):
+        # When/Then
+        assert subtract_intervals((500, 1000), [(400, 520), (600, 700), (950, 1100)]) == [(520, 600), (700, 950)]
+
+    def test_given_no_busy_interval_when_subtract_then_return_whole_window(self):
+        # When/Then
+        assert subtract_intervals((500, 1000), []) == [(500, 1000)]
+
+
+class TestFindFreeIntervals:
+    """Test cases for the free intervals shared by several resources."""
+    def test_given_busy_resources_when_find_free_intervals_then_return_long_enough_gaps_in_opening_window(self):
+        # Given
+        teacher = [(9 * 60, 10 * 60), (14 * 60, 16 * 60)]
+        room = [(10 * 60 + 15, 12 * 60)]
+        # When
+        free = find_free_intervals([teacher, room], duration=30)
+        # Then
+        assert free == [(DAY_START_MINUTE, 9 * 60), (12 * 60, 14 * 60), (16 * 60, DAY_END_MINUTE)]
+        assert (10 * 60, 10 * 60 + 15) not in free
+        assert find_free_intervals([teacher, room], duration=120) == [(12 * 60, 14 * 60)]
@@ -0,0 +1,84 @@
+from src.main.domain.collision import SlotIndex, find_first_collision
+from src.main.domain.planning import PlanningSlot, PlanningSlotId
+from src.main.domain.promotion import PromotionId
+from src.main.domain.teacher import TeacherId
+from src.main.domain.course import CourseId
+from src.main.domain.room import RoomId
+
+
+def create_slot(slot_id: str, start_hour: int, start_min: int, end_hour: int, end_min: int,
+                promotion="1", teacher="1", room="1") -> PlanningSlot:
+    return PlanningSlot(
+        id=PlanningSlotId(id=slot_id),
+        hours_start=start_hour,
+        minutes_start=start_min,
+        hours_end=end_hour,
+        minutes_end=end_min,
+        promotion_id=PromotionId(id=promotion),
+        teacher_id=TeacherId(id=teacher),
+        course_id=CourseId(id="1"),
+        room_id=RoomId(id=room)
+    )
+
+
+class TestFindFirstCollision:
+    """Test cases for the sort and sweep validation of a list of slots."""
+    def test_given_contiguous_slots_when_find_first_collision_then_return_none(self):
+        # Given
+        slots = [create_slot("2", 10, 0, 11, 0), create_slot("1", 9, 0, 10, 0), create_slot("3", 11, 0, 12, 0)]
+        # When/Then
+        assert find_first_collision(slots) is None
+
+    def test_given_overlapping_slots_on_distinct_resources_when_find_first_collision_then_return_none(self):
+        # Given
+        slots = [create_slot("1", 9, 0, 10, 0), create_slot("2", 9, 30, 10, 30, promotion="2", teacher="2", room="2")]
+        # When/Then
+        assert find_first_collision(slots) is None
+
+    def test_given_slots_sharing_a_room_when_find_first_collision_then_return_positions_once(self):
+        # Given
+        slots = [
+            create_slot("1", 14, 0, 15, 0, promotion="1", teacher="1", room="1"),
+            create_slot("2", 9, 0, 10, 0, promotion="2", teacher="2", room="2"),
+            create_slot("3", 13, 0, 16, 0, promotion="3", teacher="3", room="1")
+        ]
+        # When/Then
+        assert find_first_collision(slots) == (0, 2)
+
+    def test_given_slot_nested_after_long_slot_when_find_first_collision_then_detect_collision(self):
+        # Given: the third slot only overlaps the first one, which ends after the second one
+        slots = [
+            create_slot("1", 9, 0, 13, 0),
+            create_slot("2", 9, 30, 10, 0, promotion="2", teacher="2", room="2"),
+            create_slot("3", 12, 0, 12, 30)
+        ]
+        # When/Then
+        assert find_first_collision(slots) == (0, 2)
+
+
+class TestSlotIndex:
+    """Test cases for the incremental collision checks of SlotIndex."""
+    def test_given_indexed_slots_when_find_collision_then_return_colliding_slot_id(self):
+        # Given
+        index = SlotIndex([create_slot("1", 9, 0, 10, 0), create_slot("2", 10, 0, 11, 0)])
+        # When/Then
+        assert index.find_collision(create_slot("3", 9, 45, 10, 15, teacher="2", room="2")) == "2"
+        assert index.find_collision(create_slot("4", 11, 0, 12, 0)) is None
+        assert index.find_collision(create_slot("5", 9, 30, 10, 30, promotion="2", teacher="2", room="2")) is None
+
+    def test_given_indexed_slot_when_find_collision_ignoring_it_then_return_none(self):
+        # Given
+        index = SlotIndex([create_slot("1", 9, 0, 10, 0), create_slot("2", 10, 0, 11, 0)])
+        # When/Then
+        assert index.find_collision(create_slot("2", 10, 15, 11, 15), ignore_id=PlanningSlotId(id="2")) is None
+        assert index.find_collision(create_slot("2", 9, 45, 11, 0), ignore_id=PlanningSlotId(id="2")) == "1"
+
+    def test_given_removed_slot_when_find_collision_then_slot_is_free(self):
+        # Given
+        slot = create_slot("1", 9, 0, 10, 0)
+        index = SlotIndex([slot])
+        # When
+        index.remove(slot)
+        # Then
+        assert len(index) == 0
+        assert index.find_collision(create_slot("2", 9, 0, 10, 0)) is None
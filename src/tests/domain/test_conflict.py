@@ -0,0 +1,43 @@
+from datetime import date
+from src.main.domain.conflict import ResourceConflictIndex
+from src.main.domain.planning import Planning, PlanningId
+from src.main.domain.promotion import PromotionId
+from src.tests.domain.test_collision import create_slot
+
+
+DAY = date(2024, 3, 4)
+
+
+def create_planning(planning_id: str, promotion: str, slots) -> Planning:
+    return Planning(id=PlanningId(id=planning_id), date=DAY, promotion_id=PromotionId(id=promotion), slots=slots)
+
+
+class TestResourceConflictIndex:
+    """Test cases for the detection of teachers and rooms booked by the plannings of several promotions."""
+    def test_given_planning_of_another_promotion_when_same_teacher_overlaps_then_return_conflict(self):
+        # Given
+        index = ResourceConflictIndex()
+        index.load(DAY, [create_planning("p1", "1", [create_slot("s1", 9, 0, 10, 0, promotion="1", teacher="T")])])
+        # When
+        conflict = index.find_conflict(DAY, create_slot("s2", 9, 30, 10, 30, promotion="2", teacher="T", room="2"))
+        # Then
+        assert conflict == "s1"
+
+    def test_given_planning_of_another_promotion_when_only_promotion_overlaps_then_return_none(self):
+        # Given
+        index = ResourceConflictIndex()
+        index.load(DAY, [create_planning("p1", "1", [create_slot("s1", 9, 0, 10, 0, promotion="1")])])
+        # When/Then
+        assert index.find_conflict(DAY, create_slot("s2", 9, 0, 10, 0, promotion="1", teacher="2", room="2")) is None
+        assert index.find_conflict(date(2024, 3, 5), create_slot("s3", 9, 0, 10, 0)) is None
+
+    def test_given_added_slot_when_same_room_overlaps_then_return_conflict(self):
+        # Given
+        index = ResourceConflictIndex()
+        index.load(DAY, [])
+        index.add(DAY, [create_slot("s1", 14, 0, 16, 0, teacher="1", room="R")])
+        index.add(date(2024, 3, 5), [create_slot("s2", 14, 0, 16, 0, teacher="1", room="R")])
+        slot = create_slot("s3", 15, 0, 16, 0, promotion="2", teacher="2", room="R")
+        # When/Then
+        assert index.find_conflict(DAY, slot) == "s1"
+        assert index.find_conflict(date(2024, 3, 5), slot) is None
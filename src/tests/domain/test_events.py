@@ -0,0 +1,79 @@
+import asyncio
+import threading
+from datetime import date
+from src.main.domain.events import PlanningEvent, PlanningEventBroker
+from src.main.domain.planning import PlanningId
+from src.main.domain.promotion import PromotionId
+
+
+DAY = date(2024, 3, 4)
+
+
+def create_event(planning_id: str, promotion: str = "1", day: date = DAY, type: str = "updated") -> PlanningEvent:
+    return PlanningEvent(
+        type=type, planning_id=PlanningId(id=planning_id), promotion_id=PromotionId(id=promotion), date=day, version=1)
+
+
+class TestPlanningEventBroker:
+    """Test cases for the fan-out of planning events to their subscribers."""
+    def test_given_filtered_subscribers_when_publish_then_each_receives_matching_events_in_order(self):
+        async def scenario():
+            # Given
+            broker = PlanningEventBroker()
+            everything = broker.subscribe()
+            promotion = broker.subscribe(promotion_id=PromotionId(id="2"))
+            day = broker.subscribe(date=date(2024, 3, 5))
+            # When
+            broker.publish(create_event("p1"))
+            broker.publish(create_event("p2", promotion="2", type="added"))
+            # Then
+            first, second = await everything.get(), await everything.get()
+            assert (first.sequence, str(first.event.planning_id)) == (1, "p1")
+            assert (second.sequence, second.event.type) == (2, "added")
+            assert str((await promotion.get()).event.planning_id) == "p2"
+            assert promotion._queue.empty() and day._queue.empty()
+
+        asyncio.run(scenario())
+
+    def test_given_slow_subscriber_when_its_queue_is_full_then_it_is_dropped(self):
+        async def scenario():
+            # Given
+            broker = PlanningEventBroker(max_queue_size=2)
+            slow = broker.subscribe()
+            fast = broker.subscribe()
+            # When
+            for i in range(3):
+                broker.publish(create_event(f"p{i}"))
+                if i < 2:
+                    await fast.get()
+            # Then
+            assert await slow.get() is None
+            assert slow.dropped and len(broker) == 1 and broker.dropped == 1
+            assert str((await fast.get()).event.planning_id) == "p2"
+
+        asyncio.run(scenario())
+
+    def test_given_subscriber_when_publish_from_another_thread_then_event_is_delivered_on_its_loop(self):
+        async def scenario():
+            # Given
+            broker = PlanningEventBroker()
+            subscription = broker.subscribe()
+            # When
+            thread = threading.Thread(target=broker.publish, args=(create_event("p1"),))
+            thread.start()
+            thread.join()
+            # Then
+            published = await asyncio.wait_for(subscription.get(), 1)
+            assert str(published.event.planning_id) == "p1"
+
+        asyncio.run(scenario())
+
+    def test_given_closed_subscription_when_publish_then_nothing_is_queued(self):
+        async def scenario():
+            broker = PlanningEventBroker()
+            subscription = broker.subscribe()
+            subscription.close()
+            broker.publish(create_event("p1"))
+            assert len(broker) == 0 and subscription._queue.empty() and broker.dropped == 0
+
+        asyncio.run(scenario())
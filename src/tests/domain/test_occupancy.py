@@ -0,0 +1,86 @@
+import random
+from src.main.domain.availability import DAY_END_MINUTE, DAY_START_MINUTE, find_free_intervals
+from src.main.domain.collision import find_first_collision
+from src.main.domain.occupancy import DayOccupancy, find_first_overlap, interval_mask, mask_intervals
+from src.tests.domain.test_collision import create_slot
+import pytest
+
+
+class TestMasks:
+    """Test cases for the conversion between intervals and bitsets."""
+    def test_given_interval_when_interval_mask_then_one_bit_per_minute_from_window_start(self):
+        # When
+        mask = interval_mask(DAY_START_MINUTE + 10, DAY_START_MINUTE + 15)
+        # Then
+        assert mask == 0b11111 << 10
+        assert interval_mask(DAY_START_MINUTE, DAY_END_MINUTE).bit_length() == 540
+
+    def test_given_coarse_quantum_when_interval_mask_then_every_touched_quantum_is_set(self):
+        # When/Then
+        assert interval_mask(DAY_START_MINUTE + 7, DAY_START_MINUTE + 11, quantum=5) == 0b110
+        assert mask_intervals(0b110, quantum=5) == [(DAY_START_MINUTE + 5, DAY_START_MINUTE + 15)]
+
+    def test_given_several_runs_when_mask_intervals_then_return_sorted_intervals(self):
+        # Given
+        mask = interval_mask(540, 600) | interval_mask(660, 720) | interval_mask(1000, 1100)
+        # When/Then
+        assert mask_intervals(mask) == [(540, 600), (660, 720), (1000, DAY_END_MINUTE)]
+
+
+class TestFindFirstOverlap:
+    """Test cases for the bitset validation of a list of slots."""
+    def test_given_slots_sharing_a_teacher_when_find_first_overlap_then_return_positions(self):
+        # Given
+        slots = [create_slot("1", 9, 0, 10, 0), create_slot("2", 11, 0, 12, 0, promotion="2", room="2"),
+                 create_slot("3", 11, 30, 12, 30, promotion="3", room="3")]
+        # When/Then
+        assert find_first_overlap(slots) == (1, 2)
+
+    def test_given_random_slots_when_find_first_overlap_then_agree_with_sort_and_sweep(self):
+        # Given
+        generator = random.Random(12)
+        for _ in range(200):
+            slots = []
+            for i in range(6):
+                start = generator.randrange(9 * 60, 15 * 60, 15)
+                end = start + generator.choice([30, 60, 90])
+                slots.append(create_slot(str(i), start // 60, start % 60, end // 60, end % 60,
+                                         promotion=str(generator.randrange(4)), teacher=str(generator.randrange(4)),
+                                         room=str(generator.randrange(4))))
+            # When/Then
+            assert (find_first_overlap(slots) is None) == (find_first_collision(slots) is None)
+
+
+class TestDayOccupancy:
+    """Test cases for the bitset occupancy of a day."""
+    def test_given_booked_slot_when_book_overlapping_slot_then_raise_value_error(self):
+        # Given
+        occupancy = DayOccupancy([create_slot("1", 9, 0, 10, 0)])
+        # When/Then
+        assert occupancy.is_free(create_slot("2", 10, 0, 11, 0))
+        with pytest.raises(ValueError, match="Collision detected"):
+            occupancy.book(create_slot("3", 9, 30, 10, 30, promotion="2", teacher="2"))
+
+    def test_given_released_slot_when_book_again_then_slot_is_free(self):
+        # Given
+        slot = create_slot("1", 9, 0, 10, 0)
+        occupancy = DayOccupancy([slot])
+        # When
+        occupancy.release(slot)
+        # Then
+        occupancy.book(slot)
+        assert occupancy.masks[("room", "1")] == interval_mask(540, 600)
+
+    def test_given_booked_resources_when_free_intervals_then_agree_with_sorted_interval_subtraction(self):
+        # Given
+        slots = [create_slot("1", 9, 0, 10, 0), create_slot("2", 14, 0, 16, 0, promotion="2"),
+                 create_slot("3", 10, 15, 12, 0, promotion="3", teacher="3", room="2")]
+        occupancy = DayOccupancy(slots)
+        keys = [("teacher", "1"), ("room", "2")]
+        # When
+        free = occupancy.free_intervals(keys, duration=30)
+        # Then
+        expected = find_free_intervals(
+            [[(s.start_minute, s.end_minute) for s in slots if s.teacher_id.id == "1"],
+             [(s.start_minute, s.end_minute) for s in slots if s.room_id.id == "2"]], duration=30)
+        assert free == expected == [(DAY_START_MINUTE, 540), (720, 840), (960, DAY_END_MINUTE)]
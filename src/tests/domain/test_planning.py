@@ -1,123 +1,195 @@
-from src.main.domain.planning import Planning, PlanningId, PlanningSlot, PlanningSlotId
-from src.main.domain.promotion import PromotionId
-from src.main.domain.teacher import TeacherId
-from src.main.domain.course import CourseId
-from src.main.domain.room import RoomId
-from datetime import date
-import pytest
-
-
-class TestPlanning:
-    """Test cases for Planning aggregate and its slot management methods."""
-    @pytest.fixture
-    def common_entities(self):
-        return {
-            "promotion1": PromotionId(id="1"),
-            "promotion2": PromotionId(id="2"),
-            "teacher1": TeacherId(id="1"),
-            "teacher2": TeacherId(id="2"),
-            "course1": CourseId(id="1"),
-            "course2": CourseId(id="2"),
-            "room1": RoomId(id="1"),
-            "room2": RoomId(id="2")
-        }
-
-    @pytest.fixture
-    def empty_planning(self, common_entities):
-        planning_id = PlanningId(id="1")
-        slots = []
-        return Planning(id=planning_id, date=date(2021, 9, 1), promotion_id=common_entities["promotion1"], slots=slots)
-
-    def create_slot(self, slot_id: str, start_hour: int, start_min: int, end_hour: int, end_min: int, common_entities,
-                    promo_key="promotion1", teacher_key="teacher1", course_key="course1", room_key="room1"):
-        return PlanningSlot(
-            id=PlanningSlotId(id=slot_id),
-            hours_start=start_hour,
-            minutes_start=start_min,
-            hours_end=end_hour,
-            minutes_end=end_min,
-            promotion_id=common_entities[promo_key],
-            teacher_id=common_entities[teacher_key],
-            course_id=common_entities[course_key],
-            room_id=common_entities[room_key]
-        )
-
-    def test_given_valid_slots_in_constructor_when_create_planning_then_return_planning(self, common_entities):
-        # Given
-        planning_id = PlanningId(id="1")
-        date_planning = date(2021, 9, 1)
-        promotion_id = common_entities["promotion1"]
-        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
-        slot2 = self.create_slot("2", 10, 15, 11, 15, common_entities, promo_key="promotion2", teacher_key="teacher2",
-                                 course_key="course2", room_key="room2")
-        # When
-        planning = Planning(id=planning_id, date=date_planning, promotion_id=promotion_id, slots=[slot1, slot2])
-        # Then
-        assert planning.id == planning_id
-        assert planning.date == date_planning
-        assert planning.promotion_id == promotion_id
-        assert len(planning.slots) == 2
-
-    def test_add_valid_slot_to_planning(self, empty_planning, common_entities):
-        # Given
-        slot = self.create_slot("1", 9, 0, 10, 0, common_entities)
-        # When
-        empty_planning.add_slot(slot)
-        # Then
-        assert len(empty_planning.slots) == 1
-        assert empty_planning.slots[0] == slot
-
-    def test_add_colliding_slot_to_planning_then_raise_value_error(self, empty_planning, common_entities):
-        # Given
-        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
-        slot2 = self.create_slot("2", 9, 30, 10, 30, common_entities)
-        empty_planning.add_slot(slot1)
-        # When/Then
-        with pytest.raises(ValueError, match="Collision detected"):
-            empty_planning.add_slot(slot2)
-
-    def test_remove_slot_from_planning(self, empty_planning, common_entities):
-        # Given
-        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
-        slot2 = self.create_slot("2", 10, 15, 11, 15, common_entities, promo_key="promotion2", teacher_key="teacher2",
-                                 course_key="course2", room_key="room2")
-        empty_planning.add_slot(slot1)
-        empty_planning.add_slot(slot2)
-        # When
-        empty_planning.remove_slot(slot1.id)
-        # Then
-        assert len(empty_planning.slots) == 1
-        assert empty_planning.slots[0] == slot2
-
-    def test_update_slot_in_planning_successfully(self, empty_planning, common_entities):
-        # Given
-        slot = self.create_slot("1", 9, 0, 10, 0, common_entities)
-        empty_planning.add_slot(slot)
-        # When: updating the slot to shift the schedule (without collision)
-        updated_slot = self.create_slot("1", 10, 0, 11, 0, common_entities)
-        empty_planning.update_slot(updated_slot)
-        # Then
-        assert empty_planning.slots[0].hours_start == 10
-        assert empty_planning.slots[0].hours_end == 11
-
-    def test_update_slot_in_planning_with_collision_then_raise_value_error(self, empty_planning, common_entities):
-        # Given
-        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
-        # Here, the initial slot2 is without collision (different teacher, promotion, etc.)
-        slot2 = self.create_slot("2", 10, 15, 11, 15, common_entities, promo_key="promotion2", teacher_key="teacher2",
-                                 course_key="course2", room_key="room2")
-        empty_planning.add_slot(slot1)
-        empty_planning.add_slot(slot2)
-        # When: updating slot2 to create a collision with slot1
-        # To cause the collision, we force slot2 to share the same teacher as slot1.
-        updated_slot2 = self.create_slot("2", 9, 30, 10, 30, common_entities, promo_key="promotion2", teacher_key="teacher1",
-                                         course_key="course2", room_key="room2")
-        with pytest.raises(ValueError, match="Collision detected"):
-            empty_planning.update_slot(updated_slot2)
-
-    def test_update_nonexistent_slot_then_raise_value_error(self, empty_planning, common_entities):
-        # Given
-        slot = self.create_slot("1", 9, 0, 10, 0, common_entities)
-        # When/Then
-        with pytest.raises(ValueError, match="Slot not found"):
-            empty_planning.update_slot(slot)
+from pydantic import ValidationError
+from src.main.domain.collision import SlotIndex
+from src.main.domain.planning import Planning, PlanningId, PlanningSlot, PlanningSlotId
+import src.main.domain.planning as planning_module
+from src.main.domain.promotion import PromotionId
+from src.main.domain.teacher import TeacherId
+from src.main.domain.course import CourseId
+from src.main.domain.room import RoomId
+from datetime import date
+import pytest
+
+
+class TestPlanning:
+    """Test cases for Planning aggregate and its slot management methods."""
+    @pytest.fixture
+    def common_entities(self):
+        return {
+            "promotion1": PromotionId(id="1"),
+            "promotion2": PromotionId(id="2"),
+            "teacher1": TeacherId(id="1"),
+            "teacher2": TeacherId(id="2"),
+            "course1": CourseId(id="1"),
+            "course2": CourseId(id="2"),
+            "room1": RoomId(id="1"),
+            "room2": RoomId(id="2")
+        }
+
+    @pytest.fixture
+    def empty_planning(self, common_entities):
+        planning_id = PlanningId(id="1")
+        slots = []
+        return Planning(id=planning_id, date=date(2021, 9, 1), promotion_id=common_entities["promotion1"], slots=slots)
+
+    def create_slot(self, slot_id: str, start_hour: int, start_min: int, end_hour: int, end_min: int, common_entities,
+                    promo_key="promotion1", teacher_key="teacher1", course_key="course1", room_key="room1"):
+        return PlanningSlot(
+            id=PlanningSlotId(id=slot_id),
+            hours_start=start_hour,
+            minutes_start=start_min,
+            hours_end=end_hour,
+            minutes_end=end_min,
+            promotion_id=common_entities[promo_key],
+            teacher_id=common_entities[teacher_key],
+            course_id=common_entities[course_key],
+            room_id=common_entities[room_key]
+        )
+
+    def test_given_valid_slots_in_constructor_when_create_planning_then_return_planning(self, common_entities):
+        # Given
+        planning_id = PlanningId(id="1")
+        date_planning = date(2021, 9, 1)
+        promotion_id = common_entities["promotion1"]
+        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        slot2 = self.create_slot("2", 10, 15, 11, 15, common_entities, promo_key="promotion2", teacher_key="teacher2",
+                                 course_key="course2", room_key="room2")
+        # When
+        planning = Planning(id=planning_id, date=date_planning, promotion_id=promotion_id, slots=[slot1, slot2])
+        # Then
+        assert planning.id == planning_id
+        assert planning.date == date_planning
+        assert planning.promotion_id == promotion_id
+        assert len(planning.slots) == 2
+
+    def test_add_valid_slot_to_planning(self, empty_planning, common_entities):
+        # Given
+        slot = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        # When
+        empty_planning.add_slot(slot)
+        # Then
+        assert len(empty_planning.slots) == 1
+        assert empty_planning.slots[0] == slot
+
+    def test_add_colliding_slot_to_planning_then_raise_value_error(self, empty_planning, common_entities):
+        # Given
+        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        slot2 = self.create_slot("2", 9, 30, 10, 30, common_entities)
+        empty_planning.add_slot(slot1)
+        # When/Then
+        with pytest.raises(ValueError, match="Collision detected"):
+            empty_planning.add_slot(slot2)
+
+    def test_remove_slot_from_planning(self, empty_planning, common_entities):
+        # Given
+        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        slot2 = self.create_slot("2", 10, 15, 11, 15, common_entities, promo_key="promotion2", teacher_key="teacher2",
+                                 course_key="course2", room_key="room2")
+        empty_planning.add_slot(slot1)
+        empty_planning.add_slot(slot2)
+        # When
+        empty_planning.remove_slot(slot1.id)
+        # Then
+        assert len(empty_planning.slots) == 1
+        assert empty_planning.slots[0] == slot2
+
+    def test_update_slot_in_planning_successfully(self, empty_planning, common_entities):
+        # Given
+        slot = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        empty_planning.add_slot(slot)
+        # When: updating the slot to shift the schedule (without collision)
+        updated_slot = self.create_slot("1", 10, 0, 11, 0, common_entities)
+        empty_planning.update_slot(updated_slot)
+        # Then
+        assert empty_planning.slots[0].hours_start == 10
+        assert empty_planning.slots[0].hours_end == 11
+
+    def test_update_slot_in_planning_with_collision_then_raise_value_error(self, empty_planning, common_entities):
+        # Given
+        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        # Here, the initial slot2 is without collision (different teacher, promotion, etc.)
+        slot2 = self.create_slot("2", 10, 15, 11, 15, common_entities, promo_key="promotion2", teacher_key="teacher2",
+                                 course_key="course2", room_key="room2")
+        empty_planning.add_slot(slot1)
+        empty_planning.add_slot(slot2)
+        # When: updating slot2 to create a collision with slot1
+        # To cause the collision, we force slot2 to share the same teacher as slot1.
+        updated_slot2 = self.create_slot("2", 9, 30, 10, 30, common_entities, promo_key="promotion2", teacher_key="teacher1",
+                                         course_key="course2", room_key="room2")
+        with pytest.raises(ValueError, match="Collision detected"):
+            empty_planning.update_slot(updated_slot2)
+
+    def test_update_nonexistent_slot_then_raise_value_error(self, empty_planning, common_entities):
+        # Given
+        slot = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        # When/Then
+        with pytest.raises(ValueError, match="Slot not found"):
+            empty_planning.update_slot(slot)
+
+    def test_given_colliding_slots_in_constructor_when_create_planning_then_report_collision_once(self, common_entities):
+        # Given
+        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        slot2 = self.create_slot("2", 9, 30, 10, 30, common_entities, promo_key="promotion2", teacher_key="teacher2",
+                                 course_key="course2")
+        # When/Then
+        with pytest.raises(ValueError, match="Collision detected between slot 1 and slot 2"):
+            Planning(id=PlanningId(id="1"), date=date(2021, 9, 1), promotion_id=common_entities["promotion1"],
+                     slots=[slot1, slot2])
+
+    def test_slot_appended_outside_aggregate_then_add_slot_still_detects_collision(self, empty_planning, common_entities):
+        # Given
+        empty_planning.add_slot(self.create_slot("1", 9, 0, 10, 0, common_entities))
+        empty_planning.slots.append(self.create_slot("2", 10, 0, 11, 0, common_entities))
+        # When/Then
+        with pytest.raises(ValueError, match="Collision detected"):
+            empty_planning.add_slot(self.create_slot("3", 10, 30, 11, 30, common_entities))
+
+    def test_slot_replaced_in_place_outside_aggregate_then_add_slot_checks_the_new_slot(
+            self, empty_planning, common_entities):
+        # Given: slot 1 is moved from 9:00 to 14:00 by replacing it in the list, whose length does not change
+        empty_planning.add_slot(self.create_slot("1", 9, 0, 10, 0, common_entities))
+        empty_planning.slots[0] = self.create_slot("1", 14, 0, 15, 0, common_entities)
+        # When
+        empty_planning.add_slot(self.create_slot("2", 9, 0, 10, 0, common_entities))
+        # Then
+        with pytest.raises(ValueError, match="Collision detected"):
+            empty_planning.add_slot(self.create_slot("3", 14, 30, 15, 30, common_entities))
+
+    def test_slot_when_changed_in_place_then_raise_validation_error(self, empty_planning, common_entities):
+        # Given
+        empty_planning.add_slot(self.create_slot("1", 9, 0, 10, 0, common_entities))
+        # When/Then
+        with pytest.raises(ValidationError, match="frozen"):
+            empty_planning.slots[0].hours_start = 14
+
+    def test_slots_changed_through_aggregate_then_index_is_built_once(self, empty_planning, common_entities, monkeypatch):
+        # Given
+        built = []
+        monkeypatch.setattr(planning_module, "SlotIndex", lambda slots: built.append(len(slots)) or SlotIndex(slots))
+        slots = [self.create_slot(str(i), 9 + i, 0, 10 + i, 0, common_entities) for i in range(5)]
+        # When
+        for slot in slots:
+            empty_planning.add_slot(slot)
+        empty_planning.update_slot(slots[0].model_copy(update={"minutes_start": 15}))
+        empty_planning.remove_slot(slots[1].id)
+        # Then
+        assert built == [0]
+        assert [str(slot.id) for slot in empty_planning.slots] == ["0", "2", "3", "4"]
+
+    def test_given_slots_sharing_an_id_when_create_planning_then_raise_value_error(self, common_entities):
+        # Given
+        slot1 = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        slot2 = self.create_slot("1", 11, 0, 12, 0, common_entities)
+        # When/Then
+        with pytest.raises(ValueError, match="Duplicate slot id 1"):
+            Planning(id=PlanningId(id="1"), date=date(2021, 9, 1), promotion_id=common_entities["promotion1"],
+                     slots=[slot1, slot2])
+
+    def test_removed_slot_then_its_time_range_can_be_reused(self, empty_planning, common_entities):
+        # Given
+        slot = self.create_slot("1", 9, 0, 10, 0, common_entities)
+        empty_planning.add_slot(slot)
+        # When
+        empty_planning.remove_slot(slot.id)
+        empty_planning.add_slot(self.create_slot("2", 9, 0, 10, 0, common_entities))
+        # Then
+        assert [str(s.id) for s in empty_planning.slots] == ["2"]
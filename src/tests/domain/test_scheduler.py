@@ -0,0 +1,104 @@
+from datetime import date
+from time import monotonic
+import pytest
+from src.main.domain.course import CourseId
+from src.main.domain.occupancy import DayOccupancy
+from src.main.domain.planning import Planning, PlanningId
+from src.main.domain.promotion import PromotionId
+from src.main.domain.room import RoomId
+from src.main.domain.scheduler import (
+    MAX_WEEK_MINUTES, CourseRequirement, TimetableRequest, Unavailability, generate_timetable)
+from src.main.domain.teacher import TeacherId
+from src.tests.domain.test_collision import create_slot
+
+
+MONDAY = date(2025, 1, 6)
+
+
+def create_requirement(promotion: str, course: str, teacher: str, minutes: int, session_minutes: int = 120,
+                       room_ids=()) -> CourseRequirement:
+    return CourseRequirement(
+        promotion_id=PromotionId(id=promotion), course_id=CourseId(id=course), teacher_id=TeacherId(id=teacher),
+        minutes=minutes, session_minutes=session_minutes, room_ids=[RoomId(id=room) for room in room_ids])
+
+
+def assert_no_double_booking(plannings):
+    days = {}
+    for planning in plannings:
+        for slot in planning.slots:
+            days.setdefault(planning.date, DayOccupancy()).book(slot)
+
+
+class TestCourseRequirement:
+    """Test cases for the split of weekly hours into sessions."""
+    def test_given_minutes_not_multiple_of_session_when_sessions_then_last_session_is_rounded_up_to_30(self):
+        # When/Then
+        assert create_requirement("1", "1", "1", 260).sessions() == [120, 120, 30]
+        assert create_requirement("1", "1", "1", 300, session_minutes=90).sessions() == [90, 90, 90, 30]
+
+    def test_given_more_minutes_than_a_week_when_create_requirement_then_raise_value_error(self):
+        # When/Then
+        with pytest.raises(ValueError):
+            create_requirement("1", "1", "1", MAX_WEEK_MINUTES + 1)
+
+
+class TestGenerateTimetable:
+    """Test cases for the generation of the plannings of a week."""
+    def test_given_requirements_of_several_promotions_when_generate_then_every_hour_is_planned_without_collision(self):
+        # Given
+        requirements = [create_requirement(str(p), str(c), str((p + c) % 3), 240) for p in range(3) for c in range(4)]
+        request = TimetableRequest(monday=MONDAY, requirements=requirements, rooms=[RoomId(id="1"), RoomId(id="2")])
+        # When
+        timetable = generate_timetable(request)
+        # Then
+        assert timetable.complete
+        assert {planning.date.weekday() for planning in timetable.plannings} <= set(range(5))
+        assert sum(slot.end_minute - slot.start_minute
+                   for planning in timetable.plannings for slot in planning.slots) == 12 * 240
+        assert_no_double_booking(timetable.plannings)
+
+    def test_given_booked_slots_and_unavailabilities_when_generate_then_they_are_left_free(self):
+        # Given
+        booked = Planning(id=PlanningId(id="booked"), date=MONDAY, promotion_id=PromotionId(id="9"),
+                          slots=[create_slot("b", 8, 15, 12, 15, promotion="9", teacher="1", room="9")])
+        request = TimetableRequest(
+            monday=MONDAY, requirements=[create_requirement("1", "1", "1", 240, session_minutes=240, room_ids=["1"])],
+            rooms=[RoomId(id="1")], booked=[booked],
+            unavailabilities=[
+                Unavailability(room_id=RoomId(id="1"), weekday=0, start_minute=12 * 60 + 15, end_minute=13 * 60 + 15)])
+        # When
+        timetable = generate_timetable(request)
+        # Then
+        slot = timetable.plannings[0].slots[0]
+        assert timetable.plannings[0].date == MONDAY
+        assert (slot.start_minute, slot.end_minute) == (13 * 60 + 15, 17 * 60 + 15)
+
+    def test_given_over_constrained_week_when_generate_then_report_unscheduled_sessions_within_budget(self):
+        # Given
+        requirements = [create_requirement("1", str(c), "1", 240, session_minutes=240) for c in range(12)]
+        request = TimetableRequest(monday=MONDAY, requirements=requirements, rooms=[RoomId(id="1")], time_budget=1)
+        # When
+        timetable = generate_timetable(request)
+        # Then
+        assert not timetable.complete
+        assert len(timetable.unscheduled) == 2
+        assert_no_double_booking(timetable.plannings)
+
+    def test_given_time_budget_spent_when_generate_then_stop_and_report_the_remaining_sessions(self):
+        # Given
+        requirements = [create_requirement(str(p), str(c), str(p), MAX_WEEK_MINUTES, session_minutes=30)
+                        for p in range(20) for c in range(3)]
+        rooms = [RoomId(id=str(room)) for room in range(3)]
+        request = TimetableRequest(monday=MONDAY, requirements=requirements, rooms=rooms, time_budget=0.2)
+        # When
+        start = monotonic()
+        timetable = generate_timetable(request)
+        # Then
+        assert monotonic() - start < 1
+        assert not timetable.complete
+        assert_no_double_booking(timetable.plannings)
+
+    def test_given_week_not_starting_on_monday_when_create_request_then_raise_value_error(self):
+        # When/Then
+        with pytest.raises(ValueError, match="Monday"):
+            TimetableRequest(monday=date(2025, 1, 7), requirements=[])
@@ -1,5 +1,5 @@
-from .test_course import *
-from .test_planning import *
-from .test_promotion import *
-from .test_teacher import *
-from .test_room import *
+from .test_course import *
+from .test_planning import *
+from .test_promotion import *
+from .test_teacher import *
+from .test_room import *
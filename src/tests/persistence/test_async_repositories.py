@@ -0,0 +1,118 @@
+import asyncio
+from datetime import date
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.main.domain import (
+    ConcurrentUpdateError, Course as DomainCourse, CourseId, Planning as DomainPlanning, PlanningId,
+    PlanningSlot as DomainPlanningSlot, PlanningSlotId, Promotion as DomainPromotion, PromotionId, Room as DomainRoom,
+    ResourceConflictError, RoomId, Teacher as DomainTeacher, TeacherId)
+from src.main.persistence import (
+    AsyncCourseRepository, AsyncPlanningRepository, AsyncPromotionRepository, AsyncRoomRepository, AsyncTeacherRepository)
+
+
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///test.db"
+
+
+def run_with_session(scenario):
+    """Runs an async scenario against a fresh SQLite database, through aiosqlite."""
+    async def main():
+        engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=NullPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                await scenario(session)
+        finally:
+            async with engine.begin() as connection:
+                await connection.run_sync(SQLModel.metadata.drop_all)
+            await engine.dispose()
+    asyncio.run(main())
+
+
+def create_domain_slot(slot_id: str, hours_start: int, hours_end: int) -> DomainPlanningSlot:
+    return DomainPlanningSlot(
+        id=PlanningSlotId(id=slot_id), hours_start=hours_start, minutes_start=0, hours_end=hours_end, minutes_end=0,
+        promotion_id=PromotionId(id="1"), teacher_id=TeacherId(id="1"), course_id=CourseId(id="1"), room_id=RoomId(id="1"))
+
+
+@pytest.mark.parametrize("repository_class, entity, change", [
+    (AsyncPromotionRepository,
+     DomainPromotion(id=PromotionId(id="1"), study_year=2, diploma="DEUST", name="Kempf"), {"name": "Maisonnier"}),
+    (AsyncTeacherRepository, DomainTeacher(id=TeacherId(id="1"), name="Doe", firstname="John"), {"name": "Smith"}),
+    (AsyncCourseRepository, DomainCourse(id=CourseId(id="1"), name="Course A"), {"name": "Course B"}),
+    (AsyncRoomRepository, DomainRoom(id=RoomId(id="1"), name="Room A", description="Description A"), {"name": "Room B"}),
+])
+def test_async_reference_repository_crud(repository_class, entity, change):
+    async def scenario(session):
+        repository = repository_class(session)
+        await repository.add(entity)
+        assert await repository.find_by_id(entity.id) == entity
+        assert await repository.find_by_ids([entity.id]) == [entity]
+        updated = entity.model_copy(update=change)
+        await repository.update(updated)
+        assert await repository.find_all() == [updated]
+        assert [streamed async for streamed in repository.iter_all()] == [updated]
+        await repository.delete(entity.id)
+        with pytest.raises(ValueError):
+            await repository.find_by_id(entity.id)
+
+    run_with_session(scenario)
+
+
+def test_async_planning_repository_reads_and_writes():
+    async def scenario(session):
+        repository = AsyncPlanningRepository(session)
+        for i in range(3):
+            await repository.add(DomainPlanning(
+                id=PlanningId(id=f"p{i}"), date=date(2023, 10, 10 + i), promotion_id=PromotionId(id="1"),
+                slots=[create_domain_slot(f"s{i}", 9, 10)]))
+
+        page = await repository.find_page(2, after=(date(2023, 10, 10), PlanningId(id="p0")))
+        assert [str(p.id) for p in page] == ["p1", "p2"]
+        assert len(await repository.find_by_date_and_promotion(date(2023, 10, 11), PromotionId(id="1"))) == 1
+
+        planning = await repository.find_by_id(PlanningId(id="p0"))
+        planning.slots = [create_domain_slot("s0", 10, 11), create_domain_slot("new", 14, 15)]
+        await repository.update(planning)
+        assert await repository.find_version(planning.id) == 2
+        header = await repository.find_header(planning.id)
+        assert (header.date, str(header.promotion_id), header.version, header.slots) == (date(2023, 10, 10), "1", 2, [])
+        session.expunge_all()
+        assert [(str(s.id), s.hours_start) for s in (await repository.find_by_id(planning.id)).slots] == [
+            ("s0", 10), ("new", 14)]
+
+        stale = planning.model_copy(update={"version": 1})
+        with pytest.raises(ConcurrentUpdateError):
+            await repository.update(stale)
+        with pytest.raises(ConcurrentUpdateError):
+            await repository.add_slot(planning.id, create_domain_slot("late", 16, 17), expected_version=1)
+        await repository.update_slot(planning.id, create_domain_slot("new", 15, 16))
+        assert (await repository.find_slot_by_id(planning.id, PlanningSlotId(id="new"))).hours_start == 15
+        overlapping = await repository.find_overlapping_slots(date(2023, 10, 10), 15 * 60 + 30, 17 * 60)
+        assert [str(slot.id) for slot in overlapping] == ["new"]
+        assert await repository.find_bookings(date(2023, 10, 10), date(2023, 10, 11), teacher_id=TeacherId(id="1")) == [
+            (date(2023, 10, 10), 600, 660), (date(2023, 10, 10), 900, 960), (date(2023, 10, 11), 540, 600)]
+        await repository.delete_slot(planning.id, PlanningSlotId(id="new"))
+        await repository.add_slot(planning.id, create_domain_slot("other", 13, 14))
+        assert (await repository.find_by_id(planning.id)).version == 5
+        await repository.delete(planning)
+        with pytest.raises(ValueError, match="Planning not found"):
+            await repository.find_by_id(planning.id)
+        assert len(await repository.find_all()) == 2
+
+        await repository.add_all([DomainPlanning(
+            id=PlanningId(id=f"bulk{i}"), date=date(2023, 11, 1), promotion_id=PromotionId(id="1"),
+            slots=[create_domain_slot(f"bulk-s{i}", 9 + 2 * i, 10 + 2 * i)]) for i in range(2)])
+        existing = await repository.find_existing_ids([PlanningId(id="bulk1"), PlanningId(id="p0"), PlanningId(id="x")])
+        assert sorted(str(id) for id in existing) == ["bulk1"]
+        existing = await repository.find_existing_slot_ids([PlanningSlotId(id="bulk-s0"), PlanningSlotId(id="x")])
+        assert [str(id) for id in existing] == ["bulk-s0"]
+        with pytest.raises(ResourceConflictError):
+            await repository.add_slot(PlanningId(id="bulk1"), create_domain_slot("booked", 9, 10))
+        assert await repository.find_version(PlanningId(id="bulk1")) == 1
+
+    run_with_session(scenario)
@@ -0,0 +1,113 @@
+import asyncio
+from src.main.domain import RoomId
+from src.main.persistence.cache import LRUCache, CachedRepository, MISSING
+from src.tests.persistence.test_room import RoomRepositoryDumb
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingRoomRepository(RoomRepositoryDumb):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def find_by_id(self, id):
+        self.calls.append(("find_by_id", str(id)))
+        return super().find_by_id(id)
+
+    def find_by_ids(self, ids):
+        self.calls.append(("find_by_ids", sorted(str(id) for id in ids)))
+        return super().find_by_ids(ids)
+
+
+class AsyncRoomRepository(RoomRepositoryDumb):
+    async def find_by_id(self, id):
+        return super().find_by_id(id)
+
+    async def update(self, room):
+        return super().update(room)
+
+
+def test_full_cache_when_set_then_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2}
+
+
+def test_expired_entry_when_get_then_return_missing():
+    clock = FakeClock()
+    cache = LRUCache(max_size=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is MISSING
+    assert len(cache) == 0
+
+
+def test_cached_repository_when_find_by_id_twice_then_repository_is_queried_once():
+    repository = CountingRoomRepository()
+    cached = CachedRepository(repository, LRUCache())
+    first = cached.find_by_id(RoomId(id="1"))
+    first.name = "Modified by the caller"
+    second = cached.find_by_id(RoomId(id="1"))
+    assert second.name == "Room A"
+    assert repository.calls == [("find_by_id", "1")]
+    assert cached.cache.stats()["hits"] == 1
+
+
+def test_cached_repository_when_find_by_ids_then_only_missing_ids_are_queried():
+    repository = CountingRoomRepository()
+    cached = CachedRepository(repository, LRUCache())
+    cached.find_by_id(RoomId(id="1"))
+    rooms = cached.find_by_ids([RoomId(id="1"), RoomId(id="2")])
+    assert {str(room.id) for room in rooms} == {"1", "2"}
+    assert cached.find_by_ids([RoomId(id="2")])[0].name == "Room B"
+    assert repository.calls == [("find_by_id", "1"), ("find_by_ids", ["2"])]
+
+
+def test_cached_repository_when_update_then_entry_is_invalidated():
+    repository = CountingRoomRepository()
+    cached = CachedRepository(repository, LRUCache())
+    room = cached.find_by_id(RoomId(id="1"))
+    room.name = "Room Z"
+    cached.update(room)
+    assert cached.find_by_id(RoomId(id="1")).name == "Room Z"
+    cached.delete(RoomId(id="1"))
+    assert cached.cache.get("1") is MISSING
+
+
+def test_cached_repository_when_written_or_next_period_then_generation_changes():
+    clock = FakeClock()
+    cached = CachedRepository(CountingRoomRepository(), LRUCache(ttl=10), clock=clock)
+    generation = cached.generation()
+    assert cached.generation() == generation
+    cached.update(cached.find_by_id(RoomId(id="1")))
+    assert cached.generation() != generation
+    generation = cached.generation()
+    clock.now = 10
+    assert cached.generation() not in (generation, (0, 0))
+
+
+def test_cached_async_repository_when_find_and_update_then_cache_is_kept_consistent():
+    async def scenario():
+        cached = CachedRepository(AsyncRoomRepository(), LRUCache())
+        room = await cached.find_by_id(RoomId(id="1"))
+        assert cached.find_by_id(RoomId(id="1")).name == "Room A"
+        room.name = "Room Z"
+        await cached.update(room)
+        assert (await cached.find_by_id(RoomId(id="1"))).name == "Room Z"
+
+    asyncio.run(scenario())
@@ -1,87 +1,111 @@
-from src.main.domain import Course as DomainCourse
-from src.main.domain import BaseRepository, ICourseRepository, CourseId
-from sqlmodel import Session, create_engine, SQLModel
-from src.main.persistence.course import CourseRepository
-import pytest
-
-
-class CourseRepositoryDumb(BaseRepository, ICourseRepository):
-    """Dumb implementation of ICourseRepository."""
-    def __init__(self):
-        self.courses = [
-            DomainCourse(id=CourseId(id="1"), name="Course A"),
-            DomainCourse(id=CourseId(id="2"), name="Course B")
-        ]
-
-    def find_all(self):
-        return self.courses
-
-    def find_by_id(self, id: CourseId):
-        for course in self.courses:
-            if str(course.id) == str(id):
-                return course
-        raise ValueError("Course not found")
-
-    def add(self, course: DomainCourse):
-        self.courses.append(course)
-
-    def update(self, course: DomainCourse):
-        for i, c in enumerate(self.courses):
-            if c.id == course.id:
-                self.courses[i] = course
-                break
-        else:
-            raise ValueError(f"Course {course.id} not found")
-
-    def delete(self, id: CourseId):
-        for i, c in enumerate(self.courses):
-            if c.id == id:
-                del self.courses[i]
-                break
-        else:
-            raise ValueError(f"Course {id} not found")
-
-
-class CourseRepositoryException(CourseRepositoryDumb):
-    def find_all(self):
-        raise Exception("Test exception")
-
-    def find_by_id(self, id: CourseId):
-        raise Exception("Test exception")
-
-
-DATABASE_URL = "sqlite:///test.db"
-engine = create_engine(DATABASE_URL)
-
-
-@pytest.fixture(name="session")
-def session_fixture():
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
-
-
-def test_course_repository(session):
-    # Given
-    name = "Course A"
-    repository = CourseRepository(session)
-    course_id = CourseId(id=repository.next_identity())
-    course = DomainCourse(id=course_id, name=name)
-
-    # When
-    repository.add(course)
-    assert course.id is not None
-
-    fetched_course = repository.find_by_id(course.id)
-    assert fetched_course is not None
-    assert fetched_course.name == "Course A"
-
-    fetched_course.name = "Course B"
-    repository.update(fetched_course)
-    updated_course = repository.find_by_id(fetched_course.id)
-    assert updated_course.name == "Course B"
-
-    repository.delete(updated_course.id)
-    with pytest.raises(ValueError):
-        repository.find_by_id(updated_course.id)
+from src.main.domain import Course as DomainCourse
+from src.main.domain import BaseRepository, ICourseRepository, CourseId
+from sqlmodel import Session, create_engine, SQLModel
+from src.main.persistence.course import CourseRepository
+import pytest
+
+
+class CourseRepositoryDumb(BaseRepository, ICourseRepository):
+    """Dumb implementation of ICourseRepository."""
+    def __init__(self):
+        self.courses = [
+            DomainCourse(id=CourseId(id="1"), name="Course A"),
+            DomainCourse(id=CourseId(id="2"), name="Course B")
+        ]
+
+    def find_all(self):
+        return self.courses
+
+    def iter_all(self):
+        return iter(self.courses)
+
+    def find_by_id(self, id: CourseId):
+        for course in self.courses:
+            if str(course.id) == str(id):
+                return course
+        raise ValueError("Course not found")
+
+    def find_by_ids(self, ids):
+        wanted = {str(id) for id in ids}
+        return [course for course in self.courses if str(course.id) in wanted]
+
+    def add(self, course: DomainCourse):
+        self.courses.append(course)
+
+    def update(self, course: DomainCourse):
+        for i, c in enumerate(self.courses):
+            if c.id == course.id:
+                self.courses[i] = course
+                break
+        else:
+            raise ValueError(f"Course {course.id} not found")
+
+    def delete(self, id: CourseId):
+        for i, c in enumerate(self.courses):
+            if c.id == id:
+                del self.courses[i]
+                break
+        else:
+            raise ValueError(f"Course {id} not found")
+
+
+class CourseRepositoryException(CourseRepositoryDumb):
+    def find_all(self):
+        raise Exception("Test exception")
+
+    def find_by_id(self, id: CourseId):
+        raise Exception("Test exception")
+
+    def find_by_ids(self, ids):
+        raise Exception("Test exception")
+
+
+DATABASE_URL = "sqlite:///test.db"
+engine = create_engine(DATABASE_URL)
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+
+
+def test_course_repository(session):
+    # Given
+    name = "Course A"
+    repository = CourseRepository(session)
+    course_id = CourseId(id=repository.next_identity())
+    course = DomainCourse(id=course_id, name=name)
+
+    # When
+    repository.add(course)
+    assert course.id is not None
+
+    fetched_course = repository.find_by_id(course.id)
+    assert fetched_course is not None
+    assert fetched_course.name == "Course A"
+
+    fetched_course.name = "Course B"
+    repository.update(fetched_course)
+    updated_course = repository.find_by_id(fetched_course.id)
+    assert updated_course.name == "Course B"
+
+    repository.delete(updated_course.id)
+    with pytest.raises(ValueError):
+        repository.find_by_id(updated_course.id)
+
+
+def test_given_courses_when_find_by_ids_then_return_only_requested_courses(session):
+    # Given
+    repository = CourseRepository(session)
+    for i in range(3):
+        repository.add(DomainCourse(id=CourseId(id=str(i)), name=f"Course {i}"))
+
+    # When
+    fetched = repository.find_by_ids([CourseId(id="0"), CourseId(id="2"), CourseId(id="missing")])
+
+    # Then
+    assert {str(course.id) for course in fetched} == {"0", "2"}
+    assert repository.find_by_ids([]) == []
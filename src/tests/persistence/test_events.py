@@ -0,0 +1,106 @@
+import asyncio
+from datetime import date
+from sqlmodel import Session, SQLModel
+from src.main.domain import Planning, PlanningEventBroker, PlanningId, PlanningSlotId, PromotionId
+from src.main.persistence import PlanningRepository
+from src.main.persistence.events import EventPublishingRepository
+from src.tests.persistence.test_planning import PlanningRepositoryDumb, count_queries, create_domain_slot, engine
+
+
+class FailingPlanningRepository(PlanningRepositoryDumb):
+    def update(self, planning):
+        raise ValueError("Planning not found")
+
+
+class AsyncPlanningRepository:
+    def __init__(self, repository: PlanningRepositoryDumb):
+        self.repository = repository
+
+    async def add_slot(self, planning_id, slot, expected_version=None):
+        return self.repository.add_slot(planning_id, slot, expected_version=expected_version)
+
+    async def find_header(self, id):
+        return self.repository.find_header(id)
+
+
+def create_planning(planning_id: str = "p1") -> Planning:
+    return Planning(id=PlanningId(id=planning_id), date=date(2024, 3, 4), promotion_id=PromotionId(id="1"), slots=[])
+
+
+def collect(broker: PlanningEventBroker, write) -> list:
+    """Runs a write while subscribed to every planning event, and returns the (type, planning id, version) received."""
+    async def scenario():
+        subscription = broker.subscribe()
+        result = write()
+        if asyncio.iscoroutine(result):
+            await result
+        events = []
+        while not subscription._queue.empty():
+            event = (await subscription.get()).event
+            events.append((event.type, str(event.planning_id), event.version))
+        subscription.close()
+        return events
+    return asyncio.run(scenario())
+
+
+def test_publishing_repository_when_planning_is_written_then_publish_each_write():
+    broker = PlanningEventBroker()
+    repository = EventPublishingRepository(PlanningRepositoryDumb(), broker)
+    planning = create_planning()
+
+    def write():
+        repository.add(planning)
+        repository.add_slot(planning.id, create_domain_slot("s1"))
+        repository.update(planning)
+        repository.delete(planning)
+
+    assert collect(broker, write) == [("added", "p1", 1), ("updated", "p1", 2), ("updated", "p1", 3), ("deleted", "p1", 3)]
+
+
+def test_publishing_repository_when_write_fails_then_publish_nothing():
+    broker = PlanningEventBroker()
+    repository = EventPublishingRepository(FailingPlanningRepository(), broker)
+
+    def write():
+        try:
+            repository.update(create_planning())
+        except ValueError:
+            pass
+
+    assert collect(broker, write) == []
+
+
+def test_publishing_repository_when_async_repository_adds_slot_then_publish_once_written():
+    broker = PlanningEventBroker()
+    dumb = PlanningRepositoryDumb()
+    dumb.add(create_planning())
+    repository = EventPublishingRepository(AsyncPlanningRepository(dumb), broker)
+
+    events = collect(broker, lambda: repository.add_slot(PlanningId(id="p1"), create_domain_slot("s1")))
+
+    assert events == [("updated", "p1", 2)]
+
+
+def test_publishing_repository_when_slots_are_written_then_publish_without_loading_the_planning():
+    SQLModel.metadata.create_all(engine)
+    try:
+        with Session(engine) as session:
+            broker = PlanningEventBroker()
+            repository = EventPublishingRepository(PlanningRepository(session), broker)
+            planning = create_planning()
+            planning.slots = [create_domain_slot("s1")]
+            repository.add(planning)
+            slot = create_domain_slot("s2").model_copy(update={"hours_start": 11, "hours_end": 12})
+
+            def write():
+                repository.add_slot(planning.id, slot, expected_version=1)
+                repository.update_slot(planning.id, slot.model_copy(update={"hours_start": 14, "hours_end": 15}))
+                repository.delete_slot(planning.id, PlanningSlotId(id="s1"), expected_version=3)
+
+            with count_queries() as statements:
+                events = collect(broker, write)
+    finally:
+        SQLModel.metadata.drop_all(engine)
+
+    assert events == [("updated", "p1", 2), ("updated", "p1", 3), ("updated", "p1", 4)]
+    assert not [statement for statement in statements if "planning_slots.planning_id IN" in statement]
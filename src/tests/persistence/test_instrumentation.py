@@ -0,0 +1,45 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from src.main.persistence.instrumentation import instrument_engine, record_queries
+import asyncio
+import pytest
+
+
+def test_instrumented_engine_when_record_queries_then_count_statements_run_in_the_block_only():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    instrument_engine(engine)
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with record_queries() as stats:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+        connection.execute(text("SELECT 3"))
+
+    assert stats.statements == 2
+    assert stats.seconds > 0
+
+
+def test_failed_statement_when_record_queries_then_following_statements_are_still_timed():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    with engine.connect() as connection, record_queries() as stats:
+        with pytest.raises(Exception):
+            connection.execute(text("SELECT * FROM missing"))
+        connection.execute(text("SELECT 1"))
+        assert connection.info["query_start_times"] == []
+
+    assert stats.statements == 1
+
+
+def test_async_engine_when_record_queries_then_count_its_statements():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        instrument_engine(engine)
+        with record_queries() as stats:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        await engine.dispose()
+        return stats
+
+    assert asyncio.run(scenario()).statements == 1
@@ -0,0 +1,174 @@
+from contextlib import contextmanager
+from datetime import date
+import asyncio
+import pytest
+from sqlalchemy import create_engine, event, inspect, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel
+from src.main.domain.course import CourseId
+from src.main.domain.planning import Planning as DomainPlanning, PlanningId, PlanningSlot as DomainPlanningSlot, PlanningSlotId
+from src.main.domain.promotion import PromotionId
+from src.main.domain.room import RoomId
+from src.main.domain.teacher import TeacherId
+from src.main.persistence import migrations
+from src.main.persistence.planning import Planning, PlanningRepository, PlanningSlot
+import src.main.persistence  # noqa: F401 - declares every table in SQLModel.metadata
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def get_indexes(engine, table: str) -> dict:
+    return {index["name"]: index["column_names"] for index in inspect(engine).get_indexes(table)}
+
+
+@contextmanager
+def capture_statements(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(engine, statement: str, parameters) -> str:
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def store_plannings(engine):
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO promotions VALUES ('1', 1, 'Master', 'Promotion')"))
+        for day in range(1, 8):
+            connection.execute(text(f"INSERT INTO plannings VALUES ('p{day}', '2024-03-0{day}', '1', 1)"))
+            connection.execute(text(
+                f"INSERT INTO planning_slots VALUES ('s{day}', 9, 0, 10, 0, '1', 't{day}', 'c', 'r{day}', 'p{day}')"))
+
+
+def test_empty_database_when_migrate_then_apply_every_migration_once(engine):
+    assert migrations.upgrade(engine) == [migration.version for migration in migrations.MIGRATIONS]
+    assert migrations.upgrade(engine) == []
+
+    with engine.connect() as connection:
+        assert migrations.applied_versions(connection) == [1, 2, 3, 4]
+
+
+def test_migrated_database_then_schema_matches_the_declared_tables(engine):
+    migrations.upgrade(engine)
+    declared = create_engine("sqlite://")
+    SQLModel.metadata.create_all(declared)
+
+    assert set(inspect(engine).get_table_names()) == set(inspect(declared).get_table_names()) | {"schema_migrations"}
+    for table in inspect(declared).get_table_names():
+        assert ({column["name"]: column["nullable"] for column in inspect(engine).get_columns(table)}
+                == {column["name"]: column["nullable"] for column in inspect(declared).get_columns(table)})
+        assert get_indexes(engine, table) == get_indexes(declared, table)
+
+
+def test_database_created_before_migrations_when_migrate_then_add_version_and_replace_indexes(engine):
+    with engine.begin() as connection:
+        migrations.create_initial_tables(connection)
+        connection.execute(text("CREATE INDEX ix_plannings_date ON plannings (date)"))
+        connection.execute(text("CREATE INDEX ix_planning_slots_teacher_id ON planning_slots (teacher_id)"))
+        connection.execute(text("INSERT INTO promotions VALUES ('1', 1, 'Master', 'Promotion')"))
+        connection.execute(text("INSERT INTO plannings VALUES ('p1', '2024-03-04', '1')"))
+        connection.execute(text("INSERT INTO planning_slots VALUES ('s1', 9, 15, 10, 45, '1', 't', 'c', 'r', 'p1')"))
+
+    migrations.upgrade(engine)
+
+    with Session(engine) as session:
+        assert session.exec(select(Planning.version).where(Planning.id == "p1")).one() == (1,)
+        assert session.exec(select(PlanningSlot.start_minute, PlanningSlot.end_minute)).one() == (555, 645)
+    assert get_indexes(engine, "plannings") == {"ix_plannings_date_promotion_id": ["date", "promotion_id"]}
+    assert "ix_planning_slots_teacher_id" not in get_indexes(engine, "planning_slots")
+
+
+def test_plannings_of_a_date_and_promotion_when_loaded_then_query_plans_use_indexes(engine):
+    migrations.upgrade(engine)
+    store_plannings(engine)
+
+    with Session(engine) as session, capture_statements(engine) as statements:
+        plannings = PlanningRepository(session).find_by_date_and_promotion(date(2024, 3, 4), PromotionId(id="1"))
+        PlanningRepository(session).find_slot_by_id(PlanningId(id="p4"), plannings[0].slots[0].id)
+
+    select_plannings, select_slots, select_slot = [explain(engine, *statement) for statement in statements]
+    assert "USING INDEX ix_plannings_date_promotion_id (date=? AND promotion_id=?)" in select_plannings
+    assert "USING INDEX ix_planning_slots_planning_id_start_minute (planning_id=?)" in select_slots
+    assert "USING INDEX sqlite_autoindex_planning_slots_1 (id=?)" in select_slot
+
+
+def test_bookings_of_a_teacher_or_room_for_a_date_when_loaded_then_query_plans_use_indexes(engine):
+    migrations.upgrade(engine)
+    store_plannings(engine)
+    for column, index in [(PlanningSlot.teacher_id, "ix_planning_slots_teacher_id_planning_id"),
+                          (PlanningSlot.room_id, "ix_planning_slots_room_id_planning_id")]:
+        statement = (select(PlanningSlot.id).join(Planning, PlanningSlot.planning_id == Planning.id)
+                     .where(Planning.date == date(2024, 3, 4), column == "t4"))
+        compiled = statement.compile(engine)
+
+        plan = explain(engine, str(compiled), tuple(compiled.params[name] for name in compiled.positiontup))
+
+        assert f"SEARCH planning_slots USING INDEX {index} ({column.name}=?)" in plan
+        assert "SCAN" not in plan
+
+
+def test_async_engine_when_upgrade_async_then_apply_every_migration():
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        try:
+            return await migrations.upgrade_async(engine), await migrations.upgrade_async(engine)
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(scenario()) == ([1, 2, 3, 4], [])
+
+
+def test_slots_overlapping_an_interval_and_bookings_when_loaded_then_query_plans_use_indexes(engine):
+    migrations.upgrade(engine)
+    store_plannings(engine)
+
+    with Session(engine) as session, capture_statements(engine) as statements:
+        repository = PlanningRepository(session)
+        repository.find_overlapping_slots(date(2024, 3, 4), 9 * 60, 10 * 60)
+        repository.find_bookings(date(2024, 3, 1), date(2024, 3, 7), teacher_id=TeacherId(id="t4"),
+                                 room_id=RoomId(id="r5"))
+
+    overlapping, bookings = [explain(engine, *statement) for statement in statements]
+    assert ("SEARCH planning_slots USING INDEX ix_planning_slots_planning_id_start_minute "
+            "(planning_id=? AND start_minute<?)") in overlapping
+    assert "MULTI-INDEX OR" in bookings
+    assert "USING INDEX ix_planning_slots_teacher_id_planning_id (teacher_id=?)" in bookings
+    assert "USING INDEX ix_planning_slots_room_id_planning_id (room_id=?)" in bookings
+    assert "SCAN" not in overlapping + bookings
+
+
+def test_slots_written_when_bookings_are_checked_then_query_plans_use_indexes(engine):
+    migrations.upgrade(engine)
+    store_plannings(engine)
+    slot = DomainPlanningSlot(
+        id=PlanningSlotId(id="new"), hours_start=11, minutes_start=0, hours_end=12, minutes_end=0,
+        promotion_id=PromotionId(id="1"), teacher_id=TeacherId(id="t4"), course_id=CourseId(id="c"),
+        room_id=RoomId(id="r9"))
+
+    with Session(engine) as session, capture_statements(engine) as statements:
+        repository = PlanningRepository(session)
+        repository.add_slot(PlanningId(id="p4"), slot)
+        other = slot.model_copy(update={"id": PlanningSlotId(id="other"), "hours_start": 13, "hours_end": 14})
+        repository.add(DomainPlanning(
+            id=PlanningId(id="p8"), date=date(2024, 3, 4), promotion_id=PromotionId(id="1"), slots=[other]))
+
+    checks = [explain(engine, *statement) for statement in statements if " JOIN " in statement[0]]
+    assert len(checks) == 4
+    assert all("SCAN" not in plan for plan in checks)
+    assert sum("ix_planning_slots_teacher_id_planning_id (teacher_id=?)" in plan for plan in checks) == 2
+    assert sum("ix_planning_slots_room_id_planning_id (room_id=?)" in plan for plan in checks) == 2
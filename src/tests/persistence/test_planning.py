@@ -1,358 +1,711 @@
-import uuid
-from datetime import date
-from typing import List
-import pytest
-from sqlmodel import Session, create_engine, SQLModel
-
-from src.main.domain.planning import (
-    IPlanningRepository, Planning as DomainPlanning, PlanningId, PlanningSlot as DomainPlanningSlot, PlanningSlotId)
-from src.main.domain.promotion import PromotionId
-from src.main.domain.teacher import TeacherId
-from src.main.domain.course import CourseId
-from src.main.domain.room import RoomId
-from src.main.persistence.planning import PlanningRepository, Planning, PlanningSlot
-
-
-class PlanningRepositoryDumb(IPlanningRepository):
-    def __init__(self):
-        self.plannings = []
-
-    def next_identity(self) -> PlanningId:
-        return PlanningId(id=str(len(self.plannings) + 1))
-
-    def find_all(self) -> List[DomainPlanning]:
-        return self.plannings
-
-    def find_by_id(self, id: PlanningId) -> DomainPlanning:
-        return next((p for p in self.plannings if str(p.id) == str(id)), None)
-
-    def find_by_date_and_promotion(self, date: date, promotion_id: PromotionId) -> List[DomainPlanning]:
-        return [p for p in self.plannings if p.date == date and p.promotion_id == promotion_id]
-
-    def add(self, planning: DomainPlanning):
-        for i, existing in enumerate(self.plannings):
-            if existing.id == planning.id:
-                self.plannings[i] = planning
-                return
-        self.plannings.append(planning)
-
-    def delete(self, planning: DomainPlanning):
-        self.plannings = [p for p in self.plannings if p.id != planning.id]
-
-    def update(self, planning: DomainPlanning):
-        for i, existing in enumerate(self.plannings):
-            if existing.id == planning.id:
-                self.plannings[i] = planning
-                return
-        raise ValueError("Planning not found")
-
-
-DATABASE_URL = "sqlite:///test.db"
-engine = create_engine(DATABASE_URL)
-
-
-@pytest.fixture(name="session")
-def session_fixture():
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
-
-
-def create_domain_slot(slot_id: str = None) -> DomainPlanningSlot:
-    return DomainPlanningSlot(
-        id=PlanningSlotId(id=slot_id or str(uuid.uuid4())),
-        hours_start=9,
-        minutes_start=0,
-        hours_end=10,
-        minutes_end=30,
-        promotion_id=PromotionId(id="1"),
-        teacher_id=TeacherId(id="1"),
-        course_id=CourseId(id="1"),
-        room_id=RoomId(id="1")
-    )
-
-
-def create_planning(repository, planning_id, promotion_id, planning_date, slots):
-    planning = DomainPlanning(id=planning_id, date=planning_date, promotion_id=promotion_id, slots=slots)
-    repository.add(planning)
-    return planning
-
-
-# ===================== TESTS ========================
-
-def test_empty_database_when_find_by_id_then_raise_exception(session):
-    repo = PlanningRepository(session)
-    with pytest.raises(ValueError):
-        repo.find_by_id(PlanningId(id="nonexistent"))
-
-
-def test_existing_planning_when_find_by_id_then_return_planning(session):
-    repo = PlanningRepository(session)
-    planning_id = PlanningId(id=str(uuid.uuid4()))
-    promotion_id = PromotionId(id="1")
-    planning_date = date(2023, 10, 10)
-    slot = create_domain_slot()
-    create_planning(repo, planning_id, promotion_id, planning_date, [slot])
-
-    fetched = repo.find_by_id(planning_id)
-    assert fetched.id == planning_id
-    assert fetched.date == planning_date
-    assert len(fetched.slots) == 1
-
-
-def test_existing_planning_when_update_date_then_date_is_updated(session):
-    repo = PlanningRepository(session)
-    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[])
-    repo.add(repo._to_domain(db_planning))
-
-    new_date = date(2022, 1, 2)
-    new_promotion = "2"
-    updated = DomainPlanning(id=PlanningId(id="1"), date=new_date, promotion_id=PromotionId(id=new_promotion), slots=[])
-    repo._update_planning(db_planning, updated)
-
-    assert db_planning.date == new_date
-    assert db_planning.promotion_id == new_promotion
-
-
-def test_existing_planning_with_slot_when_slot_removed_then_slot_is_deleted(session):
-    repo = PlanningRepository(session)
-    slot = PlanningSlot(
-        id="1", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
-        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="1"
-    )
-    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[slot])
-    session.add(db_planning)
-    session.commit()
-
-    assert len(db_planning.slots) == 1
-
-    updated = DomainPlanning(id=PlanningId(id="1"), date=db_planning.date, promotion_id=PromotionId(id="1"), slots=[])
-    repo._update_planning(db_planning, updated)
-
-    assert len(db_planning.slots) == 0
-
-
-def test_existing_slot_when_updated_then_slot_fields_are_updated(session):
-    repo = PlanningRepository(session)
-    slot = PlanningSlot(
-        id="1", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
-        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="1"
-    )
-    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[slot])
-    session.add(db_planning)
-    session.commit()
-
-    updated_slot = DomainPlanningSlot(
-        id=PlanningSlotId(id="1"), hours_start=10, minutes_start=5, hours_end=11, minutes_end=10,
-        promotion_id=PromotionId(id="1"), teacher_id=TeacherId(id="1"),
-        course_id=CourseId(id="1"), room_id=RoomId(id="1")
-    )
-    updated = DomainPlanning(
-        id=PlanningId(id="1"), date=db_planning.date, promotion_id=PromotionId(id="1"), slots=[updated_slot])
-    repo._update_planning(db_planning, updated)
-
-    assert slot.hours_start == 10
-    assert slot.minutes_start == 5
-    assert slot.hours_end == 11
-    assert slot.minutes_end == 10
-
-
-def test_empty_planning_when_new_slot_added_then_slot_is_created(session):
-    repo = PlanningRepository(session)
-    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[])
-    session.add(db_planning)
-    session.commit()
-
-    domain_slot = create_domain_slot(slot_id="1")
-    updated = DomainPlanning(
-        id=PlanningId(id="1"), date=db_planning.date, promotion_id=PromotionId(id="1"), slots=[domain_slot])
-    repo._update_planning(db_planning, updated)
-
-    assert len(db_planning.slots) == 1
-
-
-def test_existing_planning_when_deleted_then_not_found(session):
-    repo = PlanningRepository(session)
-    planning_id = PlanningId(id=str(uuid.uuid4()))
-    promotion_id = PromotionId(id="1")
-    planning_date = date(2023, 10, 10)
-    create_planning(repo, planning_id, promotion_id, planning_date, [])
-
-    repo.delete(DomainPlanning(id=planning_id, date=planning_date, promotion_id=promotion_id, slots=[]))
-
-    with pytest.raises(ValueError):
-        repo.find_by_id(planning_id)
-
-
-def test_existing_planning_when_find_by_date_and_promotion_then_return_planning(session):
-    repo = PlanningRepository(session)
-    planning_id = PlanningId(id=str(uuid.uuid4()))
-    promotion_id = PromotionId(id="1")
-    planning_date = date(2023, 10, 10)
-    create_planning(repo, planning_id, promotion_id, planning_date, [])
-
-    results = repo.find_by_date_and_promotion(planning_date, promotion_id)
-    assert len(results) == 1
-    assert results[0].id == planning_id
-
-
-def test_database_with_multiple_plannings_when_find_all_then_return_all_domain_plannings(session):
-    repo = PlanningRepository(session)
-
-    planning_1 = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[])
-    planning_2 = Planning(id="2", date=date(2022, 1, 2), promotion_id="2", slots=[])
-
-    session.add(planning_1)
-    session.add(planning_2)
-    session.commit()
-
-    results = repo.find_all()
-
-    assert len(results) == 2
-    ids = {str(p.id) for p in results}
-    assert ids == {"1", "2"}
-
-
-def test_existing_planning_when_update_called_then_updates_are_applied(session):
-    repo = PlanningRepository(session)
-    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[])
-    session.add(db_planning)
-    session.commit()
-
-    updated = DomainPlanning(id=PlanningId(id="1"), date=date(2022, 2, 2), promotion_id=PromotionId(id="2"), slots=[])
-    repo.update(updated)
-
-    refreshed = session.get(Planning, "1")
-    assert refreshed.date == date(2022, 2, 2)
-    assert refreshed.promotion_id == "2"
-
-
-def test_nonexistent_planning_when_update_called_then_raise_value_error(session):
-    repo = PlanningRepository(session)
-
-    updated = DomainPlanning(id=PlanningId(id="999"), date=date(2022, 2, 2), promotion_id=PromotionId(id="2"), slots=[])
-
-    with pytest.raises(ValueError, match="Planning not found"):
-        repo.update(updated)
-
-
-def test_existing_planning_with_slot_when_find_slot_by_id_then_return_domain_slot(session):
-    repo = PlanningRepository(session)
-
-    slot = PlanningSlot(
-        id="slot-123", hours_start=9, minutes_start=0, hours_end=10, minutes_end=30,
-        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="plan-123"
-    )
-    db_planning = Planning(id="plan-123", date=date(2022, 1, 1), promotion_id="1", slots=[slot])
-    session.add(db_planning)
-    session.commit()
-
-    result = repo.find_slot_by_id(PlanningId(id="plan-123"), PlanningSlotId(id="slot-123"))
-    assert result.id.id == "slot-123"
-    assert result.hours_start == 9
-    assert result.hours_end == 10
-
-
-def test_nonexistent_slot_when_find_slot_by_id_then_raise_value_error(session):
-    repo = PlanningRepository(session)
-
-    with pytest.raises(ValueError, match="Planning slot not found"):
-        repo.find_slot_by_id(PlanningId(id="nonexistent"), PlanningSlotId(id="missing"))
-
-
-def test_existing_planning_when_add_slot_then_slot_is_persisted(session):
-    repo = PlanningRepository(session)
-
-    # Create planning without slots
-    db_planning = Planning(id="plan-321", date=date(2022, 1, 1), promotion_id="1", slots=[])
-    session.add(db_planning)
-    session.commit()
-
-    # Create slot and add it
-    domain_slot = create_domain_slot(slot_id="slot-321")
-    repo.add_slot(PlanningId(id="plan-321"), domain_slot)
-
-    # Fetch and validate
-    updated = session.get(Planning, "plan-321")
-    assert len(updated.slots) == 1
-    assert updated.slots[0].id == "slot-321"
-    assert updated.slots[0].planning_id == "plan-321"
-
-
-def test_existing_planning_when_update_slot_then_slot_is_updated(session):
-    repo = PlanningRepository(session)
-
-    # Create initial planning and slot
-    db_slot = PlanningSlot(
-        id="slot-456", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
-        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="plan-456"
-    )
-    db_planning = Planning(id="plan-456", date=date(2022, 1, 1), promotion_id="1", slots=[db_slot])
-    session.add(db_planning)
-    session.commit()
-
-    # Update slot data via domain model
-    updated_slot = DomainPlanningSlot(
-        id=PlanningSlotId(id="slot-456"), hours_start=10, minutes_start=15, hours_end=12, minutes_end=45,
-        promotion_id=PromotionId(id="1"), teacher_id=TeacherId(id="1"), course_id=CourseId(id="1"), room_id=RoomId(id="1")
-    )
-    repo.update_slot(PlanningId(id="plan-456"), updated_slot)
-
-    # Validate
-    refreshed_slot = session.get(PlanningSlot, "slot-456")
-    assert refreshed_slot.hours_start == 10
-    assert refreshed_slot.minutes_start == 15
-    assert refreshed_slot.hours_end == 12
-    assert refreshed_slot.minutes_end == 45
-
-
-def test_wrong_planning_when_update_slot_then_raise_value_error(session):
-    repo = PlanningRepository(session)
-
-    # Create planning and slot with mismatched planning_id
-    db_slot = PlanningSlot(
-        id="slot-789", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
-        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="correct-plan"
-    )
-    session.add(db_slot)
-    session.commit()
-
-    # Try updating with wrong planning_id
-    updated_slot = DomainPlanningSlot(
-        id=PlanningSlotId(id="slot-789"), hours_start=10, minutes_start=0, hours_end=11, minutes_end=0,
-        promotion_id=PromotionId(id="1"), teacher_id=TeacherId(id="1"), course_id=CourseId(id="1"), room_id=RoomId(id="1")
-    )
-
-    with pytest.raises(ValueError, match="Planning slot not found"):
-        repo.update_slot(PlanningId(id="wrong-plan"), updated_slot)
-
-
-def test_existing_planning_when_delete_slot_then_slot_is_removed(session):
-    repo = PlanningRepository(session)
-
-    db_slot = PlanningSlot(
-        id="slot-del", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
-        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="plan-del"
-    )
-    db_planning = Planning(id="plan-del", date=date(2022, 1, 1), promotion_id="1", slots=[db_slot])
-    session.add(db_planning)
-    session.commit()
-
-    repo.delete_slot(PlanningId(id="plan-del"), PlanningSlotId(id="slot-del"))
-
-    assert session.get(PlanningSlot, "slot-del") is None
-
-
-def test_wrong_planning_when_delete_slot_then_raise_value_error(session):
-    repo = PlanningRepository(session)
-
-    db_slot = PlanningSlot(
-        id="slot-wrong", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
-        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="correct-plan"
-    )
-    session.add(db_slot)
-    session.commit()
-
-    with pytest.raises(ValueError, match="Planning slot not found"):
-        repo.delete_slot(PlanningId(id="wrong-plan"), PlanningSlotId(id="slot-wrong"))
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from typing import List, Optional, Tuple
+import pytest
+from sqlmodel import Session, create_engine, SQLModel
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from src.main.domain.planning import (
+    ConcurrentUpdateError, IPlanningRepository, Planning as DomainPlanning, PlanningId, PlanningSlot as DomainPlanningSlot,
+    PlanningSlotId, ResourceConflictError)
+from src.main.domain.promotion import PromotionId
+from src.main.domain.teacher import TeacherId
+from src.main.domain.course import CourseId
+from src.main.domain.room import RoomId
+from src.main.persistence import planning as planning_persistence
+from src.main.persistence.planning import PlanningRepository, Planning, PlanningSlot
+
+
+class PlanningRepositoryDumb(IPlanningRepository):
+    def __init__(self):
+        self.plannings = []
+
+    def next_identity(self) -> PlanningId:
+        return PlanningId(id=str(len(self.plannings) + 1))
+
+    def find_all(self) -> List[DomainPlanning]:
+        return self.plannings
+
+    def find_by_id(self, id: PlanningId) -> DomainPlanning:
+        return next((p for p in self.plannings if str(p.id) == str(id)), None)
+
+    def find_version(self, id: PlanningId) -> int:
+        for planning in self.plannings:
+            if str(planning.id) == str(id):
+                return planning.version
+        raise ValueError("Planning not found")
+
+    def find_header(self, id: PlanningId) -> DomainPlanning:
+        planning = self.find_by_id(id)
+        if planning is None:
+            raise ValueError("Planning not found")
+        return planning.model_copy(update={"slots": []})
+
+    def find_by_date_and_promotion(self, date: date, promotion_id: PromotionId) -> List[DomainPlanning]:
+        return [p for p in self.plannings if p.date == date and p.promotion_id == promotion_id]
+
+    def find_by_date_range(self, date_from: date, date_to: date,
+                           promotion_id: Optional[PromotionId] = None) -> List[DomainPlanning]:
+        return self.find_page(len(self.plannings), date_from=date_from, date_to=date_to, promotion_id=promotion_id)
+
+    def find_page(self, limit: int, after: Optional[Tuple[date, PlanningId]] = None, date_from: Optional[date] = None,
+                  date_to: Optional[date] = None, promotion_id: Optional[PromotionId] = None) -> List[DomainPlanning]:
+        plannings = sorted(self.plannings, key=lambda p: (p.date, str(p.id)))
+        return [
+            p for p in plannings
+            if (after is None or (p.date, str(p.id)) > (after[0], str(after[1])))
+            and (date_from is None or p.date >= date_from) and (date_to is None or p.date <= date_to)
+            and (promotion_id is None or p.promotion_id == promotion_id)
+        ][:limit]
+
+    def find_existing_ids(self, ids: List[PlanningId]) -> List[PlanningId]:
+        wanted = {str(id) for id in ids}
+        return [p.id for p in self.plannings if str(p.id) in wanted]
+
+    def find_existing_slot_ids(self, ids: List[PlanningSlotId]) -> List[PlanningSlotId]:
+        wanted = {str(id) for id in ids}
+        return [slot.id for p in self.plannings for slot in p.slots if str(slot.id) in wanted]
+
+    def _books(self, slot: DomainPlanningSlot, teacher_id, room_id, promotion_id) -> bool:
+        resources = [(slot.teacher_id, teacher_id), (slot.room_id, room_id), (slot.promotion_id, promotion_id)]
+        given = [(value, wanted) for value, wanted in resources if wanted is not None]
+        return not given or any(value == wanted for value, wanted in given)
+
+    def find_overlapping_slots(self, date: date, start_minute: int, end_minute: int, teacher_id=None, room_id=None,
+                               promotion_id=None) -> List[DomainPlanningSlot]:
+        slots = [slot for p in self.plannings if p.date == date for slot in p.slots
+                 if slot.start_minute < end_minute and slot.end_minute > start_minute
+                 and self._books(slot, teacher_id, room_id, promotion_id)]
+        return sorted(slots, key=lambda slot: (slot.start_minute, str(slot.id)))
+
+    def find_bookings(self, date_from: date, date_to: date, teacher_id=None, room_id=None,
+                      promotion_id=None) -> List[Tuple[date, int, int]]:
+        return sorted((p.date, slot.start_minute, slot.end_minute)
+                      for p in self.find_by_date_range(date_from, date_to) for slot in p.slots
+                      if self._books(slot, teacher_id, room_id, promotion_id))
+
+    def _check_bookings(self, planning: DomainPlanning, slots: List[DomainPlanningSlot]):
+        for slot in slots:
+            for other in self.plannings:
+                if other.id == planning.id or other.date != planning.date:
+                    continue
+                for booked in other.slots:
+                    if (booked.start_minute < slot.end_minute and booked.end_minute > slot.start_minute
+                            and (booked.teacher_id == slot.teacher_id or booked.room_id == slot.room_id)):
+                        raise ResourceConflictError(
+                            f"Teacher or room of slot {slot.id} is already booked by slot {booked.id}")
+
+    def add(self, planning: DomainPlanning):
+        self._check_bookings(planning, planning.slots)
+        planning.version = 1
+        for i, existing in enumerate(self.plannings):
+            if existing.id == planning.id:
+                self.plannings[i] = planning
+                return
+        self.plannings.append(planning)
+
+    def add_all(self, plannings: List[DomainPlanning]):
+        for planning in plannings:
+            self._check_bookings(planning, planning.slots)
+        for planning in plannings:
+            self.add(planning)
+
+    def delete(self, planning: DomainPlanning):
+        self.plannings = [p for p in self.plannings if p.id != planning.id]
+
+    def update(self, planning: DomainPlanning):
+        for i, existing in enumerate(self.plannings):
+            if existing.id == planning.id:
+                if planning.version and existing.version != planning.version:
+                    raise ConcurrentUpdateError(f"Planning {planning.id} was modified since version {planning.version}")
+                self._check_bookings(planning, planning.slots)
+                planning.version = existing.version + 1
+                self.plannings[i] = planning
+                return
+        raise ValueError("Planning not found")
+
+    def add_slot(self, planning_id: PlanningId, slot: DomainPlanningSlot, expected_version: Optional[int] = None):
+        planning = self.find_by_id(planning_id)
+        if planning is None:
+            raise ValueError("Planning not found")
+        if expected_version is not None and planning.version != expected_version:
+            raise ConcurrentUpdateError(f"Planning {planning_id} was modified since version {expected_version}")
+        self._check_bookings(planning, [slot])
+        if slot not in planning.slots:
+            planning.slots.append(slot)
+        planning.version += 1
+
+
+DATABASE_URL = "sqlite:///test.db"
+engine = create_engine(DATABASE_URL)
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def create_domain_slot(slot_id: str = None) -> DomainPlanningSlot:
+    return DomainPlanningSlot(
+        id=PlanningSlotId(id=slot_id or str(uuid.uuid4())),
+        hours_start=9,
+        minutes_start=0,
+        hours_end=10,
+        minutes_end=30,
+        promotion_id=PromotionId(id="1"),
+        teacher_id=TeacherId(id="1"),
+        course_id=CourseId(id="1"),
+        room_id=RoomId(id="1")
+    )
+
+
+def create_planning(repository, planning_id, promotion_id, planning_date, slots):
+    planning = DomainPlanning(id=planning_id, date=planning_date, promotion_id=promotion_id, slots=slots)
+    repository.add(planning)
+    return planning
+
+
+# ===================== TESTS ========================
+
+def test_empty_database_when_find_by_id_then_raise_exception(session):
+    repo = PlanningRepository(session)
+    with pytest.raises(ValueError):
+        repo.find_by_id(PlanningId(id="nonexistent"))
+
+
+def test_existing_planning_when_find_by_id_then_return_planning(session):
+    repo = PlanningRepository(session)
+    planning_id = PlanningId(id=str(uuid.uuid4()))
+    promotion_id = PromotionId(id="1")
+    planning_date = date(2023, 10, 10)
+    slot = create_domain_slot()
+    create_planning(repo, planning_id, promotion_id, planning_date, [slot])
+
+    fetched = repo.find_by_id(planning_id)
+    assert fetched.id == planning_id
+    assert fetched.date == planning_date
+    assert len(fetched.slots) == 1
+
+
+def test_existing_planning_when_update_date_then_date_is_updated(session):
+    repo = PlanningRepository(session)
+    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[])
+    repo.add(repo._to_domain(db_planning))
+
+    new_date = date(2022, 1, 2)
+    new_promotion = "2"
+    updated = DomainPlanning(id=PlanningId(id="1"), date=new_date, promotion_id=PromotionId(id=new_promotion), slots=[])
+    repo._update_planning(db_planning, updated)
+
+    assert db_planning.date == new_date
+    assert db_planning.promotion_id == new_promotion
+
+
+def test_existing_planning_with_slot_when_slot_removed_then_slot_is_deleted(session):
+    repo = PlanningRepository(session)
+    slot = PlanningSlot(
+        id="1", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
+        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="1"
+    )
+    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[slot])
+    session.add(db_planning)
+    session.commit()
+
+    assert len(db_planning.slots) == 1
+
+    updated = DomainPlanning(id=PlanningId(id="1"), date=db_planning.date, promotion_id=PromotionId(id="1"), slots=[])
+    repo._update_planning(db_planning, updated)
+
+    assert len(db_planning.slots) == 0
+
+
+def test_existing_slot_when_updated_then_slot_fields_are_updated(session):
+    repo = PlanningRepository(session)
+    slot = PlanningSlot(
+        id="1", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
+        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="1"
+    )
+    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[slot])
+    session.add(db_planning)
+    session.commit()
+
+    updated_slot = DomainPlanningSlot(
+        id=PlanningSlotId(id="1"), hours_start=10, minutes_start=5, hours_end=11, minutes_end=10,
+        promotion_id=PromotionId(id="1"), teacher_id=TeacherId(id="1"),
+        course_id=CourseId(id="1"), room_id=RoomId(id="1")
+    )
+    updated = DomainPlanning(
+        id=PlanningId(id="1"), date=db_planning.date, promotion_id=PromotionId(id="1"), slots=[updated_slot])
+    repo._update_planning(db_planning, updated)
+
+    assert slot.hours_start == 10
+    assert slot.minutes_start == 5
+    assert slot.hours_end == 11
+    assert slot.minutes_end == 10
+
+
+def test_empty_planning_when_new_slot_added_then_slot_is_created(session):
+    repo = PlanningRepository(session)
+    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[])
+    session.add(db_planning)
+    session.commit()
+
+    domain_slot = create_domain_slot(slot_id="1")
+    updated = DomainPlanning(
+        id=PlanningId(id="1"), date=db_planning.date, promotion_id=PromotionId(id="1"), slots=[domain_slot])
+    repo._update_planning(db_planning, updated)
+
+    assert len(db_planning.slots) == 1
+
+
+def test_existing_planning_when_deleted_then_not_found(session):
+    repo = PlanningRepository(session)
+    planning_id = PlanningId(id=str(uuid.uuid4()))
+    promotion_id = PromotionId(id="1")
+    planning_date = date(2023, 10, 10)
+    create_planning(repo, planning_id, promotion_id, planning_date, [])
+
+    repo.delete(DomainPlanning(id=planning_id, date=planning_date, promotion_id=promotion_id, slots=[]))
+
+    with pytest.raises(ValueError):
+        repo.find_by_id(planning_id)
+
+
+def test_existing_planning_when_find_by_date_and_promotion_then_return_planning(session):
+    repo = PlanningRepository(session)
+    planning_id = PlanningId(id=str(uuid.uuid4()))
+    promotion_id = PromotionId(id="1")
+    planning_date = date(2023, 10, 10)
+    create_planning(repo, planning_id, promotion_id, planning_date, [])
+
+    results = repo.find_by_date_and_promotion(planning_date, promotion_id)
+    assert len(results) == 1
+    assert results[0].id == planning_id
+
+
+def test_database_with_multiple_plannings_when_find_all_then_return_all_domain_plannings(session):
+    repo = PlanningRepository(session)
+
+    planning_1 = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[])
+    planning_2 = Planning(id="2", date=date(2022, 1, 2), promotion_id="2", slots=[])
+
+    session.add(planning_1)
+    session.add(planning_2)
+    session.commit()
+
+    results = repo.find_all()
+
+    assert len(results) == 2
+    ids = {str(p.id) for p in results}
+    assert ids == {"1", "2"}
+
+
+def test_existing_planning_when_update_called_then_updates_are_applied(session):
+    repo = PlanningRepository(session)
+    db_planning = Planning(id="1", date=date(2022, 1, 1), promotion_id="1", slots=[])
+    session.add(db_planning)
+    session.commit()
+
+    updated = DomainPlanning(id=PlanningId(id="1"), date=date(2022, 2, 2), promotion_id=PromotionId(id="2"), slots=[])
+    repo.update(updated)
+
+    refreshed = session.get(Planning, "1")
+    assert refreshed.date == date(2022, 2, 2)
+    assert refreshed.promotion_id == "2"
+
+
+def test_nonexistent_planning_when_update_called_then_raise_value_error(session):
+    repo = PlanningRepository(session)
+
+    updated = DomainPlanning(id=PlanningId(id="999"), date=date(2022, 2, 2), promotion_id=PromotionId(id="2"), slots=[])
+
+    with pytest.raises(ValueError, match="Planning not found"):
+        repo.update(updated)
+
+
+def test_existing_planning_with_slot_when_find_slot_by_id_then_return_domain_slot(session):
+    repo = PlanningRepository(session)
+
+    slot = PlanningSlot(
+        id="slot-123", hours_start=9, minutes_start=0, hours_end=10, minutes_end=30,
+        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="plan-123"
+    )
+    db_planning = Planning(id="plan-123", date=date(2022, 1, 1), promotion_id="1", slots=[slot])
+    session.add(db_planning)
+    session.commit()
+
+    result = repo.find_slot_by_id(PlanningId(id="plan-123"), PlanningSlotId(id="slot-123"))
+    assert result.id.id == "slot-123"
+    assert result.hours_start == 9
+    assert result.hours_end == 10
+
+
+def test_nonexistent_slot_when_find_slot_by_id_then_raise_value_error(session):
+    repo = PlanningRepository(session)
+
+    with pytest.raises(ValueError, match="Planning slot not found"):
+        repo.find_slot_by_id(PlanningId(id="nonexistent"), PlanningSlotId(id="missing"))
+
+
+def test_existing_planning_when_add_slot_then_slot_is_persisted(session):
+    repo = PlanningRepository(session)
+
+    # Create planning without slots
+    db_planning = Planning(id="plan-321", date=date(2022, 1, 1), promotion_id="1", slots=[])
+    session.add(db_planning)
+    session.commit()
+
+    # Create slot and add it
+    domain_slot = create_domain_slot(slot_id="slot-321")
+    repo.add_slot(PlanningId(id="plan-321"), domain_slot)
+
+    # Fetch and validate
+    updated = session.get(Planning, "plan-321")
+    assert len(updated.slots) == 1
+    assert updated.slots[0].id == "slot-321"
+    assert updated.slots[0].planning_id == "plan-321"
+
+
+def test_existing_planning_when_update_slot_then_slot_is_updated(session):
+    repo = PlanningRepository(session)
+
+    # Create initial planning and slot
+    db_slot = PlanningSlot(
+        id="slot-456", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
+        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="plan-456"
+    )
+    db_planning = Planning(id="plan-456", date=date(2022, 1, 1), promotion_id="1", slots=[db_slot])
+    session.add(db_planning)
+    session.commit()
+
+    # Update slot data via domain model
+    updated_slot = DomainPlanningSlot(
+        id=PlanningSlotId(id="slot-456"), hours_start=10, minutes_start=15, hours_end=12, minutes_end=45,
+        promotion_id=PromotionId(id="1"), teacher_id=TeacherId(id="1"), course_id=CourseId(id="1"), room_id=RoomId(id="1")
+    )
+    repo.update_slot(PlanningId(id="plan-456"), updated_slot)
+
+    # Validate
+    refreshed_slot = session.get(PlanningSlot, "slot-456")
+    assert refreshed_slot.hours_start == 10
+    assert refreshed_slot.minutes_start == 15
+    assert refreshed_slot.hours_end == 12
+    assert refreshed_slot.minutes_end == 45
+
+
+def test_wrong_planning_when_update_slot_then_raise_value_error(session):
+    repo = PlanningRepository(session)
+
+    # Create planning and slot with mismatched planning_id
+    db_slot = PlanningSlot(
+        id="slot-789", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
+        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="correct-plan"
+    )
+    session.add(db_slot)
+    session.commit()
+
+    # Try updating with wrong planning_id
+    updated_slot = DomainPlanningSlot(
+        id=PlanningSlotId(id="slot-789"), hours_start=10, minutes_start=0, hours_end=11, minutes_end=0,
+        promotion_id=PromotionId(id="1"), teacher_id=TeacherId(id="1"), course_id=CourseId(id="1"), room_id=RoomId(id="1")
+    )
+
+    with pytest.raises(ValueError, match="Planning slot not found"):
+        repo.update_slot(PlanningId(id="wrong-plan"), updated_slot)
+
+
+def test_existing_planning_when_delete_slot_then_slot_is_removed(session):
+    repo = PlanningRepository(session)
+
+    db_slot = PlanningSlot(
+        id="slot-del", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
+        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="plan-del"
+    )
+    db_planning = Planning(id="plan-del", date=date(2022, 1, 1), promotion_id="1", slots=[db_slot])
+    session.add(db_planning)
+    session.commit()
+
+    repo.delete_slot(PlanningId(id="plan-del"), PlanningSlotId(id="slot-del"))
+
+    assert session.get(PlanningSlot, "slot-del") is None
+
+
+def test_wrong_planning_when_delete_slot_then_raise_value_error(session):
+    repo = PlanningRepository(session)
+
+    db_slot = PlanningSlot(
+        id="slot-wrong", hours_start=9, minutes_start=0, hours_end=10, minutes_end=0,
+        promotion_id="1", teacher_id="1", course_id="1", room_id="1", planning_id="correct-plan"
+    )
+    session.add(db_slot)
+    session.commit()
+
+    with pytest.raises(ValueError, match="Planning slot not found"):
+        repo.delete_slot(PlanningId(id="wrong-plan"), PlanningSlotId(id="slot-wrong"))
+
+
+def test_plannings_when_find_page_then_return_filtered_plannings_in_keyset_order(session):
+    repo = PlanningRepository(session)
+    for i, day in enumerate([3, 1, 2, 1, 5]):
+        create_planning(repo, PlanningId(id=f"p{i}"), PromotionId(id=str(i % 2)), date(2023, 10, day), [])
+
+    first_page = repo.find_page(2)
+    second_page = repo.find_page(2, after=(first_page[-1].date, first_page[-1].id))
+    filtered = repo.find_page(10, date_from=date(2023, 10, 2), date_to=date(2023, 10, 5), promotion_id=PromotionId(id="0"))
+
+    assert [str(p.id) for p in first_page] == ["p1", "p3"]
+    assert [str(p.id) for p in second_page] == ["p2", "p0"]
+    assert [str(p.id) for p in filtered] == ["p2", "p0", "p4"]
+
+
+def test_plannings_with_slots_when_read_then_slots_are_loaded_in_one_extra_query(session):
+    repo = PlanningRepository(session)
+    for i in range(5):
+        resources = {"teacher_id": TeacherId(id=str(i)), "room_id": RoomId(id=str(i))}
+        create_planning(repo, PlanningId(id=f"p{i}"), PromotionId(id="1"), date(2023, 10, 10),
+                        [create_domain_slot().model_copy(update=resources),
+                         create_domain_slot().model_copy(update={"hours_start": 11, "hours_end": 12, **resources})])
+    session.expunge_all()
+
+    with count_queries() as statements:
+        plannings = repo.find_all()
+    assert len(statements) == 2
+    assert sum(len(p.slots) for p in plannings) == 10
+
+    for read in [lambda: repo.find_by_date_and_promotion(date(2023, 10, 10), PromotionId(id="1")),
+                 lambda: repo.find_page(5), lambda: [repo.find_by_id(PlanningId(id="p0"))]]:
+        session.expunge_all()
+        with count_queries() as statements:
+            plannings = read()
+        assert len(statements) == 2
+        assert all(len(p.slots) == 2 for p in plannings)
+
+
+def test_plannings_when_find_by_date_range_then_return_plannings_of_the_range_ordered_by_date(session):
+    repo = PlanningRepository(session)
+    for i, day in enumerate([8, 6, 10, 13, 7]):
+        create_planning(repo, PlanningId(id=f"p{i}"), PromotionId(id="1" if i < 4 else "2"), date(2025, 1, day), [])
+
+    results = repo.find_by_date_range(date(2025, 1, 6), date(2025, 1, 10), PromotionId(id="1"))
+
+    assert [str(p.id) for p in results] == ["p1", "p0", "p2"]
+    assert len(repo.find_by_date_range(date(2025, 1, 6), date(2025, 1, 10))) == 4
+
+
+def test_plannings_when_add_all_then_rows_are_inserted_in_batches(session, monkeypatch):
+    monkeypatch.setattr(planning_persistence, "BULK_INSERT_BATCH_SIZE", 2)
+    repo = PlanningRepository(session)
+    plannings = [
+        DomainPlanning(id=PlanningId(id=f"p{i}"), date=date(2023, 10, 10 + i), promotion_id=PromotionId(id="1"),
+                       slots=[create_domain_slot()])
+        for i in range(3)
+    ]
+
+    with count_queries() as statements:
+        repo.add_all(plannings)
+
+    inserts = [statement for statement in statements if statement.startswith("INSERT")]
+    assert len(inserts) == 4
+    session.expunge_all()
+    assert [len(p.slots) for p in repo.find_all()] == [1, 1, 1]
+    assert [str(id) for id in repo.find_existing_ids([PlanningId(id="p0"), PlanningId(id="p2"), PlanningId(id="x")])] == [
+        "p0", "p2"]
+    assert sorted(str(id) for id in repo.find_existing_slot_ids(
+        [PlanningSlotId(id=str(slot.id)) for p in plannings for slot in p.slots] + [PlanningSlotId(id="x")])) == sorted(
+        str(slot.id) for p in plannings for slot in p.slots)
+
+
+def test_existing_planning_when_add_all_with_same_id_then_nothing_is_added(session):
+    repo = PlanningRepository(session)
+    create_planning(repo, PlanningId(id="p0"), PromotionId(id="1"), date(2023, 10, 10), [])
+
+    with pytest.raises(IntegrityError):
+        repo.add_all([
+            DomainPlanning(id=PlanningId(id="p1"), date=date(2023, 10, 11), promotion_id=PromotionId(id="1"), slots=[]),
+            DomainPlanning(id=PlanningId(id="p0"), date=date(2023, 10, 12), promotion_id=PromotionId(id="1"), slots=[])
+        ])
+
+    assert [str(p.id) for p in repo.find_all()] == ["p0"]
+
+
+def test_planning_with_many_slots_when_update_one_then_only_changed_rows_are_written(session):
+    repo = PlanningRepository(session)
+    slots = [create_domain_slot(f"s{i}").model_copy(update={"room_id": RoomId(id=str(i)), "teacher_id": TeacherId(
+        id=str(i)), "promotion_id": PromotionId(id=str(i))}) for i in range(50)]
+    planning = create_planning(repo, PlanningId(id="p"), PromotionId(id="1"), date(2023, 10, 10), slots)
+    session.expunge_all()
+    planning.slots = slots[1:]
+    planning.slots[0] = planning.slots[0].model_copy(update={"hours_start": 11, "hours_end": 12})
+    planning.slots.append(create_domain_slot("new").model_copy(update={"room_id": RoomId(id="new")}))
+
+    with count_queries() as statements:
+        repo.update(planning)
+
+    writes = [statement.split()[0] for statement in statements if not statement.startswith("SELECT")]
+    # The planning row is only updated for its version.
+    assert sorted(writes) == ["DELETE", "INSERT", "UPDATE", "UPDATE"]
+    # Then one query per resource checks the bookings of the slots against the other plannings.
+    assert len(statements) == 8
+    session.expunge_all()
+    stored = repo.find_by_id(PlanningId(id="p"))
+    assert len(stored.slots) == 50
+    assert {str(slot.id): slot.hours_start for slot in stored.slots}["s1"] == 11
+
+
+def test_planning_when_written_then_each_write_increments_its_version(session):
+    repo = PlanningRepository(session)
+    planning_id = PlanningId(id="versioned")
+    planning = create_planning(repo, planning_id, PromotionId(id="1"), date(2023, 10, 10), [create_domain_slot("v1")])
+    assert repo.find_version(planning_id) == 1
+
+    planning.slots = []
+    repo.update(planning)
+    assert repo.find_version(planning_id) == 2
+
+    slot = create_domain_slot("v2")
+    repo.add_slot(planning_id, slot)
+    repo.update_slot(planning_id, slot.model_copy(update={"hours_start": 11, "hours_end": 12}))
+    repo.delete_slot(planning_id, slot.id)
+    assert repo.find_version(planning_id) == 5
+    assert repo.find_by_id(planning_id).version == 5
+
+
+def test_find_version_then_slots_are_not_loaded(session):
+    repo = PlanningRepository(session)
+    create_planning(repo, PlanningId(id="p"), PromotionId(id="1"), date(2023, 10, 10), [create_domain_slot()])
+
+    with count_queries() as statements:
+        repo.find_version(PlanningId(id="p"))
+
+    assert len(statements) == 1
+    assert "planning_slots" not in statements[0]
+    with pytest.raises(ValueError, match="Planning not found"):
+        repo.find_version(PlanningId(id="missing"))
+
+
+def test_planning_read_twice_when_both_copies_are_updated_then_second_update_raises_concurrent_update_error(session):
+    repo = PlanningRepository(session)
+    planning_id = PlanningId(id="edited")
+    create_planning(repo, planning_id, PromotionId(id="1"), date(2023, 10, 10), [create_domain_slot("s1")])
+    first, second = repo.find_by_id(planning_id), repo.find_by_id(planning_id)
+
+    first.slots = []
+    repo.update(first)
+    second.slots.append(create_domain_slot("s2").model_copy(update={"hours_start": 11, "hours_end": 12}))
+    with pytest.raises(ConcurrentUpdateError):
+        repo.update(second)
+
+    session.expunge_all()
+    stored = repo.find_by_id(planning_id)
+    assert (stored.slots, stored.version, first.version, second.version) == ([], 2, 2, 1)
+
+
+def test_outdated_expected_version_when_slot_is_written_then_raise_and_write_nothing(session):
+    repo = PlanningRepository(session)
+    planning_id = PlanningId(id="slots")
+    slot = create_domain_slot("s1")
+    create_planning(repo, planning_id, PromotionId(id="1"), date(2023, 10, 10), [slot])
+    repo.add_slot(planning_id, create_domain_slot("s2").model_copy(update={"hours_start": 11, "hours_end": 12}),
+                  expected_version=1)
+
+    with pytest.raises(ConcurrentUpdateError):
+        repo.add_slot(planning_id, create_domain_slot("s3").model_copy(update={"hours_start": 14, "hours_end": 15}),
+                      expected_version=1)
+    with pytest.raises(ConcurrentUpdateError):
+        repo.update_slot(planning_id, slot.model_copy(update={"hours_start": 16, "hours_end": 17}), expected_version=1)
+    with pytest.raises(ConcurrentUpdateError):
+        repo.delete_slot(planning_id, slot.id, expected_version=1)
+
+    session.expunge_all()
+    stored = repo.find_by_id(planning_id)
+    assert sorted(str(slot.id) for slot in stored.slots) == ["s1", "s2"]
+    assert stored.version == 2 and repo.find_slot_by_id(planning_id, slot.id).hours_start == 9
+
+
+def test_slots_of_a_date_when_find_overlapping_slots_then_return_slots_sharing_minutes_with_the_interval(session):
+    repo = PlanningRepository(session)
+    slots = [create_domain_slot(f"s{hours}").model_copy(update={
+        "hours_start": hours, "hours_end": hours + 1, "teacher_id": TeacherId(id=f"t{hours}")}) for hours in [9, 11, 14]]
+    create_planning(repo, PlanningId(id="day"), PromotionId(id="1"), date(2023, 10, 10), slots)
+    create_planning(repo, PlanningId(id="next"), PromotionId(id="1"), date(2023, 10, 11), [create_domain_slot("other")])
+
+    def overlapping(start, end, **resources):
+        return [str(slot.id) for slot in repo.find_overlapping_slots(date(2023, 10, 10), start, end, **resources)]
+
+    assert overlapping(10 * 60 + 30, 11 * 60) == []
+    assert overlapping(9 * 60 + 30, 14 * 60 + 1) == ["s9", "s11", "s14"]
+    assert overlapping(0, 24 * 60, teacher_id=TeacherId(id="t11"), room_id=RoomId(id="2")) == ["s11"]
+
+    repo.update_slot(PlanningId(id="day"), slots[0].model_copy(update={"hours_start": 13, "hours_end": 13,
+                                                                       "minutes_end": 45}))
+    assert overlapping(10 * 60, 11 * 60) == []
+    assert overlapping(13 * 60 + 30, 14 * 60) == ["s9"]
+
+
+def test_slots_of_a_date_range_when_find_bookings_then_return_minutes_of_the_given_resources_ordered(session):
+    repo = PlanningRepository(session)
+    create_planning(repo, PlanningId(id="p1"), PromotionId(id="1"), date(2023, 10, 11), [
+        create_domain_slot("late").model_copy(update={"hours_start": 14, "minutes_start": 30, "hours_end": 16}),
+        create_domain_slot("early")])
+    create_planning(repo, PlanningId(id="p2"), PromotionId(id="2"), date(2023, 10, 10), [
+        create_domain_slot("room").model_copy(update={
+            "promotion_id": PromotionId(id="2"), "teacher_id": TeacherId(id="2"), "room_id": RoomId(id="2")})])
+
+    assert repo.find_bookings(date(2023, 10, 10), date(2023, 10, 11), teacher_id=TeacherId(id="1")) == [
+        (date(2023, 10, 11), 540, 630), (date(2023, 10, 11), 870, 990)]
+    assert repo.find_bookings(date(2023, 10, 10), date(2023, 10, 10), teacher_id=TeacherId(id="1"),
+                              room_id=RoomId(id="2")) == [(date(2023, 10, 10), 540, 630)]
+    assert len(repo.find_bookings(date(2023, 10, 10), date(2023, 10, 11))) == 3
+
+
+def test_teacher_or_room_booked_by_another_planning_when_slots_are_written_then_raise_and_write_nothing(session):
+    repo = PlanningRepository(session)
+    day = date(2024, 3, 4)
+    create_planning(repo, PlanningId(id="p1"), PromotionId(id="1"), day, [create_domain_slot("booked")])
+
+    def slot(slot_id, hours_start, teacher, room):
+        return create_domain_slot(slot_id).model_copy(update={
+            "hours_start": hours_start, "hours_end": hours_start + 1, "promotion_id": PromotionId(id="2"),
+            "teacher_id": TeacherId(id=teacher), "room_id": RoomId(id=room)})
+
+    with pytest.raises(ResourceConflictError, match="slot conflicting is already booked by slot booked"):
+        create_planning(repo, PlanningId(id="p2"), PromotionId(id="2"), day, [slot("conflicting", 10, "1", "2")])
+    with pytest.raises(ResourceConflictError):
+        repo.add_all([DomainPlanning(id=PlanningId(id="p3"), date=day, promotion_id=PromotionId(id="2"),
+                                     slots=[slot("conflicting", 9, "2", "1")])])
+    assert repo.find_existing_ids([PlanningId(id="p2"), PlanningId(id="p3")]) == []
+
+    planning = create_planning(repo, PlanningId(id="p2"), PromotionId(id="2"), day, [slot("free", 11, "1", "1")])
+    with pytest.raises(ResourceConflictError):
+        repo.add_slot(planning.id, slot("added", 9, "2", "1"), expected_version=1)
+    with pytest.raises(ResourceConflictError):
+        repo.update_slot(planning.id, slot("free", 10, "1", "2"), expected_version=1)
+    planning.slots = [slot("free", 9, "2", "1")]
+    with pytest.raises(ResourceConflictError):
+        repo.update(planning)
+
+    session.expunge_all()
+    stored = repo.find_by_id(planning.id)
+    assert stored.version == 1
+    assert [(str(s.id), s.hours_start) for s in stored.slots] == [("free", 11)]
+    repo.add_slot(planning.id, slot("elsewhere", 9, "2", "2"), expected_version=1)
+    assert repo.find_version(planning.id) == 2
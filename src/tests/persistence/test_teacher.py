@@ -1,79 +1,117 @@
-from src.main.domain import Teacher as DomainTeacher, BaseRepository, ITeacherRepository, TeacherId
-from sqlmodel import Session, create_engine, SQLModel
-from src.main.persistence.teacher import TeacherRepository
-import pytest
-
-
-class TeacherRepositoryDumb(BaseRepository, ITeacherRepository):
-    """Dumb implementation of ITeacherRepository."""
-    def __init__(self):
-        self.teachers = [
-            DomainTeacher(id=TeacherId(id="1"), name="Doe", firstname="John"),
-            DomainTeacher(id=TeacherId(id="2"), name="Smith", firstname="Jane")
-        ]
-
-    def find_all(self):
-        return self.teachers
-
-    def find_by_id(self, id: TeacherId):
-        for teacher in self.teachers:
-            if str(teacher.id) == str(id):
-                return teacher
-        raise ValueError("Teacher not found")
-
-    def add(self, teacher: DomainTeacher):
-        self.teachers.append(teacher)
-
-    def update(self, teacher: DomainTeacher):
-        for i, t in enumerate(self.teachers):
-            if str(t.id) == str(teacher.id):
-                self.teachers[i] = teacher
-                return
-        raise ValueError("Teacher not found")
-
-    def delete(self, id: TeacherId):
-        self.teachers = [t for t in self.teachers if str(t.id) != str(id)]
-
-
-class TeacherRepositoryException(TeacherRepositoryDumb):
-    def find_all(self):
-        raise Exception("Test exception")
-
-    def find_by_id(self, id: TeacherId):
-        raise Exception("Test exception")
-
-
-DATABASE_URL = "sqlite:///test.db"
-engine = create_engine(DATABASE_URL)
-
-
-@pytest.fixture(name="session")
-def session_fixture():
-    SQLModel.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    SQLModel.metadata.drop_all(engine)
-
-
-def test_teacher_repository(session):
-    # Given
-    repository = TeacherRepository(session)
-    teacher = DomainTeacher(id=TeacherId(id=repository.next_identity()), name="Doe", firstname="John")
-
-    # When
-    repository.add(teacher)
-    assert teacher.id is not None
-
-    fetched_teacher = repository.find_by_id(teacher.id)
-    assert fetched_teacher is not None
-    assert fetched_teacher.name == "Doe"
-    assert fetched_teacher.firstname == "John"
-
-    fetched_teacher.name = "Smith"
-    repository.update(fetched_teacher)
-    updated_teacher = repository.find_by_id(fetched_teacher.id)
-    assert updated_teacher.name == "Smith"
-
-    repository.delete(updated_teacher.id)
-    with pytest.raises(ValueError):
-        repository.find_by_id(updated_teacher.id)
+from src.main.domain import Teacher as DomainTeacher, BaseRepository, ITeacherRepository, TeacherId
+from sqlmodel import Session, create_engine, SQLModel
+from src.main.persistence.teacher import TeacherRepository
+import pytest
+
+
+class TeacherRepositoryDumb(BaseRepository, ITeacherRepository):
+    """Dumb implementation of ITeacherRepository."""
+    def __init__(self):
+        self.teachers = [
+            DomainTeacher(id=TeacherId(id="1"), name="Doe", firstname="John"),
+            DomainTeacher(id=TeacherId(id="2"), name="Smith", firstname="Jane")
+        ]
+
+    def find_all(self):
+        return self.teachers
+
+    def iter_all(self):
+        return iter(self.teachers)
+
+    def find_by_id(self, id: TeacherId):
+        for teacher in self.teachers:
+            if str(teacher.id) == str(id):
+                return teacher
+        raise ValueError("Teacher not found")
+
+    def find_by_ids(self, ids):
+        wanted = {str(id) for id in ids}
+        return [teacher for teacher in self.teachers if str(teacher.id) in wanted]
+
+    def add(self, teacher: DomainTeacher):
+        self.teachers.append(teacher)
+
+    def update(self, teacher: DomainTeacher):
+        for i, t in enumerate(self.teachers):
+            if str(t.id) == str(teacher.id):
+                self.teachers[i] = teacher
+                return
+        raise ValueError("Teacher not found")
+
+    def delete(self, id: TeacherId):
+        self.teachers = [t for t in self.teachers if str(t.id) != str(id)]
+
+
+class TeacherRepositoryException(TeacherRepositoryDumb):
+    def find_all(self):
+        raise Exception("Test exception")
+
+    def find_by_id(self, id: TeacherId):
+        raise Exception("Test exception")
+
+    def find_by_ids(self, ids):
+        raise Exception("Test exception")
+
+
+DATABASE_URL = "sqlite:///test.db"
+engine = create_engine(DATABASE_URL)
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+
+
+def test_teacher_repository(session):
+    # Given
+    repository = TeacherRepository(session)
+    teacher = DomainTeacher(id=TeacherId(id=repository.next_identity()), name="Doe", firstname="John")
+
+    # When
+    repository.add(teacher)
+    assert teacher.id is not None
+
+    fetched_teacher = repository.find_by_id(teacher.id)
+    assert fetched_teacher is not None
+    assert fetched_teacher.name == "Doe"
+    assert fetched_teacher.firstname == "John"
+
+    fetched_teacher.name = "Smith"
+    repository.update(fetched_teacher)
+    updated_teacher = repository.find_by_id(fetched_teacher.id)
+    assert updated_teacher.name == "Smith"
+
+    repository.delete(updated_teacher.id)
+    with pytest.raises(ValueError):
+        repository.find_by_id(updated_teacher.id)
+
+
+def test_given_teachers_when_find_by_ids_then_return_only_requested_teachers(session):
+    # Given
+    repository = TeacherRepository(session)
+    for i in range(3):
+        repository.add(DomainTeacher(id=TeacherId(id=str(i)), name=f"Name {i}", firstname=f"Firstname {i}"))
+
+    # When
+    fetched = repository.find_by_ids([TeacherId(id="0"), TeacherId(id="2"), TeacherId(id="missing")])
+
+    # Then
+    assert {str(teacher.id) for teacher in fetched} == {"0", "2"}
+    assert repository.find_by_ids([]) == []
+
+
+def test_given_teachers_when_iter_all_then_yield_every_teacher_lazily(session):
+    # Given
+    repository = TeacherRepository(session)
+    for i in range(3):
+        repository.add(DomainTeacher(id=TeacherId(id=str(i)), name=f"Name {i}", firstname=f"Firstname {i}"))
+
+    # When
+    teachers = repository.iter_all()
+
+    # Then
+    assert not isinstance(teachers, list)
+    assert sorted(str(teacher.id) for teacher in teachers) == ["0", "1", "2"]
@@ -0,0 +1,85 @@
+from fastapi.testclient import TestClient
+from fastapi import status
+from src.tests.persistence import PlanningRepositoryDumb
+from src.main.web.main import app
+from src.main.web import state
+from datetime import date
+import src.main.domain as domain
+
+
+API_AVAILABILITY = "/api/v1/availability"
+
+
+client = TestClient(app)
+
+
+def assert_response_status(response, expected_status):
+    assert response.status_code == expected_status, response.text
+
+
+def create_slot(slot_id, promotion_id, teacher_id, room_id, hours_start, hours_end):
+    return domain.PlanningSlot(
+        id=domain.PlanningSlotId(id=slot_id), hours_start=hours_start, minutes_start=0, hours_end=hours_end,
+        minutes_end=0, promotion_id=domain.PromotionId(id=promotion_id), teacher_id=domain.TeacherId(id=teacher_id),
+        course_id=domain.CourseId(id="1"), room_id=domain.RoomId(id=room_id))
+
+
+def setup_module(module):
+    state.repository_plannings = PlanningRepositoryDumb()
+    for planning in [
+        domain.Planning(id=domain.PlanningId(id="1"), date=date(2024, 3, 4), promotion_id=domain.PromotionId(id="1"),
+                        slots=[create_slot("a", "1", "1", "1", 9, 11), create_slot("b", "1", "2", "2", 14, 16)]),
+        domain.Planning(id=domain.PlanningId(id="2"), date=date(2024, 3, 4), promotion_id=domain.PromotionId(id="2"),
+                        slots=[create_slot("c", "2", "1", "3", 12, 13)]),
+        domain.Planning(id=domain.PlanningId(id="3"), date=date(2024, 3, 5), promotion_id=domain.PromotionId(id="2"),
+                        slots=[create_slot("d", "2", "1", "1", 9, 13), create_slot("e", "2", "1", "1", 13, 17)]),
+    ]:
+        state.repository_plannings.add(planning)
+
+
+def test_get_availability_of_teacher_and_promotion_then_get_common_free_intervals():
+    response = client.get(API_AVAILABILITY, params={"date": "2024-03-04", "teacher_id": "1", "promotion_id": "1"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert [(i["hours_start"], i["minutes_start"], i["hours_end"], i["minutes_end"]) for i in response.json()] == [
+        (8, 15, 9, 0), (11, 0, 12, 0), (13, 0, 14, 0), (16, 0, 17, 15)]
+
+
+def test_get_availability_over_several_days_with_duration_then_get_long_enough_intervals_per_day():
+    response = client.get(API_AVAILABILITY, params={
+        "date": "2024-03-04", "date_to": "2024-03-06", "room_id": "1", "duration": 240})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert [(i["date"], i["hours_start"], i["hours_end"]) for i in response.json()] == [
+        ("2024-03-04", 11, 17), ("2024-03-06", 8, 17)]
+
+
+def test_get_availability_with_invalid_range_or_duration_then_get_error():
+    assert_response_status(
+        client.get(API_AVAILABILITY, params={"date": "2024-03-04", "date_to": "2024-03-01"}), status.HTTP_400_BAD_REQUEST)
+    assert_response_status(client.get(API_AVAILABILITY, params={"date": "2024-03-04", "duration": 10}), 422)
+
+
+def test_get_availability_then_bookings_are_read_in_one_call_without_loading_plannings():
+    class BookingsOnlyRepository(PlanningRepositoryDumb):
+        calls = []
+
+        def find_by_date_range(self, date_from, date_to, promotion_id=None):
+            raise AssertionError("Plannings must not be loaded")
+
+        def find_bookings(self, date_from, date_to, teacher_id=None, room_id=None, promotion_id=None):
+            self.calls.append((date_from, date_to, teacher_id, room_id, promotion_id))
+            return [(date_from, 9 * 60, 10 * 60)]
+
+    previous, state.repository_plannings = state.repository_plannings, BookingsOnlyRepository()
+    try:
+        response = client.get(API_AVAILABILITY, params={
+            "date": "2024-03-04", "date_to": "2024-03-05", "teacher_id": "1", "room_id": "2"})
+    finally:
+        state.repository_plannings = previous
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert BookingsOnlyRepository.calls == [
+        (date(2024, 3, 4), date(2024, 3, 5), domain.TeacherId(id="1"), domain.RoomId(id="2"), None)]
+    assert [(i["date"], i["hours_start"], i["hours_end"]) for i in response.json()] == [
+        ("2024-03-04", 8, 9), ("2024-03-04", 10, 17), ("2024-03-05", 8, 17)]
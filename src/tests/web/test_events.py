@@ -0,0 +1,72 @@
+import asyncio
+import json
+from datetime import date
+from fastapi.testclient import TestClient
+import src.main.domain as domain
+from src.main.web import state
+from src.main.web.events import event_stream
+from src.main.web.main import app
+
+
+API_EVENTS = "/api/v1/plannings/events"
+
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    state.planning_events = domain.PlanningEventBroker()
+
+
+def create_event(planning_id: str, promotion: str) -> domain.PlanningEvent:
+    return domain.PlanningEvent(
+        type="added", planning_id=domain.PlanningId(id=planning_id), promotion_id=domain.PromotionId(id=promotion),
+        date=date(2024, 3, 4), version=1)
+
+
+def test_event_stream_when_planning_of_watched_promotion_is_written_then_send_it_as_server_sent_event():
+    async def scenario():
+        stream = event_stream(domain.PromotionId(id="1"))
+        assert (await anext(stream)).startswith("retry:")
+        state.planning_events.publish(create_event("other", "2"))
+        state.planning_events.publish(create_event("p1", "1"))
+        message = await anext(stream)
+        await stream.aclose()
+        return message
+
+    lines = asyncio.run(scenario()).splitlines()
+
+    assert lines[0] == "id: 2"
+    assert lines[1] == "event: added"
+    assert json.loads(lines[2].removeprefix("data: ")) == {
+        "planning_id": "p1", "promotion_id": "1", "date": "2024-03-04", "version": 1}
+    assert len(state.planning_events) == 0
+
+
+def test_event_stream_when_idle_then_send_keepalive_comment():
+    async def scenario():
+        stream = event_stream(keepalive=0.01)
+        await anext(stream)
+        message = await anext(stream)
+        await stream.aclose()
+        return message
+
+    assert asyncio.run(scenario()) == ": keepalive\n\n"
+
+
+def test_event_stream_when_client_is_too_slow_then_send_overflow_and_stop():
+    async def scenario():
+        state.planning_events = domain.PlanningEventBroker(max_queue_size=1)
+        stream = event_stream()
+        await anext(stream)
+        for i in range(2):
+            state.planning_events.publish(create_event(f"p{i}", "1"))
+        return [message async for message in stream]
+
+    assert asyncio.run(scenario()) == ["event: overflow\ndata: {}\n\n"]
+
+
+def test_invalid_date_when_get_planning_events_then_get_422():
+    # The route is matched before /api/v1/plannings/{planning_id}.
+    response = client.get(API_EVENTS, params={"date": "not-a-date"})
+    assert response.status_code == 422, response.text
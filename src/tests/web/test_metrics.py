@@ -0,0 +1,97 @@
+from datetime import date
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from src.main.persistence.cache import CachedRepository
+from src.main.persistence.instrumentation import instrument_engine
+from src.main.web import metrics, state
+from src.main.web.main import app
+from src.tests.persistence import PlanningRepositoryDumb, TeacherRepositoryDumb
+import src.main.domain as domain
+
+
+client = TestClient(app)
+
+
+def setup_module(module):
+    state.repository_plannings = PlanningRepositoryDumb()
+    state.repository_plannings.add(domain.Planning(
+        id=domain.PlanningId(id="timed"), date=date(2024, 5, 6), promotion_id=domain.PromotionId(id="1"), slots=[]))
+    for histogram in metrics.HISTOGRAMS:
+        histogram.clear()
+
+
+def test_request_when_handled_then_server_timing_header_holds_app_and_db_durations():
+    response = client.get("/api/v1/plannings/timed")
+
+    timings = response.headers["Server-Timing"].split(", ")
+    assert timings[0].startswith("app;dur=")
+    assert timings[1].startswith("db;dur=") and timings[1].endswith(';desc="0 statements"')
+
+
+def test_requests_when_get_metrics_then_get_histograms_per_route_template():
+    client.get("/api/v1/plannings/timed")
+    client.get("/api/v1/plannings/unknown")
+    client.get("/not-a-route")
+
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert "# TYPE http_request_duration_seconds histogram" in lines
+    labels = 'method="GET",route="/api/v1/plannings/{planning_id}"'
+    assert f'http_request_duration_seconds_count{{{labels},status="404"}} 1' in lines
+    assert f'http_request_db_statements_bucket{{{labels},status="404",le="0.0"}} 1' in lines
+    assert 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"} 1' in lines
+
+
+def test_route_running_statements_when_handled_then_count_them_in_header_and_histograms():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    instrumented = FastAPI()
+    instrumented.add_middleware(metrics.RequestMetricsMiddleware)
+
+    @instrumented.get("/queries/{count}")
+    def run_queries(count: int):
+        with engine.connect() as connection:
+            for _ in range(count):
+                connection.execute(text("SELECT 1"))
+        return {}
+
+    response = TestClient(instrumented).get("/queries/3")
+
+    assert response.headers["Server-Timing"].endswith('desc="3 statements"')
+    assert ('http_request_db_statements_sum{method="GET",route="/queries/{count}",status="200"} 3.0'
+            in metrics.request_db_statements.render())
+
+
+def test_histogram_when_rendered_then_buckets_are_cumulative():
+    histogram = metrics.Histogram("latency_seconds", "Latency.", ["route"], [0.1, 1])
+    for value in [0.05, 0.1, 0.5, 3]:
+        histogram.observe(value, "/a")
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1.0"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4'
+    ]
+
+
+def test_cached_repositories_when_get_metrics_then_get_hit_and_miss_counters_per_repository(monkeypatch):
+    teachers = CachedRepository(TeacherRepositoryDumb())
+    monkeypatch.setattr(state, "repository_teachers", teachers)
+    monkeypatch.setattr(state, "repository_rooms", None)
+    for _ in range(3):
+        teachers.find_by_id(domain.TeacherId(id="1"))
+
+    lines = client.get("/metrics").text.splitlines()
+
+    assert "# TYPE repository_cache_hits_total counter" in lines
+    assert 'repository_cache_hits_total{repository="teachers"} 2' in lines
+    assert 'repository_cache_misses_total{repository="teachers"} 1' in lines
+    assert 'repository_cache_entries{repository="teachers"} 1' in lines
+    assert not [line for line in lines if 'repository="rooms"' in line]
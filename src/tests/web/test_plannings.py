@@ -1,96 +1,604 @@
-from fastapi.testclient import TestClient
-from fastapi import status
-from src.tests.persistence import (
-    PlanningRepositoryDumb, PromotionRepositoryDumb, TeacherRepositoryDumb, CourseRepositoryDumb, RoomRepositoryDumb
-)
-from src.main.web.main import app
-from src.main.web.planning import Planning
-from src.main.web import state
-from datetime import date
-import src.main.domain as domain
-import uuid
-
-
-API_BASIS = "/api/v1"
-API_PLANNINGS = f"{API_BASIS}/plannings"
-API_TOKEN = "/token"
-
-
-client = TestClient(app)
-
-
-def get_auth_token():
-    response = client.post(API_TOKEN, data={"username": "user", "password": "password"})
-    assert response.status_code == status.HTTP_200_OK, response.text
-    return response.json()["access_token"]
-
-
-def assert_response_status(response, expected_status):
-    assert response.status_code == expected_status, response.text
-
-
-def assert_list_of_models(json_list, model_class, min_length=2):
-    assert isinstance(json_list, list)
-    assert len(json_list) >= min_length
-    for item in json_list:
-        model_class(**item)
-
-
-def setup_module(module):
-    state.repository_plannings = PlanningRepositoryDumb()
-    state.repository_promotions = PromotionRepositoryDumb()
-    state.repository_teachers = TeacherRepositoryDumb()
-    state.repository_courses = CourseRepositoryDumb()
-    state.repository_rooms = RoomRepositoryDumb()
-    # Add initial data
-    plannings = [
-        domain.Planning(
-            id=domain.PlanningId(id="1"), date=date(2023, 10, 10), promotion_id=domain.PromotionId(id="1"), slots=[]),
-        domain.Planning(
-            id=domain.PlanningId(id="2"), date=date(2023, 10, 11), promotion_id=domain.PromotionId(id="2"), slots=[])
-    ]
-    for planning in plannings:
-        state.repository_plannings.add(planning)
-
-
-def test_get_plannings():
-    response = client.get(API_PLANNINGS)
-    assert_response_status(response, status.HTTP_200_OK)
-    assert_list_of_models(response.json(), Planning)
-
-
-def test_add_planning():
-    token = get_auth_token()
-    planning_data = {
-        "id": str(uuid.uuid4()),
-        "date": "2023-10-12",
-        "promotion_id": "1",
-        "slots": []
-    }
-    response = client.post(API_PLANNINGS, json=planning_data, headers={"Authorization": f"Bearer {token}"})
-    assert_response_status(response, status.HTTP_200_OK)
-    assert response.json()["date"] == planning_data["date"]
-
-
-def test_get_planning_by_id():
-    response = client.get(f"{API_PLANNINGS}/1")
-    assert_response_status(response, status.HTTP_200_OK)
-    assert response.json()["id"] == "1"
-
-
-def test_add_planning_slot():
-    token = get_auth_token()
-    slot_data = {
-        "id": str(uuid.uuid4()),
-        "hours_start": 9,
-        "minutes_start": 0,
-        "hours_end": 10,
-        "minutes_end": 30,
-        "promotion_id": "1",
-        "teacher_id": "1",
-        "course_id": "1",
-        "room_id": "1"
-    }
-    response = client.post(f"{API_PLANNINGS}/1/slots", json=slot_data, headers={"Authorization": f"Bearer {token}"})
-    assert_response_status(response, status.HTTP_200_OK)
-    assert response.json()["slots"][0]["hours_start"] == slot_data["hours_start"]
+from fastapi.testclient import TestClient
+from fastapi import status
+from src.tests.persistence import (
+    PlanningRepositoryDumb, PromotionRepositoryDumb, TeacherRepositoryDumb, CourseRepositoryDumb, RoomRepositoryDumb
+)
+from src.main.persistence.cache import CachedRepository, LRUCache
+from src.main.web.main import app
+from src.main.web.planning import IncludedPlanning, Planning, get_planning_from_entity
+from src.main.web import state
+from datetime import date
+import src.main.domain as domain
+import asyncio
+import httpx
+import json
+import uuid
+
+
+API_BASIS = "/api/v1"
+API_PLANNINGS = f"{API_BASIS}/plannings"
+API_TOKEN = "/token"
+
+
+client = TestClient(app)
+
+
+def get_auth_token():
+    response = client.post(API_TOKEN, data={"username": "user", "password": "password"})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return response.json()["access_token"]
+
+
+def assert_response_status(response, expected_status):
+    assert response.status_code == expected_status, response.text
+
+
+def assert_list_of_models(json_list, model_class, min_length=2):
+    assert isinstance(json_list, list)
+    assert len(json_list) >= min_length
+    for item in json_list:
+        model_class(**item)
+
+
+def setup_module(module):
+    state.repository_plannings = PlanningRepositoryDumb()
+    state.repository_promotions = PromotionRepositoryDumb()
+    state.repository_teachers = TeacherRepositoryDumb()
+    state.repository_courses = CourseRepositoryDumb()
+    state.repository_rooms = RoomRepositoryDumb()
+    # Add initial data
+    plannings = [
+        domain.Planning(
+            id=domain.PlanningId(id="1"), date=date(2023, 10, 10), promotion_id=domain.PromotionId(id="1"), slots=[]),
+        domain.Planning(
+            id=domain.PlanningId(id="2"), date=date(2023, 10, 11), promotion_id=domain.PromotionId(id="2"), slots=[])
+    ]
+    for planning in plannings:
+        state.repository_plannings.add(planning)
+
+
+def test_get_plannings():
+    response = client.get(API_PLANNINGS)
+    assert_response_status(response, status.HTTP_200_OK)
+    assert_list_of_models(response.json(), Planning)
+
+
+def test_add_planning():
+    token = get_auth_token()
+    planning_data = {
+        "id": str(uuid.uuid4()),
+        "date": "2023-10-12",
+        "promotion_id": "1",
+        "slots": []
+    }
+    response = client.post(API_PLANNINGS, json=planning_data, headers={"Authorization": f"Bearer {token}"})
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.json()["date"] == planning_data["date"]
+
+
+def test_get_planning_by_id():
+    response = client.get(f"{API_PLANNINGS}/1")
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.json()["id"] == "1"
+
+
+def test_add_planning_slot():
+    token = get_auth_token()
+    slot_data = {
+        "id": str(uuid.uuid4()),
+        "hours_start": 9,
+        "minutes_start": 0,
+        "hours_end": 10,
+        "minutes_end": 30,
+        "promotion_id": "1",
+        "teacher_id": "1",
+        "course_id": "1",
+        "room_id": "1"
+    }
+    response = client.post(f"{API_PLANNINGS}/1/slots", json=slot_data, headers={"Authorization": f"Bearer {token}"})
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.json()["slots"][0]["hours_start"] == slot_data["hours_start"]
+
+
+def test_add_planning_slot_then_only_the_new_slot_is_stored():
+    class SlotOnlyPlanningRepository(PlanningRepositoryDumb):
+        def update(self, planning):
+            raise AssertionError("Adding a slot must not rewrite the planning")
+
+    repository = SlotOnlyPlanningRepository()
+    repository.add(domain.Planning(
+        id=domain.PlanningId(id="slot-only"), date=date(2023, 10, 20), promotion_id=domain.PromotionId(id="1"), slots=[]))
+    previous, state.repository_plannings = state.repository_plannings, repository
+    slot = {"id": "slot-only-1", "hours_start": 9, "minutes_start": 0, "hours_end": 10, "minutes_end": 0,
+            "promotion_id": "1", "teacher_id": "1", "course_id": "1", "room_id": "1"}
+    try:
+        response = client.post(
+            f"{API_PLANNINGS}/slot-only/slots", json=slot, headers={"Authorization": f"Bearer {get_auth_token()}"})
+        assert_response_status(response, status.HTTP_200_OK)
+        assert [str(slot.id) for slot in repository.find_by_id(domain.PlanningId(id="slot-only")).slots] == ["slot-only-1"]
+    finally:
+        state.repository_plannings = previous
+
+
+def test_get_plannings_with_slots_then_each_reference_type_is_fetched_once(monkeypatch):
+    class CountingTeacherRepository(TeacherRepositoryDumb):
+        calls = 0
+
+        def find_by_id(self, id):
+            raise AssertionError("References must be resolved in batch")
+
+        def find_by_ids(self, ids):
+            CountingTeacherRepository.calls += 1
+            return super().find_by_ids(ids)
+
+    monkeypatch.setattr(state, "repository_teachers", CountingTeacherRepository())
+    for i in range(3):
+        state.repository_plannings.add(domain.Planning(
+            id=domain.PlanningId(id=f"batch-{i}"), date=date(2023, 10, 16 + i), promotion_id=domain.PromotionId(id="1"),
+            slots=[domain.PlanningSlot(
+                id=domain.PlanningSlotId(id=f"batch-slot-{i}-{j}"), hours_start=9 + 2 * j, minutes_start=0,
+                hours_end=10 + 2 * j, minutes_end=0, promotion_id=domain.PromotionId(id="1"),
+                teacher_id=domain.TeacherId(id=str(j + 1)), course_id=domain.CourseId(id="1"),
+                room_id=domain.RoomId(id=str(j + 1))) for j in range(2)]))
+
+    response = client.get(API_PLANNINGS)
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert CountingTeacherRepository.calls == 1
+    slots = [slot for planning in response.json() if planning["id"].startswith("batch-") for slot in planning["slots"]]
+    assert len(slots) == 6
+    assert {slot["teacher"]["name"] for slot in slots} == {"Doe", "Smith"}
+
+
+def test_get_plannings_filtered_by_date_and_promotion():
+    response = client.get(API_PLANNINGS, params={"date": "2023-10-11", "promotion_id": "2"})
+    assert_response_status(response, status.HTTP_200_OK)
+    assert [planning["id"] for planning in response.json()] == ["2"]
+
+
+def test_get_plannings_with_limit_then_follow_cursor_until_last_page():
+    ids = []
+    params = {"limit": 1}
+    while True:
+        response = client.get(API_PLANNINGS, params=params)
+        assert_response_status(response, status.HTTP_200_OK)
+        assert len(response.json()) <= 1
+        ids += [planning["id"] for planning in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert ids == [str(p.id) for p in sorted(state.repository_plannings.plannings, key=lambda p: (p.date, str(p.id)))]
+
+
+def test_get_plannings_filtered_by_date_and_promotion_with_limit_then_pages_are_ordered_with_cursor():
+    for planning_id in ["same-day-b", "same-day-a"]:
+        state.repository_plannings.add(domain.Planning(
+            id=domain.PlanningId(id=planning_id), date=date(2024, 2, 1), promotion_id=domain.PromotionId(id="1"), slots=[]))
+    params = {"date": "2024-02-01", "promotion_id": "1", "limit": 1}
+
+    first = client.get(API_PLANNINGS, params=params)
+    second = client.get(API_PLANNINGS, params={**params, "cursor": first.headers["X-Next-Cursor"]})
+
+    assert [planning["id"] for planning in first.json()] == ["same-day-a"]
+    assert [planning["id"] for planning in second.json()] == ["same-day-b"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_get_plannings_with_invalid_cursor_then_get_400():
+    response = client.get(API_PLANNINGS, params={"cursor": "not a cursor"})
+    assert_response_status(response, status.HTTP_400_BAD_REQUEST)
+
+
+def test_concurrent_requests_then_each_request_works_on_its_own_session():
+    from src.main.persistence import database
+    sessions = []
+
+    class SessionRecordingRepository(PlanningRepositoryDumb):
+        async def find_by_id(self, id):
+            sessions.append(database.current_session())
+            # Both requests must be in flight at once: each waits here for the other one.
+            await asyncio.wait_for(both_in_flight.wait(), timeout=5)
+            return super().find_by_id(id)
+
+    async def get_concurrently():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+            return await asyncio.gather(*(async_client.get(f"{API_PLANNINGS}/1") for _ in range(2)))
+
+    both_in_flight = asyncio.Barrier(2)
+    repository = SessionRecordingRepository()
+    repository.plannings = state.repository_plannings.plannings
+    previous, state.repository_plannings = state.repository_plannings, repository
+    try:
+        responses = asyncio.run(get_concurrently())
+    finally:
+        state.repository_plannings = previous
+
+    for response in responses:
+        assert_response_status(response, status.HTTP_200_OK)
+    assert len(sessions) == 2
+    assert sessions[0] is not sessions[1]
+
+
+def create_week_planning(planning_id, planning_date, promotion_id, hours):
+    return domain.Planning(
+        id=domain.PlanningId(id=planning_id), date=planning_date, promotion_id=domain.PromotionId(id=promotion_id),
+        slots=[domain.PlanningSlot(
+            id=domain.PlanningSlotId(id=f"{planning_id}-{hour}"), hours_start=hour, minutes_start=15, hours_end=hour + 1,
+            minutes_end=15, promotion_id=domain.PromotionId(id=promotion_id), teacher_id=domain.TeacherId(id="1"),
+            course_id=domain.CourseId(id="1"), room_id=domain.RoomId(id="1")) for hour in hours])
+
+
+def test_get_promotion_week_then_get_slots_grouped_by_day():
+    for planning in [
+        create_week_planning("week-wed", date(2024, 3, 6), "1", [14, 9]),
+        create_week_planning("week-mon", date(2024, 3, 4), "1", [10]),
+        create_week_planning("week-sat", date(2024, 3, 9), "1", [10]),
+        create_week_planning("week-other", date(2024, 3, 5), "2", [10]),
+    ]:
+        state.repository_plannings.add(planning)
+
+    response = client.get(f"{API_BASIS}/promotions/1/weeks/2024-W10")
+
+    assert_response_status(response, status.HTTP_200_OK)
+    week = response.json()
+    assert week["promotion"]["id"] == "1"
+    assert [day["date"] for day in week["days"]] == ["2024-03-04", "2024-03-05", "2024-03-06", "2024-03-07", "2024-03-08"]
+    assert [[slot["id"] for slot in day["slots"]] for day in week["days"]] == [
+        ["week-mon-10"], [], ["week-wed-9", "week-wed-14"], [], []]
+    assert week["days"][0]["slots"][0]["teacher"]["name"] == "Doe"
+
+
+def test_get_promotion_week_with_invalid_week_then_get_error():
+    assert_response_status(client.get(f"{API_BASIS}/promotions/1/weeks/2024-W60"), status.HTTP_400_BAD_REQUEST)
+    assert_response_status(client.get(f"{API_BASIS}/promotions/1/weeks/2024-10"), 422)
+
+
+def test_get_promotion_week_of_unknown_promotion_then_get_404():
+    assert_response_status(client.get(f"{API_BASIS}/promotions/unknown/weeks/2024-W10"), status.HTTP_404_NOT_FOUND)
+
+
+def create_bulk_item(planning_id, planning_date, slots):
+    return {
+        "id": planning_id, "date": planning_date, "promotion_id": "1",
+        "slots": [{"id": f"{planning_id}-{i}", "hours_start": hours_start, "minutes_start": 0,
+                   "hours_end": hours_start + 1, "minutes_end": 0, "promotion_id": "1", "teacher_id": teacher_id,
+                   "course_id": "1", "room_id": "1"} for i, (hours_start, teacher_id) in enumerate(slots)]
+    }
+
+
+def test_add_plannings_bulk_then_valid_items_are_added_and_others_reported():
+    token = get_auth_token()
+    items = [
+        create_bulk_item("bulk-1", "2024-04-01", [(9, "1"), (10, "2")]),
+        create_bulk_item("bulk-2", "2024-04-02", [(9, "1"), (9, "2")]),
+        create_bulk_item("bulk-3", "2024-04-03", [(9, "unknown")]),
+        create_bulk_item("1", "2024-04-04", []),
+        create_bulk_item("bulk-1", "2024-04-05", []),
+        {"id": "bulk-6", "date": "not a date", "promotion_id": "1", "slots": []},
+        create_bulk_item("bulk-7", "2024-04-07", []),
+        create_bulk_item("bulk-8", "2024-04-08", [(9, "1")]),
+    ]
+    items[-1]["slots"][0]["id"] = "bulk-stored-15"
+    state.repository_plannings.add(create_week_planning("bulk-stored", date(2024, 4, 8), "2", [15]))
+
+    response = client.post(f"{API_PLANNINGS}:bulk", json=items, headers={"Authorization": f"Bearer {token}"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    result = response.json()
+    assert result["created"] == 2
+    assert [error["index"] for error in result["errors"]] == [1, 2, 3, 4, 5, 7]
+    assert "Collision" in result["errors"][0]["detail"]
+    assert result["errors"][1]["detail"] == "Teacher unknown not found"
+    assert result["errors"][2]["detail"] == "Planning already exists"
+    assert result["errors"][5]["detail"] == "Slot bulk-stored-15 already exists"
+    added = {str(p.id): p for p in state.repository_plannings.plannings if str(p.id).startswith("bulk-")}
+    assert sorted(added) == ["bulk-1", "bulk-7", "bulk-stored"]
+    assert len(added["bulk-1"].slots) == 2
+
+
+def test_add_plannings_bulk_from_ndjson_then_malformed_lines_are_reported():
+    token = get_auth_token()
+    body = "\n".join([
+        json.dumps(create_bulk_item("ndjson-1", "2024-05-01", [(9, "1")])),
+        "{not json",
+        "",
+        json.dumps(create_bulk_item("ndjson-2", "2024-05-02", [])),
+    ])
+
+    response = client.post(f"{API_PLANNINGS}:bulk", content=body, headers={
+        "Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.json()["created"] == 2
+    assert [error["index"] for error in response.json()["errors"]] == [1]
+
+
+def test_add_plannings_bulk_with_null_or_repeated_slots_then_report_those_items():
+    token = get_auth_token()
+    null_slot = create_bulk_item("bulk-null", "2024-05-13", [(9, "1")])
+    null_slot["slots"].append(None)
+    repeated_slot = create_bulk_item("bulk-repeated", "2024-05-14", [(9, "1"), (11, "1")])
+    repeated_slot["slots"][1]["id"] = repeated_slot["slots"][0]["id"]
+    valid = create_bulk_item("bulk-valid", "2024-05-15", [(9, "1")])
+
+    response = client.post(f"{API_PLANNINGS}:bulk", json=[null_slot, repeated_slot, valid],
+                           headers={"Authorization": f"Bearer {token}"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    result = response.json()
+    assert result["created"] == 1
+    assert [(error["index"], error["detail"]) for error in result["errors"]] == [
+        (0, "slots.1: Slot must not be null"), (1, "Value error, Duplicate slot id bulk-repeated-0")]
+
+
+def test_add_plannings_bulk_with_invalid_body_or_token_then_get_error():
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    assert_response_status(
+        client.post(f"{API_PLANNINGS}:bulk", json={"id": "1"}, headers=headers), status.HTTP_400_BAD_REQUEST)
+    assert_response_status(
+        client.post(f"{API_PLANNINGS}:bulk", content="[", headers=headers), status.HTTP_400_BAD_REQUEST)
+    assert_response_status(
+        client.post(f"{API_PLANNINGS}:bulk", json=[], headers={"Authorization": "Bearer invalid-token"}),
+        status.HTTP_401_UNAUTHORIZED)
+
+
+def test_add_planning_when_teacher_booked_by_another_promotion_then_get_409():
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    first = create_bulk_item("conflict-1", "2024-06-03", [(9, "1")])
+    other = create_bulk_item("conflict-2", "2024-06-03", [(9, "1")])
+    other["promotion_id"] = "2"
+    other["slots"][0]["room_id"] = "2"
+    assert_response_status(client.post(API_PLANNINGS, json=first, headers=headers), status.HTTP_200_OK)
+
+    response = client.post(API_PLANNINGS, json=other, headers=headers)
+
+    assert_response_status(response, status.HTTP_409_CONFLICT)
+    assert "conflict-1-0" in response.json()["detail"]
+    other["slots"][0]["teacher_id"] = "2"
+    assert_response_status(client.post(API_PLANNINGS, json=other, headers=headers), status.HTTP_200_OK)
+    slot = dict(other["slots"][0], id="conflict-2-1", hours_start=10, hours_end=11, teacher_id="1", room_id="1")
+    assert_response_status(client.post(f"{API_PLANNINGS}/conflict-1/slots", json=slot, headers=headers), status.HTTP_200_OK)
+    slot = dict(slot, id="conflict-2-2", room_id="2")
+    response = client.post(f"{API_PLANNINGS}/conflict-2/slots", json=slot, headers=headers)
+    assert_response_status(response, status.HTTP_409_CONFLICT)
+
+
+def test_add_plannings_bulk_when_room_booked_by_another_item_then_report_conflict():
+    token = get_auth_token()
+    first = create_bulk_item("bulk-conflict-1", "2024-06-10", [(14, "1")])
+    other = create_bulk_item("bulk-conflict-2", "2024-06-10", [(14, "2")])
+    other["promotion_id"] = "2"
+
+    response = client.post(f"{API_PLANNINGS}:bulk", json=[first, other], headers={"Authorization": f"Bearer {token}"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.json()["created"] == 1
+    assert "already booked" in response.json()["errors"][0]["detail"]
+
+
+def test_stream_parameter_when_get_plannings_then_stream_every_planning_page_after_page(monkeypatch):
+    from src.main.web import planning
+    monkeypatch.setattr(planning, "STREAM_PAGE_SIZE", 2)
+    expected = [str(entity.id) for entity in sorted(
+        state.repository_plannings.find_all(), key=lambda entity: (entity.date, str(entity.id)))]
+
+    response = client.get(API_PLANNINGS, params={"stream": 1, "limit": 1})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [Planning(**json.loads(line)) for line in response.text.splitlines()]
+    assert [planning.id for planning in streamed] == expected
+    assert len(expected) > 2
+
+
+def test_ndjson_accept_header_when_get_plannings_by_promotion_then_stream_its_plannings():
+    response = client.get(API_PLANNINGS, params={"promotion_id": "2"}, headers={"Accept": "application/x-ndjson"})
+    assert_response_status(response, status.HTTP_200_OK)
+    assert {json.loads(line)["promotion"]["id"] for line in response.text.splitlines()} == {"2"}
+
+
+def test_etag_when_get_planning_by_id_with_if_none_match_then_get_304():
+    etag = client.get(f"{API_PLANNINGS}/1").headers["ETag"]
+
+    response = client.get(f"{API_PLANNINGS}/1", headers={"If-None-Match": etag})
+
+    assert_response_status(response, status.HTTP_304_NOT_MODIFIED)
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+def test_etag_when_referenced_teacher_is_renamed_then_plannings_are_returned_again(monkeypatch):
+    monkeypatch.setattr(state, "repository_teachers", CachedRepository(state.repository_teachers, LRUCache()))
+    state.repository_teachers.add(domain.Teacher(id=domain.TeacherId(id="etag-teacher"), name="Doe", firstname="Jane"))
+    planning = create_week_planning("etag-reference", date(2024, 3, 19), "1", [16])
+    planning.slots[0] = planning.slots[0].model_copy(update={"teacher_id": domain.TeacherId(id="etag-teacher")})
+    state.repository_plannings.add(planning)
+    urls = [f"{API_PLANNINGS}/etag-reference", f"{API_PLANNINGS}?date=2024-03-19&promotion_id=1",
+            f"{API_BASIS}/promotions/1/weeks/2024-W12"]
+    etags = [client.get(url).headers["ETag"] for url in urls]
+
+    state.repository_teachers.update(domain.Teacher(id=domain.TeacherId(id="etag-teacher"), name="Smith", firstname="Jane"))
+
+    for url, etag in zip(urls, etags):
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert_response_status(response, status.HTTP_200_OK)
+        assert response.headers["ETag"] != etag
+        assert "Smith" in response.text
+
+
+def test_etag_when_get_planning_by_id_with_if_none_match_then_get_304_without_loading_the_planning(monkeypatch):
+    etag = client.get(f"{API_PLANNINGS}/1").headers["ETag"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The planning must not be loaded")
+    monkeypatch.setattr(state.repository_plannings, "find_by_id", fail)
+
+    response = client.get(f"{API_PLANNINGS}/1", headers={"If-None-Match": etag})
+
+    assert_response_status(response, status.HTTP_304_NOT_MODIFIED)
+    assert response.headers["ETag"] == etag
+
+
+def test_etag_when_planning_is_written_then_get_planning_by_id_returns_it_again():
+    etag = client.get(f"{API_PLANNINGS}/2").headers["ETag"]
+    slot = {"id": "etag-slot", "hours_start": 14, "minutes_start": 0, "hours_end": 15, "minutes_end": 0,
+            "promotion_id": "2", "teacher_id": "2", "course_id": "1", "room_id": "2"}
+    assert_response_status(client.post(
+        f"{API_PLANNINGS}/2/slots", json=slot, headers={"Authorization": f"Bearer {get_auth_token()}"}), status.HTTP_200_OK)
+
+    response = client.get(f"{API_PLANNINGS}/2", headers={"If-None-Match": etag})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.headers["ETag"] != etag
+    assert response.json()["slots"][0]["id"] == "etag-slot"
+
+
+def test_etag_when_get_plannings_and_promotion_week_with_if_none_match_then_get_304():
+    for url in [f"{API_PLANNINGS}?promotion_id=1", f"{API_BASIS}/promotions/1/weeks/2024-W10"]:
+        etag = client.get(url).headers["ETag"]
+        assert_response_status(client.get(url, headers={"If-None-Match": etag}), status.HTTP_304_NOT_MODIFIED)
+        assert_response_status(client.get(url, headers={"If-None-Match": '"other"'}), status.HTTP_200_OK)
+
+
+def test_fast_response_path_when_get_planning_by_id_then_body_matches_response_model():
+    planning = create_week_planning("fast-path", date(2024, 3, 12), "1", [9, 11])
+    state.repository_plannings.add(planning)
+
+    response = client.get(f"{API_PLANNINGS}/fast-path")
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["ETag"]
+    assert response.json() == asyncio.run(get_planning_from_entity(planning)).model_dump(mode="json")
+    page = client.get(API_PLANNINGS, params={"date": "2024-03-12", "promotion_id": "1"}).json()
+    assert page == [response.json()]
+
+
+def test_normalized_format_when_get_planning_by_id_then_references_are_included_once():
+    planning = create_week_planning("normalized", date(2024, 3, 13), "1", [9, 10, 11])
+    state.repository_plannings.add(planning)
+
+    response = client.get(f"{API_PLANNINGS}/normalized", params={"format": "normalized"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    body = IncludedPlanning(**response.json())
+    assert (body.data.id, body.data.promotion_id) == ("normalized", "1")
+    assert [(slot.id, slot.teacher_id) for slot in body.data.slots] == [
+        ("normalized-9", "1"), ("normalized-10", "1"), ("normalized-11", "1")]
+    assert list(body.included.teachers) == ["1"] and list(body.included.rooms) == ["1"]
+    assert body.included.promotions["1"].id == "1"
+    embedded = client.get(f"{API_PLANNINGS}/normalized")
+    assert len(response.content) < len(embedded.content)
+    assert response.headers["ETag"] == embedded.headers["ETag"]
+
+
+def test_normalized_format_when_get_plannings_and_promotion_week_then_slots_hold_reference_ids():
+    page = client.get(API_PLANNINGS, params={"date": "2024-03-04", "promotion_id": "1", "format": "normalized"})
+    assert_response_status(page, status.HTTP_200_OK)
+    assert [planning["id"] for planning in page.json()["data"]] == ["week-mon"]
+    assert page.json()["data"][0]["slots"][0]["course_id"] == "1"
+    assert page.json()["included"]["courses"]["1"]["id"] == "1"
+
+    week = client.get(f"{API_BASIS}/promotions/1/weeks/2024-W10", params={"format": "normalized"})
+    assert_response_status(week, status.HTTP_200_OK)
+    assert week.json()["data"]["promotion_id"] == "1"
+    assert [[slot["id"] for slot in day["slots"]] for day in week.json()["data"]["days"]] == [
+        ["week-mon-10"], [], ["week-wed-9", "week-wed-14"], [], []]
+    assert week.json()["included"]["teachers"]["1"]["name"] == "Doe"
+
+
+def test_normalized_format_when_streaming_or_unknown_format_then_get_error():
+    assert_response_status(client.get(API_PLANNINGS, params={"stream": 1, "format": "normalized"}),
+                           status.HTTP_400_BAD_REQUEST)
+    assert_response_status(client.get(API_PLANNINGS, params={"format": "flat"}), 422)
+
+
+class UnreadRepository:
+    def find_by_ids(self, ids):
+        raise AssertionError("The entities of a relation left out must not be read")
+
+
+def test_fields_and_expand_when_get_planning_by_id_then_only_selected_fields_and_relations_are_returned(monkeypatch):
+    state.repository_plannings.add(create_week_planning("sparse", date(2024, 3, 14), "1", [9, 10]))
+    for name in ["repository_promotions", "repository_teachers", "repository_courses"]:
+        monkeypatch.setattr(state, name, UnreadRepository())
+
+    response = client.get(f"{API_PLANNINGS}/sparse", params={
+        "fields": "hours_start,minutes_start,hours_end,minutes_end,teacher,room", "expand": "room"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    planning = response.json()
+    assert planning["promotion_id"] == "1" and "promotion" not in planning
+    assert planning["slots"][0] == {"id": "sparse-9", "hours_start": 9, "minutes_start": 15, "hours_end": 10,
+                                    "minutes_end": 15, "teacher_id": "1", "room": planning["slots"][0]["room"]}
+    assert planning["slots"][0]["room"]["id"] == "1"
+
+
+def test_fields_and_expand_when_streaming_or_normalized_then_apply_to_every_planning(monkeypatch):
+    monkeypatch.setattr(state, "repository_teachers", UnreadRepository())
+    monkeypatch.setattr(state, "repository_courses", UnreadRepository())
+
+    streamed = client.get(API_PLANNINGS, params={"stream": 1, "fields": "hours_start,room", "expand": "promotion,room"})
+    assert_response_status(streamed, status.HTTP_200_OK)
+    for line in streamed.text.splitlines():
+        planning = json.loads(line)
+        assert "promotion" in planning
+        assert all(set(slot) == {"id", "hours_start", "room"} for slot in planning["slots"])
+
+    week = client.get(f"{API_BASIS}/promotions/1/weeks/2024-W10",
+                      params={"format": "normalized", "fields": "hours_start,room", "expand": "room"}).json()
+    assert week["data"]["promotion_id"] == "1"
+    assert week["data"]["days"][0]["slots"] == [{"id": "week-mon-10", "hours_start": 10, "room_id": "1"}]
+    assert list(week["included"]["rooms"]) == ["1"]
+    assert week["included"]["promotions"] == {} and week["included"]["teachers"] == {}
+
+
+def test_unknown_field_or_relation_when_get_plannings_then_get_400():
+    for params in [{"fields": "hours_start,colour"}, {"expand": "teacher,building"}]:
+        response = client.get(API_PLANNINGS, params=params)
+        assert_response_status(response, status.HTTP_400_BAD_REQUEST)
+        assert "colour" in response.text or "building" in response.text
+
+
+def test_unknown_planning_when_get_planning_by_id_then_get_404():
+    assert_response_status(client.get(f"{API_PLANNINGS}/unknown"), status.HTTP_404_NOT_FOUND)
+
+
+def create_slot_data(slot_id, hours_start, room_id="1"):
+    return {"id": slot_id, "hours_start": hours_start, "minutes_start": 0, "hours_end": hours_start + 1,
+            "minutes_end": 0, "promotion_id": "1", "teacher_id": "1", "course_id": "1", "room_id": room_id}
+
+
+def test_if_match_when_add_planning_slot_then_add_it_only_if_planning_is_unchanged():
+    state.repository_plannings.add(domain.Planning(
+        id=domain.PlanningId(id="if-match"), date=date(2023, 11, 20), promotion_id=domain.PromotionId(id="1"), slots=[]))
+    url = f"{API_PLANNINGS}/if-match/slots"
+    etag = client.get(f"{API_PLANNINGS}/if-match").headers["ETag"]
+
+    response = client.post(url, json=create_slot_data("if-match-1", 9), headers={"If-Match": etag})
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.headers["ETag"] == client.get(f"{API_PLANNINGS}/if-match").headers["ETag"] != etag
+
+    response = client.post(url, json=create_slot_data("if-match-2", 11), headers={"If-Match": etag})
+    assert_response_status(response, status.HTTP_412_PRECONDITION_FAILED)
+    assert len(client.get(f"{API_PLANNINGS}/if-match").json()["slots"]) == 1
+
+
+def test_concurrent_write_when_add_planning_slot_then_get_409():
+    class ConcurrentPlanningRepository(PlanningRepositoryDumb):
+        def add_slot(self, planning_id, slot, expected_version=None):
+            raise domain.ConcurrentUpdateError("Planning was modified since version 1")
+
+    repository = ConcurrentPlanningRepository()
+    repository.add(domain.Planning(
+        id=domain.PlanningId(id="raced"), date=date(2023, 11, 21), promotion_id=domain.PromotionId(id="1"), slots=[]))
+    previous, state.repository_plannings = state.repository_plannings, repository
+    try:
+        response = client.post(f"{API_PLANNINGS}/raced/slots", json=create_slot_data("raced-1", 9))
+    finally:
+        state.repository_plannings = previous
+
+    assert_response_status(response, status.HTTP_409_CONFLICT)
+    assert "modified" in response.json()["detail"]
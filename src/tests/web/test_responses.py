@@ -0,0 +1,39 @@
+from datetime import date
+from fastapi import Response
+from src.main import domain
+from src.main.web import responses
+from src.main.web.responses import dumps, get_documents, trusted_response
+from src.main.web.rooms import Room
+import json
+
+
+CONTENT = {"id": "1", "date": date(2024, 3, 4), "name": "Salle é", "slots": [{"hours_start": 8}], "missing": None}
+
+
+def test_dumps_then_get_compact_json_bytes():
+    assert json.loads(dumps(CONTENT)) == {**CONTENT, "date": "2024-03-04"}
+    assert b" " not in dumps([1, {"a": 2}])
+
+
+def test_dumps_without_orjson_then_get_the_same_bytes(monkeypatch):
+    expected = dumps(CONTENT)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert dumps(CONTENT) == expected
+
+
+def test_trusted_response_then_keep_headers_set_on_injected_response():
+    injected = Response()
+    del injected.headers["content-length"]
+    injected.headers["ETag"] = '"etag"'
+
+    response = trusted_response([{"id": "1"}], injected)
+
+    assert response.body == b'[{"id":"1"}]'
+    assert response.headers["ETag"] == '"etag"'
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["content-length"] == str(len(response.body))
+
+
+def test_get_documents_then_get_fields_of_the_model_with_string_ids():
+    rooms = [domain.Room(id=domain.RoomId(id="1"), name="A1", description="Amphi")]
+    assert get_documents(rooms, Room) == [Room(id="1", name="A1", description="Amphi").model_dump()]
@@ -0,0 +1,91 @@
+from fastapi.testclient import TestClient
+from fastapi import status
+from src.tests.persistence import PlanningRepositoryDumb, RoomRepositoryDumb
+from src.main.web.main import app
+from src.main.web.planning import PlanningWrite
+from src.main.web import state
+from datetime import date
+import src.main.domain as domain
+
+
+API_TIMETABLES = "/api/v1/timetables"
+API_TOKEN = "/token"
+
+
+client = TestClient(app)
+
+
+def get_auth_token():
+    response = client.post(API_TOKEN, data={"username": "user", "password": "password"})
+    assert response.status_code == status.HTTP_200_OK, response.text
+    return response.json()["access_token"]
+
+
+def assert_response_status(response, expected_status):
+    assert response.status_code == expected_status, response.text
+
+
+def setup_module(module):
+    state.repository_plannings = PlanningRepositoryDumb()
+    state.repository_rooms = RoomRepositoryDumb()
+
+
+def teardown_module(module):
+    if state.scheduler_pool is not None:
+        state.scheduler_pool.shutdown()
+        state.scheduler_pool = None
+
+
+def test_generate_timetable_then_get_plannings_ready_for_bulk_import():
+    token = get_auth_token()
+    timetable = {
+        "week": "2025-W02",
+        "requirements": [
+            {"promotion_id": "1", "course_id": "1", "teacher_id": "1", "minutes": 360, "session_minutes": 180},
+            {"promotion_id": "1", "course_id": "2", "teacher_id": "2", "minutes": 120, "room_ids": ["2"]},
+        ],
+    }
+
+    response = client.post(API_TIMETABLES, json=timetable, headers={"Authorization": f"Bearer {token}"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    result = response.json()
+    assert result["complete"]
+    plannings = [PlanningWrite(**planning) for planning in result["plannings"]]
+    slots = [slot for planning in plannings for slot in planning.slots]
+    assert len(slots) == 3
+    assert {slot.room_id for slot in slots if slot.course_id == "2"} == {"2"}
+    assert all(planning.date.isocalendar()[:2] == (2025, 2) for planning in plannings)
+
+
+def test_generate_timetable_with_invalid_requirement_or_token_then_get_error():
+    token = get_auth_token()
+    timetable = {"week": "2025-W02", "requirements": [
+        {"promotion_id": "1", "course_id": "1", "teacher_id": "1", "minutes": 120, "session_minutes": 10}]}
+    assert_response_status(
+        client.post(API_TIMETABLES, json=timetable, headers={"Authorization": f"Bearer {token}"}), 422)
+    timetable["requirements"][0].update(minutes=200000, session_minutes=120)
+    assert_response_status(
+        client.post(API_TIMETABLES, json=timetable, headers={"Authorization": f"Bearer {token}"}), 422)
+    assert_response_status(
+        client.post(API_TIMETABLES, json=timetable, headers={"Authorization": "Bearer invalid-token"}),
+        status.HTTP_401_UNAUTHORIZED)
+
+
+def test_generate_timetable_around_booked_slots_then_booked_resources_are_not_double_booked():
+    token = get_auth_token()
+    state.repository_plannings.add(domain.Planning(
+        id=domain.PlanningId(id="booked"), date=date(2025, 1, 6), promotion_id=domain.PromotionId(id="2"),
+        slots=[domain.PlanningSlot(
+            id=domain.PlanningSlotId(id="booked-slot"), hours_start=8, minutes_start=15, hours_end=12, minutes_end=15,
+            promotion_id=domain.PromotionId(id="2"), teacher_id=domain.TeacherId(id="1"),
+            course_id=domain.CourseId(id="1"), room_id=domain.RoomId(id="1"))]))
+    timetable = {"week": "2025-W02", "room_ids": ["1"], "requirements": [
+        {"promotion_id": "1", "course_id": "1", "teacher_id": "1", "minutes": 240 * 9, "session_minutes": 240}]}
+
+    response = client.post(API_TIMETABLES, json=timetable, headers={"Authorization": f"Bearer {token}"})
+
+    assert_response_status(response, status.HTTP_200_OK)
+    assert response.json()["complete"]
+    monday = [p for p in response.json()["plannings"] if p["date"] == "2025-01-06"]
+    assert [(slot["hours_start"], slot["minutes_start"]) for slot in monday[0]["slots"]] == [(12, 15)]